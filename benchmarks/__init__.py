@@ -0,0 +1,3 @@
+"""
+Benchmarks de desempenho com servidor chat-completions simulado
+"""
@@ -0,0 +1,35 @@
+"""
+Metadados do ambiente gravados junto com os resultados dos benchmarks
+"""
+
+import platform
+import subprocess
+import tomllib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def environment_metadata() -> Dict[str, Any]:
+    """Versão do pacote, commit, Python e plataforma da execução"""
+    try:
+        with open(ROOT / "pyproject.toml", "rb") as pyproject:
+            version = tomllib.load(pyproject)["project"]["version"]
+    except (OSError, KeyError, tomllib.TOMLDecodeError):
+        version = "unknown"
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+
+    return {
+        "version": version,
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now().isoformat(),
+    }
@@ -0,0 +1,153 @@
+"""
+Benchmark do tempo de importação (cold start)
+
+Cada módulo é importado em um processo Python novo, várias vezes, e o
+tempo de ``import`` é medido dentro do processo filho. Também registra
+quais dependências pesadas (``pydantic_ai``, ``openai``, ``langgraph``,
+``httpx``) foram carregadas: um subpacote que passe a carregar uma
+dependência fora de ``ALLOWED_HEAVY`` é uma regressão independente da
+máquina. Com ``--compare``, tempos acima da tolerância também falham.
+
+Uso:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --compare benchmarks/results/import-anterior.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from .environment import ROOT, environment_metadata
+
+PACKAGE = "src.autonomous_code_converter"
+DEFAULT_RESULTS_DIR = ROOT / "benchmarks" / "results"
+DEFAULT_REPEATS = 5
+
+HEAVY_MODULES = ("pydantic_ai", "openai", "langgraph", "httpx")
+
+# Dependências pesadas que cada módulo pode carregar ao ser importado
+ALLOWED_HEAVY: Dict[str, Sequence[str]] = {
+    PACKAGE: (),
+    f"{PACKAGE}.models": (),
+    f"{PACKAGE}.tools": (),
+    f"{PACKAGE}.graphs": (),
+    f"{PACKAGE}.agents": (),
+    f"{PACKAGE}.tools.language_heuristics": (),
+    f"{PACKAGE}.tools.dependency_parser": (),
+    f"{PACKAGE}.tools.metrics": (),
+    f"{PACKAGE}.graphs.base_graph": ("langgraph",),
+    f"{PACKAGE}.graphs.pipeline": ("langgraph",),
+    f"{PACKAGE}.tools.openrouter_client": ("pydantic_ai", "openai", "httpx"),
+    f"{PACKAGE}.agents.language_detection_agent": ("pydantic_ai", "openai", "httpx"),
+    f"{PACKAGE}.agents.dependency_extraction_agent": ("pydantic_ai", "openai", "httpx"),
+}
+
+_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def _import_once(module: str) -> Dict[str, Any]:
+    completed = subprocess.run(
+        [sys.executable, "-c", _SNIPPET.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def measure_import(module: str, repeats: int = DEFAULT_REPEATS) -> Dict[str, Any]:
+    """Mede o tempo de importação de ``module`` em processos novos
+
+    A primeira execução só aquece o cache de bytecode e é descartada.
+    """
+    _import_once(module)
+    runs = [_import_once(module) for _ in range(repeats)]
+    times = [run["seconds"] * 1000 for run in runs]
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(times), 2),
+        "min_ms": round(min(times), 2),
+        "heavy_modules": runs[-1]["loaded"],
+    }
+
+
+def run_import_benchmark(modules: Optional[List[str]] = None,
+                         repeats: int = DEFAULT_REPEATS) -> Dict[str, Any]:
+    """Mede todos os ``modules`` (padrão: os de ALLOWED_HEAVY)"""
+    return {
+        "meta": {**environment_metadata(), "repeats": repeats},
+        "results": [measure_import(module, repeats) for module in (modules or list(ALLOWED_HEAVY))],
+    }
+
+
+def check_heavy_imports(report: Dict[str, Any]) -> List[str]:
+    """Lista módulos que carregaram dependências pesadas não permitidas"""
+    violations = []
+    for item in report["results"]:
+        allowed = ALLOWED_HEAVY.get(item["module"])
+        if allowed is None:
+            continue
+        unexpected = sorted(set(item["heavy_modules"]) - set(allowed))
+        if unexpected:
+            violations.append(f"{item['module']}: carrega {', '.join(unexpected)}")
+    return violations
+
+
+def compare_import_times(current: Dict[str, Any], baseline: Dict[str, Any],
+                         threshold: float = 0.25) -> List[str]:
+    """Lista módulos cuja mediana piorou mais que ``threshold`` (fração)"""
+    previous = {item["module"]: item for item in baseline["results"]}
+    regressions = []
+    for item in current["results"]:
+        before = previous.get(item["module"])
+        if before is None or not before["median_ms"]:
+            continue
+        if item["median_ms"] > before["median_ms"] * (1 + threshold):
+            regressions.append(f"{item['module']}: {before['median_ms']}ms -> {item['median_ms']}ms")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Ponto de entrada de linha de comando"""
+    parser = argparse.ArgumentParser(description="Benchmark do tempo de importação")
+    parser.add_argument("--module", action="append", help="Módulo a medir (padrão: todos; pode repetir)")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("-o", "--output", help="Arquivo JSON de saída (padrão: benchmarks/results/import-<versão>-<data>.json)")
+    parser.add_argument("--compare", help="Resultado anterior para detectar regressões")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Tolerância de regressão (fração)")
+    args = parser.parse_args(argv)
+
+    report = run_import_benchmark(args.module, args.repeats)
+
+    if args.output:
+        output = Path(args.output)
+    else:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = DEFAULT_RESULTS_DIR / f"import-{report['meta']['version']}-{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+
+    for item in report["results"]:
+        print(f"{item['module']:<64} median={item['median_ms']:>8.1f}ms min={item['min_ms']:>8.1f}ms "
+              f"heavy={','.join(item['heavy_modules']) or '-'}")
+    print(f"Resultados gravados em {output}")
+
+    problems = check_heavy_imports(report)
+    if args.compare:
+        problems += compare_import_times(report, json.loads(Path(args.compare).read_text()), args.threshold)
+    for problem in problems:
+        print(f"REGRESSÃO {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
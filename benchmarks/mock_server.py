@@ -0,0 +1,289 @@
+"""
+Servidor local compatível com chat-completions para benchmarks
+
+Responde a ``POST .../chat/completions`` com uma chamada da ferramenta
+``final_result`` cujos argumentos são gerados a partir do JSON Schema
+enviado pelo agente, de modo que qualquer agente PydanticAI funciona sem
+rede. Latência, taxa de erros e taxa de geração de tokens são
+configuráveis para simular provedores lentos ou instáveis.
+
+Uso isolado:
+    python -m benchmarks.mock_server --port 8765 --latency lognormal:0.3,0.4 --error-rate 0.05
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+
+@dataclass
+class LatencyDistribution:
+    """Distribuição da latência base de cada resposta, em segundos
+
+    Tipos aceitos (parâmetros entre parênteses):
+    - constant (valor)
+    - uniform (mínimo, máximo)
+    - exponential (média)
+    - lognormal (mediana, sigma)
+    """
+    kind: str = "constant"
+    params: Tuple[float, ...] = (0.0,)
+
+    def sample(self, rng: random.Random) -> float:
+        """Sorteia uma latência"""
+        if self.kind == "constant":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(self.params[0], self.params[1])
+        if self.kind == "exponential":
+            return rng.expovariate(1.0 / self.params[0]) if self.params[0] > 0 else 0.0
+        if self.kind == "lognormal":
+            return rng.lognormvariate(math.log(self.params[0]), self.params[1])
+        raise ValueError(f"Distribuição de latência desconhecida: {self.kind}")
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        """Converte ``tipo:p1,p2`` (ex.: ``lognormal:0.3,0.4``) em uma distribuição"""
+        kind, _, params = spec.partition(":")
+        values = tuple(float(value) for value in params.split(",") if value) or (0.0,)
+        distribution = cls(kind, values)
+        distribution.sample(random.Random(0))
+        return distribution
+
+
+@dataclass
+class MockServerConfig:
+    """Comportamento simulado do provedor"""
+    latency: LatencyDistribution = field(default_factory=LatencyDistribution)
+    error_rate: float = 0.0
+    error_status: int = 429
+    retry_after: Optional[float] = 0.0
+    tokens_per_second: Optional[float] = None
+    completion_tokens: int = 32
+    seed: Optional[int] = None
+
+
+def _resolve(schema: Dict[str, Any], defs: Dict[str, Any]) -> Dict[str, Any]:
+    while "$ref" in schema:
+        schema = defs[schema["$ref"].rsplit("/", 1)[-1]]
+    return schema
+
+
+def generate_from_schema(schema: Dict[str, Any], defs: Optional[Dict[str, Any]] = None) -> Any:
+    """Gera o menor valor válido para um JSON Schema (apenas campos obrigatórios)"""
+    defs = {**(defs or {}), **schema.get("$defs", {})}
+    schema = _resolve(schema, defs)
+
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "const" in schema:
+        return schema["const"]
+    for combinator in ("anyOf", "oneOf", "allOf"):
+        if combinator in schema:
+            options = [_resolve(option, defs) for option in schema[combinator]]
+            chosen = next((option for option in options if option.get("type") != "null"), options[0])
+            return generate_from_schema(chosen, defs)
+
+    kind = schema.get("type", "object")
+    if kind == "object":
+        properties = schema.get("properties", {})
+        return {
+            name: generate_from_schema(properties[name], defs)
+            for name in schema.get("required", []) if name in properties
+        }
+    if kind == "array":
+        return []
+    if kind == "string":
+        return "mock"
+    if kind == "number":
+        low, high = schema.get("minimum", 0.0), schema.get("maximum", 1.0)
+        return round(low + 0.9 * (high - low), 3)
+    if kind == "integer":
+        return int(schema.get("minimum", 0))
+    if kind == "boolean":
+        return True
+    return None
+
+
+def _final_result_schema(payload: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    for tool in payload.get("tools") or []:
+        function = tool.get("function", {})
+        if function.get("name", "").startswith("final_result"):
+            return function["name"], function.get("parameters", {})
+    return "final_result", {"type": "object"}
+
+
+class _Server(ThreadingHTTPServer):
+    # A fila padrão (5) derruba conexões sob concorrência alta e o cliente
+    # só tenta de novo após ~1 s, o que distorceria as latências medidas
+    request_queue_size = 256
+    daemon_threads = True
+
+
+class MockChatServer:
+    """Servidor chat-completions em uma thread de fundo"""
+
+    def __init__(self, config: Optional[MockServerConfig] = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        """Cria o servidor; ``port=0`` escolhe uma porta livre"""
+        self.config = config or MockServerConfig()
+        self._rng = random.Random(self.config.seed)
+        self._rng_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self._httpd = _Server((host, port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """URL base para usar como ``OpenRouterConfig.base_url``"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockChatServer":
+        """Inicia o atendimento em segundo plano"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Encerra o servidor"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "MockChatServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de requisições atendidas"""
+        with self._stats_lock:
+            return {"requests": self.requests, "errors": self.errors, "prompt_tokens": self.prompt_tokens}
+
+    def _draw(self) -> Tuple[float, bool]:
+        with self._rng_lock:
+            return self.config.latency.sample(self._rng), self._rng.random() < self.config.error_rate
+
+    def _response(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        name, schema = _final_result_schema(payload)
+        prompt_chars = sum(len(str(message.get("content") or "")) for message in payload.get("messages", []))
+        return {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "tool_calls",
+                "message": {
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [{
+                        "id": "call_mock",
+                        "type": "function",
+                        "function": {"name": name, "arguments": json.dumps(generate_from_schema(schema))},
+                    }],
+                },
+            }],
+            "usage": {
+                "prompt_tokens": prompt_chars // 4,
+                "completion_tokens": self.config.completion_tokens,
+                "total_tokens": prompt_chars // 4 + self.config.completion_tokens,
+            },
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Cabeçalhos e corpo saem em escritas separadas; sem isso o
+            # algoritmo de Nagle soma ~40 ms a cada resposta
+            disable_nagle_algorithm = True
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def _send(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    self._send(404, {"error": {"message": "not found"}})
+                    return
+
+                latency, failed = server._draw()
+                config = server.config
+                if config.tokens_per_second:
+                    latency += config.completion_tokens / config.tokens_per_second
+                time.sleep(latency)
+
+                response = server._response(payload)
+                with server._stats_lock:
+                    server.requests += 1
+                    server.prompt_tokens += response["usage"]["prompt_tokens"]
+                    server.errors += failed
+
+                if failed:
+                    headers = {}
+                    if config.error_status == 429 and config.retry_after is not None:
+                        headers["Retry-After"] = str(config.retry_after)
+                    self._send(config.error_status, {"error": {"message": "simulated failure"}}, headers)
+                else:
+                    self._send(200, response)
+
+        return Handler
+
+
+def main(argv: Optional[list] = None) -> None:
+    """Executa o servidor em primeiro plano"""
+    parser = argparse.ArgumentParser(description="Servidor chat-completions simulado")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="constant:0.05", help="tipo:parâmetros, ex.: lognormal:0.3,0.4")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    config = MockServerConfig(
+        latency=LatencyDistribution.parse(args.latency),
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        tokens_per_second=args.tokens_per_second,
+        seed=args.seed,
+    )
+    server = MockChatServer(config, args.host, args.port)
+    print(f"Servidor simulado em {server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Suíte de benchmarks de vazão e latência
+
+Executa cada cenário (agentes e grafo compilado) contra o servidor
+simulado em vários níveis de concorrência e mede arquivos/s, latências
+p50/p95/p99 e pico de RSS. Os resultados são gravados em JSON para
+comparação entre versões.
+
+Com ``--record`` as respostas do LLM são gravadas em disco; com
+``--replay`` a rodada é reproduzida sem rede, com latência zero (só o
+custo do framework) ou, com ``--replay-latency``, com a latência gravada.
+
+Uso:
+    python -m benchmarks.run_benchmarks --files 200 --concurrency 1 4 16
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/anterior.json
+    python -m benchmarks.run_benchmarks --record .cache/recordings
+    python -m benchmarks.run_benchmarks --replay .cache/recordings --replay-latency
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import resource
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.autonomous_code_converter.agents.batching import run_bounded
+from src.autonomous_code_converter.agents.dependency_extraction_agent import DependencyExtractionAgent
+from src.autonomous_code_converter.agents.language_detection_agent import LanguageDetectionAgent
+from src.autonomous_code_converter.graphs.base_graph import create_base_graph, create_initial_state
+from src.autonomous_code_converter.models.base_models import LanguageType, SourceCode
+from src.autonomous_code_converter.models.config import OpenRouterConfig, RateLimitConfig, RecordingConfig
+from src.autonomous_code_converter.tools.openrouter_client import OpenRouterClient
+
+from .environment import ROOT, environment_metadata
+from .mock_server import LatencyDistribution, MockChatServer, MockServerConfig
+
+DEFAULT_RESULTS_DIR = ROOT / "benchmarks" / "results"
+DEFAULT_CONCURRENCY = [1, 4, 16]
+RSS_SAMPLE_INTERVAL = 0.01
+
+_TEMPLATES = {
+    LanguageType.PYTHON: (
+        "import os\nimport json\nimport requests\n\n",
+        "def handler_{i}(payload):\n    if payload.get('id') == {i}:\n        return json.dumps(payload)\n    return None\n\n",
+    ),
+    LanguageType.JAVASCRIPT: (
+        "const fs = require('fs');\nimport express from 'express';\n\n",
+        "function handler{i}(req, res) {{\n  if (req.id === {i}) {{ return res.send(fs.readFileSync('x')); }}\n  return null;\n}}\n\n",
+    ),
+    LanguageType.TYPESCRIPT: (
+        "import {{ Injectable }} from '@angular/core';\nimport type {{ Request }} from 'express';\n\n",
+        "export function handler{i}(req: Request): number {{\n  return req.body.length + {i};\n}}\n\n",
+    ),
+}
+
+
+def make_corpus(count: int, functions_per_file: int = 20, seed: int = 0) -> List[SourceCode]:
+    """Gera arquivos sintéticos nas três linguagens suportadas"""
+    rng = random.Random(seed)
+    languages = list(_TEMPLATES)
+    corpus = []
+    for index in range(count):
+        language = languages[index % len(languages)]
+        header, body = _TEMPLATES[language]
+        functions = rng.randint(functions_per_file // 2, functions_per_file)
+        content = header.format() + "".join(body.format(i=i) for i in range(functions))
+        extension = {"python": "py", "javascript": "js", "typescript": "ts"}[language.value]
+        corpus.append(SourceCode(content=content, language=language, filename=f"file_{index}.{extension}"))
+    return corpus
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Percentil pelo método do posto mais próximo"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), math.ceil(fraction * len(ordered))))
+    return ordered[rank - 1]
+
+
+def _current_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # Sem /proc: recorre ao pico do processo (em KB no Linux, bytes no macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+async def _sample_rss(peak: List[int], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        peak[0] = max(peak[0], _current_rss_bytes())
+        try:
+            await asyncio.wait_for(stop.wait(), RSS_SAMPLE_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+def _client(base_url: str, rate_limit: bool, recording: Optional[RecordingConfig] = None) -> OpenRouterClient:
+    return OpenRouterClient(OpenRouterConfig(
+        api_key="benchmark",
+        base_url=base_url,
+        rate_limit=RateLimitConfig(enabled=rate_limit, requests_per_minute=None),
+        recording=recording or RecordingConfig()
+    ))
+
+
+# Cada cenário recebe o cliente e devolve a função assíncrona que processa um arquivo
+Scenario = Callable[[OpenRouterClient], Callable[[SourceCode], Awaitable[Any]]]
+
+
+def _language_detection(fast_path: bool) -> Scenario:
+    def build(client: OpenRouterClient):
+        agent = LanguageDetectionAgent(client, fast_path_threshold=0.85 if fast_path else None)
+        return lambda source_code: agent.detect_language(source_code.content)
+    return build
+
+
+def _dependency_extraction(client: OpenRouterClient):
+    agent = DependencyExtractionAgent(client, llm_enrichment=True)
+    return agent.extract_dependencies
+
+
+def _graph(client: OpenRouterClient):
+    graph = create_base_graph(
+        language_agent=LanguageDetectionAgent(client, fast_path_threshold=None),
+        dependency_agent=DependencyExtractionAgent(client, llm_enrichment=True)
+    )
+
+    async def run(source_code: SourceCode):
+        state = create_initial_state(source_code.content, source_code.language, filename=source_code.filename)
+        thread_id = state.system_state.session_id
+        try:
+            return await graph.ainvoke(state, config={"configurable": {"thread_id": thread_id}})
+        finally:
+            await graph.checkpointer.adelete_thread(thread_id)
+    return run
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "language_detection": _language_detection(fast_path=True),
+    "language_detection_llm": _language_detection(fast_path=False),
+    "dependency_extraction": _dependency_extraction,
+    "graph": _graph,
+}
+
+
+async def run_scenario(name: str, corpus: List[SourceCode], concurrency: int,
+                       server: MockChatServer, rate_limit: bool = False,
+                       recording: Optional[RecordingConfig] = None) -> Dict[str, Any]:
+    """Mede um cenário em um nível de concorrência"""
+    client = _client(server.base_url, rate_limit, recording)
+    process = SCENARIOS[name](client)
+    requests_before = server.stats()["requests"]
+    latencies: List[float] = []
+    errors = 0
+
+    async def timed(source_code: SourceCode) -> Optional[float]:
+        start = time.perf_counter()
+        try:
+            await process(source_code)
+        except Exception:
+            return None
+        return time.perf_counter() - start
+
+    peak = [_current_rss_bytes()]
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(_sample_rss(peak, stop))
+    start = time.perf_counter()
+    try:
+        jobs = (lambda source_code=source_code: timed(source_code) for source_code in corpus)
+        async for latency in run_bounded(jobs, concurrency):
+            if latency is None:
+                errors += 1
+            else:
+                latencies.append(latency)
+    finally:
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await sampler
+        await client.aclose()
+
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "files": len(corpus),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "files_per_sec": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99": round(percentile(latencies, 0.99) * 1000, 3),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            "max": round(max(latencies, default=0.0) * 1000, 3),
+        },
+        "peak_rss_mb": round(peak[0] / (1024 * 1024), 2),
+        "server_requests": server.stats()["requests"] - requests_before,
+        "recording": client.get_recording_metrics(),
+    }
+
+
+def _metadata(server_config: MockServerConfig) -> Dict[str, Any]:
+    return {
+        **environment_metadata(),
+        "server": {
+            "latency": {"kind": server_config.latency.kind, "params": list(server_config.latency.params)},
+            "error_rate": server_config.error_rate,
+            "error_status": server_config.error_status,
+            "tokens_per_second": server_config.tokens_per_second,
+        },
+    }
+
+
+async def run_suite(scenarios: List[str], concurrency_levels: List[int], files: int,
+                    server_config: MockServerConfig, rate_limit: bool = False,
+                    recording: Optional[RecordingConfig] = None) -> Dict[str, Any]:
+    """Executa todos os cenários e níveis de concorrência"""
+    corpus = make_corpus(files)
+    results = []
+    with MockChatServer(server_config) as server:
+        for name in scenarios:
+            for concurrency in concurrency_levels:
+                results.append(await run_scenario(name, corpus, concurrency, server, rate_limit, recording))
+    return {"meta": _metadata(server_config), "results": results}
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any],
+                    threshold: float = 0.1) -> List[str]:
+    """Lista regressões de vazão ou de p95 acima de ``threshold`` (fração)"""
+    previous = {(item["scenario"], item["concurrency"]): item for item in baseline["results"]}
+    regressions = []
+    for item in current["results"]:
+        before = previous.get((item["scenario"], item["concurrency"]))
+        if before is None:
+            continue
+        label = f"{item['scenario']} @ {item['concurrency']}"
+        if before["files_per_sec"] and item["files_per_sec"] < before["files_per_sec"] * (1 - threshold):
+            regressions.append(f"{label}: files/s {before['files_per_sec']} -> {item['files_per_sec']}")
+        if before["latency_ms"]["p95"] and item["latency_ms"]["p95"] > before["latency_ms"]["p95"] * (1 + threshold):
+            regressions.append(f"{label}: p95 {before['latency_ms']['p95']}ms -> {item['latency_ms']['p95']}ms")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Ponto de entrada de linha de comando"""
+    parser = argparse.ArgumentParser(description="Benchmarks de vazão e latência")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Cenário a executar (padrão: todos; pode repetir)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--latency", default="lognormal:0.05,0.5", help="tipo:parâmetros do servidor simulado")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rate-limit", action="store_true", help="Mantém o controle de vazão do cliente ativo")
+    parser.add_argument("-o", "--output", help="Arquivo JSON de saída (padrão: benchmarks/results/<versão>-<data>.json)")
+    parser.add_argument("--compare", help="Resultado anterior para detectar regressões")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Tolerância de regressão (fração)")
+    recording = parser.add_mutually_exclusive_group()
+    recording.add_argument("--record", metavar="DIR", help="Grava as respostas do LLM em DIR")
+    recording.add_argument("--replay", metavar="DIR", help="Reproduz as respostas gravadas em DIR, sem rede")
+    parser.add_argument("--replay-latency", action="store_true", help="No replay, espera a latência gravada")
+    args = parser.parse_args(argv)
+
+    recording_config = None
+    if args.record or args.replay:
+        recording_config = RecordingConfig(mode="record" if args.record else "replay",
+                                           directory=args.record or args.replay,
+                                           replay_latency=args.replay_latency)
+
+    server_config = MockServerConfig(
+        latency=LatencyDistribution.parse(args.latency),
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        tokens_per_second=args.tokens_per_second,
+        seed=args.seed,
+    )
+    report = asyncio.run(run_suite(args.scenario or list(SCENARIOS), args.concurrency,
+                                   args.files, server_config, args.rate_limit, recording_config))
+
+    if args.output:
+        output = Path(args.output)
+    else:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = DEFAULT_RESULTS_DIR / f"{report['meta']['version']}-{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+
+    for item in report["results"]:
+        print(f"{item['scenario']:<24} c={item['concurrency']:<3} {item['files_per_sec']:>9.2f} files/s  "
+              f"p50={item['latency_ms']['p50']:.1f}ms p95={item['latency_ms']['p95']:.1f}ms "
+              f"p99={item['latency_ms']['p99']:.1f}ms rss={item['peak_rss_mb']}MB errors={item['errors']}")
+    print(f"Resultados gravados em {output}")
+
+    if args.compare:
+        regressions = compare_results(report, json.loads(Path(args.compare).read_text()), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSÃO {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
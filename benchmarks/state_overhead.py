@@ -0,0 +1,159 @@
+"""
+Microbenchmark do custo por passo do estado do grafo
+
+Mede, para estados de tamanhos crescentes, o que o framework gasta a cada
+passo além do trabalho dos nós:
+
+- ``validate``: revalidar a árvore inteira a partir de dicts;
+- ``construct``: montar o BaseGraphState a partir das instâncias dos
+  canais (o que o LangGraph faz na entrada de cada nó);
+- ``dumps``/``loads``: checkpoint do SystemState com o serializador
+  padrão do LangGraph e com o StateSerializer, e os bytes gravados
+  (crus e com zlib, como no SqliteCheckpointer);
+- ``graph_step``: tempo de um ``invoke`` do grafo base dividido pelo
+  número de nós, com cada um dos serializadores no checkpointer.
+
+Uso:
+    python -m benchmarks.state_overhead
+    python -m benchmarks.state_overhead --scale 10 100 1000 --repeats 50
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from src.autonomous_code_converter.graphs.base_graph import BaseGraphState, create_base_graph, create_initial_state
+from src.autonomous_code_converter.graphs.state_serde import StateSerializer
+from src.autonomous_code_converter.models.base_models import (
+    AuditFinding, AuditSeverity, AuditState, CodeAnalysisResult, CppCodeFiles, Dependencies,
+    EnrichedAST, LanguageDetection, LanguageType
+)
+
+from .environment import ROOT, environment_metadata
+
+DEFAULT_RESULTS_DIR = ROOT / "benchmarks" / "results"
+DEFAULT_SCALES = [10, 100, 1000]
+DEFAULT_REPEATS = 20
+GRAPH_NODES = 6
+
+
+def build_state(scale: int) -> BaseGraphState:
+    """Estado com ``scale`` imports, funções, arquivos C++ e achados de auditoria"""
+    source = "".join(f"import module_{index}\n" for index in range(scale))
+    state = create_initial_state(source, LanguageType.PYTHON, filename="large.py")
+    system_state = state.system_state
+    system_state.analysis_result = CodeAnalysisResult(
+        source_code=system_state.original_source,
+        language_detection=LanguageDetection(detected_language=LanguageType.PYTHON, confidence=0.9),
+        dependencies=Dependencies(
+            imports=[f"import module_{index}" for index in range(scale)],
+            external_libraries=[f"module_{index}" for index in range(scale)],
+            documentation_urls={f"module_{index}": f"https://pypi.org/project/module_{index}/" for index in range(scale)},
+        ),
+        enriched_ast=EnrichedAST(
+            ast_nodes={"Import": scale},
+            function_descriptions={f"function_{index}": "função com 1 parâmetro(s)" for index in range(scale)},
+        ),
+    )
+    code_files = CppCodeFiles(source_files={f"file_{index}.cpp": "int x = 0;\n" * 10 for index in range(scale // 10 + 1)})
+    system_state.cpp_code = code_files
+    system_state.audit_state = AuditState(code_files=code_files, findings=[
+        AuditFinding(finding_id=str(index), severity=AuditSeverity.LOW, category="estilo", description="descrição")
+        for index in range(scale)
+    ])
+    for index in range(min(scale, state.events.capacity)):
+        state.add_message(f"mensagem {index}")
+    return state
+
+
+def measure(function: Callable[[], Any], repeats: int = DEFAULT_REPEATS) -> float:
+    """Mediana em milissegundos de ``repeats`` execuções (após uma de aquecimento)"""
+    function()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(times), 4)
+
+
+def _graph_step(state: BaseGraphState, serde, repeats: int) -> float:
+    graph = create_base_graph(checkpointer=MemorySaver(serde=serde))
+    sessions = iter(range(repeats + 1))
+
+    def invoke() -> None:
+        graph.invoke(state.model_copy(deep=True), config={"configurable": {"thread_id": str(next(sessions))}})
+
+    return round(measure(invoke, repeats) / GRAPH_NODES, 4)
+
+
+def measure_scale(scale: int, repeats: int = DEFAULT_REPEATS) -> Dict[str, Any]:
+    """Todas as medidas para um tamanho de estado"""
+    state = build_state(scale)
+    channels = {"system_state": state.system_state, "events": state.events, "analysis_partials": {}}
+    dump = state.model_dump()
+    serializers = {"jsonplus": JsonPlusSerializer(), "state": StateSerializer()}
+
+    result: Dict[str, Any] = {
+        "scale": scale,
+        "validate_ms": measure(lambda: BaseGraphState.model_validate(dump), repeats),
+        "construct_ms": measure(lambda: BaseGraphState(**channels), repeats),
+    }
+    for name, serde in serializers.items():
+        typed = serde.dumps_typed(state.system_state)
+        result[f"{name}_dumps_ms"] = measure(lambda: serde.dumps_typed(state.system_state), repeats)
+        result[f"{name}_loads_ms"] = measure(lambda: serde.loads_typed(typed), repeats)
+        result[f"{name}_bytes"] = len(typed[1])
+        result[f"{name}_zlib_bytes"] = len(zlib.compress(typed[1]))
+        result[f"{name}_graph_step_ms"] = _graph_step(state, serde, repeats)
+    return result
+
+
+def run_state_benchmark(scales: Optional[List[int]] = None, repeats: int = DEFAULT_REPEATS) -> Dict[str, Any]:
+    """Mede todos os ``scales``"""
+    return {
+        "meta": {**environment_metadata(), "repeats": repeats},
+        "results": [measure_scale(scale, repeats) for scale in (scales or DEFAULT_SCALES)],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Ponto de entrada de linha de comando"""
+    parser = argparse.ArgumentParser(description="Microbenchmark do custo por passo do estado do grafo")
+    parser.add_argument("--scale", type=int, nargs="+", default=DEFAULT_SCALES,
+                        help="Tamanhos de estado (imports, funções, achados)")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("-o", "--output", help="Arquivo JSON de saída (padrão: benchmarks/results/state-<versão>-<data>.json)")
+    args = parser.parse_args(argv)
+
+    report = run_state_benchmark(args.scale, args.repeats)
+
+    if args.output:
+        output = Path(args.output)
+    else:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = DEFAULT_RESULTS_DIR / f"state-{report['meta']['version']}-{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+
+    for item in report["results"]:
+        print(f"scale={item['scale']:<6} validate={item['validate_ms']:>8.3f}ms construct={item['construct_ms']:>7.3f}ms")
+        for name in ("jsonplus", "state"):
+            print(f"    {name:<9} dumps={item[f'{name}_dumps_ms']:>8.3f}ms loads={item[f'{name}_loads_ms']:>8.3f}ms "
+                  f"bytes={item[f'{name}_bytes']:>9} zlib={item[f'{name}_zlib_bytes']:>8} "
+                  f"passo={item[f'{name}_graph_step_ms']:>7.3f}ms")
+    print(f"Resultados gravados em {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,19 @@
 """
 Sistema Agêntico Avançado de Conversão de Código para C++
+
+Os subpacotes (``agents``, ``graphs``, ``models``, ``tools``) são
+importados apenas quando acessados.
 """
 
+import importlib
+
 __version__ = "0.1.0"
-__author__ = "Autonomous Code Converter System" 
\ No newline at end of file
+__author__ = "Autonomous Code Converter System"
+
+_SUBPACKAGES = ("agents", "graphs", "models", "tools")
+
+
+def __getattr__(name: str):
+    if name in _SUBPACKAGES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
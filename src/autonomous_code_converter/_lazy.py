@@ -0,0 +1,33 @@
+"""
+Exportação preguiçosa de atributos de pacote (PEP 562)
+
+Os ``__init__`` dos subpacotes declaram de qual submódulo vem cada nome
+público; o submódulo só é importado no primeiro acesso ao atributo. Assim
+importar um módulo leve (como ``tools.language_heuristics``) não carrega
+``pydantic_ai``, ``openai`` ou ``langgraph``.
+"""
+
+import importlib
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """Cria ``__getattr__`` e ``__dir__`` para ``package``
+
+    Args:
+        package: ``__name__`` do pacote
+        exports: Nome público -> submódulo relativo (ex.: ``".metrics"``)
+    """
+    def __getattr__(name: str) -> Any:
+        module = exports.get(name)
+        if module is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module, package), name)
+        # Acessos seguintes não passam mais por aqui
+        setattr(importlib.import_module(package), name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(importlib.import_module(package))) | set(exports))
+
+    return __getattr__, __dir__
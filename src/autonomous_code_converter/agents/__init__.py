@@ -1 +1,25 @@
-# Autonomous Code Converter - Agents Module 
\ No newline at end of file
+# Autonomous Code Converter - Agents Module
+"""
+Agents are loaded on first attribute access, so importing this package
+does not pull in pydantic_ai or openai.
+"""
+
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+_EXPORTS = {
+    "LanguageDetectionAgent": ".language_detection_agent",
+    "create_language_detection_agent": ".language_detection_agent",
+    "language_settled": ".language_detection_agent",
+    "DependencyExtractionAgent": ".dependency_extraction_agent",
+    "create_dependency_extraction_agent": ".dependency_extraction_agent",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = list(_EXPORTS)
+
+if TYPE_CHECKING:
+    from .language_detection_agent import LanguageDetectionAgent, create_language_detection_agent, language_settled
+    from .dependency_extraction_agent import DependencyExtractionAgent, create_dependency_extraction_agent
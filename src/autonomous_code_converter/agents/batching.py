@@ -0,0 +1,93 @@
+"""
+Batching helpers shared by the analysis agents.
+
+Provides bounded-concurrency execution that streams results as they
+complete, and packing of several small files into a single prompt.
+"""
+
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List, Sequence, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_FILES_PER_PROMPT = 8
+DEFAULT_MAX_CHARS_PER_PROMPT = 12_000
+
+
+def pack_files(items: Sequence[Tuple[int, T]],
+               max_files: int = DEFAULT_MAX_FILES_PER_PROMPT,
+               max_chars: int = DEFAULT_MAX_CHARS_PER_PROMPT,
+               size: Callable[[T], int] = len) -> List[List[Tuple[int, T]]]:
+    """Group (index, item) pairs into packs bounded by file count and size.
+
+    Files larger than max_chars always get a pack of their own.
+
+    Args:
+        items: Indexed items to pack, in submission order
+        max_files: Maximum number of files per pack
+        max_chars: Maximum total characters per pack
+        size: Returns the character count of an item
+
+    Returns:
+        List of packs preserving the original order
+    """
+    packs: List[List[Tuple[int, T]]] = []
+    current: List[Tuple[int, T]] = []
+    current_chars = 0
+
+    for index, item in items:
+        item_chars = size(item)
+        if current and (len(current) >= max_files or current_chars + item_chars > max_chars):
+            packs.append(current)
+            current, current_chars = [], 0
+        current.append((index, item))
+        current_chars += item_chars
+
+    if current:
+        packs.append(current)
+    return packs
+
+
+async def run_bounded(jobs: Iterable[Callable[[], Awaitable[T]]],
+                      max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> AsyncIterator[T]:
+    """Run job factories concurrently and yield results as they complete.
+
+    Jobs are pulled lazily, so at most max_concurrency coroutines exist at
+    any time. Closing the generator early cancels the jobs still running.
+
+    Args:
+        jobs: Zero-argument callables returning awaitables
+        max_concurrency: Maximum number of jobs in flight
+
+    Yields:
+        Each job's result, in completion order
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    job_iter = iter(jobs)
+    pending: Set[asyncio.Task] = set()
+    exhausted = False
+
+    try:
+        while True:
+            while not exhausted and len(pending) < max_concurrency:
+                try:
+                    job = next(job_iter)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.add(asyncio.ensure_future(job()))
+
+            if not pending:
+                return
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
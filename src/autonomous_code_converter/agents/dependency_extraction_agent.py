@@ -1,26 +1,78 @@
 """
 Dependency Extraction Agent using PydanticAI
 Extracts imports, libraries, and documentation URLs from source code.
+
+Extraction is done locally by a parser; the LLM is an optional enrichment step,
+skipped when the compiled API index already knows every library a file uses.
+The enrichment prompt only carries the import regions of a file, split into
+token-bounded chunks that are sent concurrently.
 """
 
+import asyncio
+
 from pydantic_ai import Agent
-from ..models.base_models import SourceCode, Dependencies
+from ..models.base_models import SourceCode, Dependencies, DependenciesBatch
+from ..tools.api_index import ApiIndex, get_default_api_index
 from ..tools.openrouter_client import OpenRouterClient
-from typing import Optional
+from ..tools.result_cache import ResultCache, make_cache_key
+from ..tools.dependency_parser import extract_dependencies_locally, merge_dependencies
+from ..tools.metrics import API_INDEX_ANSWERS, observe_call, observe_call_sync
+from ..tools.prompt_builder import (
+    PROMPT_VERSION,
+    BuiltPrompt,
+    build_extraction_batch_prompt,
+    build_extraction_prompt,
+    compact_source,
+    record_prompt
+)
+from ..tools.source_slicer import DEFAULT_CHUNK_TOKENS, prepare_for_extraction
+from .batching import (
+    DEFAULT_MAX_CHARS_PER_PROMPT,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_FILES_PER_PROMPT,
+    pack_files,
+    run_bounded
+)
+from .single_flight import SingleFlight
+from .streaming import StopCondition, stream_structured_output
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+# Label used for this agent's metrics
+AGENT_NAME = "dependency_extraction"
 
 
 class DependencyExtractionAgent:
     """Agent for extracting dependencies from source code."""
     
-    def __init__(self, openrouter_client: OpenRouterClient):
+    def __init__(self, openrouter_client: OpenRouterClient,
+                 cache: Optional[ResultCache] = None,
+                 llm_enrichment: bool = False,
+                 max_tokens_per_chunk: int = DEFAULT_CHUNK_TOKENS,
+                 api_index: Optional[ApiIndex] = None):
         """Initialize the dependency extraction agent.
         
         Args:
             openrouter_client: Configured OpenRouter client
+            cache: Optional result cache shared between runs
+            llm_enrichment: Also ask the LLM and merge its answer into the
+                parser result (the parser result always takes precedence)
+            max_tokens_per_chunk: Token budget of each enrichment prompt's
+                source section
+            api_index: Compiled API index used for C++ mappings and to skip
+                enrichment of well-known libraries (None uses the default index)
         """
         self.openrouter_client = openrouter_client
+        self.cache = cache
+        self.llm_enrichment = llm_enrichment
+        self.max_tokens_per_chunk = max_tokens_per_chunk
+        self.api_index = api_index
+        self.index_answers = 0
+        self.prompt_tokens_original = 0
+        self.prompt_tokens_sent = 0
         self.system_prompt = self._get_system_prompt()
+        self.in_flight: SingleFlight[Dependencies] = SingleFlight(AGENT_NAME)
         self.agent = None  # Will be created lazily
+        self.batch_agent = None  # Will be created lazily
     
     def _get_system_prompt(self) -> str:
         """Get the system prompt for dependency extraction."""
@@ -49,12 +101,60 @@ Be thorough but accurate - only include dependencies that are actually present."
         """Get or create the PydanticAI agent."""
         if self.agent is None:
             self.agent = Agent(
-                model=self.openrouter_client.get_model_name(),
+                model=self.openrouter_client.get_model(),
                 result_type=Dependencies,
                 system_prompt=self.system_prompt
             )
         return self.agent
 
+    def _get_batch_agent(self) -> Agent:
+        """Get or create the PydanticAI agent used for packed multi-file prompts."""
+        if self.batch_agent is None:
+            self.batch_agent = Agent(
+                model=self.openrouter_client.get_model(),
+                result_type=DependenciesBatch,
+                system_prompt=self.system_prompt + """
+
+When several files are given, each one is delimited by a '### File <id>' header.
+Analyze each file independently and return one entry per file id in 'results'."""
+            )
+        return self.batch_agent
+
+    def _local(self, source_code: SourceCode) -> Dependencies:
+        """Parser result, with C++ mappings when an API index is available."""
+        return extract_dependencies_locally(source_code, self.api_index)
+
+    def _answered_by_index(self, source_code: SourceCode, local: Dependencies) -> bool:
+        """Whether the API index knows every external library, leaving the LLM nothing to add."""
+        index = self.api_index if self.api_index is not None else get_default_api_index()
+        if index is None or not index.covers(local.external_libraries, source_code.language):
+            return False
+        self.index_answers += 1
+        API_INDEX_ANSWERS.inc(agent=AGENT_NAME)
+        return True
+
+    def _cache_key(self, source_code: SourceCode) -> str:
+        """Build the result cache key for a source file."""
+        return make_cache_key(
+            content=source_code.content,
+            language=source_code.language.value,
+            filename=source_code.filename,
+            model_name=self.openrouter_client.get_model_name(),
+            system_prompt=self.system_prompt,
+            prompt_version=f"{PROMPT_VERSION}/{self.max_tokens_per_chunk}"
+        )
+
+    def _cached_result(self, key: str) -> Optional[Dependencies]:
+        """Look up cached dependencies, if a cache is configured."""
+        if self.cache is None:
+            return None
+        return self.cache.get(key, Dependencies)
+
+    def _store_result(self, key: str, dependencies: Dependencies) -> None:
+        """Store dependencies in the cache, if a cache is configured."""
+        if self.cache is not None:
+            self.cache.set(key, dependencies)
+
     async def extract_dependencies(self, source_code: SourceCode) -> Dependencies:
         """Extract dependencies from source code.
         
@@ -64,24 +164,79 @@ Be thorough but accurate - only include dependencies that are actually present."
         Returns:
             Dependencies with imports, libraries, and documentation
         """
+        local = self._local(source_code)
+        if not self.llm_enrichment or self._answered_by_index(source_code, local):
+            return local
+        
+        key = self._cache_key(source_code)
+        cached = self._cached_result(key)
+        if cached is not None:
+            return merge_dependencies(local, cached)
+        
         # Use PydanticAI agent to get structured response
+        enrichment = await self._extract_with_llm(source_code, key)
+        return merge_dependencies(local, enrichment)
+    
+    async def extract_dependencies_stream(self, source_code: SourceCode,
+                                          stop_when: Optional[StopCondition] = None
+                                          ) -> AsyncIterator[Dependencies]:
+        """Extract dependencies, yielding partial results as they arrive.
+        
+        The parser result is yielded first, so callers can start on the
+        imports already found. With LLM enrichment, each chunk's response
+        is streamed and merged into the parser result as it grows. Once
+        stop_when returns True for a merged result, generation stops and
+        no further chunks are sent. Only a complete enrichment is cached.
+        
+        Args:
+            source_code: The source code to analyze
+            stop_when: Stop the generation once it returns True
+            
+        Yields:
+            Dependencies objects, each at least as complete as the last
+        """
+        local = self._local(source_code)
+        yield local
+        if not self.llm_enrichment or (stop_when is not None and stop_when(local)):
+            return
+        if self._answered_by_index(source_code, local):
+            return
+        
+        key = self._cache_key(source_code)
+        cached = self._cached_result(key)
+        if cached is not None:
+            yield merge_dependencies(local, cached)
+            return
+        
+        # Chunks are streamed one after another so that stopping saves the rest
         agent = self._get_agent()
+        done: List[Dependencies] = []
+        stopped = False
+        last = local
         
-        # Prepare context for the agent
-        context = f"""
-Language: {source_code.language.value}
-Filename: {source_code.filename or 'unknown'}
-
-Source Code:
-```{source_code.language.value}
-{source_code.content}
-```
-
-Analyze this code and extract all dependencies.
-"""
+        def merged_stop(partial: Dependencies) -> bool:
+            return stop_when(merge_dependencies(local, *done, partial))
         
-        result = await agent.run(context)
-        return result.data
+        for chunk in self._prepare(source_code):
+            stream = stream_structured_output(
+                agent, self._build_context(chunk), Dependencies, AGENT_NAME,
+                None if stop_when is None else merged_stop
+            )
+            partial = None
+            complete = False
+            async for partial, complete in stream:
+                merged = merge_dependencies(local, *done, partial)
+                if merged != last:
+                    last = merged
+                    yield merged
+            if partial is not None:
+                done.append(partial)
+            if not complete:
+                stopped = True
+                break
+        
+        if done and not stopped:
+            self._store_result(key, merge_dependencies(*done))
     
     def extract_dependencies_sync(self, source_code: SourceCode) -> Dependencies:
         """Synchronous version of dependency extraction.
@@ -92,31 +247,151 @@ Analyze this code and extract all dependencies.
         Returns:
             Dependencies with imports, libraries, and documentation
         """
-        # Use PydanticAI agent to get structured response
-        agent = self._get_agent()
+        local = self._local(source_code)
+        if not self.llm_enrichment or self._answered_by_index(source_code, local):
+            return local
         
-        # Prepare context for the agent
-        context = f"""
-Language: {source_code.language.value}
-Filename: {source_code.filename or 'unknown'}
+        key = self._cache_key(source_code)
+        cached = self._cached_result(key)
+        if cached is not None:
+            return merge_dependencies(local, cached)
+        
+        # Use PydanticAI agent to get structured response, one call per chunk
+        agent = self._get_agent()
+        enrichment = merge_dependencies(*(
+            observe_call_sync(AGENT_NAME, agent.run_sync, self._build_context(chunk)).output
+            for chunk in self._prepare(source_code)
+        ))
+        self._store_result(key, enrichment)
+        return merge_dependencies(local, enrichment)
 
-Source Code:
-```{source_code.language.value}
-{source_code.content}
-```
+    def _prepare(self, source_code: SourceCode) -> List[SourceCode]:
+        """Cut a file down to its import regions, split into token-bounded chunks."""
+        return prepare_for_extraction(source_code, self.max_tokens_per_chunk)
 
-Analyze this code and extract all dependencies.
-"""
+    def _sliced_content(self, source_code: SourceCode) -> str:
+        """Import regions of a file as one string, for packed prompts."""
+        return "\n".join(chunk.content for chunk in self._prepare(source_code))
+
+    def _prompt(self, prompt: BuiltPrompt) -> str:
+        """Count a compacted prompt's tokens and return its text."""
+        self.prompt_tokens_original += prompt.original_tokens
+        self.prompt_tokens_sent += prompt.prompt_tokens
+        return record_prompt(AGENT_NAME, prompt)
+
+    def _build_context(self, source_code: SourceCode) -> str:
+        """Build the compacted single-file prompt for a (sliced) source file."""
+        return self._prompt(build_extraction_prompt(source_code))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Report how many prompt tokens compaction saved, how many files the API
+        index answered and how many calls were coalesced."""
+        return {
+            "prompt_tokens": self.prompt_tokens_sent,
+            "prompt_tokens_saved": self.prompt_tokens_original - self.prompt_tokens_sent,
+            "index_answers": self.index_answers,
+            "coalesced_calls": self.in_flight.saved
+        }
+
+    async def extract_dependencies_batch(self, sources: Iterable[SourceCode],
+                                         max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                                         max_files_per_prompt: int = DEFAULT_MAX_FILES_PER_PROMPT,
+                                         max_chars_per_prompt: int = DEFAULT_MAX_CHARS_PER_PROMPT
+                                         ) -> AsyncIterator[Tuple[int, Dependencies]]:
+        """Extract dependencies from many files concurrently.
+        
+        Without LLM enrichment every file is answered by the parser. With
+        enrichment, cached files are yielded first and the rest are packed
+        several per prompt with at most max_concurrency requests in flight;
+        results stream out as each request completes.
+        
+        Args:
+            sources: Source files to analyze
+            max_concurrency: Maximum number of LLM requests in flight
+            max_files_per_prompt: Maximum number of files packed in one prompt
+            max_chars_per_prompt: Maximum characters packed in one prompt
+            
+        Yields:
+            (index in sources, Dependencies) in completion order
+        """
+        remaining: List[Tuple[int, SourceCode]] = []
+        for index, source_code in enumerate(sources):
+            local = self._local(source_code)
+            if not self.llm_enrichment or self._answered_by_index(source_code, local):
+                yield index, local
+                continue
+            cached = self._cached_result(self._cache_key(source_code))
+            if cached is not None:
+                yield index, merge_dependencies(local, cached)
+            elif not self._sliced_content(source_code):
+                # No import regions: nothing for the LLM to add
+                yield index, local
+            else:
+                remaining.append((index, source_code))
+        
+        # Pack by the size of what is actually sent: the compacted import regions
+        packs = pack_files(remaining, max_files_per_prompt, max_chars_per_prompt,
+                           size=lambda source_code: len(compact_source(self._sliced_content(source_code),
+                                                                       source_code.language)))
+        jobs = [lambda pack=pack: self._extract_pack(pack) for pack in packs]
+        async for results in run_bounded(jobs, max_concurrency):
+            for item in results:
+                yield item
+    
+    async def _extract_pack(self, pack: List[Tuple[int, SourceCode]]) -> List[Tuple[int, Dependencies]]:
+        """Run one packed prompt and split the reply into per-file results."""
+        if len(pack) == 1:
+            index, source_code = pack[0]
+            enrichment = await self._extract_with_llm(source_code, self._cache_key(source_code))
+            return [(index, merge_dependencies(self._local(source_code), enrichment))]
+        
+        result = await observe_call(AGENT_NAME, self._get_batch_agent().run(
+            self._prompt(build_extraction_batch_prompt(pack, self._sliced_content))
+        ))
+        
+        extracted = []
+        for index, source_code in pack:
+            key = self._cache_key(source_code)
+            enrichment = result.output.results.get(str(index))
+            if enrichment is None:
+                # The model skipped this file: ask about it on its own
+                enrichment = await self._extract_with_llm(source_code, key)
+            else:
+                self._store_result(key, enrichment)
+            extracted.append((index, merge_dependencies(self._local(source_code), enrichment)))
+        return extracted
+    
+    async def _extract_with_llm(self, source_code: SourceCode, key: str) -> Dependencies:
+        """Single-file LLM extraction, bypassing the cache lookup.
+        
+        Only the import regions are sent; when they exceed the chunk budget
+        the chunks are extracted concurrently and merged. Concurrent
+        extractions of identical files share one set of requests.
+        """
+        return await self.in_flight.do(key, lambda: self._run_extraction(source_code, key))
+    
+    async def _run_extraction(self, source_code: SourceCode, key: str) -> Dependencies:
+        """Send the chunked extraction prompts and cache the merged answer."""
+        agent = self._get_agent()
+        chunks = self._prepare(source_code)
+        results = await asyncio.gather(*(
+            observe_call(AGENT_NAME, agent.run(self._build_context(chunk))) for chunk in chunks
+        ))
         
-        result = agent.run_sync(context)
-        return result.data
+        enrichment = merge_dependencies(*(result.output for result in results))
+        self._store_result(key, enrichment)
+        return enrichment
 
 
-def create_dependency_extraction_agent(openrouter_client: Optional[OpenRouterClient] = None) -> DependencyExtractionAgent:
+def create_dependency_extraction_agent(openrouter_client: Optional[OpenRouterClient] = None,
+                                       llm_enrichment: bool = False,
+                                       api_index: Optional[ApiIndex] = None) -> DependencyExtractionAgent:
     """Factory function to create a dependency extraction agent.
     
     Args:
         openrouter_client: Optional pre-configured client, will create default if None
+        llm_enrichment: Merge an LLM answer into the parser result
+        api_index: Compiled API index (None uses the default index, if any)
         
     Returns:
         Configured DependencyExtractionAgent
@@ -126,4 +401,9 @@ def create_dependency_extraction_agent(openrouter_client: Optional[OpenRouterCli
         system_config = load_config()
         openrouter_client = OpenRouterClient(system_config.openrouter)
     
-    return DependencyExtractionAgent(openrouter_client) 
\ No newline at end of file
+    return DependencyExtractionAgent(
+        openrouter_client,
+        cache=openrouter_client.get_result_cache(),
+        llm_enrichment=llm_enrichment,
+        api_index=api_index
+    ) 
\ No newline at end of file
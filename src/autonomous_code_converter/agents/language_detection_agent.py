@@ -4,23 +4,64 @@ Detects programming language from source code with confidence score.
 """
 
 from pydantic_ai import Agent
-from ..models.base_models import LanguageDetection
+from ..models.base_models import LanguageDetection, LanguageDetectionBatch
 from ..tools.openrouter_client import OpenRouterClient
-from typing import Optional
+from ..tools.result_cache import ResultCache, make_cache_key
+from ..tools.language_heuristics import detect_language_locally
+from ..tools.metrics import FAST_PATH, observe_call, observe_call_sync
+from ..tools.prompt_builder import (
+    DEFAULT_DETECTION_TOKENS,
+    PROMPT_VERSION,
+    BuiltPrompt,
+    build_detection_batch_prompt,
+    build_detection_prompt,
+    detection_code,
+    record_prompt
+)
+from .batching import (
+    DEFAULT_MAX_CHARS_PER_PROMPT,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_FILES_PER_PROMPT,
+    pack_files,
+    run_bounded
+)
+from .single_flight import SingleFlight
+from .streaming import StopCondition, stream_structured_output
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+# Label used for this agent's metrics
+AGENT_NAME = "language_detection"
+
+# Local detections at or above this confidence skip the LLM entirely
+DEFAULT_FAST_PATH_THRESHOLD = 0.85
 
 
 class LanguageDetectionAgent:
     """Agent for detecting programming language from source code."""
     
-    def __init__(self, openrouter_client: OpenRouterClient):
+    def __init__(self, openrouter_client: OpenRouterClient,
+                 cache: Optional[ResultCache] = None,
+                 fast_path_threshold: Optional[float] = DEFAULT_FAST_PATH_THRESHOLD):
         """Initialize the language detection agent.
         
         Args:
             openrouter_client: Configured OpenRouter client
+            cache: Optional result cache shared between runs
+            fast_path_threshold: Minimum local heuristic confidence to skip the
+                LLM; None always calls the LLM
         """
         self.openrouter_client = openrouter_client
+        self.cache = cache
+        self.fast_path_threshold = fast_path_threshold
+        self.detections = 0
+        self.fast_path_hits = 0
+        self.llm_calls = 0
+        self.prompt_tokens_original = 0
+        self.prompt_tokens_sent = 0
         self.system_prompt = self._get_system_prompt()
+        self.in_flight: SingleFlight[LanguageDetection] = SingleFlight(AGENT_NAME)
         self.agent = None  # Will be created lazily
+        self.batch_agent = None  # Will be created lazily
     
     def _get_system_prompt(self) -> str:
         """Get the system prompt for language detection."""
@@ -42,12 +83,79 @@ Be conservative with confidence - only give high confidence (>0.8) when very cer
         """Get or create the PydanticAI agent."""
         if self.agent is None:
             self.agent = Agent(
-                model=self.openrouter_client.get_model_name(),
+                model=self.openrouter_client.get_model(),
                 result_type=LanguageDetection,
                 system_prompt=self.system_prompt
             )
         return self.agent
 
+    def _get_batch_agent(self) -> Agent:
+        """Get or create the PydanticAI agent used for packed multi-file prompts."""
+        if self.batch_agent is None:
+            self.batch_agent = Agent(
+                model=self.openrouter_client.get_model(),
+                result_type=LanguageDetectionBatch,
+                system_prompt=self.system_prompt + """
+
+When several files are given, each one is delimited by a '### File <id>' header.
+Detect each file independently and return one entry per file id in 'results'."""
+            )
+        return self.batch_agent
+
+    def _fast_path(self, source_code: str) -> Optional[LanguageDetection]:
+        """Return the local detection when it is confident enough."""
+        self.detections += 1
+        if self.fast_path_threshold is None:
+            return None
+        detection = detect_language_locally(source_code)
+        if detection.confidence >= self.fast_path_threshold:
+            self.fast_path_hits += 1
+            FAST_PATH.inc(result="hit")
+            return detection
+        FAST_PATH.inc(result="miss")
+        return None
+
+    def _prompt(self, prompt: BuiltPrompt) -> str:
+        """Count a compacted prompt's tokens and return its text."""
+        self.prompt_tokens_original += prompt.original_tokens
+        self.prompt_tokens_sent += prompt.prompt_tokens
+        return record_prompt(AGENT_NAME, prompt)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Report how often the local fast path answered instead of the LLM,
+        how many calls were coalesced and how many prompt tokens compaction saved."""
+        return {
+            "detections": self.detections,
+            "fast_path_hits": self.fast_path_hits,
+            "llm_calls": self.llm_calls,
+            "fast_path_ratio": self.fast_path_hits / self.detections if self.detections else 0.0,
+            "coalesced_calls": self.in_flight.saved,
+            "prompt_tokens": self.prompt_tokens_sent,
+            "prompt_tokens_saved": self.prompt_tokens_original - self.prompt_tokens_sent
+        }
+
+    def _cache_key(self, source_code: str) -> str:
+        """Build the result cache key for a source string."""
+        return make_cache_key(
+            content=source_code,
+            language=None,
+            filename=None,
+            model_name=self.openrouter_client.get_model_name(),
+            system_prompt=self.system_prompt,
+            prompt_version=f"{PROMPT_VERSION}/{DEFAULT_DETECTION_TOKENS}"
+        )
+
+    def _cached_result(self, key: str) -> Optional[LanguageDetection]:
+        """Look up a cached detection, if a cache is configured."""
+        if self.cache is None:
+            return None
+        return self.cache.get(key, LanguageDetection)
+
+    def _store_result(self, key: str, detection: LanguageDetection) -> None:
+        """Store a detection in the cache, if a cache is configured."""
+        if self.cache is not None:
+            self.cache.set(key, detection)
+
     async def detect_language(self, source_code: str) -> LanguageDetection:
         """Detect programming language from source code.
         
@@ -57,13 +165,56 @@ Be conservative with confidence - only give high confidence (>0.8) when very cer
         Returns:
             LanguageDetection with language and confidence
         """
+        local = self._fast_path(source_code)
+        if local is not None:
+            return local
+        
+        key = self._cache_key(source_code)
+        cached = self._cached_result(key)
+        if cached is not None:
+            return cached
+        
         # Use PydanticAI agent to get structured response
-        agent = self._get_agent()
-        result = await agent.run(
-            f"Analyze this source code and detect the programming language:\n\n```\n{source_code}\n```"
-        )
+        return await self._detect_with_llm(source_code)
+    
+    async def detect_language_stream(self, source_code: str,
+                                     stop_when: Optional[StopCondition] = None
+                                     ) -> AsyncIterator[LanguageDetection]:
+        """Detect the programming language, yielding partial detections.
+        
+        Fast-path and cached answers are yielded once. Otherwise detections
+        are yielded as the response streams in; pass stop_when (e.g.
+        language_settled()) to stop generating once the answer is known.
+        Only a complete response is stored in the cache.
+        
+        Args:
+            source_code: The source code to analyze
+            stop_when: Stop the generation once it returns True
+            
+        Yields:
+            LanguageDetection objects, each at least as complete as the last
+        """
+        local = self._fast_path(source_code)
+        if local is not None:
+            yield local
+            return
+        
+        key = self._cache_key(source_code)
+        cached = self._cached_result(key)
+        if cached is not None:
+            yield cached
+            return
         
-        return result.data
+        self.llm_calls += 1
+        stream = stream_structured_output(
+            self._get_agent(),
+            self._prompt(build_detection_prompt(source_code)),
+            LanguageDetection, AGENT_NAME, stop_when
+        )
+        async for detection, complete in stream:
+            if complete:
+                self._store_result(key, detection)
+            yield detection
     
     def detect_language_sync(self, source_code: str) -> LanguageDetection:
         """Synchronous version of language detection.
@@ -74,20 +225,129 @@ Be conservative with confidence - only give high confidence (>0.8) when very cer
         Returns:
             LanguageDetection with language and confidence
         """
+        local = self._fast_path(source_code)
+        if local is not None:
+            return local
+        
+        key = self._cache_key(source_code)
+        cached = self._cached_result(key)
+        if cached is not None:
+            return cached
+        
         # Use PydanticAI agent to get structured response
         agent = self._get_agent()
-        result = agent.run_sync(
-            f"Analyze this source code and detect the programming language:\n\n```\n{source_code}\n```"
+        self.llm_calls += 1
+        result = observe_call_sync(
+            AGENT_NAME, agent.run_sync,
+            self._prompt(build_detection_prompt(source_code))
         )
         
-        return result.data
+        self._store_result(key, result.output)
+        return result.output
+
+    async def detect_language_batch(self, sources: Iterable[str],
+                                    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                                    max_files_per_prompt: int = DEFAULT_MAX_FILES_PER_PROMPT,
+                                    max_chars_per_prompt: int = DEFAULT_MAX_CHARS_PER_PROMPT
+                                    ) -> AsyncIterator[Tuple[int, LanguageDetection]]:
+        """Detect the language of many sources concurrently.
+        
+        Sources answered by the fast path or the cache are yielded first.
+        The rest are packed several per prompt and sent with at most
+        max_concurrency requests in flight; results stream out as each
+        request completes.
+        
+        Args:
+            sources: Source code strings to analyze
+            max_concurrency: Maximum number of LLM requests in flight
+            max_files_per_prompt: Maximum number of files packed in one prompt
+            max_chars_per_prompt: Maximum characters packed in one prompt
+            
+        Yields:
+            (index in sources, LanguageDetection) in completion order
+        """
+        remaining: List[Tuple[int, str]] = []
+        for index, source_code in enumerate(sources):
+            local = self._fast_path(source_code)
+            if local is None:
+                local = self._cached_result(self._cache_key(source_code))
+            if local is not None:
+                yield index, local
+            else:
+                remaining.append((index, source_code))
+        
+        # Pack by the size of what is actually sent: the compacted code
+        packs = pack_files(remaining, max_files_per_prompt, max_chars_per_prompt,
+                           size=lambda source_code: len(detection_code(source_code)))
+        jobs = [lambda pack=pack: self._detect_pack(pack) for pack in packs]
+        async for results in run_bounded(jobs, max_concurrency):
+            for item in results:
+                yield item
+    
+    async def _detect_pack(self, pack: List[Tuple[int, str]]) -> List[Tuple[int, LanguageDetection]]:
+        """Run one packed prompt and split the reply into per-file results."""
+        if len(pack) == 1:
+            index, source_code = pack[0]
+            return [(index, await self._detect_with_llm(source_code))]
+        
+        self.llm_calls += 1
+        result = await observe_call(AGENT_NAME, self._get_batch_agent().run(
+            self._prompt(build_detection_batch_prompt(pack))
+        ))
+        
+        detections = []
+        for index, source_code in pack:
+            detection = result.output.results.get(str(index))
+            if detection is None:
+                # The model skipped this file: ask about it on its own
+                detection = await self._detect_with_llm(source_code)
+            else:
+                self._store_result(self._cache_key(source_code), detection)
+            detections.append((index, detection))
+        return detections
+    
+    async def _detect_with_llm(self, source_code: str) -> LanguageDetection:
+        """Single-file LLM detection, bypassing the fast path and cache lookup.
+        
+        Concurrent detections of identical sources share one request.
+        """
+        return await self.in_flight.do(self._cache_key(source_code),
+                                       lambda: self._run_detection(source_code))
+    
+    async def _run_detection(self, source_code: str) -> LanguageDetection:
+        """Send the single-file detection prompt and cache the answer."""
+        agent = self._get_agent()
+        self.llm_calls += 1
+        result = await observe_call(AGENT_NAME, agent.run(
+            self._prompt(build_detection_prompt(source_code))
+        ))
+        self._store_result(self._cache_key(source_code), result.output)
+        return result.output
+
+
+def language_settled(min_confidence: float = DEFAULT_FAST_PATH_THRESHOLD) -> StopCondition:
+    """Stop condition met once the detected language is known.
+    
+    The language must have been sent by the model (not filled in) and the
+    confidence received so far must reach min_confidence. A partial number
+    is a prefix of the final one, so it never overstates the confidence.
+    
+    Args:
+        min_confidence: Minimum confidence, the fast path threshold by default
+    """
+    def settled(detection: LanguageDetection) -> bool:
+        return ("detected_language" in detection.model_fields_set
+                and detection.confidence >= min_confidence)
+    return settled
 
 
-def create_language_detection_agent(openrouter_client: Optional[OpenRouterClient] = None) -> LanguageDetectionAgent:
+def create_language_detection_agent(openrouter_client: Optional[OpenRouterClient] = None,
+                                    fast_path_threshold: Optional[float] = DEFAULT_FAST_PATH_THRESHOLD) -> LanguageDetectionAgent:
     """Factory function to create a language detection agent.
     
     Args:
         openrouter_client: Optional pre-configured client, will create default if None
+        fast_path_threshold: Minimum local confidence to skip the LLM; None disables the fast path
         
     Returns:
         Configured LanguageDetectionAgent
@@ -97,4 +357,8 @@ def create_language_detection_agent(openrouter_client: Optional[OpenRouterClient
         system_config = load_config()
         openrouter_client = OpenRouterClient(system_config.openrouter)
     
-    return LanguageDetectionAgent(openrouter_client) 
\ No newline at end of file
+    return LanguageDetectionAgent(
+        openrouter_client,
+        cache=openrouter_client.get_result_cache(),
+        fast_path_threshold=fast_path_threshold
+    ) 
\ No newline at end of file
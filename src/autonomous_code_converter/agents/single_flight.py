@@ -0,0 +1,89 @@
+"""
+In-flight request coalescing shared by the analysis agents.
+
+Byte-identical files analyzed at the same time produce identical LLM
+calls, and the result cache only helps once the first one finishes.
+SingleFlight runs one call per key and lets every concurrent caller with
+the same key await its result.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, TypeVar
+
+from ..tools.metrics import COALESCED_CALLS
+
+T = TypeVar("T")
+
+
+class _Flight(Generic[T]):
+    """One shared call and the number of callers still waiting on it."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, task: "asyncio.Future[T]"):
+        self.loop = loop
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[T]):
+    """Coalesce concurrent calls that share a key into a single call.
+
+    The call runs in its own task and each caller awaits it through
+    asyncio.shield, so a caller cancelling its wait never cancels the call
+    for the others; the call is only cancelled once nobody is waiting.
+    A failure is raised to every waiter. Keys are forgotten as soon as the
+    call finishes, so later callers go through the cache or a fresh call.
+    """
+
+    def __init__(self, name: str):
+        """Initialize the group.
+
+        Args:
+            name: Agent label used for the coalescing metric
+        """
+        self.name = name
+        self._flights: Dict[str, _Flight[T]] = {}
+        self.calls = 0
+        self.saved = 0
+
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running."""
+        return len(self._flights)
+
+    async def do(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        """Run call() unless an identical one is in flight, and return its result.
+
+        Args:
+            key: Identifies calls whose results are interchangeable
+            call: Zero-argument callable starting the call
+
+        Returns:
+            The shared call's result
+        """
+        loop = asyncio.get_running_loop()
+        flight = self._flights.get(key)
+        if flight is not None and flight.loop is not loop:
+            # Futures cannot be awaited across event loops: run on our own
+            return await call()
+
+        if flight is None:
+            flight = _Flight(loop, asyncio.ensure_future(call()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.calls += 1
+        else:
+            self.saved += 1
+            COALESCED_CALLS.inc(agent=self.name)
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # The last waiter gave up: nobody needs the answer any more
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _forget(self, key: str, flight: _Flight[T]) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
@@ -0,0 +1,91 @@
+"""
+Streaming of structured agent outputs with partial validation.
+
+Partial outputs are validated in pydantic's partial mode, which drops an
+incomplete trailing value: a yielded object never holds a half-received
+import name or language. The caller can stop the generation as soon as a
+partial output is good enough; leaving the stream closes the HTTP response,
+so the provider stops producing completion tokens.
+"""
+
+import time
+from typing import Any, AsyncIterator, Callable, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelResponse, ToolCallPart
+
+from ..models.base_models import type_adapter
+from ..tools.metrics import AGENT_CALL_DURATION, AGENT_CALL_ERRORS, AGENT_STREAM_STOPS, record_usage
+
+T = TypeVar("T", bound=BaseModel)
+
+# Predicate telling a stream it can stop early
+StopCondition = Callable[[Any], bool]
+
+
+class _StopGeneration(Exception):
+    """Aborts a run from inside so the response is closed, not drained."""
+
+
+
+def validate_partial(message: ModelResponse, output_type: Type[T]) -> Optional[T]:
+    """Validate the output tool call of an incomplete response.
+    
+    Returns None while the arguments received so far do not yet form a
+    valid object (for instance, a required field is still missing).
+    """
+    for part in message.parts:
+        if not isinstance(part, ToolCallPart) or not part.args:
+            continue
+        try:
+            if isinstance(part.args, str):
+                return type_adapter(output_type).validate_json(part.args, experimental_allow_partial="on")
+            return type_adapter(output_type).validate_python(part.args, experimental_allow_partial="on")
+        except ValidationError:
+            return None
+    return None
+
+
+async def stream_structured_output(agent: Agent, prompt: str, output_type: Type[T],
+                                   agent_name: str,
+                                   stop_when: Optional[StopCondition] = None
+                                   ) -> AsyncIterator[Tuple[T, bool]]:
+    """Run an agent in streaming mode, yielding outputs as they grow.
+    
+    Args:
+        agent: PydanticAI agent whose result type is output_type
+        prompt: User prompt
+        output_type: Model used to validate partial outputs
+        agent_name: Label for the agent metrics
+        stop_when: Stop the generation once it returns True for an output
+        
+    Yields:
+        (output, complete) pairs; complete is True only for the final,
+        fully validated output. Unchanged partials are not repeated.
+    """
+    start = time.perf_counter()
+    last: Optional[T] = None
+    try:
+        async with agent.run_stream(prompt) as result:
+            async for message, is_last in result.stream_structured(debounce_by=None):
+                if is_last:
+                    output = await result.validate_structured_output(message, allow_partial=False)
+                else:
+                    output = validate_partial(message, output_type)
+                    if output is None or output == last:
+                        continue
+                last = output
+                yield output, is_last
+                if not is_last and stop_when is not None and stop_when(output):
+                    record_usage(agent_name, result)
+                    # Leaving normally would drain the rest of the response
+                    raise _StopGeneration
+            record_usage(agent_name, result)
+    except _StopGeneration:
+        AGENT_STREAM_STOPS.inc(agent=agent_name)
+    except Exception:
+        AGENT_CALL_ERRORS.inc(agent=agent_name)
+        raise
+    finally:
+        AGENT_CALL_DURATION.observe(time.perf_counter() - start, agent=agent_name)
@@ -1,7 +1,38 @@
 """
 Grafos LangGraph para orquestração do sistema
+
+Os nomes públicos são carregados sob demanda para que importar o pacote
+não traga ``langgraph`` antes de ser necessário.
 """
 
-from .base_graph import create_base_graph, BaseGraphState
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+_EXPORTS = {
+    "create_base_graph": ".base_graph",
+    "create_checkpointer": ".base_graph",
+    "BaseGraphState": ".base_graph",
+    "SqliteCheckpointer": ".sqlite_checkpointer",
+    "iter_source_files": ".pipeline",
+    "run_path_pipeline": ".pipeline",
+    "run_pipeline": ".pipeline",
+    "FingerprintStore": ".incremental",
+    "run_incremental": ".incremental",
+    "PreAnalyzer": ".preanalysis",
+    "run_preanalyzed_pipeline": ".preanalysis",
+    "Priority": ".scheduler",
+    "SessionScheduler": ".scheduler",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = list(_EXPORTS)
 
-__all__ = ["create_base_graph", "BaseGraphState"] 
\ No newline at end of file
+if TYPE_CHECKING:
+    from .base_graph import create_base_graph, create_checkpointer, BaseGraphState
+    from .sqlite_checkpointer import SqliteCheckpointer
+    from .pipeline import iter_source_files, run_path_pipeline, run_pipeline
+    from .incremental import FingerprintStore, run_incremental
+    from .preanalysis import PreAnalyzer, run_preanalyzed_pipeline
+    from .scheduler import Priority, SessionScheduler
@@ -2,71 +2,297 @@
 StateGraph base para o sistema de conversão de código
 """
 
-from typing import Dict, Any, Optional
+from typing import Annotated, Any, Callable, Dict, FrozenSet, List, Optional
 import uuid
 from datetime import datetime
 
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
 from pydantic import BaseModel, Field
 
-from ..models.base_models import SystemState, SourceCode, LanguageType
+from ..models.base_models import (
+    CodeAnalysisResult, Dependencies, EnrichedAST, LanguageDetection,
+    SystemState, SourceCode, LanguageType
+)
+from ..models.config import CheckpointerConfig
+from ..models.event_log import EventCode, EventLog, make_event, merge_event_logs
+from ..tools.ast_summary import summarize_ast_locally
+from ..tools.dependency_parser import extract_dependencies_locally
+from ..tools.language_heuristics import detect_language_locally
+from ..tools.metrics import instrument_node
+from .sqlite_checkpointer import SqliteCheckpointer
+from .state_serde import StateSerializer
+
+# Ramos de análise independentes: cada um grava uma chave em analysis_partials
+ANALYSIS_BRANCHES = ("language_detection", "dependency_extraction", "ast_analysis")
+
+_PARTIAL_TYPES = {
+    "language_detection": LanguageDetection,
+    "dependencies": Dependencies,
+    "enriched_ast": EnrichedAST,
+}
+
+
+def merge_analysis_partials(left: Optional[Dict[str, Any]],
+                            right: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Redutor dos resultados parciais dos ramos paralelos
+
+    Cada ramo grava chaves próprias, então a união é suficiente; uma chave
+    com valor ``None`` é removida (o ramo troca ``<chave>_error`` por
+    ``<chave>`` ou vice-versa) e ``None`` no lugar do dict descarta os
+    parciais depois que o nó de junção os consumiu.
+    """
+    if right is None:
+        return {}
+    merged = {**(left or {}), **right}
+    for key, value in right.items():
+        if value is None:
+            del merged[key]
+    return merged
 
 
 class BaseGraphState(BaseModel):
     """Estado base para os grafos LangGraph"""
     system_state: SystemState = Field(..., description="Estado do sistema")
-    messages: list[str] = Field(default_factory=list, description="Mensagens de log")
+    events: Annotated[EventLog, merge_event_logs] = Field(default_factory=EventLog, description="Log de eventos")
+    analysis_partials: Annotated[Dict[str, Any], merge_analysis_partials] = Field(
+        default_factory=dict, description="Resultados parciais dos ramos de análise"
+    )
+    
+    @property
+    def messages(self) -> List[str]:
+        """Mensagens de log formatadas a partir do log de eventos"""
+        return self.events.messages()
     
     def add_message(self, message: str):
         """Adiciona uma mensagem de log"""
-        timestamp = datetime.now().isoformat()
-        self.messages.append(f"[{timestamp}] {message}")
+        self.events.append(EventCode.MESSAGE, self.system_state.current_phase, text=message)
     
     def update_phase(self, phase: str):
         """Atualiza a fase atual"""
         self.system_state.current_phase = phase
         self.system_state.updated_at = datetime.now()
-        self.add_message(f"Fase atualizada para: {phase}")
+        self.events.append(EventCode.PHASE_CHANGED, phase)
 
 
-def initialization_node(state: BaseGraphState) -> BaseGraphState:
+def _phase_update(state: BaseGraphState, phase: str, *codes: EventCode, **changes: Any) -> Dict[str, Any]:
+    """Atualização parcial que muda a fase; os nós retornam apenas o que mudou
+
+    Com redutores no estado, devolver o estado inteiro duplicaria os
+    eventos acumulados. O SystemState de entrada não é alterado: a fase e
+    os demais campos de ``changes`` vão numa cópia rasa.
+    """
+    previous = state.system_state.current_phase
+    system_state = state.system_state.model_copy(
+        update={"current_phase": phase, "updated_at": datetime.now(), **changes}
+    )
+    return {
+        "system_state": system_state,
+        "events": [make_event(code, previous) for code in codes] + [make_event(EventCode.PHASE_CHANGED, phase)],
+    }
+
+
+def initialization_node(state: BaseGraphState) -> Dict[str, Any]:
     """Nó de inicialização do sistema"""
-    state.add_message("Sistema iniciado")
-    state.update_phase("initialized")
-    
-    return state
+    return _phase_update(state, "initialized", EventCode.SESSION_STARTED)
+
+
+def _branch_result(name: str, key: str, phase: str, result: Any) -> Dict[str, Any]:
+    """Atualização de um ramo concluído; descarta um erro anterior da mesma chave"""
+    return {
+        "analysis_partials": {key: result, f"{key}_error": None},
+        "events": [make_event(EventCode.BRANCH_COMPLETED, phase, branch=name)],
+    }
+
+
+def _branch_failure(name: str, key: str, phase: str, error: Exception) -> Dict[str, Any]:
+    """Atualização de um ramo com falha; descarta um resultado anterior da mesma chave"""
+    return {
+        "analysis_partials": {f"{key}_error": f"{name}: {error}", key: None},
+        "events": [make_event(EventCode.BRANCH_FAILED, phase, branch=name, error=str(error))],
+    }
+
+
+def _analysis_node(name: str, key: str, analyze: Callable[[SourceCode], BaseModel]) -> Callable:
+    """Cria um nó de análise síncrono que grava um único resultado parcial
+
+    Um resultado já presente no estado inicial (pré-análise em processos)
+    é mantido sem recalcular.
+    """
+    def node(state: BaseGraphState) -> Dict[str, Any]:
+        source = state.system_state.original_source
+        if source is None:
+            return {}
+        phase = state.system_state.current_phase
+        if key in state.analysis_partials or f"{key}_error" in state.analysis_partials:
+            return {"events": [make_event(EventCode.BRANCH_COMPLETED, phase, branch=name, precomputed=True)]}
+        try:
+            result = analyze(source)
+        except Exception as e:
+            return _branch_failure(name, key, phase, e)
+        return _branch_result(name, key, phase, result)
+
+    node.__name__ = f"{name}_node"
+    return node
+
+
+def _async_analysis_node(name: str, key: str, analyze: Callable[[SourceCode], Any]) -> Callable:
+    """Versão assíncrona de _analysis_node, para ramos que chamam agentes
+
+    O agente substitui a análise local: um resultado local pré-calculado
+    para a mesma chave é trocado pelo do agente (run_preanalyzed_pipeline
+    nem calcula esses ramos, veja agent_branches).
+    """
+    async def node(state: BaseGraphState) -> Dict[str, Any]:
+        source = state.system_state.original_source
+        if source is None:
+            return {}
+        phase = state.system_state.current_phase
+        try:
+            result = await analyze(source)
+        except Exception as e:
+            return _branch_failure(name, key, phase, e)
+        return _branch_result(name, key, phase, result)
 
+    node.__name__ = f"{name}_node"
+    return node
 
-def validation_node(state: BaseGraphState) -> BaseGraphState:
+
+def _streaming_analysis_node(name: str, key: str, stream: Callable[[SourceCode], Any]) -> Callable:
+    """Versão de _async_analysis_node para agentes com saída em streaming
+
+    Cada resultado parcial é publicado no modo ``custom`` do stream do grafo
+    como ``{"branch": name, "partial": resultado}``, para que consumidores de
+    ``graph.astream(..., stream_mode="custom")`` comecem a trabalhar antes do
+    fim da resposta. O último resultado é o gravado em analysis_partials.
+    """
+    async def analyze(source: SourceCode) -> Any:
+        write = get_stream_writer()
+        result = None
+        async for result in stream(source):
+            write({"branch": name, "partial": result})
+        if result is None:
+            raise ValueError("o agente não produziu resultado")
+        return result
+
+    return _async_analysis_node(name, key, analyze)
+
+
+language_detection_node = _analysis_node(
+    "language_detection", "language_detection",
+    lambda source: detect_language_locally(source.content)
+)
+dependency_extraction_node = _analysis_node(
+    "dependency_extraction", "dependencies", extract_dependencies_locally
+)
+ast_analysis_node = _analysis_node("ast_analysis", "enriched_ast", summarize_ast_locally)
+
+
+def _partial(partials: Dict[str, Any], key: str) -> Optional[BaseModel]:
+    """Recupera um parcial; após checkpoint ele pode voltar como dict"""
+    value = partials.get(key)
+    if value is None or isinstance(value, BaseModel):
+        return value
+    return _PARTIAL_TYPES[key].model_validate(value)
+
+
+def merge_analysis_node(state: BaseGraphState) -> Dict[str, Any]:
+    """Nó de junção: monta o CodeAnalysisResult a partir dos ramos paralelos"""
+    source = state.system_state.original_source
+    if source is None:
+        return {"events": [make_event(EventCode.ANALYSIS_SKIPPED, state.system_state.current_phase)]}
+
+    partials = state.analysis_partials
+    changes: Dict[str, Any] = {}
+    errors = [value for key, value in partials.items() if key.endswith("_error")]
+    if errors:
+        changes["error_messages"] = [*state.system_state.error_messages, *errors]
+
+    results = {key: _partial(partials, key) for key in _PARTIAL_TYPES}
+    if all(result is not None for result in results.values()):
+        # Transição interna: as partes já são modelos validados
+        changes["analysis_result"] = CodeAnalysisResult.model_construct(source_code=source, **results)
+
+    update = _phase_update(state, "analyzed", EventCode.ANALYSIS_MERGED, **changes)
+    update["analysis_partials"] = None
+    return update
+
+
+def validation_node(state: BaseGraphState) -> Dict[str, Any]:
     """Nó de validação básica"""
-    state.add_message("Validação básica executada")
-    
     # Validação básica do estado
+    changes: Dict[str, Any] = {}
     if not state.system_state.session_id:
-        state.system_state.error_messages.append("Session ID não encontrado")
+        changes["error_messages"] = [*state.system_state.error_messages, "Session ID não encontrado"]
     
-    state.update_phase("validated")
-    return state
+    return _phase_update(state, "validated", EventCode.VALIDATED, **changes)
+
+
+def create_checkpointer(config: Optional[CheckpointerConfig] = None):
+    """Cria o checkpointer escolhido em ``SystemConfig.checkpointer``"""
+    config = config or CheckpointerConfig()
+    if config.backend == "sqlite":
+        return SqliteCheckpointer(config.path, compress_threshold=config.compress_threshold)
+    return MemorySaver(serde=StateSerializer())
 
 
-def create_base_graph() -> StateGraph:
+def create_base_graph(language_agent=None, dependency_agent=None, checkpointer=None,
+                      stream_partials: bool = False) -> StateGraph:
     """
     Cria o grafo base do sistema com checkpointing
+
+    Os nós de análise só dependem do código fonte e rodam como ramos
+    paralelos entre a inicialização e o nó de junção, então a latência
+    por arquivo é a do ramo mais lento. Agentes informados substituem as
+    análises locais correspondentes (exigem ``ainvoke``). ``checkpointer``
+    aceita qualquer BaseCheckpointSaver, como o de create_checkpointer.
+    Com ``stream_partials`` os agentes rodam em streaming e publicam seus
+    resultados parciais no modo ``custom`` de ``graph.astream``.
     """
-    # Configurar o checkpointer em memória
-    checkpointer = MemorySaver()
+    # Configurar o checkpointer (em memória por padrão)
+    if checkpointer is None:
+        checkpointer = create_checkpointer()
     
     # Criar o grafo
     workflow = StateGraph(BaseGraphState)
     
-    # Adicionar nós
-    workflow.add_node("initialization", initialization_node)
-    workflow.add_node("validation", validation_node)
+    # Adicionar nós (cada um medido em graph_node_duration_seconds)
+    language_node, dependency_node = language_detection_node, dependency_extraction_node
+    if language_agent is not None:
+        language_node = (
+            _streaming_analysis_node("language_detection", "language_detection",
+                                     lambda source: language_agent.detect_language_stream(source.content))
+            if stream_partials else
+            _async_analysis_node("language_detection", "language_detection",
+                                 lambda source: language_agent.detect_language(source.content))
+        )
+    if dependency_agent is not None:
+        dependency_node = (
+            _streaming_analysis_node("dependency_extraction", "dependencies",
+                                     dependency_agent.extract_dependencies_stream)
+            if stream_partials else
+            _async_analysis_node("dependency_extraction", "dependencies", dependency_agent.extract_dependencies)
+        )
+    nodes = {
+        "initialization": initialization_node,
+        "language_detection": language_node,
+        "dependency_extraction": dependency_node,
+        "ast_analysis": ast_analysis_node,
+        "merge_analysis": merge_analysis_node,
+        "validation": validation_node,
+    }
+    agents = {"language_detection": language_agent, "dependency_extraction": dependency_agent}
+    for name, node in nodes.items():
+        metadata = {"agent": True} if agents.get(name) is not None else None
+        workflow.add_node(name, instrument_node(name, node), metadata=metadata)
     
-    # Definir fluxo
+    # Definir fluxo: fan-out após a inicialização, fan-in no nó de junção
     workflow.add_edge(START, "initialization")
-    workflow.add_edge("initialization", "validation")
+    for branch in ANALYSIS_BRANCHES:
+        workflow.add_edge("initialization", branch)
+    workflow.add_edge(list(ANALYSIS_BRANCHES), "merge_analysis")
+    workflow.add_edge("merge_analysis", "validation")
     workflow.add_edge("validation", END)
     
     # Compilar com checkpointing
@@ -75,10 +301,27 @@ def create_base_graph() -> StateGraph:
     return graph
 
 
+def agent_branches(graph) -> FrozenSet[str]:
+    """Ramos de análise que ``graph`` entrega a agentes (não usam a análise local)"""
+    return frozenset(
+        name for name in ANALYSIS_BRANCHES
+        if (graph.builder.nodes[name].metadata or {}).get("agent")
+    )
+
+
 def create_initial_state(source_code: Optional[str] = None, 
-                        language: Optional[LanguageType] = None) -> BaseGraphState:
+                        language: Optional[LanguageType] = None,
+                        filename: Optional[str] = None,
+                        metadata: Optional[Dict[str, Any]] = None,
+                        event_log: Optional[EventLog] = None,
+                        source: Optional[SourceCode] = None) -> BaseGraphState:
     """
     Cria o estado inicial do sistema
+
+    ``event_log`` permite escolher a capacidade do log de eventos e o
+    arquivo que recebe os eventos expulsos do buffer. ``source`` usa um
+    SourceCode já construído (e possivelmente já guardado no BlobStore)
+    no lugar de ``source_code``/``language``.
     """
     session_id = str(uuid.uuid4())
     
@@ -86,14 +329,18 @@ def create_initial_state(source_code: Optional[str] = None,
     system_state = SystemState(session_id=session_id)
     
     # Se código fonte foi fornecido, adicionar ao estado
-    if source_code and language:
+    if source is not None:
+        system_state.original_source = source
+    elif source_code and language:
         system_state.original_source = SourceCode(
             content=source_code,
-            language=language
+            language=language,
+            filename=filename,
+            metadata=metadata or {}
         )
     
     # Criar estado do grafo
-    graph_state = BaseGraphState(system_state=system_state)
-    graph_state.add_message("Estado inicial criado")
+    graph_state = BaseGraphState(system_state=system_state, events=event_log if event_log is not None else EventLog())
+    graph_state.events.append(EventCode.STATE_CREATED, system_state.current_phase)
     
     return graph_state 
\ No newline at end of file
@@ -0,0 +1,412 @@
+"""
+Reanálise incremental guiada por impressões digitais dos arquivos
+
+Um FingerprintStore (SQLite) guarda, por arquivo, ``(mtime_ns, tamanho,
+sha256)``, as chaves dos módulos que ele importa e o resumo da última
+análise (o CodeAnalysisResult sem o conteúdo, como no JSONL do pipeline).
+Numa nova execução só passam pelo grafo os arquivos alterados e os que
+importam algum deles, então o custo acompanha o tamanho do diff.
+
+As alterações vêm de uma de três fontes:
+
+- ``stat``: mtime e tamanho; só arquivos com stat diferente são lidos e
+  têm o hash comparado (um ``touch`` não dispara reanálise);
+- ``hash``: lê e compara o hash de todos os arquivos;
+- ``git``: ``git diff`` local contra uma referência mais os arquivos não
+  rastreados; supõe que o store foi atualizado naquela referência.
+
+Os imports são guardados como chaves de módulo: nomes pontuados em Python
+(``pkg.mod``, com os relativos já resolvidos) e caminhos sem extensão em
+JavaScript/TypeScript (``src/util``). Um arquivo responde por todos os
+sufixos pontuados do seu caminho, o que pode reanalisar arquivos a mais,
+nunca a menos.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import posixpath
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, TextIO
+
+from ..models.base_models import LanguageType, SourceCode
+from ..tools.dependency_parser import import_specifiers
+from .pipeline import (
+    DEFAULT_IGNORE_PATTERNS,
+    DEFAULT_MAX_FILE_BYTES,
+    DEFAULT_MAX_IN_FLIGHT,
+    EXTENSION_LANGUAGES,
+    FAILED_PHASES,
+    _is_ignored,
+    iter_source_paths,
+    load_ignore_patterns,
+    load_source,
+    run_pipeline,
+)
+
+DETECTION_MODES = ("stat", "hash", "git")
+
+# Limite de parâmetros por consulta IN (o SQLite antigo aceita 999)
+_QUERY_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    result TEXT
+);
+CREATE TABLE IF NOT EXISTS imports (
+    path TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (path, key)
+);
+CREATE INDEX IF NOT EXISTS imports_by_key ON imports (key);
+"""
+
+
+class Fingerprint(NamedTuple):
+    """Impressão digital de um arquivo"""
+    mtime_ns: int
+    size: int
+    sha256: str
+
+
+class ChangeSet(NamedTuple):
+    """Arquivos alterados desde a última execução (caminhos relativos)"""
+    changed: Dict[str, Fingerprint]
+    deleted: List[str]
+    touched: Dict[str, Fingerprint]
+    scanned: int
+
+
+def fingerprint_file(path: str) -> Fingerprint:
+    """Stat e SHA-256 do conteúdo de ``path``"""
+    stat = os.stat(path)
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return Fingerprint(stat.st_mtime_ns, stat.st_size, digest.hexdigest())
+
+
+def module_keys(relative_path: str) -> List[str]:
+    """Chaves pelas quais outros arquivos importam ``relative_path``"""
+    stem, extension = posixpath.splitext(relative_path)
+    if EXTENSION_LANGUAGES.get(extension.lower()) == LanguageType.PYTHON:
+        parts = stem.split("/")
+        if parts[-1] == "__init__":
+            parts = parts[:-1]
+        return [".".join(parts[index:]) for index in range(len(parts))]
+
+    keys = [stem]
+    if posixpath.basename(stem) == "index" and posixpath.dirname(stem):
+        keys.append(posixpath.dirname(stem))
+    return keys
+
+
+def import_keys(source_code: SourceCode) -> List[str]:
+    """Chaves dos módulos locais que ``source_code`` pode importar"""
+    relative_path = source_code.filename or ""
+    keys: List[str] = []
+    if source_code.language == LanguageType.PYTHON:
+        package = relative_path.split("/")[:-1]
+        for specifier in import_specifiers(source_code):
+            name = specifier.lstrip(".")
+            level = len(specifier) - len(name)
+            if level:
+                # Um ponto é o pacote do arquivo; cada ponto extra sobe um nível
+                if level - 1 > len(package):
+                    continue
+                base = package[:len(package) - (level - 1)]
+                name = ".".join([*base, name] if name else base)
+            if name:
+                keys.append(name)
+    else:
+        directory = posixpath.dirname(relative_path)
+        for specifier in import_specifiers(source_code):
+            if not specifier.startswith("."):
+                continue
+            target = posixpath.normpath(posixpath.join(directory, specifier))
+            stem, extension = posixpath.splitext(target)
+            if extension.lower() in EXTENSION_LANGUAGES:
+                target = stem
+            if not target.startswith(".."):
+                keys.append(target)
+    return list(dict.fromkeys(keys))
+
+
+class FingerprintStore:
+    """Impressões digitais, imports e resultados por arquivo em SQLite"""
+
+    def __init__(self, path: str = ":memory:"):
+        """Abre (ou cria) o banco em ``path``"""
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+
+    def get(self, path: str) -> Optional[Fingerprint]:
+        """Impressão digital gravada para ``path``"""
+        row = self.conn.execute(
+            "SELECT mtime_ns, size, sha256 FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        return Fingerprint(*row) if row else None
+
+    def fingerprints(self) -> Dict[str, Fingerprint]:
+        """Todas as impressões digitais gravadas"""
+        return {
+            path: Fingerprint(mtime_ns, size, sha256)
+            for path, mtime_ns, size, sha256 in self.conn.execute(
+                "SELECT path, mtime_ns, size, sha256 FROM files")
+        }
+
+    def result(self, path: str) -> Optional[Dict[str, Any]]:
+        """Resumo da última análise de ``path``"""
+        row = self.conn.execute("SELECT result FROM files WHERE path = ?", (path,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def record(self, path: str, fingerprint: Fingerprint, keys: Iterable[str],
+               result: Optional[Dict[str, Any]]) -> None:
+        """Grava o estado de um arquivo analisado"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files (path, mtime_ns, size, sha256, result) VALUES (?, ?, ?, ?, ?)",
+                (path, *fingerprint, json.dumps(result, ensure_ascii=False) if result is not None else None)
+            )
+            self.conn.execute("DELETE FROM imports WHERE path = ?", (path,))
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO imports (path, key) VALUES (?, ?)", [(path, key) for key in keys]
+            )
+
+    def touch(self, path: str, fingerprint: Fingerprint) -> None:
+        """Atualiza o stat de um arquivo cujo conteúdo não mudou"""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?",
+                (fingerprint.mtime_ns, fingerprint.size, path)
+            )
+
+    def remove(self, path: str) -> None:
+        """Esquece um arquivo apagado"""
+        with self.conn:
+            self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+            self.conn.execute("DELETE FROM imports WHERE path = ?", (path,))
+
+    def dependents(self, paths: Iterable[str], transitive: bool = False) -> Set[str]:
+        """Arquivos que importam algum de ``paths`` (sem incluir os próprios)
+
+        Args:
+            paths: Caminhos relativos alterados ou apagados
+            transitive: Segue também quem importa os dependentes
+        """
+        origin = set(paths)
+        found: Set[str] = set()
+        frontier = origin
+        while frontier:
+            keys = [key for path in frontier for key in module_keys(path)]
+            batch: Set[str] = set()
+            for start in range(0, len(keys), _QUERY_BATCH):
+                chunk = keys[start:start + _QUERY_BATCH]
+                batch.update(row[0] for row in self.conn.execute(
+                    f"SELECT DISTINCT path FROM imports WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ))
+            frontier = batch - found - origin
+            found |= frontier
+            if not transitive:
+                break
+        return found
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "FingerprintStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def git_changed_paths(root: str, since: str) -> List[str]:
+    """Caminhos (relativos a ``root``) alterados desde ``since`` e não rastreados"""
+    def git(*args: str) -> List[str]:
+        completed = subprocess.run(
+            ["git", "-C", root, *args], capture_output=True, text=True, check=True
+        )
+        return [path for path in completed.stdout.split("\0") if path]
+
+    changed = git("diff", "--name-only", "--relative", "--no-renames", "-z", since, "--")
+    untracked = git("ls-files", "--others", "--exclude-standard", "-z")
+    return sorted(set(changed) | set(untracked))
+
+
+def detect_changes(root: str, store: FingerprintStore,
+                   mode: str = "stat",
+                   since: Optional[str] = None,
+                   ignore_patterns: Optional[Iterable[str]] = None,
+                   use_gitignore: bool = True) -> ChangeSet:
+    """Compara a árvore sob ``root`` com o store
+
+    Args:
+        root: Diretório raiz do repositório
+        store: Estado da última execução
+        mode: ``stat``, ``hash`` ou ``git`` (exige ``since``)
+        since: Referência git para o modo ``git``
+        ignore_patterns: Como em iter_source_files
+        use_gitignore: Como em iter_source_files
+    """
+    if mode not in DETECTION_MODES:
+        raise ValueError(f"Modo de detecção desconhecido: {mode}")
+    root_path = Path(root).resolve()
+    changed: Dict[str, Fingerprint] = {}
+    touched: Dict[str, Fingerprint] = {}
+    scanned = 0
+
+    def compare(path: str, relative_path: str, known: Optional[Fingerprint]) -> None:
+        if mode == "stat" and known is not None:
+            stat = os.stat(path)
+            if (stat.st_mtime_ns, stat.st_size) == known[:2]:
+                return
+        current = fingerprint_file(path)
+        if known is None or current.sha256 != known.sha256:
+            changed[relative_path] = current
+        elif current[:2] != known[:2]:
+            touched[relative_path] = current
+
+    if mode == "git":
+        if since is None:
+            raise ValueError("O modo git exige uma referência (since)")
+        patterns = list(DEFAULT_IGNORE_PATTERNS if ignore_patterns is None else ignore_patterns)
+        if use_gitignore:
+            patterns.extend(load_ignore_patterns(root_path))
+        deleted = []
+        for relative_path in git_changed_paths(str(root_path), since):
+            name = posixpath.basename(relative_path)
+            if (os.path.splitext(name)[1].lower() not in EXTENSION_LANGUAGES
+                    or any(_is_ignored(part, part.rsplit("/", 1)[-1], patterns)
+                           for part in _path_prefixes(relative_path))):
+                continue
+            path = str(root_path / relative_path)
+            scanned += 1
+            if os.path.isfile(path):
+                compare(path, relative_path, store.get(relative_path))
+            elif store.get(relative_path) is not None:
+                deleted.append(relative_path)
+        return ChangeSet(changed, deleted, touched, scanned)
+
+    known = store.fingerprints()
+    for path, relative_path, _ in iter_source_paths(str(root_path), ignore_patterns, use_gitignore):
+        scanned += 1
+        try:
+            compare(path, relative_path, known.pop(relative_path, None))
+        except OSError:
+            continue
+    return ChangeSet(changed, sorted(known), touched, scanned)
+
+
+def _path_prefixes(relative_path: str) -> Iterator[str]:
+    """``a``, ``a/b``, ``a/b/c.py``: cada diretório também pode ser ignorado"""
+    parts = relative_path.split("/")
+    for index in range(1, len(parts) + 1):
+        yield "/".join(parts[:index])
+
+
+async def run_incremental(root: str,
+                          store: FingerprintStore,
+                          output: TextIO,
+                          graph=None,
+                          mode: str = "stat",
+                          since: Optional[str] = None,
+                          transitive: bool = False,
+                          max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                          ignore_patterns: Optional[Iterable[str]] = None,
+                          use_gitignore: bool = True,
+                          max_file_bytes: int = DEFAULT_MAX_FILE_BYTES) -> Dict[str, int]:
+    """Reanalisa apenas os arquivos alterados e os que os importam
+
+    Os resumos dos arquivos reanalisados vão para ``output`` (JSONL, como
+    em run_pipeline) e para o store; arquivos com falha não são gravados,
+    então voltam na próxima execução.
+
+    Returns:
+        Contadores de processados, falhas, dependentes, inalterados (entre
+        os arquivos examinados) e apagados
+    """
+    root_path = Path(root).resolve()
+    changes = detect_changes(str(root_path), store, mode, since, ignore_patterns, use_gitignore)
+
+    for relative_path, fingerprint in changes.touched.items():
+        store.touch(relative_path, fingerprint)
+    dependents = store.dependents([*changes.changed, *changes.deleted], transitive) - set(changes.deleted)
+    for relative_path in changes.deleted:
+        store.remove(relative_path)
+
+    pending: Dict[str, Any] = {}
+
+    def sources() -> Iterator[SourceCode]:
+        for relative_path in sorted(set(changes.changed) | dependents):
+            language = EXTENSION_LANGUAGES[os.path.splitext(relative_path)[1].lower()]
+            path = str(root_path / relative_path)
+            source_code = load_source(path, relative_path, language, max_file_bytes)
+            if source_code is None:
+                continue
+            fingerprint = changes.changed.get(relative_path) or store.get(relative_path)
+            pending[relative_path] = (fingerprint or fingerprint_file(path), import_keys(source_code))
+            yield source_code
+
+    def record(summary: Dict[str, Any]) -> None:
+        fingerprint, keys = pending.pop(summary["filename"])
+        if summary["phase"] not in FAILED_PHASES:
+            store.record(summary["filename"], fingerprint, keys, summary)
+
+    stats = await run_pipeline(sources(), output, graph, max_in_flight, on_summary=record)
+    stats["dependents"] = len(dependents - set(changes.changed))
+    stats["unchanged"] = changes.scanned - len(changes.changed)
+    stats["deleted"] = len(changes.deleted)
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Ponto de entrada de linha de comando"""
+    parser = argparse.ArgumentParser(description="Reanalisa apenas os arquivos alterados de um repositório")
+    parser.add_argument("root", help="Diretório raiz do repositório")
+    parser.add_argument("--store", default=".cache/fingerprints.sqlite",
+                        help="Banco SQLite com as impressões digitais e resultados")
+    parser.add_argument("-o", "--output", help="Arquivo JSONL de saída (padrão: stdout)")
+    parser.add_argument("--detect", choices=DETECTION_MODES, default="stat",
+                        help="Como detectar alterações (git exige --since)")
+    parser.add_argument("--since", default=None, help="Referência git do modo git (ex.: HEAD~1)")
+    parser.add_argument("--transitive", action="store_true",
+                        help="Reanalisa também quem importa os dependentes, recursivamente")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                        help="Máximo de arquivos em processamento simultâneo")
+    parser.add_argument("--ignore", action="append", default=None,
+                        help="Padrão adicional a ignorar (pode repetir)")
+    parser.add_argument("--no-gitignore", action="store_true", help="Não aplica o .gitignore da raiz")
+    args = parser.parse_args(argv)
+
+    patterns = DEFAULT_IGNORE_PATTERNS + (args.ignore or [])
+    options = dict(mode=args.detect, since=args.since, transitive=args.transitive,
+                   max_in_flight=args.max_in_flight, ignore_patterns=patterns,
+                   use_gitignore=not args.no_gitignore)
+    with FingerprintStore(args.store) as store:
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as output:
+                stats = asyncio.run(run_incremental(args.root, store, output, **options))
+        else:
+            stats = asyncio.run(run_incremental(args.root, store, sys.stdout, **options))
+
+    print(json.dumps(stats), file=sys.stderr)
+    return 0 if stats["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
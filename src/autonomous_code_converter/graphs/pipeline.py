@@ -0,0 +1,354 @@
+"""
+Pipeline de ingestão em streaming de repositórios
+
+Percorre a árvore de diretórios produzindo objetos SourceCode sob demanda,
+executa cada arquivo no grafo com uma janela limitada de sessões em
+andamento e grava um resultado JSONL por arquivo assim que ele termina.
+A memória usada depende apenas do tamanho da janela, não do repositório.
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from ..agents.batching import run_bounded
+from ..models.base_models import LanguageType, SourceCode
+from ..models.blob_store import BlobStore, set_default_blob_store
+from ..tools.api_index import ApiIndex, set_default_api_index
+from ..tools.metrics import PIPELINE_IN_FLIGHT, MetricsServer, SnapshotWriter
+from .base_graph import BaseGraphState, create_base_graph, create_initial_state
+
+EXTENSION_LANGUAGES: Dict[str, LanguageType] = {
+    ".py": LanguageType.PYTHON,
+    ".pyw": LanguageType.PYTHON,
+    ".js": LanguageType.JAVASCRIPT,
+    ".mjs": LanguageType.JAVASCRIPT,
+    ".cjs": LanguageType.JAVASCRIPT,
+    ".jsx": LanguageType.JAVASCRIPT,
+    ".ts": LanguageType.TYPESCRIPT,
+    ".mts": LanguageType.TYPESCRIPT,
+    ".cts": LanguageType.TYPESCRIPT,
+    ".tsx": LanguageType.TYPESCRIPT,
+}
+
+DEFAULT_IGNORE_PATTERNS = [
+    ".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv",
+    ".mypy_cache", ".pytest_cache", ".tox", "dist", "build", "*.min.js",
+]
+
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_MAX_FILE_BYTES = 1_000_000
+
+# Fases finais contadas como falha nos contadores do pipeline
+FAILED_PHASES = ("failed", "expired")
+
+
+def load_ignore_patterns(root: Path) -> List[str]:
+    """Lê padrões simples do .gitignore da raiz (negações são ignoradas)"""
+    gitignore = root / ".gitignore"
+    if not gitignore.is_file():
+        return []
+
+    patterns = []
+    for line in gitignore.read_text(encoding="utf-8", errors="ignore").splitlines():
+        line = line.strip()
+        if not line or line.startswith(("#", "!")):
+            continue
+        patterns.append(line.strip("/"))
+    return patterns
+
+
+def _is_ignored(relative_path: str, name: str, patterns: Iterable[str]) -> bool:
+    return any(
+        fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relative_path, pattern)
+        for pattern in patterns
+    )
+
+
+def iter_source_paths(root: str,
+                      ignore_patterns: Optional[Iterable[str]] = None,
+                      use_gitignore: bool = True) -> Iterator[Tuple[str, str, LanguageType]]:
+    """Produz ``(caminho, caminho relativo, linguagem)`` dos arquivos suportados
+
+    Apenas percorre a árvore; nenhum arquivo é aberto. Os parâmetros são os
+    de iter_source_files.
+    """
+    root_path = Path(root).resolve()
+    patterns = list(DEFAULT_IGNORE_PATTERNS if ignore_patterns is None else ignore_patterns)
+    if use_gitignore:
+        patterns.extend(load_ignore_patterns(root_path))
+
+    for directory, dirnames, filenames in os.walk(root_path):
+        relative_dir = os.path.relpath(directory, root_path)
+        relative_dir = "" if relative_dir == "." else relative_dir.replace(os.sep, "/")
+
+        # Poda in-place: diretórios ignorados nunca são percorridos
+        dirnames[:] = sorted(
+            name for name in dirnames
+            if not _is_ignored(f"{relative_dir}/{name}".lstrip("/"), name, patterns)
+        )
+
+        for name in sorted(filenames):
+            language = EXTENSION_LANGUAGES.get(os.path.splitext(name)[1].lower())
+            relative_path = f"{relative_dir}/{name}".lstrip("/")
+            if language is None or _is_ignored(relative_path, name, patterns):
+                continue
+            yield os.path.join(directory, name), relative_path, language
+
+
+def load_source(path: str, relative_path: str, language: LanguageType,
+                max_file_bytes: int = DEFAULT_MAX_FILE_BYTES) -> Optional[SourceCode]:
+    """Lê um arquivo como SourceCode (None se grande demais, ilegível ou não UTF-8)"""
+    try:
+        size = os.path.getsize(path)
+        if size > max_file_bytes:
+            return None
+        with open(path, "r", encoding="utf-8") as handle:
+            content = handle.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+    return SourceCode(
+        content=content,
+        language=language,
+        filename=relative_path,
+        metadata={"path": path, "size": size}
+    )
+
+
+def iter_source_files(root: str,
+                      ignore_patterns: Optional[Iterable[str]] = None,
+                      use_gitignore: bool = True,
+                      max_file_bytes: int = DEFAULT_MAX_FILE_BYTES) -> Iterator[SourceCode]:
+    """Produz os arquivos suportados sob ``root``, um por vez
+
+    O conteúdo de cada arquivo só é lido quando o item é consumido.
+    Arquivos maiores que ``max_file_bytes`` ou que não são UTF-8 são pulados.
+
+    Args:
+        root: Diretório raiz do repositório
+        ignore_patterns: Padrões fnmatch aplicados a nomes e caminhos relativos
+            (None usa DEFAULT_IGNORE_PATTERNS)
+        use_gitignore: Também aplica os padrões do .gitignore da raiz
+        max_file_bytes: Tamanho máximo de arquivo aceito
+    """
+    for path, relative_path, language in iter_source_paths(root, ignore_patterns, use_gitignore):
+        source_code = load_source(path, relative_path, language, max_file_bytes)
+        if source_code is not None:
+            yield source_code
+
+
+def summarize_result(source_code: SourceCode, state: BaseGraphState) -> Dict[str, Any]:
+    """Resumo compacto de uma sessão, sem o conteúdo do arquivo"""
+    system_state = state.system_state
+    analysis = None
+    if system_state.analysis_result is not None:
+        analysis = system_state.analysis_result.model_dump(mode="json", exclude={"source_code"})
+
+    return {
+        "filename": source_code.filename,
+        "language": source_code.language.value,
+        "session_id": system_state.session_id,
+        "phase": system_state.current_phase,
+        "errors": list(system_state.error_messages),
+        "analysis": analysis,
+    }
+
+
+def failure_summary(source_code: SourceCode, phase: str, error: BaseException,
+                    session_id: Optional[str] = None) -> Dict[str, Any]:
+    """Resumo de uma sessão que não chegou ao fim do grafo"""
+    return {
+        "filename": source_code.filename,
+        "language": source_code.language.value,
+        "session_id": session_id,
+        "phase": phase,
+        "errors": [f"{type(error).__name__}: {error}"],
+        "analysis": None,
+    }
+
+
+async def process_source(graph, source_code: SourceCode,
+                         retain_checkpoints: bool = False,
+                         partials: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Executa um arquivo no grafo e retorna o resumo da sessão
+
+    ``partials`` são resultados de análise já calculados (como os da
+    pré-análise em processos); os nós locais do grafo não os recalculam.
+    """
+    state = create_initial_state(source=source_code)
+    if partials:
+        state.analysis_partials = dict(partials)
+    session_id = state.system_state.session_id
+    config = {"configurable": {"thread_id": session_id}}
+
+    try:
+        with PIPELINE_IN_FLIGHT.track():
+            result = await graph.ainvoke(state, config=config)
+        summary = summarize_result(source_code, BaseGraphState(**result))
+    except Exception as e:
+        summary = failure_summary(source_code, "failed", e, session_id)
+    finally:
+        # Sem isso o checkpointer guardaria o estado de todas as sessões
+        checkpointer = getattr(graph, "checkpointer", None)
+        if not retain_checkpoints and checkpointer is not None:
+            await checkpointer.adelete_thread(session_id)
+
+    return summary
+
+
+async def process_path(graph, path: str, relative_path: str, language: LanguageType,
+                       max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+                       retain_checkpoints: bool = False) -> Optional[Dict[str, Any]]:
+    """Lê um arquivo numa thread e o executa no grafo (None se for pulado)"""
+    # getsize/read bloqueariam o laço de eventos, como em preanalysis
+    source_code = await asyncio.to_thread(load_source, path, relative_path, language, max_file_bytes)
+    if source_code is None:
+        return None
+    return await process_source(graph, source_code, retain_checkpoints)
+
+
+async def write_summaries(jobs: Iterable[Callable[[], Awaitable[Optional[Dict[str, Any]]]]],
+                          output: TextIO,
+                          max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                          on_summary: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, int]:
+    """Executa ``jobs`` com no máximo ``max_in_flight`` em andamento e grava cada resumo
+
+    Cada job devolve o resumo de um arquivo (None para arquivos pulados).
+    """
+    stats = {"processed": 0, "failed": 0}
+    async for summary in run_bounded(jobs, max_in_flight):
+        if summary is None:
+            continue
+        output.write(json.dumps(summary, ensure_ascii=False) + "\n")
+        output.flush()
+        if on_summary is not None:
+            on_summary(summary)
+        stats["processed"] += 1
+        if summary["phase"] in FAILED_PHASES:
+            stats["failed"] += 1
+    return stats
+
+
+async def run_pipeline(sources: Iterable[SourceCode],
+                       output: TextIO,
+                       graph=None,
+                       max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                       retain_checkpoints: bool = False,
+                       on_summary: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, int]:
+    """Processa ``sources`` no grafo gravando uma linha JSONL por arquivo
+
+    Os arquivos são consumidos de forma preguiçosa: no máximo
+    ``max_in_flight`` sessões existem ao mesmo tempo e cada resultado é
+    gravado (e descartado) assim que fica pronto. ``on_summary`` recebe
+    cada resumo logo após a gravação.
+
+    Returns:
+        Contadores de arquivos processados e com falha
+    """
+    if graph is None:
+        graph = create_base_graph()
+
+    jobs = (
+        lambda source_code=source_code: process_source(graph, source_code, retain_checkpoints)
+        for source_code in sources
+    )
+    return await write_summaries(jobs, output, max_in_flight, on_summary)
+
+
+async def run_path_pipeline(paths: Iterable[Tuple[str, str, LanguageType]],
+                            output: TextIO,
+                            graph=None,
+                            max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                            retain_checkpoints: bool = False,
+                            max_file_bytes: int = DEFAULT_MAX_FILE_BYTES) -> Dict[str, int]:
+    """Como run_pipeline, mas lê cada arquivo de ``paths`` fora do laço de eventos
+
+    ``paths`` vem de iter_source_paths; arquivos pulados por load_source
+    não geram linha no JSONL.
+    """
+    if graph is None:
+        graph = create_base_graph()
+
+    jobs = (
+        lambda path=path, relative_path=relative_path, language=language: process_path(
+            graph, path, relative_path, language, max_file_bytes, retain_checkpoints)
+        for path, relative_path, language in paths
+    )
+    return await write_summaries(jobs, output, max_in_flight)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Ponto de entrada de linha de comando"""
+    parser = argparse.ArgumentParser(description="Analisa um repositório e grava resultados JSONL")
+    parser.add_argument("root", help="Diretório raiz do repositório")
+    parser.add_argument("-o", "--output", help="Arquivo JSONL de saída (padrão: stdout)")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                        help="Máximo de arquivos em processamento simultâneo")
+    parser.add_argument("--ignore", action="append", default=None,
+                        help="Padrão adicional a ignorar (pode repetir)")
+    parser.add_argument("--no-gitignore", action="store_true", help="Não aplica o .gitignore da raiz")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processos da pré-análise local (padrão: núcleos disponíveis; 0 desativa)")
+    parser.add_argument("--blob-store", default=None,
+                        help="Diretório de um BlobStore para os textos grandes (reduz memória e checkpoints)")
+    parser.add_argument("--api-index", default=None,
+                        help="Índice de APIs compilado (tools.api_index build) para os equivalentes C++")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Expõe /metrics (Prometheus) nesta porta local durante a execução")
+    parser.add_argument("--metrics-snapshot", default=None,
+                        help="Arquivo JSONL que recebe snapshots periódicos das métricas")
+    parser.add_argument("--metrics-interval", type=float, default=60.0,
+                        help="Intervalo entre snapshots, em segundos")
+    args = parser.parse_args(argv)
+
+    patterns = DEFAULT_IGNORE_PATTERNS + (args.ignore or [])
+    analyzer = None
+    if args.workers != 0:
+        from .preanalysis import PreAnalyzer
+        analyzer = PreAnalyzer(max_workers=args.workers, api_index_path=args.api_index)
+
+    def run(output: TextIO):
+        paths = iter_source_paths(args.root, patterns, use_gitignore=not args.no_gitignore)
+        if analyzer is None:
+            return run_path_pipeline(paths, output, max_in_flight=args.max_in_flight)
+        from .preanalysis import run_preanalyzed_pipeline
+        return run_preanalyzed_pipeline(paths, output, max_in_flight=args.max_in_flight, analyzer=analyzer)
+
+    store = BlobStore(args.blob_store) if args.blob_store else None
+    previous_store = set_default_blob_store(store) if store is not None else None
+    api_index = ApiIndex(args.api_index) if args.api_index else None
+    previous_index = set_default_api_index(api_index) if api_index is not None else None
+    server = MetricsServer(port=args.metrics_port).start() if args.metrics_port is not None else None
+    writer = SnapshotWriter(args.metrics_snapshot, args.metrics_interval).start() if args.metrics_snapshot else None
+    try:
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as output:
+                stats = asyncio.run(run(output))
+        else:
+            stats = asyncio.run(run(sys.stdout))
+    finally:
+        if analyzer is not None:
+            analyzer.close()
+        if server is not None:
+            server.stop()
+        if writer is not None:
+            writer.stop()
+        if store is not None:
+            set_default_blob_store(previous_store)
+            store.close()
+        if api_index is not None:
+            set_default_api_index(previous_index)
+            api_index.close()
+
+    print(json.dumps(stats), file=sys.stderr)
+    return 0 if stats["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Pré-análise local em processos
+
+A análise local (``ast.parse``, tokenização, hash, métricas de
+complexidade) é limitada por CPU: no mesmo laço de eventos das chamadas ao
+LLM, um arquivo grande trava todas as sessões e a execução ocupa um único
+núcleo. Aqui ela roda num ProcessPoolExecutor do tamanho dos núcleos
+disponíveis:
+
+- o trabalhador recebe só o caminho, lê o arquivo e devolve uma
+  PreAnalysis compacta (tamanho, sha256 e os resultados locais como dicts
+  JSON), nunca o texto, objetos SourceCode ou Pydantic; o processo
+  principal relê o arquivo numa thread e confere o hash;
+- os arquivos entram no pool ``window`` posições à frente do grafo, então
+  a pré-análise dos próximos arquivos acontece enquanto as sessões em
+  andamento esperam a rede.
+
+Os resultados entram em ``analysis_partials`` do estado inicial e os nós
+locais do grafo não os recalculam. Ramos que o grafo entrega a agentes
+(``agent_branches``) não são calculados no trabalhador.
+"""
+
+import asyncio
+import hashlib
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import (
+    Any, Callable, Collection, Deque, Dict, Iterable, Iterator, NamedTuple, Optional, TextIO, Tuple
+)
+
+from ..models.base_models import LanguageType, SourceCode
+from ..tools.api_index import open_api_index, set_default_api_index
+from ..tools.ast_summary import summarize_ast_locally
+from ..tools.dependency_parser import extract_dependencies_locally
+from ..tools.language_heuristics import detect_language_locally
+from .base_graph import agent_branches, create_base_graph
+from .pipeline import DEFAULT_MAX_FILE_BYTES, DEFAULT_MAX_IN_FLIGHT, load_source, process_source, write_summaries
+
+# Ramos locais calculados no trabalhador: (ramo, chave em analysis_partials, análise)
+LOCAL_ANALYSES = (
+    ("language_detection", "language_detection", lambda source: detect_language_locally(source.content)),
+    ("dependency_extraction", "dependencies", extract_dependencies_locally),
+    ("ast_analysis", "enriched_ast", summarize_ast_locally),
+)
+
+
+class PreAnalysis(NamedTuple):
+    """Resultado compacto devolvido pelo trabalhador"""
+    size: int
+    sha256: str
+    partials: Dict[str, Any]
+
+
+class PendingSource(NamedTuple):
+    """Arquivo enviado ao pool e ainda não consumido pelo grafo"""
+    path: str
+    relative_path: str
+    language: LanguageType
+    future: "Future[Optional[PreAnalysis]]"
+
+
+def available_cpus() -> int:
+    """Núcleos que este processo pode usar (respeita afinidade e cgroups de CPU)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def read_source(path: str, max_file_bytes: int = DEFAULT_MAX_FILE_BYTES) -> Optional[Tuple[str, bytes]]:
+    """Texto (quebras de linha normalizadas) e bytes de um arquivo; None como em load_source"""
+    try:
+        if os.path.getsize(path) > max_file_bytes:
+            return None
+        with open(path, "rb") as handle:
+            data = handle.read()
+        # Mesma tradução de quebras de linha da leitura em modo texto
+        return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n"), data
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def preanalyze_file(path: str, language: str,
+                    max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+                    api_index_path: Optional[str] = None,
+                    skip: Collection[str] = ()) -> Optional[PreAnalysis]:
+    """Lê e analisa um arquivo no processo trabalhador
+
+    Mesmos critérios de load_source: None se o arquivo for grande demais,
+    ilegível ou não UTF-8. Falhas de um ramo viram ``<chave>_error``, como
+    nos nós do grafo. ``api_index_path`` ativa o índice de APIs no
+    trabalhador (aberto uma vez por processo); ramos em ``skip`` não são
+    calculados.
+    """
+    if api_index_path is not None:
+        set_default_api_index(open_api_index(api_index_path))
+    read = read_source(path, max_file_bytes)
+    if read is None:
+        return None
+    content, data = read
+
+    source = SourceCode(content=content, language=LanguageType(language))
+    partials: Dict[str, Any] = {}
+    for name, key, analyze in LOCAL_ANALYSES:
+        if name in skip:
+            continue
+        try:
+            partials[key] = analyze(source).model_dump(mode="json")
+        except Exception as e:
+            partials[f"{key}_error"] = f"{name}: {e}"
+    return PreAnalysis(len(data), hashlib.sha256(data).hexdigest(), partials)
+
+
+def _mp_context():
+    # fork num processo com threads (laço de eventos, SQLite) pode travar os filhos
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class PreAnalyzer:
+    """Pool de processos da pré-análise local"""
+
+    def __init__(self, max_workers: Optional[int] = None, window: Optional[int] = None,
+                 max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+                 api_index_path: Optional[str] = None):
+        """
+        Args:
+            max_workers: Processos do pool (None usa os núcleos disponíveis)
+            window: Arquivos enviados ao pool à frente do consumo (padrão: 2 por processo)
+            max_file_bytes: Tamanho máximo de arquivo aceito
+            api_index_path: Índice de APIs compilado usado pelos trabalhadores
+        """
+        self.max_workers = max_workers or available_cpus()
+        self.window = window or 2 * self.max_workers
+        self.max_file_bytes = max_file_bytes
+        self.api_index_path = api_index_path
+        self.fallbacks = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.max_workers, mp_context=_mp_context())
+        return self._executor
+
+    def submit(self, path: str, relative_path: str, language: LanguageType,
+               skip: Collection[str] = ()) -> PendingSource:
+        """Envia um arquivo ao pool (só o caminho atravessa o processo)
+
+        ``skip`` lista os ramos que o grafo entrega a agentes.
+        """
+        future = self._pool().submit(preanalyze_file, path, language.value, self.max_file_bytes,
+                                     self.api_index_path, tuple(skip))
+        return PendingSource(path, relative_path, language, future)
+
+    def prefetch(self, paths: Iterable[Tuple[str, str, LanguageType]],
+                 skip: Collection[str] = ()) -> Iterator[PendingSource]:
+        """Produz os arquivos na ordem de ``paths`` mantendo ``window`` deles no pool
+
+        Não bloqueia: cada item é entregue assim que enviado, e o resultado
+        é aguardado em resolve.
+        """
+        pending: Deque[PendingSource] = deque()
+        for path, relative_path, language in paths:
+            pending.append(self.submit(path, relative_path, language, skip))
+            if len(pending) >= self.window:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+    async def resolve(self, pending: PendingSource) -> Optional[Tuple[SourceCode, Dict[str, Any]]]:
+        """SourceCode e resultados locais de um arquivo enviado ao pool
+
+        O texto é relido aqui, numa thread; se ele mudou desde a
+        pré-análise (hash diferente) ou se o pool falhou (processo morto, por
+        exemplo), os nós locais do grafo fazem a análise.
+        """
+        try:
+            result = await asyncio.wrap_future(pending.future)
+        except Exception:
+            self.fallbacks += 1
+            source_code = await asyncio.to_thread(load_source, pending.path, pending.relative_path,
+                                                  pending.language, self.max_file_bytes)
+            return None if source_code is None else (source_code, {})
+        if result is None:
+            return None
+
+        read = await asyncio.to_thread(read_source, pending.path, self.max_file_bytes)
+        if read is None:
+            return None
+        content, data = read
+        sha256 = hashlib.sha256(data).hexdigest()
+        partials = result.partials if sha256 == result.sha256 else {}
+        source_code = SourceCode(
+            content=content,
+            language=pending.language,
+            filename=pending.relative_path,
+            metadata={"path": pending.path, "size": len(data), "sha256": sha256}
+        )
+        return source_code, partials
+
+    def close(self) -> None:
+        """Encerra o pool, descartando arquivos ainda não analisados"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self) -> "PreAnalyzer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+async def process_pending(graph, analyzer: PreAnalyzer, pending: PendingSource,
+                          retain_checkpoints: bool = False) -> Optional[Dict[str, Any]]:
+    """Aguarda a pré-análise de um arquivo e o executa no grafo (None se pulado)"""
+    resolved = await analyzer.resolve(pending)
+    if resolved is None:
+        return None
+    source_code, partials = resolved
+    return await process_source(graph, source_code, retain_checkpoints, partials)
+
+
+async def run_preanalyzed_pipeline(paths: Iterable[Tuple[str, str, LanguageType]],
+                                   output: TextIO,
+                                   graph=None,
+                                   max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                                   analyzer: Optional[PreAnalyzer] = None,
+                                   retain_checkpoints: bool = False,
+                                   on_summary: Optional[Callable[[Dict[str, Any]], None]] = None
+                                   ) -> Dict[str, int]:
+    """run_pipeline com a análise local feita no pool de processos
+
+    ``paths`` vem de iter_source_paths. Sem ``analyzer`` um PreAnalyzer do
+    tamanho dos núcleos disponíveis é criado e encerrado ao final. Os
+    ramos que ``graph`` entrega a agentes não são pré-analisados.
+
+    Returns:
+        Contadores de arquivos processados e com falha
+    """
+    if graph is None:
+        graph = create_base_graph()
+    owned = analyzer is None
+    if owned:
+        analyzer = PreAnalyzer()
+
+    try:
+        jobs = (
+            lambda pending=pending: process_pending(graph, analyzer, pending, retain_checkpoints)
+            for pending in analyzer.prefetch(paths, skip=agent_branches(graph))
+        )
+        return await write_summaries(jobs, output, max_in_flight, on_summary)
+    finally:
+        if owned:
+            # shutdown(wait=True) aguarda os processos: fora do laço de eventos
+            await asyncio.to_thread(analyzer.close)
@@ -0,0 +1,383 @@
+"""
+Escalonador de sessões do grafo
+
+Multiplexa muitas sessões de ``create_base_graph`` num único laço de
+eventos:
+
+- fila de prioridade: sessões interativas saem antes das de lote; dentro
+  da mesma classe sai primeiro o menor prazo e, depois, a ordem de chegada;
+- prazos: uma sessão que vence na fila é descartada sem rodar e uma que
+  vence em execução é interrompida; as duas terminam com fase ``expired``;
+- cancelamento: SessionHandle.cancel tira a sessão da fila ou interrompe
+  a execução;
+- controle de admissão: o número de sessões em execução acompanha a
+  capacidade atual do LLM (o limite AIMD do cliente), e ``reserved``
+  vagas ficam sempre livres para sessões interativas;
+- contrapressão: cada classe tem uma fila limitada e ``submit`` espera
+  por espaço, então um produtor de 50 mil arquivos avança no ritmo do
+  consumo sem ocupar a fila das outras classes.
+
+Sessões não são preemptadas: um pedido interativo espera no máximo por
+uma vaga reservada, nunca pelo lote inteiro.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+from collections import deque
+from enum import IntEnum
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, TextIO, Tuple
+
+from ..models.base_models import SourceCode
+from ..tools.metrics import SCHEDULER_QUEUE_DEPTH, SCHEDULER_QUEUE_WAIT, SCHEDULER_SESSIONS
+from .base_graph import create_base_graph
+from .pipeline import DEFAULT_MAX_IN_FLIGHT, failure_summary, process_source, write_summaries
+
+DEFAULT_MAX_QUEUED = 1024
+
+
+class Priority(IntEnum):
+    """Classes de prioridade; menor valor sai primeiro da fila"""
+    INTERACTIVE = 0
+    NORMAL = 1
+    BATCH = 2
+
+
+class DeadlineExceeded(TimeoutError):
+    """Prazo da sessão vencido na fila ou em execução"""
+
+
+def llm_capacity(client, requests_per_session: int = 2) -> Callable[[], Optional[int]]:
+    """Capacidade de sessões derivada do limite de concorrência do cliente
+
+    Cada sessão faz até ``requests_per_session`` chamadas simultâneas ao
+    LLM (detecção de linguagem e extração de dependências). Sem controle
+    de vazão no cliente a capacidade é ilimitada (None).
+    """
+    def capacity() -> Optional[int]:
+        limit = client.get_rate_limit_metrics().get("concurrency_limit")
+        return None if limit is None else limit // requests_per_session
+
+    return capacity
+
+
+class SessionHandle:
+    """Sessão submetida ao escalonador
+
+    ``await handle`` (ou ``handle.result()``) devolve o resumo da sessão,
+    como process_source; uma sessão cancelada lança CancelledError.
+    Cancelar quem aguarda não cancela a sessão.
+    """
+
+    def __init__(self, scheduler: "SessionScheduler", source_code: SourceCode, priority: Priority,
+                 deadline: Optional[float], partials: Optional[Dict[str, Any]]):
+        self.source_code = source_code
+        self.priority = priority
+        self.deadline = deadline
+        self.partials = partials
+        self.status = "queued"
+        self.submitted_at = scheduler._loop.time()
+        self._scheduler = scheduler
+        self._future: asyncio.Future = scheduler._loop.create_future()
+        self._task: Optional[asyncio.Task] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def done(self) -> bool:
+        """Se a sessão já terminou (de qualquer forma)"""
+        return self._future.done()
+
+    def cancelled(self) -> bool:
+        """Se a sessão foi cancelada"""
+        return self._future.cancelled()
+
+    def cancel(self) -> bool:
+        """Cancela a sessão; False se ela já tinha terminado"""
+        if self.done():
+            return False
+        if self._task is not None:
+            return self._task.cancel()
+        self._scheduler._finish_queued(self, "cancelled")
+        return True
+
+    async def result(self) -> Dict[str, Any]:
+        """Resumo da sessão"""
+        return await asyncio.shield(self._future)
+
+    def __await__(self):
+        return self.result().__await__()
+
+
+class SessionScheduler:
+    """Escalonador de sessões com prioridades, prazos e contrapressão
+
+    Deve ser criado dentro do laço de eventos que vai usá-lo.
+    """
+
+    def __init__(self, graph=None,
+                 max_sessions: int = DEFAULT_MAX_IN_FLIGHT,
+                 capacity: Optional[Callable[[], Optional[int]]] = None,
+                 reserved: int = 1,
+                 max_queued: int = DEFAULT_MAX_QUEUED,
+                 retain_checkpoints: bool = False):
+        """
+        Args:
+            graph: Grafo compilado (None cria o grafo base)
+            max_sessions: Máximo de sessões em execução
+            capacity: Capacidade atual em sessões, consultada a cada admissão
+                (por exemplo llm_capacity(client)); None usa só max_sessions
+            reserved: Vagas que só sessões interativas podem ocupar
+            max_queued: Tamanho máximo da fila de cada classe de prioridade
+            retain_checkpoints: Mantém os checkpoints das sessões no checkpointer
+        """
+        if max_sessions < 1:
+            raise ValueError("max_sessions deve ser pelo menos 1")
+        if max_queued < 1:
+            raise ValueError("max_queued deve ser pelo menos 1")
+        self.graph = graph if graph is not None else create_base_graph()
+        self.max_sessions = max_sessions
+        self.capacity = capacity
+        self.reserved = reserved
+        self.max_queued = max_queued
+        self.retain_checkpoints = retain_checkpoints
+        self._loop = asyncio.get_running_loop()
+        self._queue: List[Tuple[int, float, int, SessionHandle]] = []
+        self._sequence = itertools.count()
+        self._space_waiters: Dict[Priority, Deque[asyncio.Future]] = {priority: deque() for priority in Priority}
+        self._queued = {priority: 0 for priority in Priority}
+        self._running: Set[SessionHandle] = set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.results = {result: 0 for result in ("completed", "failed", "expired", "cancelled")}
+
+    # Submissão
+
+    async def submit(self, source_code: SourceCode, priority: Priority = Priority.NORMAL,
+                     timeout: Optional[float] = None,
+                     partials: Optional[Dict[str, Any]] = None) -> SessionHandle:
+        """Enfileira uma sessão, esperando se a fila da classe estiver cheia
+
+        ``timeout`` é o prazo em segundos a partir da submissão, incluindo
+        a espera na fila; ``partials`` segue para process_source.
+        """
+        priority = Priority(priority)
+        waiters = self._space_waiters[priority]
+        while self._queued[priority] >= self.max_queued:
+            waiter = self._loop.create_future()
+            waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # A vaga sinalizada para este produtor passa ao próximo
+                self._wake_producer(priority)
+                raise
+            finally:
+                if waiter in waiters:
+                    waiters.remove(waiter)
+        return self._enqueue(source_code, priority, timeout, partials)
+
+    def submit_nowait(self, source_code: SourceCode, priority: Priority = Priority.NORMAL,
+                      timeout: Optional[float] = None,
+                      partials: Optional[Dict[str, Any]] = None) -> SessionHandle:
+        """Como submit, mas lança asyncio.QueueFull em vez de esperar"""
+        priority = Priority(priority)
+        if self._queued[priority] >= self.max_queued:
+            raise asyncio.QueueFull(f"fila {priority.name.lower()} cheia")
+        return self._enqueue(source_code, priority, timeout, partials)
+
+    async def run(self, source_code: SourceCode, priority: Priority = Priority.NORMAL,
+                  timeout: Optional[float] = None,
+                  partials: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Submete uma sessão e aguarda o resumo"""
+        handle = await self.submit(source_code, priority, timeout, partials)
+        return await handle
+
+    def _enqueue(self, source_code: SourceCode, priority: Priority, timeout: Optional[float],
+                 partials: Optional[Dict[str, Any]]) -> SessionHandle:
+        deadline = None if timeout is None else self._loop.time() + timeout
+        handle = SessionHandle(self, source_code, priority, deadline, partials)
+        if deadline is not None:
+            handle._timer = self._loop.call_at(deadline, self._expire_queued, handle)
+        heapq.heappush(self._queue, (priority, math.inf if deadline is None else deadline,
+                                     next(self._sequence), handle))
+        self._queued[priority] += 1
+        SCHEDULER_QUEUE_DEPTH.inc(priority=priority.name.lower())
+        self._idle.clear()
+        self._pump()
+        return handle
+
+    # Admissão
+
+    def slots(self) -> int:
+        """Sessões que podem estar em execução agora"""
+        limit = self.max_sessions
+        if self.capacity is not None:
+            capacity = self.capacity()
+            if capacity is not None:
+                limit = min(limit, capacity)
+        return max(1, limit)
+
+    def _admits(self, priority: Priority) -> bool:
+        limit = self.slots()
+        if priority != Priority.INTERACTIVE:
+            # Com capacidade até ``reserved`` as outras classes ficam sem vaga;
+            # o mínimo de uma só vale sem sessões interativas à espera ou em execução
+            limit -= self.reserved
+            if limit < 1 and not self._interactive_demand():
+                limit = 1
+        return len(self._running) < limit
+
+    def _interactive_demand(self) -> bool:
+        return (self._queued[Priority.INTERACTIVE] > 0
+                or any(handle.priority == Priority.INTERACTIVE for handle in self._running))
+
+    def _pump(self) -> None:
+        """Inicia as sessões do topo da fila enquanto houver vaga"""
+        while self._queue:
+            handle = self._queue[0][3]
+            if handle.status != "queued":
+                # Cancelada ou vencida na fila: a entrada é removida aqui
+                heapq.heappop(self._queue)
+                continue
+            if not self._admits(handle.priority):
+                break
+            heapq.heappop(self._queue)
+            self._start(handle)
+        if not self._queue and not self._running:
+            self._idle.set()
+
+    def _leave_queue(self, handle: SessionHandle) -> None:
+        self._queued[handle.priority] -= 1
+        SCHEDULER_QUEUE_DEPTH.dec(priority=handle.priority.name.lower())
+        self._wake_producer(handle.priority)
+        if handle._timer is not None:
+            handle._timer.cancel()
+
+    def _wake_producer(self, priority: Priority) -> None:
+        waiters = self._space_waiters[priority]
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def _start(self, handle: SessionHandle) -> None:
+        self._leave_queue(handle)
+        handle.status = "running"
+        SCHEDULER_QUEUE_WAIT.observe(self._loop.time() - handle.submitted_at,
+                                     priority=handle.priority.name.lower())
+        self._running.add(handle)
+        handle._task = self._loop.create_task(self._execute(handle))
+        handle._task.add_done_callback(lambda task, handle=handle: self._finish_running(handle, task))
+
+    async def _execute(self, handle: SessionHandle) -> Dict[str, Any]:
+        deadline = asyncio.timeout_at(handle.deadline)
+        try:
+            async with deadline:
+                return await process_source(self.graph, handle.source_code,
+                                            self.retain_checkpoints, handle.partials)
+        except TimeoutError:
+            # Só o prazo da sessão vira ``expired``; outros TimeoutError são falhas
+            if not deadline.expired():
+                raise
+            return failure_summary(handle.source_code, "expired",
+                                   DeadlineExceeded("prazo vencido durante a execução"))
+
+    # Término
+
+    def _record(self, handle: SessionHandle, result: str) -> None:
+        handle.status = result
+        self.results[result] += 1
+        SCHEDULER_SESSIONS.inc(priority=handle.priority.name.lower(), result=result)
+
+    def _expire_queued(self, handle: SessionHandle) -> None:
+        if handle.status == "queued":
+            self._finish_queued(handle, "expired")
+
+    def _finish_queued(self, handle: SessionHandle, result: str) -> None:
+        self._leave_queue(handle)
+        self._record(handle, result)
+        if result == "cancelled":
+            handle._future.cancel()
+        else:
+            handle._future.set_result(failure_summary(handle.source_code, "expired",
+                                                      DeadlineExceeded("prazo vencido na fila")))
+        self._pump()
+
+    def _finish_running(self, handle: SessionHandle, task: asyncio.Task) -> None:
+        self._running.discard(handle)
+        if task.cancelled():
+            self._record(handle, "cancelled")
+            handle._future.cancel()
+        elif task.exception() is not None:
+            self._record(handle, "failed")
+            handle._future.set_exception(task.exception())
+        else:
+            summary = task.result()
+            phase = summary["phase"]
+            self._record(handle, phase if phase in ("failed", "expired") else "completed")
+            handle._future.set_result(summary)
+        self._pump()
+
+    # Ciclo de vida
+
+    def stats(self) -> Dict[str, Any]:
+        """Fila por classe, sessões em execução, vagas e contadores de término"""
+        return {
+            "queued": {priority.name.lower(): count for priority, count in self._queued.items()},
+            "running": len(self._running),
+            "slots": self.slots(),
+            **self.results,
+        }
+
+    async def join(self) -> None:
+        """Aguarda a fila esvaziar e as sessões em execução terminarem"""
+        await self._idle.wait()
+
+    def cancel_all(self) -> None:
+        """Cancela todas as sessões na fila e em execução"""
+        for _, _, _, handle in list(self._queue):
+            handle.cancel()
+        for handle in list(self._running):
+            handle.cancel()
+
+    async def aclose(self, cancel: bool = False) -> None:
+        """Encerra o escalonador, cancelando ou aguardando as sessões pendentes"""
+        if cancel:
+            self.cancel_all()
+        await self.join()
+
+    async def __aenter__(self) -> "SessionScheduler":
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback) -> None:
+        await self.aclose(cancel=exc_type is not None)
+
+
+async def run_scheduled_pipeline(sources: Iterable[SourceCode],
+                                 output: TextIO,
+                                 scheduler: SessionScheduler,
+                                 priority: Priority = Priority.BATCH,
+                                 timeout: Optional[float] = None,
+                                 on_summary: Optional[Callable[[Dict[str, Any]], None]] = None
+                                 ) -> Dict[str, int]:
+    """run_pipeline com as sessões submetidas a um escalonador compartilhado
+
+    O produtor respeita a contrapressão da fila de ``priority``; sessões
+    canceladas não geram linha no JSONL.
+
+    Returns:
+        Contadores de arquivos processados e com falha
+    """
+    async def job(source_code: SourceCode) -> Optional[Dict[str, Any]]:
+        handle = await scheduler.submit(source_code, priority, timeout)
+        try:
+            return await handle
+        except asyncio.CancelledError:
+            if handle.cancelled():
+                return None
+            raise
+
+    # Submissões em andamento bastam para manter todas as vagas ocupadas
+    jobs = (lambda source_code=source_code: job(source_code) for source_code in sources)
+    return await write_summaries(jobs, output, 2 * scheduler.max_sessions, on_summary)
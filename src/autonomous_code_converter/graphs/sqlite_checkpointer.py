@@ -0,0 +1,491 @@
+"""
+Checkpointer LangGraph persistido em SQLite
+
+Substitui o MemorySaver em workers de longa duração: os checkpoints vão
+para disco e sobrevivem a reinícios. Cada canal do estado é gravado como
+um blob versionado, e apenas os canais listados em ``new_versions`` são
+escritos a cada passo. Blobs grandes são comprimidos com zlib e o banco
+usa WAL para permitir várias sessões simultâneas.
+
+O código fonte fica dentro do canal ``system_state``, que ganha versão
+nova a cada mudança de fase, e aparece de novo em
+``analysis_result.source_code``. Para que ele não seja regravado a cada
+passo, todo SourceCode com texto inline é gravado no checkpoint como uma
+referência (hash e tamanho) e o texto vai uma única vez por sessão para a
+tabela ``sources``; a leitura devolve o texto inline.
+"""
+
+import asyncio
+import hashlib
+import random
+import sqlite3
+import threading
+import typing
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from pydantic import BaseModel
+
+from ..models.base_models import SourceCode
+from ..models.blob_store import BlobRef
+from .state_serde import StateSerializer
+
+# Blobs a partir deste tamanho (em bytes) são comprimidos
+DEFAULT_COMPRESS_THRESHOLD = 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    compressed INTEGER NOT NULL DEFAULT 0,
+    data BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    compressed INTEGER NOT NULL DEFAULT 0,
+    data BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS sources (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    digest TEXT NOT NULL,
+    compressed INTEGER NOT NULL DEFAULT 0,
+    data BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, digest)
+);
+"""
+
+
+def _may_hold_source(annotation: Any, seen: Set[type]) -> bool:
+    """Se um campo com esta anotação pode conter um SourceCode"""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        if issubclass(annotation, SourceCode):
+            return True
+        if annotation in seen:
+            return False
+        seen.add(annotation)
+        return any(_may_hold_source(field.annotation, seen) for field in annotation.model_fields.values())
+    return any(_may_hold_source(arg, seen) for arg in typing.get_args(annotation))
+
+
+@lru_cache(maxsize=None)
+def _source_fields(model: type) -> Tuple[str, ...]:
+    """Campos de ``model`` que podem conter um SourceCode"""
+    return tuple(name for name, field in model.model_fields.items()
+                 if _may_hold_source(field.annotation, {model}))
+
+
+def _replace_sources(value: Any, replace: Callable[[SourceCode], SourceCode]) -> Any:
+    """Cópia rasa de ``value`` com cada SourceCode trocado por ``replace``
+
+    Só os caminhos que levam a um SourceCode são copiados; o valor
+    original (o estado vivo do grafo) nunca é alterado.
+    """
+    if isinstance(value, SourceCode):
+        return replace(value)
+    if isinstance(value, BaseModel):
+        changes = {}
+        for name in _source_fields(type(value)):
+            current = getattr(value, name)
+            replaced = _replace_sources(current, replace)
+            if replaced is not current:
+                changes[name] = replaced
+        return value.model_copy(update=changes) if changes else value
+    if isinstance(value, dict):
+        items = {key: _replace_sources(item, replace) for key, item in value.items()}
+        return items if any(items[key] is not value[key] for key in value) else value
+    if isinstance(value, (list, tuple)):
+        items = [_replace_sources(item, replace) for item in value]
+        if any(new is not old for new, old in zip(items, value)):
+            return type(value)(items)
+    return value
+
+
+class SqliteCheckpointer(BaseCheckpointSaver[str]):
+    """Checkpointer em SQLite com gravação incremental por canal"""
+
+    def __init__(self, path: str = ":memory:",
+                 compress_threshold: Optional[int] = DEFAULT_COMPRESS_THRESHOLD,
+                 serde: Optional[SerializerProtocol] = None):
+        """Abre (ou cria) o banco em ``path``
+
+        Args:
+            path: Arquivo do banco (":memory:" para testes)
+            compress_threshold: Tamanho mínimo para comprimir um blob
+                (None desativa a compressão)
+            serde: Serializador; StateSerializer quando None
+        """
+        super().__init__(serde=serde or StateSerializer())
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.compress_threshold = compress_threshold
+        self._lock = threading.Lock()
+        # (thread, namespace, hash) dos textos já gravados por esta instância
+        self._stored_sources: Set[Tuple[str, str, str]] = set()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Fecha a conexão com o banco"""
+        with self._lock:
+            self.conn.close()
+
+    def __enter__(self) -> "SqliteCheckpointer":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    # Serialização
+
+    def _compress(self, data: bytes) -> Tuple[int, bytes]:
+        if self.compress_threshold is not None and len(data) >= self.compress_threshold:
+            compressed = zlib.compress(data)
+            if len(compressed) < len(data):
+                return 1, compressed
+        return 0, data
+
+    def _dump(self, value: Any, sources: Dict[str, bytes]) -> Tuple[str, int, bytes]:
+        """Serializa ``value`` com os textos dos SourceCode movidos para ``sources``"""
+        def stash(source: SourceCode) -> SourceCode:
+            if source.inline_content is None:
+                return source
+            text = source.inline_content.encode("utf-8")
+            digest = hashlib.sha256(text).hexdigest()
+            sources[digest] = text
+            return source.model_copy(update={"inline_content": None,
+                                             "content_ref": BlobRef(digest=digest, size=len(text))})
+
+        type_, data = self.serde.dumps_typed(_replace_sources(value, stash))
+        return (type_, *self._compress(data))
+
+    def _load(self, thread_id: str, checkpoint_ns: str, texts: Dict[str, Optional[str]],
+              type_: str, compressed: int, data: bytes) -> Any:
+        """Desserializa e devolve inline os textos gravados em ``sources``"""
+        if compressed:
+            data = zlib.decompress(data)
+        value = self.serde.loads_typed((type_, data))
+
+        def restore(source: SourceCode) -> SourceCode:
+            if source.inline_content is not None or source.content_ref is None:
+                return source
+            digest = source.content_ref.digest
+            if digest not in texts:
+                row = self.conn.execute(
+                    "SELECT compressed, data FROM sources "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND digest = ?",
+                    (thread_id, checkpoint_ns, digest)
+                ).fetchone()
+                texts[digest] = None if row is None else (
+                    zlib.decompress(row[1]) if row[0] else row[1]).decode("utf-8")
+            if texts[digest] is None:
+                # Referência de um BlobStore, não desta sessão
+                return source
+            return source.model_copy(update={"inline_content": texts[digest], "content_ref": None})
+
+        return _replace_sources(value, restore)
+
+    def _source_rows(self, thread_id: str, checkpoint_ns: str,
+                     sources: Dict[str, bytes]) -> List[Tuple[str, str, str, int, bytes]]:
+        """Linhas de ``sources`` ainda não gravadas nesta sessão"""
+        rows = []
+        for digest, text in sources.items():
+            key = (thread_id, checkpoint_ns, digest)
+            if key not in self._stored_sources:
+                rows.append((thread_id, checkpoint_ns, digest, *self._compress(text)))
+        return rows
+
+    def _insert_sources(self, rows: List[Tuple[str, str, str, int, bytes]]) -> None:
+        """Grava os textos novos (dentro da transação de quem chama)"""
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO sources (thread_id, checkpoint_ns, digest, compressed, data) "
+            "VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+
+    # Leitura
+
+    def _load_blobs(self, thread_id: str, checkpoint_ns: str,
+                    versions: ChannelVersions) -> Dict[str, Any]:
+        channel_values: Dict[str, Any] = {}
+        texts: Dict[str, Optional[str]] = {}
+        for channel, version in versions.items():
+            row = self.conn.execute(
+                "SELECT type, compressed, data FROM blobs "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version))
+            ).fetchone()
+            if row is not None and row[0] != "empty":
+                channel_values[channel] = self._load(thread_id, checkpoint_ns, texts, *row)
+        return channel_values
+
+    def _load_writes(self, thread_id: str, checkpoint_ns: str,
+                     checkpoint_id: str) -> List[Tuple[str, str, Any]]:
+        rows = self.conn.execute(
+            "SELECT task_id, channel, type, compressed, data FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY rowid",
+            (thread_id, checkpoint_ns, checkpoint_id)
+        ).fetchall()
+        texts: Dict[str, Optional[str]] = {}
+        return [(task_id, channel, self._load(thread_id, checkpoint_ns, texts, type_, compressed, data))
+                for task_id, channel, type_, compressed, data in rows]
+
+    def _build_tuple(self, thread_id: str, checkpoint_ns: str, row: Sequence[Any]) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint_data, metadata_type, metadata = row
+        checkpoint: Checkpoint = self.serde.loads_typed((type_, checkpoint_data))
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_blobs(thread_id, checkpoint_ns, checkpoint["channel_versions"]),
+            },
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id else None
+            ),
+            pending_writes=self._load_writes(thread_id, checkpoint_ns, checkpoint_id),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Retorna o checkpoint pedido ou o mais recente da thread"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id)
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns)
+                ).fetchone()
+            if row is None:
+                return None
+            return self._build_tuple(thread_id, checkpoint_ns, row)
+
+    def list(self, config: Optional[RunnableConfig], *,
+             filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None,
+             limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        """Lista checkpoints do mais recente para o mais antigo"""
+        query = ("SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+                 "type, checkpoint, metadata_type, metadata FROM checkpoints")
+        clauses: List[str] = []
+        params: List[Any] = []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and limit <= 0:
+                break
+            if filter:
+                metadata = self.serde.loads_typed((row[4], row[5]))
+                if not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+            if limit is not None:
+                limit -= 1
+            with self._lock:
+                item = self._build_tuple(thread_id, checkpoint_ns, row)
+            yield item
+
+    # Escrita
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint,
+            metadata: CheckpointMetadata, new_versions: ChannelVersions) -> RunnableConfig:
+        """Grava o checkpoint e somente os canais que mudaram neste passo"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        data = checkpoint.copy()
+        values: Dict[str, Any] = data.pop("channel_values")
+
+        blob_rows = []
+        sources: Dict[str, bytes] = {}
+        for channel, version in new_versions.items():
+            if channel in values:
+                type_, compressed, blob = self._dump(values[channel], sources)
+            else:
+                type_, compressed, blob = "empty", 0, None
+            blob_rows.append((thread_id, checkpoint_ns, channel, str(version), type_, compressed, blob))
+
+        type_, checkpoint_data = self.serde.dumps_typed(data)
+        metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self._lock:
+            with self.conn:
+                self.conn.execute("BEGIN")
+                source_rows = self._source_rows(thread_id, checkpoint_ns, sources)
+                self._insert_sources(source_rows)
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO blobs "
+                    "(thread_id, checkpoint_ns, channel, version, type, compressed, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    blob_rows
+                )
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints "
+                    "(thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+                    "type, checkpoint, metadata_type, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, checkpoint["id"],
+                     config["configurable"].get("checkpoint_id"),
+                     type_, checkpoint_data, metadata_type, metadata_data)
+                )
+            self._stored_sources.update(row[:3] for row in source_rows)
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]],
+                   task_id: str, task_path: str = "") -> None:
+        """Grava as escritas pendentes de uma tarefa"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        replace_rows, insert_rows = [], []
+        sources: Dict[str, bytes] = {}
+        for index, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, index)
+            type_, compressed, data = self._dump(value, sources)
+            row = (thread_id, checkpoint_ns, checkpoint_id, task_id, idx,
+                   channel, type_, compressed, data, task_path)
+            # Escritas especiais (índice negativo) substituem; as demais são gravadas uma vez
+            (replace_rows if idx < 0 else insert_rows).append(row)
+
+        columns = ("(thread_id, checkpoint_ns, checkpoint_id, task_id, idx, "
+                   "channel, type, compressed, data, task_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+        with self._lock:
+            with self.conn:
+                self.conn.execute("BEGIN")
+                source_rows = self._source_rows(thread_id, checkpoint_ns, sources)
+                self._insert_sources(source_rows)
+                self.conn.executemany(f"INSERT OR REPLACE INTO writes {columns}", replace_rows)
+                self.conn.executemany(f"INSERT OR IGNORE INTO writes {columns}", insert_rows)
+            self._stored_sources.update(row[:3] for row in source_rows)
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Remove todos os checkpoints, blobs e escritas de uma thread"""
+        with self._lock:
+            with self.conn:
+                self.conn.execute("BEGIN")
+                for table in ("checkpoints", "blobs", "writes", "sources"):
+                    self.conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._stored_sources = {key for key in self._stored_sources if key[0] != thread_id}
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        """Versões ordenáveis como string, no mesmo formato do MemorySaver"""
+        if current is None:
+            current_version = 0
+        elif isinstance(current, int):
+            current_version = current
+        else:
+            current_version = int(current.split(".")[0])
+        return f"{current_version + 1:032}.{random.random():016}"
+
+    # Variantes assíncronas: o SQLite bloqueia, então roda fora do event loop
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], *,
+                    filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None,
+                    limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint,
+                   metadata: CheckpointMetadata, new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]],
+                          task_id: str, task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
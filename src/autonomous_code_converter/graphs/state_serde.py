@@ -0,0 +1,77 @@
+"""
+Serialização rápida do estado do grafo nos checkpoints
+
+O serializador padrão do LangGraph percorre cada modelo Pydantic em
+Python (um ``ormsgpack.Ext`` por submodelo) e, na leitura, usa
+``model_construct`` no nível de cima: os submodelos voltam como dicts.
+O StateSerializer grava os modelos deste pacote (SystemState, EventLog,
+resultados de análise) com a serialização Pydantic nativa do ormsgpack,
+feita em Rust, e na leitura reconstrói a árvore inteira tipada com
+``construct_trusted`` (``model_construct`` recursivo), sem revalidar: o
+payload foi gerado pelos próprios modelos ao gravar o checkpoint. Demais
+valores (estruturas internas do LangGraph, dicts de parciais) seguem para
+o JsonPlusSerializer.
+
+O ormsgpack já é dependência do checkpoint do LangGraph; a compressão
+zlib dos blobs grandes continua a cargo do SqliteCheckpointer.
+"""
+
+import importlib
+from collections import deque
+from functools import lru_cache
+from typing import Any, Tuple, Type
+
+import ormsgpack
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from pydantic import BaseModel
+
+from ..models.base_models import construct_trusted
+
+# Só classes deste pacote são reconstruídas a partir do tipo gravado
+PACKAGE = __name__.rsplit(".", 2)[0]
+
+MODEL_TYPE_PREFIX = "model:"
+
+_OPTIONS = ormsgpack.OPT_SERIALIZE_PYDANTIC | ormsgpack.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    # EventLog guarda as entradas num deque
+    if isinstance(value, (deque, set, frozenset)):
+        return list(value)
+    raise TypeError(f"tipo não serializável: {type(value).__name__}")
+
+
+@lru_cache(maxsize=None)
+def _model_class(name: str) -> Type[BaseModel]:
+    module_name, _, qualname = name.partition(":")
+    if module_name != PACKAGE and not module_name.startswith(PACKAGE + "."):
+        raise ValueError(f"modelo fora do pacote: {name}")
+    value: Any = importlib.import_module(module_name)
+    for attribute in qualname.split("."):
+        value = getattr(value, attribute)
+    if not (isinstance(value, type) and issubclass(value, BaseModel)):
+        raise ValueError(f"não é um modelo Pydantic: {name}")
+    return value
+
+
+class StateSerializer(JsonPlusSerializer):
+    """Serializador de checkpoints com caminho rápido para os modelos do pacote"""
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        cls = type(obj)
+        if isinstance(obj, BaseModel) and cls.__module__.startswith(PACKAGE):
+            try:
+                data = ormsgpack.packb(obj, default=_default, option=_OPTIONS)
+            except TypeError:
+                # Algum campo Any com valor que o ormsgpack não conhece
+                return super().dumps_typed(obj)
+            return f"{MODEL_TYPE_PREFIX}{cls.__module__}:{cls.__qualname__}", data
+        return super().dumps_typed(obj)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.startswith(MODEL_TYPE_PREFIX):
+            model = _model_class(type_[len(MODEL_TYPE_PREFIX):])
+            return construct_trusted(model, ormsgpack.unpackb(payload))
+        return super().loads_typed(data)
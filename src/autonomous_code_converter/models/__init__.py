@@ -8,13 +8,18 @@ from .base_models import (
     AuditState,
     SourceCode,
     LanguageDetection,
+    ApiMapping,
     Dependencies,
+    LanguageDetectionBatch,
+    DependenciesBatch,
     EnrichedAST,
     CppCodeFiles,
     AuditFinding,
     LanguageType,
     AuditSeverity
 )
+from .event_log import EventCode, EventLog
+from .blob_store import BlobRef, BlobStore, get_default_blob_store, set_default_blob_store
 
 __all__ = [
     "SystemState",
@@ -22,10 +27,19 @@ __all__ = [
     "AuditState",
     "SourceCode",
     "LanguageDetection",
+    "ApiMapping",
     "Dependencies", 
+    "LanguageDetectionBatch",
+    "DependenciesBatch",
     "EnrichedAST",
     "CppCodeFiles",
     "AuditFinding",
     "LanguageType",
-    "AuditSeverity"
+    "AuditSeverity",
+    "EventCode",
+    "EventLog",
+    "BlobRef",
+    "BlobStore",
+    "get_default_blob_store",
+    "set_default_blob_store"
 ] 
\ No newline at end of file
@@ -2,10 +2,15 @@
 Modelos base Pydantic para o sistema de conversão de código
 """
 
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Dict, Any, Optional, Literal, Union
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter, model_validator
+from typing import Annotated, Callable, Iterator, List, Dict, Any, Optional, Literal, Tuple, Type, TypeVar, Union, get_args, get_origin
+from collections import deque
 from datetime import datetime
 from enum import Enum
+from functools import lru_cache
+import types
+
+from .blob_store import BlobRef, externalize_text, resolve_text
 
 
 class LanguageType(str, Enum):
@@ -24,12 +29,51 @@ class AuditSeverity(str, Enum):
 
 
 class SourceCode(BaseModel):
-    """Código fonte de entrada"""
-    content: str = Field(..., description="Conteúdo do código fonte")
+    """Código fonte de entrada
+
+    O texto é passado e serializado como ``content``. Com um BlobStore padrão
+    ativo, textos acima do limite dele ficam apenas em ``content_ref``;
+    ``content`` resolve o texto em qualquer um dos casos e também aceita
+    atribuição.
+    """
+    model_config = ConfigDict(populate_by_name=True, serialize_by_alias=True)
+
+    inline_content: Optional[str] = Field(None, alias="content", description="Conteúdo do código fonte")
+    content_ref: Optional[BlobRef] = Field(None, description="Referência ao conteúdo no BlobStore")
     language: LanguageType = Field(..., description="Linguagem do código")
     filename: Optional[str] = Field(None, description="Nome do arquivo")
     metadata: Dict[str, Any] = Field(default_factory=dict, description="Metadados adicionais")
 
+    @model_validator(mode="after")
+    def _externalize_content(self) -> "SourceCode":
+        if self.inline_content is None and self.content_ref is None:
+            raise ValueError("content é obrigatório")
+        if self.inline_content is not None:
+            ref = externalize_text(self.inline_content)
+            if ref is not None:
+                self.inline_content, self.content_ref = None, ref
+        return self
+
+    @property
+    def content(self) -> str:
+        """Conteúdo do código fonte (lido do BlobStore quando externalizado)"""
+        if self.inline_content is not None:
+            return self.inline_content
+        return self.content_ref.read_text()
+
+    @content.setter
+    def content(self, value: str) -> None:
+        ref = externalize_text(value)
+        if ref is None:
+            self.inline_content, self.content_ref = value, None
+        else:
+            self.inline_content, self.content_ref = None, ref
+
+    def with_content(self, content: str, **update: Any) -> "SourceCode":
+        """Cópia com outro conteúdo e, opcionalmente, outros campos"""
+        fields = {"language": self.language, "filename": self.filename, "metadata": self.metadata, **update}
+        return SourceCode(content=content, **fields)
+
 
 class LanguageDetection(BaseModel):
     """Resultado da detecção de linguagem"""
@@ -38,12 +82,36 @@ class LanguageDetection(BaseModel):
     features_detected: List[str] = Field(default_factory=list, description="Características detectadas")
 
 
+class ApiMapping(BaseModel):
+    """Equivalente C++ de um símbolo de biblioteca da linguagem de origem"""
+    symbol: str = Field(..., description="Módulo ou símbolo na linguagem de origem")
+    cpp_library: str = Field(..., description="Biblioteca C++ equivalente")
+    cpp_symbol: Optional[str] = Field(default=None, description="Função, classe ou método C++ equivalente")
+    includes: List[str] = Field(default_factory=list, description="Includes necessários")
+    cmake_targets: List[str] = Field(default_factory=list, description="Alvos para target_link_libraries")
+    git_repository: Optional[str] = Field(default=None, description="Repositório para FetchContent_Declare")
+    git_tag: Optional[str] = Field(default=None, description="Versão para FetchContent_Declare")
+    reference: Optional[str] = Field(default=None, description="Seção do api_cpp.md que descreve o mapeamento")
+    notes: Optional[str] = Field(default=None, description="Observações de conversão")
+
+
 class Dependencies(BaseModel):
     """Dependências do código"""
     imports: List[str] = Field(default_factory=list, description="Imports/includes encontrados")
     external_libraries: List[str] = Field(default_factory=list, description="Bibliotecas externas")
     standard_libraries: List[str] = Field(default_factory=list, description="Bibliotecas padrão")
     documentation_urls: Dict[str, str] = Field(default_factory=dict, description="URLs de documentação")
+    cpp_mappings: Dict[str, ApiMapping] = Field(default_factory=dict, description="Equivalentes C++ conhecidos por símbolo importado")
+
+
+class LanguageDetectionBatch(BaseModel):
+    """Detecções de linguagem de vários arquivos enviados em um único prompt"""
+    results: Dict[str, LanguageDetection] = Field(default_factory=dict, description="Detecção por identificador de arquivo")
+
+
+class DependenciesBatch(BaseModel):
+    """Dependências de vários arquivos enviados em um único prompt"""
+    results: Dict[str, Dependencies] = Field(default_factory=dict, description="Dependências por identificador de arquivo")
 
 
 class EnrichedAST(BaseModel):
@@ -65,13 +133,68 @@ class CodeAnalysisResult(BaseModel):
 
 
 class CppCodeFiles(BaseModel):
-    """Arquivos de código C++ gerados"""
-    header_files: Dict[str, str] = Field(default_factory=dict, description="Arquivos .hpp")
-    source_files: Dict[str, str] = Field(default_factory=dict, description="Arquivos .cpp")
+    """Arquivos de código C++ gerados
+
+    Com um BlobStore padrão ativo, arquivos grandes são guardados como
+    ``BlobRef`` em ``header_blobs``/``source_blobs``; como o store é
+    endereçado por conteúdo, arquivos que não mudam entre iterações de
+    auditoria são guardados uma única vez. ``header_files``/``source_files``
+    (também os nomes serializados) sempre entregam texto.
+    """
+    model_config = ConfigDict(populate_by_name=True, serialize_by_alias=True)
+
+    header_blobs: Dict[str, Union[BlobRef, str]] = Field(default_factory=dict, alias="header_files", description="Arquivos .hpp")
+    source_blobs: Dict[str, Union[BlobRef, str]] = Field(default_factory=dict, alias="source_files", description="Arquivos .cpp")
     cmake_config: Optional[str] = Field(None, description="Configuração CMake")
     compilation_flags: List[str] = Field(default_factory=list, description="Flags de compilação")
     dependencies_info: Dict[str, str] = Field(default_factory=dict, description="Informações de dependências")
 
+    @model_validator(mode="after")
+    def _externalize_files(self) -> "CppCodeFiles":
+        for files in (self.header_blobs, self.source_blobs):
+            _externalize_files(files)
+        return self
+
+    @property
+    def header_files(self) -> Dict[str, str]:
+        """Texto dos arquivos .hpp"""
+        return {name: resolve_text(content) for name, content in self.header_blobs.items()}
+
+    @header_files.setter
+    def header_files(self, files: Dict[str, str]) -> None:
+        self.header_blobs = _externalize_files(dict(files))
+
+    @property
+    def source_files(self) -> Dict[str, str]:
+        """Texto dos arquivos .cpp"""
+        return {name: resolve_text(content) for name, content in self.source_blobs.items()}
+
+    @source_files.setter
+    def source_files(self, files: Dict[str, str]) -> None:
+        self.source_blobs = _externalize_files(dict(files))
+
+    def read(self, name: str) -> str:
+        """Texto de um arquivo .hpp ou .cpp"""
+        if name in self.header_blobs:
+            return resolve_text(self.header_blobs[name])
+        return resolve_text(self.source_blobs[name])
+
+    def files(self) -> Iterator[Tuple[str, str]]:
+        """Pares (nome, texto) de todos os arquivos, cabeçalhos primeiro"""
+        for files in (self.header_blobs, self.source_blobs):
+            for name, content in files.items():
+                yield name, resolve_text(content)
+
+
+def _externalize_files(files: Dict[str, Union[BlobRef, str]]) -> Dict[str, Union[BlobRef, str]]:
+    """Troca, no próprio dicionário, os textos grandes por referências ao BlobStore"""
+    for name, content in files.items():
+        if isinstance(content, str):
+            ref = externalize_text(content)
+            if ref is not None:
+                files[name] = ref
+    return files
+
 
 class AuditFinding(BaseModel):
     """Descoberta de auditoria"""
@@ -116,9 +239,107 @@ class SystemState(BaseModel):
     session_id: str = Field(..., description="ID da sessão")
     created_at: datetime = Field(default_factory=datetime.now, description="Timestamp de criação")
     updated_at: datetime = Field(default_factory=datetime.now, description="Timestamp de atualização")
-    
-    model_config = ConfigDict(
-        json_encoders={
-            datetime: lambda v: v.isoformat()
-        }
-    ) 
\ No newline at end of file
+
+
+@lru_cache(maxsize=None)
+def type_adapter(tp: Any) -> TypeAdapter:
+    """TypeAdapter em cache por tipo: montar o schema custa mais que validar um valor"""
+    return TypeAdapter(tp)
+
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_new_object = object.__new__
+_set_slot = object.__setattr__
+
+# Conversor de um valor já serializado de volta ao tipo anotado (None = usa o valor como está)
+_Converter = Optional[Callable[[Any], Any]]
+
+
+def construct_trusted(model: Type[ModelT], data: Dict[str, Any]) -> ModelT:
+    """Reconstrói ``model`` a partir de um payload gerado pelo próprio sistema, sem validar
+
+    Submodelos, enums, datetimes, tuplas e deques voltam tipados, mas
+    nenhum validador roda. Só use com dados que saíram dos próprios modelos
+    (checkpoints, por exemplo). Payloads com outros nomes de campo (aliases
+    ou campos ausentes de uma versão anterior) passam por ``model_construct``.
+    """
+    names, converters, simple = _construct_plan(model)
+    if not simple or data.keys() != names:
+        return model.model_construct(**_convert_fields(model, data))
+    values = dict(data)
+    for name, convert in converters:
+        value = values[name]
+        if value is not None:
+            values[name] = convert(value)
+    # Mesmo resultado de model_construct sem o laço de aliases e padrões em Python
+    instance = _new_object(model)
+    _set_slot(instance, "__dict__", values)
+    _set_slot(instance, "__pydantic_fields_set__", set(names))
+    _set_slot(instance, "__pydantic_extra__", None)
+    _set_slot(instance, "__pydantic_private__", None)
+    return instance
+
+
+def _convert_fields(model: Type[BaseModel], data: Dict[str, Any]) -> Dict[str, Any]:
+    values = {}
+    for name, field in model.model_fields.items():
+        key = name if name in data else field.alias
+        if key is None or key not in data:
+            continue
+        value = data[key]
+        convert = _converter(field.annotation)
+        values[name] = convert(value) if convert is not None and value is not None else value
+    return values
+
+
+@lru_cache(maxsize=None)
+def _construct_plan(model: Type[BaseModel]) -> Tuple[frozenset, Tuple[Tuple[str, Callable[[Any], Any]], ...], bool]:
+    converters = tuple(
+        (name, convert) for name, field in model.model_fields.items()
+        if (convert := _converter(field.annotation)) is not None
+    )
+    # Atributos privados ou campos extras exigem o caminho completo de model_construct
+    simple = not model.__private_attributes__ and model.model_config.get("extra") != "allow"
+    return frozenset(model.model_fields), converters, simple
+
+
+def _converter(annotation: Any) -> _Converter:
+    origin = get_origin(annotation)
+    if origin is Annotated:
+        return _converter(get_args(annotation)[0])
+    if origin in (Union, types.UnionType):
+        members = [member for member in get_args(annotation) if member is not type(None)]
+        if len(members) == 1:
+            return _converter(members[0])
+        # Union de um modelo com escalares (ex.: BlobRef | str): dicts são o modelo
+        models = [member for member in members if isinstance(member, type) and issubclass(member, BaseModel)]
+        if not models:
+            return None
+        return lambda value: construct_trusted(models[0], value) if isinstance(value, dict) else value
+    if origin in (list, List, set, frozenset, deque):
+        item = _converter(get_args(annotation)[0]) if get_args(annotation) else None
+        if item is None:
+            return None if origin in (list, List) else origin
+        if origin in (list, List):
+            return lambda value: [item(element) for element in value]
+        return lambda value: origin([item(element) for element in value])
+    if origin is tuple:
+        return tuple
+    if origin is dict:
+        args = get_args(annotation)
+        item = _converter(args[1]) if len(args) == 2 else None
+        if item is None:
+            return None
+        return lambda value: {key: item(element) for key, element in value.items()}
+    if isinstance(annotation, type):
+        if issubclass(annotation, BaseModel):
+            return lambda value: construct_trusted(annotation, value) if isinstance(value, dict) else value
+        if issubclass(annotation, Enum):
+            # Consulta direta ao mapa de valores: bem mais barata que Enum(value)
+            members = annotation._value2member_map_
+            return lambda value: members.get(value) or annotation(value)
+        if annotation is datetime:
+            return lambda value: datetime.fromisoformat(value) if isinstance(value, str) else value
+    return None
+
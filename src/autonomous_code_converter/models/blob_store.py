@@ -0,0 +1,229 @@
+"""
+Armazenamento de textos endereçado por conteúdo
+
+Textos grandes (código fonte, C++ gerado) são gravados uma única vez em
+``<diretório>/<hash[:2]>/<sha256>`` e lidos por ``mmap``. Os modelos
+guardam apenas um ``BlobRef`` (hash e tamanho), que é o que vai para os
+checkpoints; o texto só é decodificado quando alguém o lê.
+
+A externalização é opcional: sem um store padrão ativo
+(``set_default_blob_store``) os modelos mantêm o texto inline como antes.
+"""
+
+import hashlib
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Union
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from .config import BlobStoreConfig
+
+DEFAULT_INLINE_THRESHOLD = 64 * 1024
+DEFAULT_MAX_OPEN_MAPS = 128
+DEFAULT_MAX_CACHED_TEXTS = 32
+
+
+class BlobNotFoundError(LookupError):
+    """Referência a um blob que não existe no store"""
+
+
+class BlobRef(BaseModel):
+    """Referência leve a um texto guardado no BlobStore"""
+    model_config = ConfigDict(frozen=True)
+
+    digest: str = Field(..., description="SHA-256 do conteúdo em UTF-8")
+    size: int = Field(..., ge=0, description="Tamanho em bytes")
+
+    def read_text(self, store: Optional["BlobStore"] = None) -> str:
+        """Resolve o texto no ``store`` informado ou no store padrão"""
+        store = store or get_default_blob_store()
+        if store is None:
+            raise BlobNotFoundError(f"Nenhum BlobStore ativo para resolver {self.digest}")
+        return store.read_text(self)
+
+
+class BlobStore:
+    """Store de blobs em arquivos mapeados em memória"""
+
+    def __init__(self, directory: Optional[str] = None,
+                 inline_threshold: int = DEFAULT_INLINE_THRESHOLD,
+                 max_open_maps: int = DEFAULT_MAX_OPEN_MAPS,
+                 max_cached_texts: int = DEFAULT_MAX_CACHED_TEXTS):
+        """Abre (ou cria) o store
+
+        Args:
+            directory: Diretório dos blobs (None = diretório temporário,
+                removido em ``close``)
+            inline_threshold: Textos com menos bytes ficam inline nos modelos
+            max_open_maps: Máximo de arquivos mapeados mantidos abertos
+            max_cached_texts: Textos decodificados mantidos para leituras
+                repetidas do mesmo blob (os agentes leem ``content`` várias
+                vezes por arquivo)
+        """
+        self._temporary = directory is None
+        self.directory = Path(directory or tempfile.mkdtemp(prefix="blobs-"))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.inline_threshold = inline_threshold
+        self.max_open_maps = max_open_maps
+        self.max_cached_texts = max_cached_texts
+        self._lock = threading.Lock()
+        self._known: set = set()
+        self._maps: "OrderedDict[str, mmap.mmap]" = OrderedDict()
+        self._texts: "OrderedDict[str, str]" = OrderedDict()
+        # Mapeamentos removidos do LRU que ainda tinham memoryviews abertas
+        self._unclosed: List[mmap.mmap] = []
+        self.writes = 0
+        self.deduplicated = 0
+
+    @classmethod
+    def from_config(cls, config: BlobStoreConfig) -> "BlobStore":
+        """Cria o store descrito em ``SystemConfig.blob_store``"""
+        return cls(config.directory, inline_threshold=config.inline_threshold)
+
+    def _path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / digest
+
+    def put(self, data: Union[str, bytes]) -> BlobRef:
+        """Grava ``data`` (se ainda não existir) e retorna a referência"""
+        raw = data.encode("utf-8") if isinstance(data, str) else data
+        digest = hashlib.sha256(raw).hexdigest()
+        ref = BlobRef(digest=digest, size=len(raw))
+
+        with self._lock:
+            if digest in self._known:
+                self.deduplicated += 1
+                return ref
+        path = self._path(digest)
+        if path.exists():
+            with self._lock:
+                self._known.add(digest)
+                self.deduplicated += 1
+            return ref
+
+        # Grava em arquivo temporário e renomeia: leitores nunca veem blobs parciais
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(raw)
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.unlink(temporary)
+            raise
+        with self._lock:
+            self._known.add(digest)
+            self.writes += 1
+        return ref
+
+    def _map(self, digest: str) -> mmap.mmap:
+        with self._lock:
+            mapped = self._maps.get(digest)
+            if mapped is not None:
+                self._maps.move_to_end(digest)
+                return mapped
+        try:
+            with open(self._path(digest), "rb") as handle:
+                mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            raise BlobNotFoundError(f"Blob {digest} não encontrado em {self.directory}") from None
+        with self._lock:
+            self._maps[digest] = mapped
+            evicted = []
+            while len(self._maps) > self.max_open_maps:
+                evicted.append(self._maps.popitem(last=False)[1])
+            self._unclosed = [m for m in self._unclosed + evicted if not _try_close(m)]
+        return mapped
+
+    def read_bytes(self, ref: BlobRef) -> bytes:
+        """Conteúdo bruto do blob"""
+        if ref.size == 0:
+            return b""
+        return self._map(ref.digest)[:]
+
+    def read_text(self, ref: BlobRef) -> str:
+        """Conteúdo do blob decodificado de UTF-8"""
+        if ref.size == 0:
+            return ""
+        with self._lock:
+            text = self._texts.get(ref.digest)
+            if text is not None:
+                self._texts.move_to_end(ref.digest)
+                return text
+        with memoryview(self._map(ref.digest)) as view:
+            text = str(view, "utf-8")
+        with self._lock:
+            self._texts[ref.digest] = text
+            while len(self._texts) > self.max_cached_texts:
+                self._texts.popitem(last=False)
+        return text
+
+    def externalize(self, text: str) -> Optional[BlobRef]:
+        """Guarda ``text`` se ele passar do limite inline; senão retorna None"""
+        # Até 4 bytes por caractere em UTF-8: textos curtos nem são codificados
+        if len(text) * 4 < self.inline_threshold:
+            return None
+        raw = text.encode("utf-8")
+        if len(raw) < self.inline_threshold:
+            return None
+        return self.put(raw)
+
+    def close(self) -> None:
+        """Fecha os mapeamentos (e remove o diretório se for temporário)"""
+        with self._lock:
+            maps, self._maps = list(self._maps.values()) + self._unclosed, OrderedDict()
+            self._unclosed = []
+            self._texts.clear()
+        for mapped in maps:
+            mapped.close()
+        if self._temporary:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self) -> "BlobStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _try_close(mapped: mmap.mmap) -> bool:
+    """Fecha o mapeamento; False se alguém ainda segura uma memoryview dele"""
+    try:
+        mapped.close()
+    except BufferError:
+        return False
+    return True
+
+
+_default_store: Optional[BlobStore] = None
+
+
+def get_default_blob_store() -> Optional[BlobStore]:
+    """Store usado pelos modelos para externalizar e resolver textos"""
+    return _default_store
+
+
+def set_default_blob_store(store: Optional[BlobStore]) -> Optional[BlobStore]:
+    """Ativa ``store`` como padrão (None desativa); retorna o anterior"""
+    global _default_store
+    previous, _default_store = _default_store, store
+    return previous
+
+
+def externalize_text(text: str) -> Optional[BlobRef]:
+    """Externaliza ``text`` no store padrão, se houver um e o texto for grande"""
+    store = _default_store
+    if store is None:
+        return None
+    return store.externalize(text)
+
+
+def resolve_text(value: Union[str, BlobRef]) -> str:
+    """Texto de um valor que pode ser inline ou uma referência"""
+    return value.read_text() if isinstance(value, BlobRef) else value
@@ -4,7 +4,60 @@ Configurações do sistema
 
 import os
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Literal, Optional
+
+
+class CacheConfig(BaseModel):
+    """Configuração do cache de resultados dos agentes"""
+    enabled: bool = Field(default=False, description="Habilita o cache de resultados")
+    directory: Optional[str] = Field(default=".cache/results", description="Diretório do cache em disco (None = apenas memória)")
+    memory_max_entries: int = Field(default=1024, gt=0, description="Máximo de entradas no cache em memória")
+    disk_max_bytes: int = Field(default=256 * 1024 * 1024, gt=0, description="Tamanho máximo do cache em disco")
+    max_age_seconds: Optional[int] = Field(default=7 * 24 * 3600, gt=0, description="Idade máxima de uma entrada")
+
+
+class RateLimitConfig(BaseModel):
+    """Configuração do controle de vazão do cliente"""
+    enabled: bool = Field(default=False, description="Habilita o controle de vazão")
+    requests_per_minute: Optional[int] = Field(default=20, gt=0, description="Requisições por minuto (None = sem limite)")
+    tokens_per_minute: Optional[int] = Field(default=None, gt=0, description="Tokens por minuto (None = sem limite)")
+    initial_concurrency: int = Field(default=4, gt=0, description="Limite inicial de requisições simultâneas")
+    min_concurrency: int = Field(default=1, gt=0, description="Limite mínimo de requisições simultâneas")
+    max_concurrency: int = Field(default=16, gt=0, description="Limite máximo de requisições simultâneas")
+    decrease_factor: float = Field(default=0.5, gt=0.0, lt=1.0, description="Fator de redução após sobrecarga")
+
+
+class HedgingConfig(BaseModel):
+    """Configuração das requisições duplicadas (hedging) contra a cauda de latência"""
+    enabled: bool = Field(default=False, description="Duplica requisições lentas")
+    percentile: float = Field(default=0.95, gt=0.0, lt=1.0, description="Percentil de latência do modelo após o qual a duplicata é enviada")
+    min_delay: float = Field(default=1.0, ge=0.0, description="Espera mínima em segundos antes de duplicar")
+    initial_delay: Optional[float] = Field(default=None, gt=0.0, description="Espera usada enquanto não há amostras suficientes (None = não duplica)")
+    min_samples: int = Field(default=20, gt=0, description="Amostras por modelo antes de usar o percentil medido")
+    window: int = Field(default=256, gt=0, description="Latências recentes guardadas por modelo")
+    budget: float = Field(default=0.05, gt=0.0, le=1.0, description="Fração máxima das requisições que pode ser duplicada")
+    alternate_model: Optional[str] = Field(default=None, description="Modelo usado na duplicata (None = o mesmo)")
+
+
+class RecordingConfig(BaseModel):
+    """Configuração da gravação/reprodução do tráfego com o LLM"""
+    mode: Literal["off", "record", "replay"] = Field(default="off", description="off, record (grava as respostas) ou replay (serve as gravadas sem rede)")
+    directory: str = Field(default=".cache/recordings", description="Diretório das gravações")
+    replay_latency: bool = Field(default=False, description="No replay, espera a latência gravada antes de responder")
+
+
+class CheckpointerConfig(BaseModel):
+    """Configuração do checkpointer dos grafos"""
+    backend: Literal["memory", "sqlite"] = Field(default="memory", description="Onde os checkpoints são guardados")
+    path: str = Field(default=".cache/checkpoints.sqlite", description="Arquivo do banco SQLite")
+    compress_threshold: Optional[int] = Field(default=1024, gt=0, description="Tamanho mínimo em bytes para comprimir um blob (None = nunca)")
+
+
+class BlobStoreConfig(BaseModel):
+    """Configuração do armazenamento de textos grandes endereçado por conteúdo"""
+    enabled: bool = Field(default=False, description="Externaliza textos grandes dos modelos em um BlobStore")
+    directory: Optional[str] = Field(default=".cache/blobs", description="Diretório dos blobs (None = temporário)")
+    inline_threshold: int = Field(default=64 * 1024, gt=0, description="Tamanho em bytes a partir do qual o texto é externalizado")
 
 
 class OpenRouterConfig(BaseModel):
@@ -15,11 +68,21 @@ class OpenRouterConfig(BaseModel):
     temperature: float = Field(default=0.1, ge=0.0, le=2.0, description="Temperatura do modelo")
     max_tokens: int = Field(default=4000, gt=0, description="Máximo de tokens")
     timeout: int = Field(default=60, gt=0, description="Timeout em segundos")
+    connect_timeout: float = Field(default=10.0, gt=0, description="Timeout de conexão em segundos")
+    max_connections: int = Field(default=32, gt=0, description="Máximo de conexões HTTP simultâneas no pool")
+    max_keepalive_connections: int = Field(default=16, ge=0, description="Conexões ociosas mantidas abertas no pool")
+    keepalive_expiry: float = Field(default=60.0, gt=0, description="Tempo em segundos até fechar uma conexão ociosa")
+    cache: CacheConfig = Field(default_factory=CacheConfig, description="Configuração do cache de resultados")
+    rate_limit: RateLimitConfig = Field(default_factory=RateLimitConfig, description="Configuração do controle de vazão")
+    hedging: HedgingConfig = Field(default_factory=HedgingConfig, description="Configuração do hedging de requisições")
+    recording: RecordingConfig = Field(default_factory=RecordingConfig, description="Configuração da gravação/reprodução")
 
 
 class SystemConfig(BaseModel):
     """Configuração geral do sistema"""
     openrouter: OpenRouterConfig
+    checkpointer: CheckpointerConfig = Field(default_factory=CheckpointerConfig, description="Configuração do checkpointer")
+    blob_store: BlobStoreConfig = Field(default_factory=BlobStoreConfig, description="Configuração do BlobStore")
     debug: bool = Field(default=False, description="Modo debug")
     log_level: str = Field(default="INFO", description="Nível de log")
     
@@ -30,10 +93,37 @@ def load_config() -> SystemConfig:
     if not api_key:
         raise ValueError("OPENROUTER_API_KEY não encontrada nas variáveis de ambiente")
     
-    openrouter_config = OpenRouterConfig(api_key=api_key)
+    cache_config = CacheConfig(
+        enabled=os.getenv("CACHE_ENABLED", "false").lower() == "true",
+        directory=os.getenv("CACHE_DIR", ".cache/results")
+    )
+    hedging_config = HedgingConfig(
+        enabled=os.getenv("HEDGING_ENABLED", "false").lower() == "true",
+        alternate_model=os.getenv("HEDGING_ALTERNATE_MODEL") or None
+    )
+    recording_config = RecordingConfig(
+        mode=os.getenv("LLM_RECORDING", "off"),
+        directory=os.getenv("LLM_RECORDING_DIR", ".cache/recordings"),
+        replay_latency=os.getenv("LLM_REPLAY_LATENCY", "false").lower() == "true"
+    )
+    rate_limit_config = RateLimitConfig(
+        enabled=os.getenv("RATE_LIMIT_ENABLED", "false").lower() == "true"
+    )
+    openrouter_config = OpenRouterConfig(api_key=api_key, cache=cache_config, rate_limit=rate_limit_config,
+                                         hedging=hedging_config, recording=recording_config)
+    checkpointer_config = CheckpointerConfig(
+        backend=os.getenv("CHECKPOINTER", "memory"),
+        path=os.getenv("CHECKPOINT_DB", ".cache/checkpoints.sqlite")
+    )
+    blob_store_config = BlobStoreConfig(
+        enabled=os.getenv("BLOB_STORE_ENABLED", "false").lower() == "true",
+        directory=os.getenv("BLOB_STORE_DIR", ".cache/blobs")
+    )
     
     return SystemConfig(
         openrouter=openrouter_config,
+        checkpointer=checkpointer_config,
+        blob_store=blob_store_config,
         debug=os.getenv("DEBUG", "false").lower() == "true",
         log_level=os.getenv("LOG_LEVEL", "INFO")
     ) 
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+Log de eventos estruturado e de capacidade fixa
+
+Substitui a lista de mensagens formatadas do estado do grafo. Cada evento
+é uma tupla compacta ``(timestamp_ns, código, fase, payload)`` guardada em
+um buffer circular; o texto legível só é montado quando alguém lê o log.
+Eventos expulsos do buffer podem ser gravados em disco (JSONL).
+
+O timestamp é o relógio de parede em nanossegundos (``time.time_ns()``).
+O relógio monotônico não serve aqui: a origem dele muda entre processos e
+a cada reinício, e o log é retomado de checkpoints em outros processos.
+Durações continuam sendo medidas com o relógio monotônico por quem as mede.
+"""
+
+import json
+import time
+from collections import deque
+from datetime import datetime
+from enum import IntEnum
+from typing import Any, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from pydantic import BaseModel, Field, model_validator
+
+DEFAULT_EVENT_CAPACITY = 64
+
+# (timestamp_ns, código, fase, payload)
+EventEntry = Tuple[int, int, str, Dict[str, Any]]
+
+
+class EventCode(IntEnum):
+    """Códigos dos eventos registrados pelo sistema"""
+    MESSAGE = 0
+    STATE_CREATED = 1
+    SESSION_STARTED = 2
+    PHASE_CHANGED = 3
+    BRANCH_COMPLETED = 4
+    BRANCH_FAILED = 5
+    ANALYSIS_MERGED = 6
+    ANALYSIS_SKIPPED = 7
+    VALIDATED = 8
+
+
+_TEMPLATES = {
+    EventCode.MESSAGE: "{text}",
+    EventCode.STATE_CREATED: "Estado inicial criado",
+    EventCode.SESSION_STARTED: "Sistema iniciado",
+    EventCode.PHASE_CHANGED: "Fase atualizada para: {phase}",
+    EventCode.BRANCH_COMPLETED: "{branch} concluída",
+    EventCode.BRANCH_FAILED: "Falha em {branch}: {error}",
+    EventCode.ANALYSIS_MERGED: "Resultados da análise combinados",
+    EventCode.ANALYSIS_SKIPPED: "Análise ignorada: sem código fonte",
+    EventCode.VALIDATED: "Validação básica executada",
+}
+
+
+class Event(NamedTuple):
+    """Visão de leitura de uma entrada do log"""
+    timestamp_ns: int
+    code: EventCode
+    phase: str
+    payload: Dict[str, Any]
+
+
+def make_event(code: EventCode, phase: str = "", **payload: Any) -> EventEntry:
+    """Cria uma entrada com o horário atual"""
+    return (time.time_ns(), int(code), phase, payload)
+
+
+class EventLog(BaseModel):
+    """Buffer circular de eventos com despejo opcional em disco"""
+    capacity: int = Field(DEFAULT_EVENT_CAPACITY, ge=1, description="Máximo de eventos mantidos")
+    spill_path: Optional[str] = Field(None, description="Arquivo JSONL que recebe os eventos expulsos")
+    dropped: int = Field(0, description="Eventos expulsos do buffer até agora")
+    entries: Deque[EventEntry] = Field(default_factory=deque)
+
+    @model_validator(mode="after")
+    def _bound_entries(self) -> "EventLog":
+        if self.entries.maxlen != self.capacity:
+            entries = list(self.entries)
+            overflow = max(0, len(entries) - self.capacity)
+            self._evict(entries[:overflow])
+            self.entries = deque(entries[overflow:], maxlen=self.capacity)
+        return self
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _evict(self, entries: List[EventEntry]) -> None:
+        if not entries:
+            return
+        self.dropped += len(entries)
+        if self.spill_path is None:
+            return
+        with open(self.spill_path, "a", encoding="utf-8") as spill:
+            for timestamp, code, phase, payload in entries:
+                spill.write(json.dumps({
+                    "timestamp_ns": timestamp,
+                    "code": EventCode(code).name,
+                    "phase": phase,
+                    "payload": payload,
+                }, ensure_ascii=False, default=str) + "\n")
+
+    def extend(self, entries: Iterable[EventEntry]) -> None:
+        """Acrescenta entradas, expulsando as mais antigas quando cheio"""
+        for entry in entries:
+            if len(self.entries) == self.capacity:
+                self._evict([self.entries[0]])
+            self.entries.append(entry)
+
+    def append(self, code: EventCode, phase: str = "", **payload: Any) -> None:
+        """Registra um evento"""
+        self.extend([make_event(code, phase, **payload)])
+
+    def copy_with(self, entries: Iterable[EventEntry]) -> "EventLog":
+        """Cópia com ``entries`` acrescentadas; o original não muda"""
+        log = self.model_copy(update={"entries": deque(self.entries, maxlen=self.capacity)})
+        log.extend(entries)
+        return log
+
+    def events(self) -> Iterator[Event]:
+        """Eventos do mais antigo para o mais recente"""
+        for timestamp, code, phase, payload in self.entries:
+            yield Event(timestamp, EventCode(code), phase, payload)
+
+    def format(self, entry: EventEntry) -> str:
+        """Texto de uma entrada, no formato ``[ISO] mensagem``"""
+        timestamp, code, phase, payload = entry
+        text = _TEMPLATES[EventCode(code)].format(phase=phase, **payload)
+        return f"[{datetime.fromtimestamp(timestamp / 1e9).isoformat()}] {text}"
+
+    def messages(self) -> List[str]:
+        """Todas as entradas formatadas como texto"""
+        return [self.format(entry) for entry in self.entries]
+
+
+def merge_event_logs(left: Optional[EventLog],
+                     right: Union[EventLog, List[EventEntry], None]) -> EventLog:
+    """Redutor do log de eventos para os ramos paralelos do grafo
+
+    Os nós retornam listas de entradas novas; um EventLog completo (estado
+    inicial) traz também a capacidade e o destino de despejo. Sempre
+    devolve um novo objeto, pois o valor anterior pode estar em um checkpoint.
+    """
+    if isinstance(right, EventLog):
+        if left is None or not left.entries:
+            return right
+        return right.model_copy(update={"entries": deque()}).copy_with([*left.entries, *right.entries])
+    if left is None:
+        left = EventLog()
+    if not right:
+        return left
+    return left.copy_with(right)
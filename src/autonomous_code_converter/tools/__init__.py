@@ -1,7 +1,39 @@
 """
 Ferramentas e integrações externas
+
+Os nomes públicos são carregados sob demanda: ``OpenRouterClient`` traz
+``openai`` e ``pydantic_ai``, que só são importados no primeiro acesso.
 """
 
-from .openrouter_client import OpenRouterClient
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+_EXPORTS = {
+    "OpenRouterClient": ".openrouter_client",
+    "ResultCache": ".result_cache",
+    "make_cache_key": ".result_cache",
+    "detect_language_locally": ".language_heuristics",
+    "extract_dependencies_locally": ".dependency_parser",
+    "merge_dependencies": ".dependency_parser",
+    "summarize_ast_locally": ".ast_summary",
+    "ApiIndex": ".api_index",
+    "build_index": ".api_index",
+    "REGISTRY": ".metrics",
+    "MetricsRegistry": ".metrics",
+    "MetricsServer": ".metrics",
+    "SnapshotWriter": ".metrics",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = list(_EXPORTS)
 
-__all__ = ["OpenRouterClient"] 
\ No newline at end of file
+if TYPE_CHECKING:
+    from .openrouter_client import OpenRouterClient
+    from .result_cache import ResultCache, make_cache_key
+    from .language_heuristics import detect_language_locally
+    from .dependency_parser import extract_dependencies_locally, merge_dependencies
+    from .ast_summary import summarize_ast_locally
+    from .api_index import ApiIndex, build_index
+    from .metrics import REGISTRY, MetricsRegistry, MetricsServer, SnapshotWriter
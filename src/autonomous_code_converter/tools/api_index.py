@@ -0,0 +1,411 @@
+"""
+Índice compilado de mapeamentos de APIs para C++
+
+Base de conhecimento do item 2.3 do plano: símbolos de bibliotecas
+Python/JavaScript (``requests``, ``json.loads``, ``openai.OpenAI``...)
+mapeados para o equivalente C++, os includes, os alvos CMake e a seção do
+``api_cpp.md`` que descreve a integração. As etapas de dependências e de
+síntese consultam o índice em vez de perguntar ao LLM sobre APIs
+conhecidas.
+
+A compilação é um passo offline (``python -m
+src.autonomous_code_converter.tools.api_index build``): as seções e as
+declarações FetchContent vêm do ``api_cpp.md`` e os símbolos de origem da
+tabela deste módulo; uma referência a seção inexistente interrompe a
+compilação. O artefato é um arquivo binário versionado:
+
+- cabeçalho com magic, versão do formato e sha256 das entradas da
+  compilação (documento e tabela);
+- tabela hash de endereçamento aberto (blake2b de 64 bits, fator de carga
+  de no máximo 1/2), com o deslocamento de cada registro;
+- registros ``chave + JSON do ApiMapping``.
+
+O arquivo é mapeado em memória: abrir não lê o índice e cada consulta
+toca uma ou duas entradas da tabela, em O(1). Processos da pré-análise
+compartilham as mesmas páginas do cache do sistema.
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from ..models.base_models import ApiMapping, LanguageType
+
+FORMAT_VERSION = 1
+MAGIC = b"ACCAPIX\x00"
+
+DEFAULT_SOURCE = "api_cpp.md"
+DEFAULT_INDEX_PATH = ".cache/api_index.bin"
+
+# magic, versão do formato, reservado, registros, sha256 das entradas, entradas da tabela
+_HEADER = struct.Struct("<8sHHI32sI")
+# hash da chave, deslocamento do registro (0 = vazio)
+_SLOT = struct.Struct("<QQ")
+# tamanho da chave, tamanho do JSON
+_RECORD = struct.Struct("<HI")
+
+
+class CppLibrary(NamedTuple):
+    """Biblioteca C++ descrita no api_cpp.md"""
+    section: Optional[str]
+    includes: Tuple[str, ...]
+    cmake_targets: Tuple[str, ...]
+    fetch_name: Optional[str] = None
+
+
+CPP_LIBRARIES: Dict[str, CppLibrary] = {
+    "cpr": CppLibrary("1.1", ("<cpr/cpr.h>",), ("cpr::cpr",), "cpr"),
+    "Boost.Beast": CppLibrary("1.1", ("<boost/beast.hpp>", "<boost/asio.hpp>"), ("Boost::headers",)),
+    "nlohmann/json": CppLibrary("1.2", ("<nlohmann/json.hpp>",), ("nlohmann_json::nlohmann_json",)),
+    "OpenAICompatibleClient": CppLibrary(
+        "2.2", ('"OpenAICompatibleClient.hpp"', "<cpr/cpr.h>", "<nlohmann/json.hpp>"),
+        ("cpr::cpr", "nlohmann_json::nlohmann_json"), "cpr"),
+    "AWS SDK for C++": CppLibrary(
+        "3.3", ("<aws/core/Aws.h>", "<aws/bedrock-runtime/BedrockRuntimeClient.h>",
+                "<aws/bedrock-runtime/model/InvokeModelRequest.h>"),
+        ("aws-cpp-sdk-bedrock-runtime", "aws-cpp-sdk-core")),
+    "std": CppLibrary(None, (), ()),
+}
+
+_PY, _JS = LanguageType.PYTHON.value, LanguageType.JAVASCRIPT.value
+
+# (linguagem, símbolo de origem, biblioteca C++, símbolo C++, seção própria, observação)
+SYMBOL_MAPPINGS: List[Tuple[str, str, str, Optional[str], Optional[str], Optional[str]]] = [
+    (_PY, "requests", "cpr", None, None, "cpr segue a API do Python Requests sobre a libcurl"),
+    (_PY, "requests.get", "cpr", "cpr::Get", None, "cpr::Get(cpr::Url{...}, cpr::Parameters{...})"),
+    (_PY, "requests.post", "cpr", "cpr::Post", None, "json= vira cpr::Body{j.dump()} com Content-Type"),
+    (_PY, "requests.put", "cpr", "cpr::Put", None, None),
+    (_PY, "requests.patch", "cpr", "cpr::Patch", None, None),
+    (_PY, "requests.delete", "cpr", "cpr::Delete", None, None),
+    (_PY, "requests.head", "cpr", "cpr::Head", None, None),
+    (_PY, "requests.Session", "cpr", "cpr::Session", None, None),
+    (_PY, "requests.Response", "cpr", "cpr::Response", None, "status_code, text e header"),
+    (_PY, "httpx", "cpr", None, None, "Chamadas assíncronas: cpr::GetAsync/PostAsync devolvem std::future"),
+    (_PY, "httpx.get", "cpr", "cpr::Get", None, None),
+    (_PY, "httpx.post", "cpr", "cpr::Post", None, None),
+    (_PY, "httpx.Client", "cpr", "cpr::Session", None, None),
+    (_PY, "httpx.AsyncClient", "cpr", "cpr::Session", None, "Use cpr::GetAsync/PostAsync ou Boost.Beast"),
+    (_PY, "urllib.request", "cpr", None, None, None),
+    (_PY, "urllib.request.urlopen", "cpr", "cpr::Get", None, None),
+    (_PY, "aiohttp", "Boost.Beast", None, None, "I/O assíncrono sobre Boost.Asio"),
+    (_PY, "aiohttp.ClientSession", "Boost.Beast", "boost::beast::http", None, None),
+    (_PY, "json", "nlohmann/json", "nlohmann::json", None, None),
+    (_PY, "json.loads", "nlohmann/json", "nlohmann::json::parse", None, None),
+    (_PY, "json.load", "nlohmann/json", "nlohmann::json::parse", None, "Recebe um std::ifstream"),
+    (_PY, "json.dumps", "nlohmann/json", "nlohmann::json::dump", None, "indent=4 vira dump(4)"),
+    (_PY, "json.dump", "nlohmann/json", "nlohmann::json::dump", None, "Grave com operator<< num std::ofstream"),
+    (_PY, "json.JSONDecodeError", "nlohmann/json", "nlohmann::json::parse_error", None, None),
+    (_PY, "openai", "OpenAICompatibleClient", None, None, "Mesmo cliente para todos os provedores compatíveis (seção 2.3)"),
+    (_PY, "openai.OpenAI", "OpenAICompatibleClient", "OpenAICompatibleClient", None, None),
+    (_PY, "openai.AsyncOpenAI", "OpenAICompatibleClient", "OpenAICompatibleClient", None, None),
+    (_PY, "anthropic", "cpr", None, "3.2", "API REST própria: cabeçalhos x-api-key e anthropic-version"),
+    (_PY, "anthropic.Anthropic", "cpr", "cpr::Post", "3.2", "POST https://api.anthropic.com/v1/messages"),
+    (_PY, "google.generativeai", "cpr", None, "3.1", "Sem SDK C++: API REST com token Bearer do Google Cloud"),
+    (_PY, "vertexai", "cpr", None, "3.1", "Sem SDK C++: API REST com token Bearer do Google Cloud"),
+    (_PY, "boto3", "AWS SDK for C++", None, None, "find_package(AWSSDK COMPONENTS bedrock-runtime)"),
+    (_PY, "boto3.client", "AWS SDK for C++", "Aws::BedrockRuntime::BedrockRuntimeClient", None,
+     "Aws::InitAPI antes de criar o cliente; o body é o JSON do provedor do modelo"),
+    (_PY, "ollama", "OpenAICompatibleClient", "OpenAICompatibleClient", "4.1", "base_url http://localhost:11434"),
+    (_PY, "huggingface_hub", "cpr", None, "4.2", None),
+    (_PY, "huggingface_hub.InferenceClient", "cpr", "cpr::Post", "4.2", None),
+    (_PY, "replicate", "cpr", None, "4.3", "Cria a predição e consulta o status até terminar"),
+    (_PY, "time.sleep", "std", "std::this_thread::sleep_for", "4.3", None),
+    (_PY, "os.getenv", "std", "std::getenv", "5.3", None),
+    (_PY, "os.environ", "std", "std::getenv", "5.3", "Somente leitura; retorna nullptr se ausente"),
+    (_JS, "axios", "cpr", None, None, None),
+    (_JS, "axios.get", "cpr", "cpr::Get", None, None),
+    (_JS, "axios.post", "cpr", "cpr::Post", None, None),
+    (_JS, "node-fetch", "cpr", "cpr::Get", None, None),
+    (_JS, "JSON.parse", "nlohmann/json", "nlohmann::json::parse", None, None),
+    (_JS, "JSON.stringify", "nlohmann/json", "nlohmann::json::dump", None, None),
+    (_JS, "openai", "OpenAICompatibleClient", "OpenAICompatibleClient", None, None),
+    (_JS, "@anthropic-ai/sdk", "cpr", "cpr::Post", "3.2", "API REST própria: cabeçalhos x-api-key e anthropic-version"),
+    (_JS, "@google/generative-ai", "cpr", None, "3.1", "Sem SDK C++: API REST com token Bearer do Google Cloud"),
+    (_JS, "@aws-sdk/client-bedrock-runtime", "AWS SDK for C++", "Aws::BedrockRuntime::BedrockRuntimeClient", None, None),
+    (_JS, "ollama", "OpenAICompatibleClient", "OpenAICompatibleClient", "4.1", "base_url http://localhost:11434"),
+    (_JS, "replicate", "cpr", None, "4.3", None),
+]
+
+_SECTION_RE = re.compile(r"^Secção (\d+\.\d+): (.+?)\s*$", re.M)
+_FETCH_RE = re.compile(r"FetchContent_Declare\(\s*(\S+)\s+GIT_REPOSITORY\s+(\S+)\s+GIT_TAG\s+(\S+)")
+
+
+def _family(language: LanguageType) -> str:
+    """JavaScript e TypeScript compartilham as mesmas chaves"""
+    return _PY if language == LanguageType.PYTHON else _JS
+
+
+def _key(symbol: str, family: str) -> bytes:
+    return f"{family}:{symbol}".encode("utf-8")
+
+
+def _hash(key: bytes) -> int:
+    # Estável entre processos (o hash() do Python é aleatorizado)
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def parse_reference(text: str) -> Tuple[Dict[str, str], Dict[str, Tuple[str, str]]]:
+    """Seções e declarações FetchContent do api_cpp.md
+
+    Returns:
+        (número da seção -> título, nome -> (repositório, tag))
+    """
+    sections = {number: title for number, title in _SECTION_RE.findall(text)}
+    fetch = {name: (repository, tag) for name, repository, tag in _FETCH_RE.findall(text)}
+    return sections, fetch
+
+
+def build_mappings(text: str) -> List[Tuple[str, ApiMapping]]:
+    """Combina a tabela de símbolos com o api_cpp.md
+
+    Raises:
+        ValueError: Se uma seção ou biblioteca citada não existir
+    """
+    sections, fetch = parse_reference(text)
+    entries = []
+    for family, symbol, library_name, cpp_symbol, section, notes in SYMBOL_MAPPINGS:
+        library = CPP_LIBRARIES.get(library_name)
+        if library is None:
+            raise ValueError(f"{symbol}: biblioteca C++ desconhecida {library_name}")
+        section = section or library.section
+        reference = None
+        if section is not None:
+            if section not in sections:
+                raise ValueError(f"{symbol}: seção {section} não existe no api_cpp.md")
+            reference = f"api_cpp.md, Secção {section}: {sections[section]}"
+        repository, tag = fetch.get(library.fetch_name, (None, None))
+        entries.append((f"{family}:{symbol}", ApiMapping(
+            symbol=symbol,
+            cpp_library=library_name,
+            cpp_symbol=cpp_symbol,
+            includes=list(library.includes),
+            cmake_targets=list(library.cmake_targets),
+            git_repository=repository,
+            git_tag=tag,
+            reference=reference,
+            notes=notes,
+        )))
+    return entries
+
+
+def write_index(entries: List[Tuple[str, ApiMapping]], digest: bytes, output: str) -> Path:
+    """Grava o artefato binário (substituição atômica)"""
+    slot_count = 1
+    while slot_count < 2 * max(len(entries), 1):
+        slot_count *= 2
+    mask = slot_count - 1
+
+    records = bytearray()
+    slots = [(0, 0)] * slot_count
+    base = _HEADER.size + _SLOT.size * slot_count
+    for key_text, mapping in entries:
+        key = key_text.encode("utf-8")
+        value = mapping.model_dump_json(exclude_none=True).encode("utf-8")
+        offset = base + len(records)
+        records += _RECORD.pack(len(key), len(value)) + key + value
+
+        key_hash = _hash(key)
+        position = key_hash & mask
+        while slots[position][1]:
+            position = (position + 1) & mask
+        slots[position] = (key_hash, offset)
+
+    path = Path(output)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(entries), digest, slot_count))
+            handle.write(b"".join(_SLOT.pack(*slot) for slot in slots))
+            handle.write(records)
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+        raise
+    return path
+
+
+def build_index(source: str = DEFAULT_SOURCE, output: str = DEFAULT_INDEX_PATH) -> Path:
+    """Compila o índice a partir do api_cpp.md (passo offline)"""
+    text = Path(source).read_text(encoding="utf-8")
+    entries = build_mappings(text)
+    table = json.dumps([SYMBOL_MAPPINGS, CPP_LIBRARIES], ensure_ascii=False).encode("utf-8")
+    digest = hashlib.sha256(text.encode("utf-8") + b"\x00" + table).digest()
+    return write_index(entries, digest, output)
+
+
+class ApiIndex:
+    """Índice compilado, mapeado em memória e somente leitura"""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        """Abre o artefato
+
+        Raises:
+            ValueError: Se o arquivo não for um índice ou for de outra versão do formato
+        """
+        self.path = Path(path)
+        with open(self.path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, format_version, _, count, digest, slot_count = _HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            magic = format_version = None
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} não é um índice de APIs")
+        if format_version != FORMAT_VERSION:
+            self._map.close()
+            raise ValueError(f"{path} usa o formato {format_version}; recompile com o formato {FORMAT_VERSION}")
+        self.count = count
+        self.version = digest.hex()
+        self._mask = slot_count - 1
+        self._decoded: Dict[int, ApiMapping] = {}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def get(self, symbol: str, language: LanguageType) -> Optional[ApiMapping]:
+        """Mapeamento exato de ``symbol`` (None se desconhecido)"""
+        key = _key(symbol, _family(language))
+        key_hash = _hash(key)
+        position = key_hash & self._mask
+        while True:
+            slot_hash, offset = _SLOT.unpack_from(self._map, _HEADER.size + _SLOT.size * position)
+            if not offset:
+                return None
+            if slot_hash == key_hash:
+                key_length, value_length = _RECORD.unpack_from(self._map, offset)
+                start = offset + _RECORD.size
+                if self._map[start:start + key_length] == key:
+                    mapping = self._decoded.get(offset)
+                    if mapping is None:
+                        value = self._map[start + key_length:start + key_length + value_length]
+                        mapping = self._decoded[offset] = ApiMapping.model_validate_json(value)
+                    return mapping
+            position = (position + 1) & self._mask
+
+    def lookup(self, symbol: str, language: LanguageType) -> Optional[ApiMapping]:
+        """Mapeamento de ``symbol`` ou do módulo mais próximo que o contém
+
+        ``requests.adapters.HTTPAdapter`` cai em ``requests`` se só o
+        módulo for conhecido.
+        """
+        while symbol:
+            mapping = self.get(symbol, language)
+            if mapping is not None:
+                return mapping
+            symbol = symbol.rpartition(".")[0]
+        return None
+
+    def covers(self, libraries: Iterable[str], language: LanguageType) -> bool:
+        """Se há ``libraries`` e todas têm mapeamento (lista vazia não é coberta)"""
+        libraries = list(libraries)
+        return bool(libraries) and all(self.get(library, language) is not None for library in libraries)
+
+    def close(self) -> None:
+        """Fecha o mapeamento"""
+        self._map.close()
+
+    def __enter__(self) -> "ApiIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+@lru_cache(maxsize=None)
+def open_api_index(path: str) -> ApiIndex:
+    """ApiIndex aberto uma vez por processo para ``path``"""
+    return ApiIndex(path)
+
+
+_default_index: Optional[ApiIndex] = None
+
+
+def get_default_api_index() -> Optional[ApiIndex]:
+    """Índice consultado pela extração local de dependências"""
+    return _default_index
+
+
+def set_default_api_index(index: Optional[ApiIndex]) -> Optional[ApiIndex]:
+    """Ativa ``index`` como padrão (None desativa); retorna o anterior"""
+    global _default_index
+    previous, _default_index = _default_index, index
+    return previous
+
+
+def cpp_mappings(specifiers: Iterable[str], language: LanguageType,
+                 index: ApiIndex) -> Dict[str, ApiMapping]:
+    """Mapeamentos dos especificadores importados, por símbolo encontrado no índice"""
+    found: Dict[str, ApiMapping] = {}
+    for specifier in specifiers:
+        mapping = index.lookup(specifier, language)
+        if mapping is not None:
+            found.setdefault(mapping.symbol, mapping)
+    return found
+
+
+class CppRequirements(NamedTuple):
+    """O que a síntese precisa declarar para um conjunto de mapeamentos"""
+    includes: List[str]
+    cmake_targets: List[str]
+    fetch_content: Dict[str, Tuple[str, str]]
+
+
+def collect_requirements(mappings: Iterable[ApiMapping]) -> CppRequirements:
+    """Includes, alvos CMake e declarações FetchContent sem repetição"""
+    includes: Dict[str, None] = {}
+    targets: Dict[str, None] = {}
+    fetch: Dict[str, Tuple[str, str]] = {}
+    for mapping in mappings:
+        includes.update(dict.fromkeys(mapping.includes))
+        targets.update(dict.fromkeys(mapping.cmake_targets))
+        if mapping.git_repository and mapping.git_tag:
+            library = CPP_LIBRARIES.get(mapping.cpp_library)
+            fetch.setdefault(library.fetch_name if library and library.fetch_name else mapping.cpp_library,
+                             (mapping.git_repository, mapping.git_tag))
+    return CppRequirements(list(includes), list(targets), fetch)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Ponto de entrada de linha de comando"""
+    parser = argparse.ArgumentParser(description="Compila e consulta o índice de mapeamentos de APIs para C++")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Compila o índice a partir do api_cpp.md")
+    build.add_argument("--source", default=DEFAULT_SOURCE, help="Documento de referência")
+    build.add_argument("-o", "--output", default=DEFAULT_INDEX_PATH, help="Arquivo do índice")
+    lookup = commands.add_parser("lookup", help="Consulta símbolos no índice")
+    lookup.add_argument("symbols", nargs="+")
+    lookup.add_argument("--language", default=_PY, choices=[language.value for language in LanguageType])
+    lookup.add_argument("--index", default=DEFAULT_INDEX_PATH, help="Arquivo do índice")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        path = build_index(args.source, args.output)
+        with ApiIndex(str(path)) as index:
+            print(f"{len(index)} mapeamentos gravados em {path} (versão {index.version[:12]})", file=sys.stderr)
+        return 0
+
+    with ApiIndex(args.index) as index:
+        missing = 0
+        for symbol in args.symbols:
+            mapping = index.lookup(symbol, LanguageType(args.language))
+            if mapping is None:
+                missing += 1
+            print(json.dumps({symbol: None if mapping is None else mapping.model_dump(exclude_none=True)},
+                             ensure_ascii=False))
+    return 0 if missing == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
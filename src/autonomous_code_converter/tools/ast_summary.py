@@ -0,0 +1,136 @@
+"""
+Resumo estrutural local do código fonte
+
+Produz um EnrichedAST sem LLM: contagem de nós, funções e classes,
+papéis de variáveis, fluxo de controle e métricas de complexidade.
+Python usa o ``ast``; JavaScript/TypeScript usam o tokenizador do
+extrator de dependências, que já ignora comentários e strings.
+"""
+
+import ast
+from collections import Counter
+from typing import Dict, List, Union
+
+from ..models.base_models import EnrichedAST, LanguageType, SourceCode
+from .dependency_parser import js_tokens
+
+# Limite de entradas de fluxo de controle mantidas no resultado
+MAX_CONTROL_FLOW_ENTRIES = 50
+
+_PY_BRANCHES = (ast.If, ast.IfExp, ast.Try, ast.ExceptHandler, ast.BoolOp, ast.comprehension, ast.Match)
+_PY_LOOPS = (ast.For, ast.AsyncFor, ast.While)
+_PY_FUNCTIONS = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+_JS_BRANCH_KEYWORDS = frozenset({"if", "case", "catch", "switch"})
+_JS_LOOP_KEYWORDS = frozenset({"for", "while", "do"})
+
+
+def _python_summary(content: str) -> EnrichedAST:
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError) as e:
+        return EnrichedAST(ast_nodes={"parse_error": str(e)},
+                           complexity_metrics={"lines": content.count("\n") + 1})
+
+    node_counts: Counter = Counter()
+    functions: Dict[str, str] = {}
+    roles: Dict[str, str] = {}
+    control_flow: List[str] = []
+    branches = loops = 0
+
+    for node in ast.walk(tree):
+        node_counts[type(node).__name__] += 1
+        if isinstance(node, _PY_FUNCTIONS):
+            docstring = ast.get_docstring(node)
+            params = [arg.arg for arg in node.args.args if arg.arg not in ("self", "cls")]
+            functions[node.name] = (
+                docstring.splitlines()[0] if docstring
+                else f"função com {len(params)} parâmetro(s)"
+            )
+            for param in params:
+                roles.setdefault(param, "parâmetro")
+        elif isinstance(node, _PY_BRANCHES):
+            branches += 1
+        elif isinstance(node, _PY_LOOPS):
+            loops += 1
+
+        if isinstance(node, (ast.If, ast.Try, ast.Match) + _PY_LOOPS) and len(control_flow) < MAX_CONTROL_FLOW_ENTRIES:
+            control_flow.append(f"{type(node).__name__.lower()} na linha {node.lineno}")
+
+    for node in tree.body:
+        targets = node.targets if isinstance(node, ast.Assign) else (
+            [node.target] if isinstance(node, (ast.AnnAssign, ast.AugAssign)) else []
+        )
+        for target in targets:
+            if isinstance(target, ast.Name):
+                roles[target.id] = "constante" if target.id.isupper() else "global"
+
+    metrics: Dict[str, Union[int, float]] = {
+        "lines": content.count("\n") + 1,
+        "functions": len(functions),
+        "classes": node_counts["ClassDef"],
+        "branches": branches,
+        "loops": loops,
+        "cyclomatic_complexity": 1 + branches + loops,
+    }
+    return EnrichedAST(
+        ast_nodes=dict(node_counts.most_common()),
+        function_descriptions=functions,
+        variable_roles=roles,
+        control_flow_logic=control_flow,
+        complexity_metrics=metrics
+    )
+
+
+def _js_summary(content: str) -> EnrichedAST:
+    tokens = js_tokens(content)
+    names = [text for kind, text, _, _ in tokens if kind == "name"]
+    functions: Dict[str, str] = {}
+    roles: Dict[str, str] = {}
+    control_flow: List[str] = []
+    branches = loops = classes = 0
+
+    for index, (kind, text, start, _) in enumerate(tokens):
+        if kind != "name":
+            continue
+        following = tokens[index + 1:index + 4]
+        if text == "function" and following and following[0][0] == "name":
+            functions[following[0][1]] = "função declarada"
+        elif text in ("const", "let", "var") and following and following[0][0] == "name":
+            name = following[0][1]
+            if len(following) == 3 and following[1][1] == "=" and following[2][1] in ("(", "function", "async"):
+                functions[name] = "função atribuída a variável"
+            else:
+                roles.setdefault(name, "constante" if text == "const" else "variável")
+        elif text == "class":
+            classes += 1
+        elif text in _JS_BRANCH_KEYWORDS or text in _JS_LOOP_KEYWORDS:
+            if text in _JS_LOOP_KEYWORDS:
+                loops += 1
+            elif text != "switch":
+                branches += 1
+            if len(control_flow) < MAX_CONTROL_FLOW_ENTRIES:
+                control_flow.append(f"{text} na linha {content.count(chr(10), 0, start) + 1}")
+
+    metrics: Dict[str, Union[int, float]] = {
+        "lines": content.count("\n") + 1,
+        "functions": len(functions),
+        "classes": classes,
+        "branches": branches,
+        "loops": loops,
+        "cyclomatic_complexity": 1 + branches + loops,
+    }
+    return EnrichedAST(
+        ast_nodes={"tokens": len(tokens), "identifiers": len(names)},
+        function_descriptions=functions,
+        variable_roles=roles,
+        control_flow_logic=control_flow,
+        complexity_metrics=metrics
+    )
+
+
+def summarize_ast_locally(source_code: SourceCode) -> EnrichedAST:
+    """Monta um EnrichedAST estrutural sem chamar o LLM"""
+    if source_code.language == LanguageType.PYTHON:
+        return _python_summary(source_code.content)
+    return _js_summary(source_code.content)
@@ -0,0 +1,282 @@
+"""
+Extração determinística de dependências sem LLM
+
+Python é analisado pela árvore do ``ast``; JavaScript/TypeScript por um
+tokenizador que ignora comentários e strings e reconhece ``import``,
+``import type``, ``export ... from``, ``require()`` e ``import()``
+dinâmico. As bibliotecas são classificadas em padrão/externas e recebem
+URLs de documentação a partir de templates. Com um ApiIndex ativo, os
+símbolos importados também recebem o equivalente C++ conhecido.
+"""
+
+import ast
+import re
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..models.base_models import ApiMapping, Dependencies, LanguageType, SourceCode
+from .api_index import ApiIndex, cpp_mappings, get_default_api_index
+
+PYTHON_STDLIB = frozenset(sys.stdlib_module_names)
+
+NODE_BUILTINS = frozenset({
+    "assert", "async_hooks", "buffer", "child_process", "cluster", "console", "constants",
+    "crypto", "dgram", "diagnostics_channel", "dns", "domain", "events", "fs", "http", "http2",
+    "https", "inspector", "module", "net", "os", "path", "perf_hooks", "process", "punycode",
+    "querystring", "readline", "repl", "stream", "string_decoder", "sys", "test", "timers",
+    "tls", "trace_events", "tty", "url", "util", "v8", "vm", "wasi", "worker_threads", "zlib",
+})
+
+DOCUMENTATION_URL_TEMPLATES = {
+    (LanguageType.PYTHON, True): "https://docs.python.org/3/library/{name}.html",
+    (LanguageType.PYTHON, False): "https://pypi.org/project/{name}/",
+    (LanguageType.JAVASCRIPT, True): "https://nodejs.org/api/{name}.html",
+    (LanguageType.JAVASCRIPT, False): "https://www.npmjs.com/package/{name}",
+}
+
+_JS_TOKEN_RE = re.compile(
+    r"""
+    (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+  | (?P<template>`(?:\\.|[^`\\])*`)
+  | (?P<name>[A-Za-z_$][\w$]*)
+  | (?P<punct>[{}()\[\];,.*=<>])
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# Dependências encontradas: (texto do import, especificador do módulo)
+_Found = List[Tuple[str, str]]
+
+
+def _dedupe(items: Iterable[str]) -> List[str]:
+    """Remove duplicatas preservando a ordem"""
+    return list(dict.fromkeys(item for item in items if item))
+
+
+def _python_dependencies(content: str) -> _Found:
+    """Percorre a árvore do ast coletando imports estáticos e dinâmicos"""
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return _python_dependencies_fallback(content)
+
+    found: _Found = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            statement = ast.unparse(node)
+            found.extend((statement, alias.name) for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            # Imports relativos apontam para o próprio projeto
+            module = "." * node.level + (node.module or "")
+            found.append((ast.unparse(node), module))
+        elif isinstance(node, ast.Call) and node.args:
+            func = node.func
+            name = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", None)
+            first = node.args[0]
+            if (name in ("import_module", "__import__")
+                    and isinstance(first, ast.Constant) and isinstance(first.value, str)):
+                found.append((ast.unparse(node), first.value))
+    return found
+
+
+_PY_IMPORT_LINE = re.compile(r"^[ \t]*import[ \t]+([\w.]+(?:[ \t]+as[ \t]+\w+)?(?:[ \t]*,[ \t]*[\w.]+(?:[ \t]+as[ \t]+\w+)?)*)", re.M)
+_PY_FROM_LINE = re.compile(r"^[ \t]*from[ \t]+(\.*[\w.]*)[ \t]+import[ \t]+[^\n]+", re.M)
+
+
+def _python_dependencies_fallback(content: str) -> _Found:
+    """Varredura por linhas para arquivos que não compilam"""
+    found: _Found = []
+    for match in _PY_IMPORT_LINE.finditer(content):
+        statement = match.group(0).strip()
+        for part in match.group(1).split(","):
+            found.append((statement, part.split()[0]))
+    for match in _PY_FROM_LINE.finditer(content):
+        found.append((match.group(0).strip(), match.group(1)))
+    return found
+
+
+def js_tokens(content: str) -> List[Tuple[str, str, int, int]]:
+    """Tokeniza JS/TS descartando comentários
+
+    Cada token é (tipo, texto, início, fim), com tipo ``string``,
+    ``template``, ``name`` ou ``punct``. Também usado pelo resumo local
+    da AST (``ast_summary``).
+    """
+    return [
+        (match.lastgroup, match.group(), match.start(), match.end())
+        for match in _JS_TOKEN_RE.finditer(content)
+        if match.lastgroup != "comment"
+    ]
+
+
+def _js_module_string(token: Tuple[str, str, int, int]) -> Optional[str]:
+    kind, text, _, _ = token
+    if kind == "string" or (kind == "template" and "${" not in text):
+        return text[1:-1]
+    return None
+
+
+def _js_dependencies(content: str) -> _Found:
+    """Reconhece import/export-from/require()/import() na sequência de tokens"""
+    tokens = js_tokens(content)
+    found: _Found = []
+    count = len(tokens)
+
+    def record(start_index: int, end_index: int, module: str) -> None:
+        statement = content[tokens[start_index][2]:tokens[end_index][3]]
+        found.append((" ".join(statement.split()), module))
+
+    for index, (kind, text, _, _) in enumerate(tokens):
+        if kind != "name" or (index > 0 and tokens[index - 1][1] == "."):
+            continue
+
+        if text in ("require", "import") and index + 2 < count and tokens[index + 1][1] == "(":
+            # require('x') e import('x') dinâmico
+            module = _js_module_string(tokens[index + 2])
+            if module is not None:
+                end = index + 3 if index + 3 < count and tokens[index + 3][1] == ")" else index + 2
+                record(index, end, module)
+        elif text == "import" and index + 1 < count:
+            module = _js_module_string(tokens[index + 1])
+            if module is not None:
+                # import 'x' (apenas efeitos colaterais)
+                record(index, index + 1, module)
+            else:
+                _record_from_clause(tokens, index, record)
+        elif text == "export" and index + 1 < count and tokens[index + 1][1] in ("*", "{", "type"):
+            _record_from_clause(tokens, index, record)
+
+    return found
+
+
+def _record_from_clause(tokens, start: int, record) -> None:
+    """Procura ``from 'x'`` a partir de um import/export, parando no fim do comando"""
+    depth = 0
+    for index in range(start + 1, min(start + 256, len(tokens) - 1)):
+        kind, text, _, _ = tokens[index]
+        if text == "{":
+            depth += 1
+        elif text == "}":
+            depth -= 1
+        elif depth == 0 and text in (";", "=", "("):
+            return
+        elif depth == 0 and kind == "name" and text == "from":
+            module = _js_module_string(tokens[index + 1])
+            if module is not None:
+                record(start, index + 1, module)
+            return
+        elif depth == 0 and kind == "name" and text in ("import", "export", "function", "class", "const", "let", "var"):
+            return
+
+
+def _library_name(module: str, language: LanguageType) -> Optional[Tuple[str, bool]]:
+    """Resolve o especificador para (nome da biblioteca, é da biblioteca padrão)
+
+    Retorna None para imports locais/relativos.
+    """
+    if language == LanguageType.PYTHON:
+        if not module or module.startswith("."):
+            return None
+        name = module.split(".")[0]
+        return name, name in PYTHON_STDLIB
+
+    if module.startswith((".", "/")) or not module:
+        return None
+    if module.startswith("node:"):
+        return module[len("node:"):].split("/")[0], True
+    parts = module.split("/")
+    if module.startswith("@"):
+        name = "/".join(parts[:2])
+    else:
+        name = parts[0]
+    return name, name in NODE_BUILTINS
+
+
+def documentation_url(name: str, language: LanguageType, is_standard: bool) -> str:
+    """Monta a URL de documentação de uma biblioteca a partir dos templates"""
+    family = LanguageType.PYTHON if language == LanguageType.PYTHON else LanguageType.JAVASCRIPT
+    return DOCUMENTATION_URL_TEMPLATES[(family, is_standard)].format(name=name)
+
+
+def extract_dependencies_locally(source_code: SourceCode,
+                                 api_index: Optional[ApiIndex] = None) -> Dependencies:
+    """Extrai dependências de forma exata, sem chamar o LLM
+
+    ``api_index`` (ou o índice padrão, se houver) preenche ``cpp_mappings``.
+    """
+    language = source_code.language
+    if language == LanguageType.PYTHON:
+        found = _python_dependencies(source_code.content)
+    else:
+        found = _js_dependencies(source_code.content)
+
+    standard: List[str] = []
+    external: List[str] = []
+    urls: Dict[str, str] = {}
+    for _, module in found:
+        resolved = _library_name(module, language)
+        if resolved is None:
+            continue
+        name, is_standard = resolved
+        (standard if is_standard else external).append(name)
+        urls.setdefault(name, documentation_url(name, language, is_standard))
+
+    index = api_index if api_index is not None else get_default_api_index()
+    return Dependencies(
+        imports=_dedupe(statement for statement, _ in found),
+        external_libraries=_dedupe(external),
+        standard_libraries=_dedupe(standard),
+        documentation_urls=urls,
+        cpp_mappings=cpp_mappings(import_specifiers(source_code), language, index) if index is not None else {}
+    )
+
+
+def import_specifiers(source_code: SourceCode) -> List[str]:
+    """Especificadores de módulo importados, inclusive os locais/relativos
+
+    Em Python, ``from m import n`` também gera ``m.n``, pois ``n`` pode ser
+    um submódulo; quem resolve os especificadores descarta o que não existe.
+    """
+    if source_code.language != LanguageType.PYTHON:
+        return _dedupe(module for _, module in _js_dependencies(source_code.content))
+
+    try:
+        tree = ast.parse(source_code.content)
+    except (SyntaxError, ValueError):
+        return _dedupe(module for _, module in _python_dependencies_fallback(source_code.content))
+
+    specifiers: List[str] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            specifiers.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            module = "." * node.level + (node.module or "")
+            specifiers.append(module)
+            separator = "" if module.endswith(".") else "."
+            specifiers.extend(f"{module}{separator}{alias.name}" for alias in node.names if alias.name != "*")
+    return _dedupe(specifiers)
+
+
+def merge_dependencies(*results: Dependencies) -> Dependencies:
+    """Une vários resultados removendo duplicatas
+
+    A ordem importa: listas mantêm a primeira ocorrência e, para URLs de
+    documentação e mapeamentos C++, o primeiro resultado que define uma
+    biblioteca prevalece.
+    """
+    urls: Dict[str, str] = {}
+    mappings: Dict[str, ApiMapping] = {}
+    for result in results:
+        for name, url in result.documentation_urls.items():
+            urls.setdefault(name, url)
+        for symbol, mapping in result.cpp_mappings.items():
+            mappings.setdefault(symbol, mapping)
+
+    return Dependencies(
+        imports=_dedupe(item for result in results for item in result.imports),
+        external_libraries=_dedupe(item for result in results for item in result.external_libraries),
+        standard_libraries=_dedupe(item for result in results for item in result.standard_libraries),
+        documentation_urls=urls,
+        cpp_mappings=mappings
+    )
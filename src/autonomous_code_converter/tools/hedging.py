@@ -0,0 +1,231 @@
+"""
+Requisições duplicadas (hedging) contra a cauda de latência do LLM
+
+Se uma requisição não termina dentro de um percentil da latência recente
+do modelo (p95 por padrão, medido ao vivo), uma duplicata é enviada ao
+mesmo modelo ou a um modelo alternativo. A primeira resposta bem-sucedida
+vence e a outra é cancelada, o que também fecha sua conexão.
+
+Um orçamento limita a fração do tráfego duplicado: cada requisição
+deposita ``budget`` fichas e cada duplicata gasta uma, então duplicatas
+nunca passam de ``budget`` das requisições (mais uma pequena rajada).
+
+Só requisições sem streaming são duplicadas; a corrida inclui a leitura
+do corpo inteiro, pois o provedor pode responder os cabeçalhos cedo e
+demorar na geração.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import httpx
+
+from ..models.config import HedgingConfig
+from .metrics import HEDGE_OUTCOMES, HEDGED_REQUESTS
+
+# Fichas acumuladas no máximo pelo orçamento (rajada de duplicatas)
+DEFAULT_BUDGET_BURST = 10.0
+
+
+class LatencyTracker:
+    """Janela deslizante de latências por modelo"""
+
+    def __init__(self, window: int = 256):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, model: str, seconds: float) -> None:
+        """Registra a latência de uma resposta de ``model``"""
+        with self._lock:
+            samples = self._samples.get(model)
+            if samples is None:
+                samples = self._samples[model] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def count(self, model: str) -> int:
+        """Amostras guardadas para ``model``"""
+        with self._lock:
+            return len(self._samples.get(model, ()))
+
+    def models(self) -> List[str]:
+        """Modelos com alguma amostra"""
+        with self._lock:
+            return list(self._samples)
+
+    def percentile(self, model: str, q: float) -> Optional[float]:
+        """Percentil ``q`` (0-1) das latências recentes de ``model``"""
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class HedgeBudget:
+    """Orçamento de duplicatas como fração das requisições"""
+
+    def __init__(self, ratio: float, burst: float = DEFAULT_BUDGET_BURST):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        """Chamado a cada requisição original"""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        """Reserva uma duplicata, se houver saldo"""
+        with self._lock:
+            # Tolerância para frações como 0.05 somadas em ponto flutuante
+            if self._tokens < 1.0 - 1e-9:
+                return False
+            self._tokens -= 1.0
+            return True
+
+
+def _request_model(request: httpx.Request) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Modelo e corpo JSON de uma requisição que pode ser duplicada"""
+    if request.method != "POST":
+        return None
+    try:
+        payload = json.loads(request.content)
+    except (httpx.RequestNotRead, ValueError):
+        return None
+    if not isinstance(payload, dict) or payload.get("stream") or not isinstance(payload.get("model"), str):
+        return None
+    return payload["model"], payload
+
+
+def _is_success(outcome: "asyncio.Task") -> bool:
+    return outcome.exception() is None and outcome.result().status_code < 400
+
+
+class HedgedTransport(httpx.AsyncBaseTransport):
+    """Transporte httpx que duplica requisições lentas"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, config: HedgingConfig):
+        """Envolve ``transport``; duplicatas passam pelas mesmas camadas"""
+        self._transport = transport
+        self.config = config
+        self.latencies = LatencyTracker(config.window)
+        self.budget = HedgeBudget(config.budget)
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def hedge_delay(self, model: str) -> Optional[float]:
+        """Espera antes de duplicar uma requisição a ``model`` (None = não duplica)"""
+        if self.latencies.count(model) < self.config.min_samples:
+            delay = self.config.initial_delay
+        else:
+            delay = self.latencies.percentile(model, self.config.percentile)
+        if delay is None:
+            return None
+        return max(self.config.min_delay, delay)
+
+    async def _send(self, request: httpx.Request, model: str) -> httpx.Response:
+        """Envia e lê o corpo, registrando a latência das respostas de sucesso"""
+        start = time.monotonic()
+        response = await self._transport.handle_async_request(request)
+        try:
+            await response.aread()
+        except BaseException:
+            await response.aclose()
+            raise
+        if response.status_code < 400:
+            self.latencies.observe(model, time.monotonic() - start)
+        return response
+
+    def _hedge_request(self, request: httpx.Request, payload: Dict[str, Any]) -> Tuple[httpx.Request, str]:
+        model = self.config.alternate_model or payload["model"]
+        if model == payload["model"]:
+            content = request.content
+        else:
+            content = json.dumps({**payload, "model": model}).encode("utf-8")
+        headers = [(name, value) for name, value in request.headers.raw if name.lower() != b"content-length"]
+        hedge = httpx.Request(request.method, request.url, headers=headers, content=content,
+                              extensions=request.extensions)
+        return hedge, model
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        found = _request_model(request)
+        if found is None:
+            return await self._transport.handle_async_request(request)
+        model, payload = found
+        self.requests += 1
+        self.budget.deposit()
+
+        delay = self.hedge_delay(model)
+        start = time.monotonic()
+        primary = asyncio.ensure_future(self._send(request, model))
+        if delay is None:
+            return await primary
+
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                return primary.result()
+            if not self.budget.try_spend():
+                HEDGE_OUTCOMES.inc(result="budget_exhausted")
+                return await primary
+
+            hedge_request, hedge_model = self._hedge_request(request, payload)
+            hedge = asyncio.ensure_future(self._send(hedge_request, hedge_model))
+            tasks.append(hedge)
+            self.hedges += 1
+            HEDGED_REQUESTS.inc(model=hedge_model)
+            winner = await self._race(primary, hedge)
+            # Tempo da original ainda pendente quando a duplicata venceu
+            censored = None if primary.done() else time.monotonic() - start
+        finally:
+            # A perdedora (ou tudo, se quem chamou desistiu) é cancelada
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if winner is hedge:
+            if censored is not None:
+                # A original cancelada levaria pelo menos esse tempo: sem essa amostra
+                # a janela só guardaria as respostas rápidas e o percentil cairia
+                self.latencies.observe(model, censored)
+            self.hedge_wins += 1
+            HEDGE_OUTCOMES.inc(result="hedge_won")
+        elif winner is primary:
+            HEDGE_OUTCOMES.inc(result="primary_won")
+        else:
+            HEDGE_OUTCOMES.inc(result="both_failed")
+            winner = primary
+        return winner.result()
+
+    @staticmethod
+    async def _race(primary: "asyncio.Task", hedge: "asyncio.Task") -> Optional["asyncio.Task"]:
+        """Primeira tarefa bem-sucedida; None se as duas falharem"""
+        pending = {primary, hedge}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in (primary, hedge):
+                if task in done and _is_success(task):
+                    return task
+        return None
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Contadores de duplicatas e latência atual por modelo"""
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_ratio": self.hedges / self.requests if self.requests else 0.0,
+            "hedge_delay": {model: self.hedge_delay(model) for model in self.latencies.models()},
+        }
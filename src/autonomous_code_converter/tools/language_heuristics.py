@@ -0,0 +1,177 @@
+"""
+Detecção local de linguagem por heurísticas
+
+Pontua sinais léxicos e sintáticos (palavras-chave, sintaxe de blocos,
+anotações de tipo, comentários) e usa o sucesso de ``ast.parse`` como evidência forte
+para Python. Executa em menos de um milissegundo para arquivos típicos e
+serve de caminho rápido antes do detector baseado em LLM.
+"""
+
+import ast
+import re
+from typing import Dict, List, Tuple
+
+from ..models.base_models import LanguageDetection, LanguageType
+
+# Apenas o início do arquivo é pontuado; é suficiente para decidir
+SAMPLE_CHARS = 4096
+
+# ast.parse domina o custo; só roda sobre um prefixo curto e quando os
+# sinais léxicos não bastam para decidir
+AST_SAMPLE_CHARS = 2048
+AST_SKIP_CONFIDENCE = 0.9
+AST_PARSE_WEIGHT = 4.0
+
+# Código sem nenhum sinal léxico de Python que apenas compila (``x = 1``,
+# um módulo de configuração só com literais) também é JavaScript válido
+AST_ONLY_MAX_CONFIDENCE = 0.4
+
+_TOP_LEVEL_BREAK = re.compile(r"\n(?=\S)")
+
+def _line_pattern(pattern: str) -> re.Pattern:
+    return re.compile(pattern, re.MULTILINE)
+
+
+# Padrões começam por um literal sempre que possível: o motor de regex
+# então salta direto para as ocorrências em vez de tentar cada posição.
+# (padrão, peso, nome da característica)
+_LINE_SIGNALS: Dict[LanguageType, List[Tuple[re.Pattern, float, str]]] = {
+    LanguageType.PYTHON: [
+        (_line_pattern(r"def[ \t]+\w+[ \t]*\(.*\)[ \t]*(->[^:\n]+)?:[ \t]*(#.*)?$"), 2.0, "def_block"),
+        (_line_pattern(r"^[ \t]*class[ \t]+\w+(\(.*\))?[ \t]*:[ \t]*$"), 2.0, "class_block"),
+        (_line_pattern(r"^[ \t]*(?:if|elif|else|for|while|try|except|finally|with)\b.*:[ \t]*(#.*)?$"), 1.0, "colon_block"),
+        (_line_pattern(r"^[ \t]*from[ \t]+[\w.]+[ \t]+import[ \t]"), 2.0, "from_import"),
+        (_line_pattern(r"^[ \t]*import[ \t]+[\w.]+([ \t]+as[ \t]+\w+)?[ \t]*(,[ \t]*[\w.]+([ \t]+as[ \t]+\w+)?)*[ \t]*$"), 1.0, "import"),
+        (_line_pattern(r"__name__[ \t]*==[ \t]*['\"]__main__['\"][ \t]*:"), 3.0, "main_guard"),
+        (_line_pattern(r"elif[ \t]"), 1.5, "elif"),
+        (_line_pattern(r"self\."), 0.5, "self"),
+        (_line_pattern(r"^[ \t]*#"), 0.5, "hash_comment"),
+    ],
+    LanguageType.JAVASCRIPT: [
+        (_line_pattern(r"function[ \t]*\*?[ \t]*[\w$]*[ \t]*\("), 2.0, "function"),
+        (_line_pattern(r"^[ \t]*(?:const|let|var)[ \t]+[\w${}\[\], ]+[ \t]*="), 1.5, "declaration"),
+        (_line_pattern(r"=>"), 1.0, "arrow_function"),
+        (_line_pattern(r"require[ \t]*\([ \t]*['\"]"), 2.0, "require"),
+        (_line_pattern(r"^[ \t]*import[ \t].+[ \t]from[ \t]*['\"]"), 2.0, "es_import"),
+        (_line_pattern(r"^[ \t]*export[ \t]+(?:default[ \t]+)?(?:function|class|const|let|async)\b"), 1.5, "es_export"),
+        (_line_pattern(r"module\.exports\b"), 2.0, "module_exports"),
+        (_line_pattern(r"console\.\w+[ \t]*\("), 2.0, "console"),
+        (_line_pattern(r"!==|==="), 2.0, "strict_equality"),
+        (_line_pattern(r"^[ \t]*//"), 0.5, "slash_comment"),
+        (_line_pattern(r"this\."), 0.5, "this"),
+        (_line_pattern(r";[ \t]*$"), 0.25, "semicolon"),
+    ],
+    LanguageType.TYPESCRIPT: [
+        (_line_pattern(r"^[ \t]*(?:export[ \t]+)?interface[ \t]+\w+[^\n{]*\{"), 3.0, "interface"),
+        (_line_pattern(r"^[ \t]*(?:export[ \t]+)?type[ \t]+\w+([ \t]*<[^>\n]*>)?[ \t]*="), 3.0, "type_alias"),
+        (_line_pattern(r"import[ \t]+type[ \t]"), 3.0, "import_type"),
+        (_line_pattern(r"^[ \t]*(?:export[ \t]+)?(?:const[ \t]+)?enum[ \t]+\w+[ \t]*\{"), 2.0, "enum"),
+        (_line_pattern(r"^[ \t]*(?:public|private|protected|readonly)[ \t]+\w+"), 2.0, "member_modifier"),
+        (_line_pattern(r":[ \t]*(?:string|number|boolean|any|void|unknown|never)\b"), 2.0, "type_annotation"),
+        (_line_pattern(r"[ \t]as[ \t]+(?:const|string|number|any|unknown)\b"), 1.5, "type_assertion"),
+        (_line_pattern(r"implements[ \t]+\w"), 2.0, "implements"),
+        (_line_pattern(r"<[A-Z]\w*(?:,[ \t]*[A-Z]\w*)*>\("), 1.0, "generic_call"),
+    ],
+}
+
+
+def _score_lines(sample: str, scores: Dict[LanguageType, float],
+                 features: Dict[LanguageType, List[str]]) -> None:
+    """Pontua os sinais de cada linguagem (cada padrão conta até 3 vezes)"""
+    for language, signals in _LINE_SIGNALS.items():
+        for pattern, weight, name in signals:
+            count = 0
+            for _ in pattern.finditer(sample):
+                count += 1
+                if count == 3:
+                    break
+            if count:
+                scores[language] += weight * count
+                features[language].append(name)
+
+    # Blocos delimitados por chaves só existem na família JavaScript
+    if sample.count("{") >= 2 and sample.count("}") >= 2:
+        scores[LanguageType.JAVASCRIPT] += 1.0
+        features[LanguageType.JAVASCRIPT].append("braces")
+
+
+def _top_level_prefix(source_code: str, limit: int) -> str:
+    """Retorna o maior prefixo até ``limit`` que termina antes de um comando de nível zero"""
+    if len(source_code) <= limit:
+        return source_code
+    head = source_code[:limit]
+    last_break = None
+    for last_break in _TOP_LEVEL_BREAK.finditer(head):
+        pass
+    if last_break is not None:
+        return head[:last_break.start()]
+    return head[:head.rfind("\n")] if "\n" in head else head
+
+
+def _margin_confidence(top: float, second: float) -> float:
+    """Confiança em [0, 1) proporcional à margem entre as duas maiores pontuações"""
+    if top <= 0:
+        return 0.0
+    return 0.5 * (1.0 + (top - second) / (top + second + 2.0))
+
+
+def detect_language_locally(source_code: str) -> LanguageDetection:
+    """Detecta a linguagem sem chamar o LLM
+
+    Retorna uma LanguageDetection com ``features_detected`` preenchido.
+    A confiança reflete a margem entre a melhor e a segunda melhor
+    linguagem; código ambíguo recebe confiança baixa.
+    """
+    sample = _top_level_prefix(source_code, SAMPLE_CHARS)
+    scores = {language: 0.0 for language in LanguageType}
+    features: Dict[LanguageType, List[str]] = {language: [] for language in LanguageType}
+
+    _score_lines(sample, scores, features)
+
+    # Python sintaticamente válido é a evidência mais forte disponível; a
+    # análise roda sempre que os sinais léxicos não decidem, para qualquer lado
+    lexical_python = scores[LanguageType.PYTHON]
+    others = scores[LanguageType.JAVASCRIPT] + scores[LanguageType.TYPESCRIPT]
+    margin = _margin_confidence(max(lexical_python, others), min(lexical_python, others))
+    if sample.strip() and margin < AST_SKIP_CONFIDENCE:
+        parse_sample = _top_level_prefix(source_code, AST_SAMPLE_CHARS)
+        try:
+            ast.parse(parse_sample)
+        except (SyntaxError, ValueError):
+            # Uma amostra truncada pode falhar mesmo sendo Python válido
+            if len(parse_sample) == len(source_code):
+                scores[LanguageType.PYTHON] *= 0.5
+        else:
+            scores[LanguageType.PYTHON] += AST_PARSE_WEIGHT
+            features[LanguageType.PYTHON].append("ast_parse_ok")
+
+    # TypeScript é um superconjunto de JavaScript: soma os sinais das duas famílias
+    js_family = scores[LanguageType.JAVASCRIPT]
+    ts_only = scores[LanguageType.TYPESCRIPT]
+    python = scores[LanguageType.PYTHON]
+
+    if python >= js_family + ts_only:
+        language = LanguageType.PYTHON
+        top, second = python, js_family + ts_only
+        families = [LanguageType.PYTHON]
+    elif ts_only > 0:
+        language = LanguageType.TYPESCRIPT
+        top, second = js_family + ts_only, python
+        families = [LanguageType.TYPESCRIPT, LanguageType.JAVASCRIPT]
+    else:
+        language = LanguageType.JAVASCRIPT
+        top, second = js_family, python
+        families = [LanguageType.JAVASCRIPT]
+
+    confidence = _margin_confidence(top, second)
+    if language == LanguageType.TYPESCRIPT:
+        # Poucos sinais de tipo ainda podem ser JavaScript com Flow/JSDoc
+        confidence = min(confidence, 0.6 + 0.1 * ts_only)
+    elif language == LanguageType.PYTHON and lexical_python == 0:
+        confidence = min(confidence, AST_ONLY_MAX_CONFIDENCE)
+
+    return LanguageDetection(
+        detected_language=language,
+        confidence=round(min(max(confidence, 0.0), 0.99), 3),
+        features_detected=[f"{family.value}:{name}" for family in families for name in features[family]]
+    )
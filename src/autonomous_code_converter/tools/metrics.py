@@ -0,0 +1,489 @@
+"""
+Métricas de desempenho do sistema
+
+Registro leve de contadores, gauges e histogramas com rótulos, sem
+dependências externas. Pode ser exportado no formato texto do Prometheus
+por um endpoint HTTP local ou gravado periodicamente como snapshots JSON.
+
+Métricas coletadas pelo próprio sistema:
+- graph_node_duration_seconds{node}: tempo de parede de cada nó do grafo
+- agent_call_duration_seconds{agent}: tempo de cada chamada ao LLM
+- llm_tokens_total{agent,kind}: tokens de prompt/completion informados na resposta
+- http_requests_total{status}, http_retryable_responses_total{reason},
+  http_request_duration_seconds
+- http_in_flight_requests, llm_queue_depth, pipeline_in_flight
+- cache_lookups_total{result}, fast_path_total{result}
+"""
+
+import asyncio
+import functools
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: Sequence[str], values: _LabelValues,
+                   extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(labelnames, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """Base das métricas: um valor por combinação de rótulos"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[_LabelValues, Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> _LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} espera os rótulos {self.labelnames}, recebeu {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self) -> None:
+        """Descarta todos os valores"""
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Contador monotônico"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Incrementa o contador"""
+        if amount < 0:
+            raise ValueError("Contadores só podem aumentar")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        """Valor atual para os rótulos informados"""
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[Tuple[str, _LabelValues, Optional[Tuple[str, str]], float]]:
+        with self._lock:
+            return [(self.name, key, None, value) for key, value in sorted(self._values.items())]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{"labels": dict(zip(self.labelnames, key)), "value": value}
+                    for key, value in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    """Valor que sobe e desce (em andamento, profundidade de fila)"""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Soma ``amount`` (pode ser negativo)"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        """Subtrai ``amount``"""
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        """Define o valor"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    @contextmanager
+    def track(self, **labels: Any) -> Iterator[None]:
+        """Incrementa durante o bloco e decrementa ao sair"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Histograma cumulativo com buckets fixos"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Registra uma observação"""
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][index] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Mede o tempo de parede do bloco"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: Any) -> int:
+        """Número de observações para os rótulos informados"""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state["count"] if state else 0
+
+    def samples(self):
+        result = []
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, state["counts"]):
+                    cumulative += count
+                    result.append((f"{self.name}_bucket", key, ("le", _format_value(bound)), cumulative))
+                result.append((f"{self.name}_bucket", key, ("le", "+Inf"), state["count"]))
+                result.append((f"{self.name}_sum", key, None, state["sum"]))
+                result.append((f"{self.name}_count", key, None, state["count"]))
+        return result
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{
+                "labels": dict(zip(self.labelnames, key)),
+                "count": state["count"],
+                "sum": state["sum"],
+                "buckets": dict(zip((_format_value(bound) for bound in self.buckets), state["counts"])),
+            } for key, state in sorted(self._values.items())]
+
+
+class MetricsRegistry:
+    """Conjunto de métricas nomeadas; criar a mesma métrica duas vezes retorna a existente"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Métrica {name} já registrada com outro tipo ou rótulos")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """Retorna a métrica registrada com ``name``"""
+        with self._lock:
+            return self._metrics.get(name)
+
+    def reset(self) -> None:
+        """Zera os valores de todas as métricas (mantém o registro)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+
+    def render_prometheus(self) -> str:
+        """Exporta no formato texto do Prometheus (versão 0.0.4)"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample_name, key, extra, value in metric.samples():
+                lines.append(f"{sample_name}{_format_labels(metric.labelnames, key, extra)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado atual de todas as métricas como dicionário serializável"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return {
+            "timestamp": time.time(),
+            "metrics": {
+                metric.name: {"type": metric.kind, "help": metric.documentation, "samples": metric.snapshot()}
+                for metric in metrics
+            },
+        }
+
+
+REGISTRY = MetricsRegistry()
+
+GRAPH_NODE_DURATION = REGISTRY.histogram(
+    "graph_node_duration_seconds", "Tempo de parede de cada nó do grafo", ["node"])
+GRAPH_NODE_ERRORS = REGISTRY.counter(
+    "graph_node_errors_total", "Exceções lançadas por nós do grafo", ["node"])
+AGENT_CALL_DURATION = REGISTRY.histogram(
+    "agent_call_duration_seconds", "Tempo de parede de cada chamada de agente ao LLM", ["agent"])
+AGENT_CALL_ERRORS = REGISTRY.counter(
+    "agent_call_errors_total", "Chamadas de agente ao LLM que falharam", ["agent"])
+AGENT_STREAM_STOPS = REGISTRY.counter(
+    "agent_stream_early_stops_total", "Respostas em streaming interrompidas antes do fim pelo chamador", ["agent"])
+PROMPT_TOKENS = REGISTRY.counter(
+    "llm_prompt_tokens_total", "Tokens estimados dos prompts antes (original) e depois (sent) da compactação", ["agent", "stage"])
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total", "Tokens informados nas respostas do LLM", ["agent", "kind"])
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "Requisições HTTP ao provedor por status", ["status"])
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "Tempo de cada requisição HTTP ao provedor")
+HTTP_RETRYABLE = REGISTRY.counter(
+    "http_retryable_responses_total", "Respostas que levam o cliente a tentar de novo (429, 5xx, timeout)", ["reason"])
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "http_in_flight_requests", "Requisições HTTP em andamento")
+LLM_QUEUE_DEPTH = REGISTRY.gauge(
+    "llm_queue_depth", "Requisições aguardando o limitador de vazão/concorrência")
+LLM_CONCURRENCY_LIMIT = REGISTRY.gauge(
+    "llm_concurrency_limit", "Limite AIMD atual de requisições simultâneas ao LLM")
+LLM_RATE_LIMIT = REGISTRY.gauge(
+    "llm_rate_limit_per_minute", "Vazão configurada de cada balde do limitador: requests (RPM), tokens (TPM)", ["bucket"])
+LLM_RATE_AVAILABLE = REGISTRY.gauge(
+    "llm_rate_available", "Fichas disponíveis em cada balde do limitador (negativo quando há dívida)", ["bucket"])
+PIPELINE_IN_FLIGHT = REGISTRY.gauge(
+    "pipeline_in_flight", "Arquivos em processamento no pipeline de ingestão")
+SCHEDULER_QUEUE_DEPTH = REGISTRY.gauge(
+    "scheduler_queue_depth", "Sessões aguardando na fila do escalonador", ["priority"])
+SCHEDULER_QUEUE_WAIT = REGISTRY.histogram(
+    "scheduler_queue_wait_seconds", "Tempo entre a submissão e o início de cada sessão", ["priority"])
+SCHEDULER_SESSIONS = REGISTRY.counter(
+    "scheduler_sessions_total", "Sessões encerradas pelo escalonador: completed, failed, expired, cancelled", ["priority", "result"])
+HEDGED_REQUESTS = REGISTRY.counter(
+    "llm_hedged_requests_total", "Duplicatas enviadas por modelo de destino", ["model"])
+HEDGE_OUTCOMES = REGISTRY.counter(
+    "llm_hedge_outcomes_total", "Desfecho das requisições lentas: hedge_won, primary_won, budget_exhausted, both_failed", ["result"])
+RECORDED_REQUESTS = REGISTRY.counter(
+    "llm_recording_requests_total", "Requisições ao LLM gravadas ou reproduzidas: recorded, replayed, miss", ["result"])
+CACHE_LOOKUPS = REGISTRY.counter(
+    "cache_lookups_total", "Consultas ao cache de resultados", ["result"])
+COALESCED_CALLS = REGISTRY.counter(
+    "llm_coalesced_calls_total", "Chamadas ao LLM evitadas por aguardar uma chamada idêntica já em andamento", ["agent"])
+API_INDEX_ANSWERS = REGISTRY.counter(
+    "api_index_answers_total", "Chamadas ao LLM evitadas porque o índice de APIs conhecia todas as bibliotecas", ["agent"])
+FAST_PATH = REGISTRY.counter(
+    "fast_path_total", "Decisões do caminho rápido local da detecção de linguagem", ["result"])
+
+
+def record_usage(agent: str, result: Any) -> None:
+    """Registra os tokens de uma resposta PydanticAI (ignora respostas sem uso)"""
+    usage = getattr(result, "usage", None)
+    try:
+        usage = usage() if callable(usage) else usage
+    except Exception:
+        return
+    for kind, attribute in (("prompt", "request_tokens"), ("completion", "response_tokens")):
+        tokens = getattr(usage, attribute, None)
+        if isinstance(tokens, int) and tokens > 0:
+            LLM_TOKENS.inc(tokens, agent=agent, kind=kind)
+
+
+async def observe_call(agent: str, call: Awaitable[Any]) -> Any:
+    """Aguarda uma chamada de agente ao LLM registrando tempo, erros e tokens"""
+    start = time.perf_counter()
+    try:
+        result = await call
+    except Exception:
+        AGENT_CALL_ERRORS.inc(agent=agent)
+        raise
+    finally:
+        AGENT_CALL_DURATION.observe(time.perf_counter() - start, agent=agent)
+    record_usage(agent, result)
+    return result
+
+
+def observe_call_sync(agent: str, function: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Versão síncrona de observe_call (ex.: ``agent.run_sync``)"""
+    start = time.perf_counter()
+    try:
+        result = function(*args, **kwargs)
+    except Exception:
+        AGENT_CALL_ERRORS.inc(agent=agent)
+        raise
+    finally:
+        AGENT_CALL_DURATION.observe(time.perf_counter() - start, agent=agent)
+    record_usage(agent, result)
+    return result
+
+
+def instrument_node(name: str, node: Callable) -> Callable:
+    """Envolve um nó do grafo (síncrono ou assíncrono) medindo tempo e erros"""
+    if asyncio.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await node(*args, **kwargs)
+            except Exception:
+                GRAPH_NODE_ERRORS.inc(node=name)
+                raise
+            finally:
+                GRAPH_NODE_DURATION.observe(time.perf_counter() - start, node=name)
+        return async_wrapper
+
+    @functools.wraps(node)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return node(*args, **kwargs)
+        except Exception:
+            GRAPH_NODE_ERRORS.inc(node=name)
+            raise
+        finally:
+            GRAPH_NODE_DURATION.observe(time.perf_counter() - start, node=name)
+    return wrapper
+
+
+class MetricsServer:
+    """Endpoint HTTP local: /metrics (Prometheus) e /metrics.json (snapshot)"""
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, host: str = "127.0.0.1", port: int = 9464):
+        """Cria o servidor; ``port=0`` escolhe uma porta livre"""
+        # http.server custa ~60 ms de importação; só quem expõe o endpoint paga
+        from http.server import ThreadingHTTPServer
+
+        self.registry = registry
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MetricsServer":
+        """Inicia o atendimento em segundo plano"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Encerra o servidor"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "MetricsServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def _handler_class(self):
+        from http.server import BaseHTTPRequestHandler
+
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                path = self.path.split("?", 1)[0]
+                if path == "/metrics":
+                    body = registry.render_prometheus().encode()
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif path == "/metrics.json":
+                    body = json.dumps(registry.snapshot()).encode()
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+class SnapshotWriter:
+    """Grava snapshots JSON periódicos (um por linha) em um arquivo"""
+
+    def __init__(self, path: str, interval: float = 60.0, registry: MetricsRegistry = REGISTRY):
+        """Configura o destino e o intervalo em segundos"""
+        self.path = Path(path)
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def write_snapshot(self) -> None:
+        """Acrescenta um snapshot ao arquivo"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as output:
+            output.write(json.dumps(self.registry.snapshot()) + "\n")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.write_snapshot()
+
+    def start(self) -> "SnapshotWriter":
+        """Inicia a gravação em segundo plano"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Para a gravação, gravando um último snapshot"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.write_snapshot()
+
+    def __enter__(self) -> "SnapshotWriter":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
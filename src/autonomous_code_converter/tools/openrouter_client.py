@@ -3,11 +3,19 @@ Cliente OpenRouter para PydanticAI
 """
 
 import os
-from typing import Any, Dict
-from openai import OpenAI
+from typing import Any, Dict, Optional
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
 from pydantic_ai import Agent
+from pydantic_ai.models.openai import OpenAIModel
+from pydantic_ai.providers.openai import OpenAIProvider
 
 from ..models.config import OpenRouterConfig, load_config
+from .result_cache import ResultCache
+from .hedging import HedgedTransport
+from .rate_limiter import MeteredTransport, PacedTransport, create_paced_transport
+from .recording import RecordingTransport
 
 
 class OpenRouterClient:
@@ -29,16 +37,123 @@ class OpenRouterClient:
         
         # Configuração do modelo para PydanticAI
         self.model_name = config.model
+        
+        # Cache de resultados compartilhado pelos agentes (criado sob demanda)
+        self._result_cache: Optional[ResultCache] = None
+        
+        # Transporte assíncrono compartilhado por todos os agentes (criado sob demanda)
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._async_client: Optional[AsyncOpenAI] = None
+        self._model: Optional[OpenAIModel] = None
+        self._paced_transport: Optional[PacedTransport] = None
+        self._hedged_transport: Optional[HedgedTransport] = None
+        self._recording_transport: Optional[RecordingTransport] = None
     
     def get_model_name(self) -> str:
         """Retorna o nome do modelo configurado"""
         return f"openai:{self.model_name}"
     
+    def _build_transport(self) -> httpx.AsyncBaseTransport:
+        """Cria o transporte HTTP com pool de conexões e keep-alive"""
+        limits = httpx.Limits(
+            max_connections=self.config.max_connections,
+            max_keepalive_connections=self.config.max_keepalive_connections,
+            keepalive_expiry=self.config.keepalive_expiry
+        )
+        return httpx.AsyncHTTPTransport(limits=limits)
+    
+    def _wrap_transport(self, transport: httpx.AsyncBaseTransport) -> httpx.AsyncBaseTransport:
+        """Aplica as camadas de controle sobre o transporte base"""
+        # Gravação logo acima da rede: a latência gravada é só a do provedor
+        if self.config.recording.mode == "record":
+            self._recording_transport = RecordingTransport(transport, self.config.recording)
+            transport = self._recording_transport
+        # Métricas ficam abaixo do limitador: medem só o tempo no provedor
+        transport = MeteredTransport(transport)
+        if self.config.rate_limit.enabled:
+            self._paced_transport = create_paced_transport(transport, self.config.rate_limit)
+            transport = self._paced_transport
+        # Duplicatas passam pelo limitador como qualquer outra requisição
+        if self.config.hedging.enabled:
+            self._hedged_transport = HedgedTransport(transport, self.config.hedging)
+            transport = self._hedged_transport
+        return transport
+    
+    def _create_transport(self) -> httpx.AsyncBaseTransport:
+        """Pilha de transportes do cliente; o replay dispensa a rede e os limites"""
+        if self.config.recording.mode == "replay":
+            self._recording_transport = RecordingTransport(None, self.config.recording)
+            return self._recording_transport
+        return self._wrap_transport(self._build_transport())
+    
+    def get_http_client(self) -> httpx.AsyncClient:
+        """Retorna o cliente HTTP assíncrono compartilhado"""
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                transport=self._create_transport(),
+                timeout=httpx.Timeout(self.config.timeout, connect=self.config.connect_timeout)
+            )
+            self._async_client = None
+            self._model = None
+        return self._http_client
+    
+    def get_async_client(self) -> AsyncOpenAI:
+        """Retorna o cliente AsyncOpenAI apontando para o OpenRouter"""
+        http_client = self.get_http_client()
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(
+                api_key=self.config.api_key,
+                base_url=self.config.base_url,
+                http_client=http_client
+            )
+        return self._async_client
+    
+    def get_model(self) -> OpenAIModel:
+        """Retorna o modelo PydanticAI que usa o transporte compartilhado"""
+        async_client = self.get_async_client()
+        if self._model is None:
+            self._model = OpenAIModel(
+                self.model_name,
+                provider=OpenAIProvider(openai_client=async_client)
+            )
+        return self._model
+    
+    def get_rate_limit_metrics(self) -> Dict[str, Any]:
+        """Retorna os limites atuais de vazão e concorrência"""
+        if self._paced_transport is None:
+            return {}
+        return self._paced_transport.metrics()
+    
+    def get_hedging_metrics(self) -> Dict[str, Any]:
+        """Retorna os contadores de duplicatas e a espera atual por modelo"""
+        if self._hedged_transport is None:
+            return {}
+        return self._hedged_transport.metrics()
+    
+    def get_recording_metrics(self) -> Dict[str, Any]:
+        """Retorna os contadores de gravação/reprodução, se ativa"""
+        if self._recording_transport is None:
+            return {}
+        return self._recording_transport.metrics()
+    
+    async def aclose(self) -> None:
+        """Fecha as conexões do pool compartilhado"""
+        if self._http_client is not None and not self._http_client.is_closed:
+            await self._http_client.aclose()
+    
+    def get_result_cache(self) -> Optional[ResultCache]:
+        """Retorna o cache de resultados compartilhado, se habilitado"""
+        if not self.config.cache.enabled:
+            return None
+        if self._result_cache is None:
+            self._result_cache = ResultCache(self.config.cache)
+        return self._result_cache
+    
     def create_agent(self, system_prompt: str, **kwargs) -> Agent:
         """Cria um agente PydanticAI com configurações do OpenRouter"""
-        # Usando diretamente o modelo OpenAI com configuração customizada
+        # Todos os agentes compartilham o mesmo modelo e pool de conexões
         return Agent(
-            model=self.get_model_name(),
+            model=self.get_model(),
             system_prompt=system_prompt,
             **kwargs
         )
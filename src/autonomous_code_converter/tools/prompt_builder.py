@@ -0,0 +1,302 @@
+"""
+Montagem compacta dos prompts dos agentes
+
+Os dois agentes enviavam o código bruto: comentários, docstrings,
+cabeçalhos de licença e literais longos custam tokens de entrada (latência
+e custo) sem ajudar na tarefa. Aqui cada prompt é montado a partir de uma
+versão compactada do código:
+
+- extração de dependências (linguagem conhecida): Python passa pelo
+  ``tokenize`` (remove comentários e docstrings, encurta literais longos);
+  JavaScript/TypeScript por um lexer de comentários e strings (mantém as
+  diretivas ``///``, que referenciam dependências);
+- detecção de linguagem (linguagem desconhecida): compactação genérica que
+  preserva a sintaxe usada como pista (comentários, indentação), mas
+  encurta cabeçalhos de licença e linhas longas e, acima do orçamento,
+  envia só o começo e o fim do arquivo.
+
+Cada prompt informa os tokens (estimados) antes e depois da compactação;
+a economia é somada em ``llm_prompt_tokens_total``.
+"""
+
+import io
+import re
+import tokenize
+from operator import attrgetter
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+from ..models.base_models import LanguageType, SourceCode
+from .metrics import PROMPT_TOKENS
+from .tokens import estimate_tokens
+
+# Versão da compactação e dos templates; entra na chave do cache de
+# resultados, então deve mudar junto com eles
+PROMPT_VERSION = "1"
+
+# Orçamento de tokens do código em um prompt de detecção
+DEFAULT_DETECTION_TOKENS = 512
+
+# Literais maiores que isso são encurtados (nomes de módulos cabem folgados)
+MAX_LITERAL_CHARS = 48
+
+# Linhas mantidas de um cabeçalho de comentários (licença) e largura máxima de linha
+MAX_HEADER_LINES = 2
+MAX_LINE_CHARS = 160
+
+OMITTED = "..."
+
+DETECTION_TEMPLATE = "Analyze this source code and detect the programming language:\n\n```\n{code}\n```"
+
+EXTRACTION_TEMPLATE = """
+Language: {language}
+Filename: {filename}
+
+Source Code:
+```{language}
+{code}
+```
+
+Analyze this code and extract all dependencies.
+"""
+
+_PYTHON_STATEMENT_START = frozenset({tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT})
+
+# Argumentos destas chamadas são nomes de módulos: nunca são encurtados
+_PYTHON_IMPORT_FUNCTIONS = frozenset({"import_module", "__import__"})
+
+_JS_LEXEME_RE = re.compile(
+    r"""
+    (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+_HEADER_COMMENT_RE = re.compile(r"^\s*(?:#|//|/\*|\*)")
+
+
+class BuiltPrompt(NamedTuple):
+    """Prompt montado e tokens estimados antes e depois da compactação"""
+    text: str
+    original_tokens: int
+    prompt_tokens: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.prompt_tokens
+
+
+def shorten_literal(literal: str, max_chars: int = MAX_LITERAL_CHARS) -> str:
+    """Encurta um literal de string mantendo prefixo e delimitadores"""
+    if len(literal) <= max_chars:
+        return literal
+    prefix = re.match(r"[A-Za-z]*", literal).group()
+    quote = literal[len(prefix):len(prefix) + 3]
+    if quote not in ('"""', "'''"):
+        quote = literal[len(prefix)]
+    body = literal[len(prefix) + len(quote):len(literal) - len(quote)]
+    return f"{prefix}{quote}{body[:max_chars // 2]}{OMITTED}{quote}"
+
+
+def _drop_blank_lines(text: str) -> str:
+    return "\n".join(line.rstrip() for line in text.split("\n") if line.strip())
+
+
+def _compact_python(content: str) -> str:
+    """Remove comentários e docstrings e encurta literais via ``tokenize``"""
+    try:
+        tokens = [
+            token for token in tokenize.generate_tokens(io.StringIO(content).readline)
+            if token.type not in (tokenize.NL, tokenize.ENCODING)
+        ]
+    except (tokenize.TokenError, SyntaxError):
+        return compact_generic(content)
+
+    edits: List[Tuple[Tuple[int, int], Tuple[int, int], str]] = []
+    previous = tokenize.NEWLINE
+    # Uma entrada por parêntese/colchete aberto: se é a chamada de um import dinâmico
+    brackets: List[bool] = []
+    for index, token in enumerate(tokens):
+        if token.type == tokenize.OP:
+            if token.string in "([{":
+                brackets.append(token.string == "(" and index > 0
+                                and tokens[index - 1].string in _PYTHON_IMPORT_FUNCTIONS)
+            elif token.string in ")]}" and brackets:
+                brackets.pop()
+        if token.type == tokenize.COMMENT:
+            edits.append((token.start, token.end, ""))
+            continue
+        if token.type == tokenize.STRING:
+            following = tokens[index + 1].type if index + 1 < len(tokens) else tokenize.ENDMARKER
+            if previous in _PYTHON_STATEMENT_START and following in (tokenize.NEWLINE, tokenize.ENDMARKER):
+                # String solta como comando: docstring
+                edits.append((token.start, token.end, ""))
+            elif len(token.string) > MAX_LITERAL_CHARS and not (brackets and brackets[-1]):
+                edits.append((token.start, token.end, shorten_literal(token.string)))
+        previous = token.type
+
+    # As linhas do tokenize terminam só em "\n"; splitlines também quebraria em \x0c, \x85...
+    lines = io.StringIO(content).readlines()
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+    # Edições em ordem crescente: trechos mantidos e substituições juntados uma só vez
+    parts: List[str] = []
+    kept = 0
+    for (start_row, start_col), (end_row, end_col), replacement in edits:
+        start = offsets[start_row - 1] + start_col
+        parts.append(content[kept:start])
+        parts.append(replacement)
+        kept = offsets[end_row - 1] + end_col
+    parts.append(content[kept:])
+    return _drop_blank_lines("".join(parts))
+
+
+def _compact_javascript(content: str) -> str:
+    """Remove comentários (exceto diretivas ``///``) e encurta strings longas"""
+    def replace(match: "re.Match") -> str:
+        text = match.group()
+        if match.lastgroup == "comment":
+            return text if text.startswith("///") else ""
+        return shorten_literal(text)
+
+    return _drop_blank_lines(_JS_LEXEME_RE.sub(replace, content))
+
+
+def compact_source(content: str, language: Optional[LanguageType]) -> str:
+    """Versão compacta de ``content`` para prompts (genérica sem linguagem)"""
+    if language == LanguageType.PYTHON:
+        return _compact_python(content)
+    if language in (LanguageType.JAVASCRIPT, LanguageType.TYPESCRIPT):
+        return _compact_javascript(content)
+    return compact_generic(content)
+
+
+def _shorten_header(lines: List[str]) -> List[str]:
+    """Encurta o bloco de comentários/docstring do topo (licenças)"""
+    start = 1 if lines and lines[0].startswith("#!") else 0
+    end = start
+    stripped = lines[start].strip() if start < len(lines) else ""
+    if stripped.startswith(('"""', "'''")):
+        quote = stripped[:3]
+        end = start + 1
+        if not (len(stripped) > 3 and stripped.endswith(quote)):
+            while end < len(lines) and quote not in lines[end]:
+                end += 1
+            end += 1
+    else:
+        while end < len(lines) and (_HEADER_COMMENT_RE.match(lines[end]) or not lines[end].strip()):
+            end += 1
+    end = min(end, len(lines))
+    if end - start <= MAX_HEADER_LINES + 1:
+        return lines
+    closing = [lines[end - 1]] if stripped.startswith(('"""', "'''", "/*")) else []
+    return lines[:start + MAX_HEADER_LINES] + closing + lines[end:]
+
+
+def compact_generic(content: str) -> str:
+    """Compactação sem conhecer a linguagem: preserva a sintaxe, corta o supérfluo"""
+    lines = _shorten_header([line.rstrip() for line in content.splitlines()])
+    compacted: List[str] = []
+    for line in lines:
+        if len(line) > MAX_LINE_CHARS:
+            line = line[:MAX_LINE_CHARS] + OMITTED
+        if line or (compacted and compacted[-1]):
+            compacted.append(line)
+    return "\n".join(compacted).strip("\n")
+
+
+def sample_lines(text: str, max_tokens: int) -> str:
+    """Começo e fim de ``text`` dentro de ``max_tokens`` (dois terços no começo)"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    lines = text.splitlines()
+    head: List[str] = []
+    budget = max_tokens * 2 // 3
+    for line in lines:
+        cost = estimate_tokens(line + "\n")
+        if cost > budget:
+            break
+        head.append(line)
+        budget -= cost
+    tail: List[str] = []
+    budget += max_tokens - max_tokens * 2 // 3
+    for line in reversed(lines[len(head):]):
+        cost = estimate_tokens(line + "\n")
+        if cost > budget:
+            break
+        tail.append(line)
+        budget -= cost
+    return "\n".join(head + [OMITTED] + tail[::-1])
+
+
+def detection_code(source_code: str, max_tokens: int = DEFAULT_DETECTION_TOKENS) -> str:
+    """Código efetivamente enviado na detecção (compactado e amostrado)"""
+    return sample_lines(compact_generic(source_code), max_tokens)
+
+
+def build_detection_prompt(source_code: str,
+                           max_tokens: int = DEFAULT_DETECTION_TOKENS) -> BuiltPrompt:
+    """Prompt de detecção de linguagem para um arquivo"""
+    code = detection_code(source_code, max_tokens)
+    text = DETECTION_TEMPLATE.format(code=code)
+    return BuiltPrompt(
+        text,
+        estimate_tokens(DETECTION_TEMPLATE.format(code=source_code)),
+        estimate_tokens(text),
+    )
+
+
+def build_detection_batch_prompt(pack: Iterable[Tuple[int, str]],
+                                 max_tokens: int = DEFAULT_DETECTION_TOKENS) -> BuiltPrompt:
+    """Prompt de detecção com vários arquivos delimitados por ``### File <id>``"""
+    pack = list(pack)
+    header = f"Analyze each of these {len(pack)} files and detect its programming language:\n\n"
+    sections = [(f"### File {index}\n```\n", source_code, detection_code(source_code, max_tokens))
+                for index, source_code in pack]
+    text = header + "\n\n".join(f"{label}{code}\n```" for label, _, code in sections)
+    original = header + "\n\n".join(f"{label}{raw}\n```" for label, raw, _ in sections)
+    return BuiltPrompt(text, estimate_tokens(original), estimate_tokens(text))
+
+
+def build_extraction_prompt(source_code: SourceCode) -> BuiltPrompt:
+    """Prompt de extração de dependências para um arquivo (ou bloco recortado)"""
+    fields = {
+        "language": source_code.language.value,
+        "filename": source_code.filename or "unknown",
+    }
+    content = source_code.content
+    text = EXTRACTION_TEMPLATE.format(code=compact_source(content, source_code.language), **fields)
+    return BuiltPrompt(
+        text,
+        estimate_tokens(EXTRACTION_TEMPLATE.format(code=content, **fields)),
+        estimate_tokens(text),
+    )
+
+
+def build_extraction_batch_prompt(pack: Iterable[Tuple[int, SourceCode]],
+                                  content: Callable[[SourceCode], str] = attrgetter("content")) -> BuiltPrompt:
+    """Prompt de extração com vários arquivos delimitados por ``### File <id>``
+
+    ``content`` escolhe o texto de cada arquivo (por exemplo, só as regiões
+    de import); a contagem original usa esse mesmo texto sem compactação.
+    """
+    pack = list(pack)
+    header = f"Analyze each of these {len(pack)} files and extract all dependencies:\n\n"
+    sections = []
+    for index, source_code in pack:
+        language = source_code.language.value
+        label = (f"### File {index}\nLanguage: {language}\n"
+                 f"Filename: {source_code.filename or 'unknown'}\n```{language}\n")
+        raw = content(source_code)
+        sections.append((label, raw, compact_source(raw, source_code.language)))
+    text = header + "\n\n".join(f"{label}{code}\n```" for label, _, code in sections)
+    original = header + "\n\n".join(f"{label}{raw}\n```" for label, raw, _ in sections)
+    return BuiltPrompt(text, estimate_tokens(original), estimate_tokens(text))
+
+
+def record_prompt(agent: str, prompt: BuiltPrompt) -> str:
+    """Soma os tokens do prompt nas métricas e devolve o texto"""
+    PROMPT_TOKENS.inc(prompt.original_tokens, agent=agent, stage="original")
+    PROMPT_TOKENS.inc(prompt.prompt_tokens, agent=agent, stage="sent")
+    return prompt.text
@@ -0,0 +1,368 @@
+"""
+Controle de vazão do lado do cliente para o OpenRouter
+
+- TokenBucket/RateLimiter: limitam requisições e tokens por minuto
+- AdaptiveConcurrencyController: controle AIMD (aumento aditivo,
+  redução multiplicativa) do número de requisições simultâneas
+- PacedTransport: transporte httpx que aplica os dois controles a cada
+  requisição, honra ``Retry-After`` e alimenta o controlador com 429,
+  5xx de sobrecarga e timeouts
+"""
+
+import asyncio
+import json
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Deque, Dict, Optional
+
+import httpx
+
+from ..models.config import RateLimitConfig
+from .metrics import (
+    HTTP_IN_FLIGHT,
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    HTTP_RETRYABLE,
+    LLM_CONCURRENCY_LIMIT,
+    LLM_QUEUE_DEPTH,
+    LLM_RATE_AVAILABLE,
+    LLM_RATE_LIMIT
+)
+from .tokens import CHARS_PER_TOKEN
+
+OVERLOAD_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+
+class TokenBucket:
+    """Balde de fichas com reserva: quem chega primeiro é atendido primeiro"""
+
+    def __init__(self, capacity: float, refill_per_second: float,
+                 clock: Callable[[], float] = time.monotonic):
+        """Inicializa o balde cheio"""
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._clock = clock
+        self._tokens = capacity
+        self._updated_at = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+
+    def reserve(self, amount: float) -> float:
+        """Reserva ``amount`` fichas e retorna quantos segundos esperar
+
+        O saldo pode ficar negativo; reservas seguintes esperam a dívida
+        ser paga, o que mantém a ordem de chegada sem filas explícitas.
+        """
+        self._refill()
+        self._tokens -= amount
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.refill_per_second
+
+    @property
+    def available(self) -> float:
+        """Fichas disponíveis agora (negativo quando há dívida)"""
+        self._refill()
+        return self._tokens
+
+
+class RateLimiter:
+    """Limita requisições por minuto e tokens por minuto"""
+
+    def __init__(self, requests_per_minute: Optional[int],
+                 tokens_per_minute: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """Inicializa os baldes; None desativa o respectivo limite"""
+        self._clock = clock
+        self.requests = (
+            TokenBucket(requests_per_minute, requests_per_minute / 60.0, clock)
+            if requests_per_minute else None
+        )
+        self.tokens = (
+            TokenBucket(tokens_per_minute, tokens_per_minute / 60.0, clock)
+            if tokens_per_minute else None
+        )
+        self._paused_until = 0.0
+        self.throttled = 0
+        for bucket, limit in (("requests", requests_per_minute), ("tokens", tokens_per_minute)):
+            if limit:
+                LLM_RATE_LIMIT.set(limit, bucket=bucket)
+        self._publish()
+
+    def _publish(self) -> None:
+        """Atualiza os gauges com o saldo atual dos baldes"""
+        for bucket, state in (("requests", self.requests), ("tokens", self.tokens)):
+            if state is not None:
+                LLM_RATE_AVAILABLE.set(state.available, bucket=bucket)
+
+    def reserve(self, tokens: int) -> float:
+        """Reserva uma requisição de ``tokens`` e retorna a espera necessária"""
+        delay = max(0.0, self._paused_until - self._clock())
+        if self.requests is not None:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.reserve(min(tokens, self.tokens.capacity)))
+        if delay > 0:
+            self.throttled += 1
+        self._publish()
+        return delay
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Aguarda até que a requisição possa ser enviada"""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """Suspende novos envios por ``seconds`` (ex.: Retry-After)"""
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Limites atuais e estado dos baldes"""
+        self._publish()
+        return {
+            "requests_per_minute": self.requests.capacity if self.requests else None,
+            "tokens_per_minute": self.tokens.capacity if self.tokens else None,
+            "requests_available": self.requests.available if self.requests else None,
+            "tokens_available": self.tokens.available if self.tokens else None,
+            "paused_for": max(0.0, self._paused_until - self._clock()),
+            "throttled": self.throttled,
+        }
+
+
+class AdaptiveConcurrencyController:
+    """Controle AIMD do número de requisições simultâneas
+
+    Cada resposta saudável aumenta o limite em ``1 / limite`` (cerca de +1
+    por janela completa); sobrecarga multiplica o limite por
+    ``decrease_factor``, no máximo uma vez por ``cooldown`` segundos para
+    que uma rajada de 429 conte como um único evento.
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 32,
+                 decrease_factor: float = 0.5, cooldown: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """Inicializa o controlador"""
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self._clock = clock
+        self._limit = float(min(max(initial, minimum), maximum))
+        self._last_decrease = float("-inf")
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.in_flight = 0
+        self.successes = 0
+        self.overloads = 0
+        LLM_CONCURRENCY_LIMIT.set(self.limit)
+
+    @property
+    def limit(self) -> int:
+        """Limite inteiro atual de requisições simultâneas"""
+        return int(self._limit)
+
+    async def acquire(self) -> None:
+        """Aguarda uma vaga dentro do limite atual"""
+        while self.in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                else:
+                    # Já tinha sido acordado: repassa a vaga ao próximo da fila
+                    self._wake()
+                raise
+        self.in_flight += 1
+
+    def release(self) -> None:
+        """Libera uma vaga e acorda quem estiver esperando"""
+        self.in_flight = max(0, self.in_flight - 1)
+        self._wake()
+
+    def on_success(self) -> None:
+        """Aumento aditivo após uma resposta saudável"""
+        self.successes += 1
+        self._limit = min(float(self.maximum), self._limit + 1.0 / self._limit)
+        LLM_CONCURRENCY_LIMIT.set(self.limit)
+        self._wake()
+
+    def on_overload(self) -> None:
+        """Redução multiplicativa após 429, 5xx de sobrecarga ou timeout"""
+        self.overloads += 1
+        now = self._clock()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self._limit = max(float(self.minimum), self._limit * self.decrease_factor)
+        LLM_CONCURRENCY_LIMIT.set(self.limit)
+
+    def _wake(self) -> None:
+        free = self.limit - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.get_loop().call_soon_threadsafe(_resolve, waiter)
+                free -= 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Limite atual, requisições em andamento e fila"""
+        return {
+            "concurrency_limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "successes": self.successes,
+            "overloads": self.overloads,
+        }
+
+
+def _resolve(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Converte o cabeçalho Retry-After (segundos ou data HTTP) em segundos"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def estimate_request_tokens(request: httpx.Request) -> int:
+    """Estima os tokens de uma requisição chat-completions (prompt + max_tokens)"""
+    body = request.content or b""
+    estimate = len(body) // CHARS_PER_TOKEN
+    try:
+        payload = json.loads(body) if body else {}
+    except ValueError:
+        return estimate
+    if isinstance(payload, dict):
+        estimate += int(payload.get("max_tokens") or payload.get("max_completion_tokens") or 0)
+    return estimate
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Corpo da resposta que devolve a vaga de concorrência ao ser fechado"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release: Optional[Callable[[], None]] = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release is not None:
+                release, self._release = self._release, None
+                release()
+
+
+class PacedTransport(httpx.AsyncBaseTransport):
+    """Transporte httpx que aplica limites de vazão e concorrência adaptativa"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport,
+                 limiter: RateLimiter,
+                 controller: AdaptiveConcurrencyController):
+        """Envolve ``transport`` com os controles informados"""
+        self._transport = transport
+        self.limiter = limiter
+        self.controller = controller
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        with LLM_QUEUE_DEPTH.track():
+            await self.controller.acquire()
+        try:
+            with LLM_QUEUE_DEPTH.track():
+                await self.limiter.acquire(estimate_request_tokens(request))
+            try:
+                response = await self._transport.handle_async_request(request)
+            except httpx.TimeoutException:
+                self.controller.on_overload()
+                raise
+        except BaseException:
+            self.controller.release()
+            raise
+
+        if response.status_code in OVERLOAD_STATUS_CODES:
+            self.controller.on_overload()
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+            if retry_after:
+                self.limiter.pause(retry_after)
+        elif response.status_code < 400:
+            self.controller.on_success()
+        if response.is_closed:
+            # Corpo já lido em memória: não há mais nada a esperar
+            self.controller.release()
+        else:
+            # A vaga só é devolvida quando o corpo (ou o streaming) é fechado
+            response.stream = _ReleasingStream(response.stream, self.controller.release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Métricas combinadas do limitador e do controlador"""
+        return {**self.limiter.metrics(), **self.controller.metrics()}
+
+
+class MeteredTransport(httpx.AsyncBaseTransport):
+    """Transporte httpx que registra duração, status e requisições em andamento"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        """Envolve ``transport`` sem alterar seu comportamento"""
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.monotonic()
+        with HTTP_IN_FLIGHT.track():
+            try:
+                response = await self._transport.handle_async_request(request)
+            except httpx.TimeoutException:
+                HTTP_RETRYABLE.inc(reason="timeout")
+                raise
+            finally:
+                HTTP_REQUEST_DURATION.observe(time.monotonic() - start)
+
+        HTTP_REQUESTS.inc(status=response.status_code)
+        if response.status_code == 429:
+            HTTP_RETRYABLE.inc(reason="429")
+        elif response.status_code >= 500:
+            HTTP_RETRYABLE.inc(reason="5xx")
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def create_paced_transport(transport: httpx.AsyncBaseTransport,
+                           config: RateLimitConfig) -> PacedTransport:
+    """Cria o transporte controlado a partir da configuração"""
+    limiter = RateLimiter(config.requests_per_minute, config.tokens_per_minute)
+    controller = AdaptiveConcurrencyController(
+        initial=config.initial_concurrency,
+        minimum=config.min_concurrency,
+        maximum=config.max_concurrency,
+        decrease_factor=config.decrease_factor
+    )
+    return PacedTransport(transport, limiter, controller)
@@ -0,0 +1,214 @@
+"""
+Gravação e reprodução do tráfego com o LLM
+
+No modo ``record`` cada par requisição/resposta é guardado em disco,
+identificado pelo hash da requisição normalizada (método, caminho e corpo
+JSON com as chaves ordenadas). No modo ``replay`` as respostas gravadas
+são servidas de volta sem rede, sem custo e de forma determinística, com
+latência zero ou com a latência gravada (``replay_latency``).
+
+A chave ignora o host, então uma gravação feita contra o servidor simulado
+dos benchmarks ou contra o provedor vale para qualquer ``base_url``.
+Requisições idênticas repetidas recebem as respostas na ordem gravada (a
+última se repete quando acabam). Respostas de sobrecarga (429, 5xx) não
+são gravadas: dependem do momento, não da requisição.
+
+Com a latência gravada medida apenas no provedor, comparar uma execução
+reproduzida com ``replay_latency`` desligado e ligado separa o custo do
+framework do tempo do modelo.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+import httpx
+
+from ..models.config import RecordingConfig
+from .metrics import RECORDED_REQUESTS
+from .rate_limiter import OVERLOAD_STATUS_CODES
+
+# Cabeçalhos que deixam de valer porque o corpo é guardado já decodificado
+_DROPPED_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding", "connection"})
+
+# Status da resposta sintética para requisições sem gravação (não é repetida pelo SDK)
+MISS_STATUS = 404
+
+
+def _canonical_body(content: bytes) -> Any:
+    """Corpo JSON decodificado (ordenado ao serializar); base64 quando não é JSON"""
+    if not content:
+        return None
+    try:
+        return json.loads(content)
+    except ValueError:
+        return {"base64": base64.b64encode(content).decode("ascii")}
+
+
+def request_key(request: httpx.Request) -> str:
+    """Chave estável da requisição: método, caminho com query e corpo normalizado"""
+    body = json.dumps(_canonical_body(request.content), sort_keys=True, ensure_ascii=False,
+                      separators=(",", ":"))
+    hasher = hashlib.sha256()
+    for part in (request.method, request.url.raw_path.decode("ascii"), body):
+        encoded = part.encode("utf-8")
+        # Prefixo de tamanho evita colisões entre concatenações diferentes
+        hasher.update(len(encoded).to_bytes(8, "little"))
+        hasher.update(encoded)
+    return hasher.hexdigest()
+
+
+def _encode_body(content: bytes) -> Dict[str, str]:
+    try:
+        return {"text": content.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(content).decode("ascii")}
+
+
+def _decode_body(body: Dict[str, str]) -> bytes:
+    if "base64" in body:
+        return base64.b64decode(body["base64"])
+    return body["text"].encode("utf-8")
+
+
+class RecordingStore:
+    """Gravações em disco, um arquivo JSON por chave de requisição"""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        # Chaves regravadas nesta execução: a primeira resposta substitui o arquivo antigo
+        self._written: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def _path_for(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Entrada gravada para ``key`` (None se não houver)"""
+        with self._lock:
+            if key not in self._entries:
+                try:
+                    with open(self._path_for(key), "r", encoding="utf-8") as handle:
+                        self._entries[key] = json.load(handle)
+                except (OSError, ValueError):
+                    return None
+            return self._entries[key]
+
+    def append(self, key: str, request: httpx.Request, response: Dict[str, Any]) -> None:
+        """Acrescenta uma resposta à gravação de ``key`` e grava o arquivo"""
+        with self._lock:
+            entry = self._entries.get(key) if key in self._written else None
+            if entry is None:
+                entry = {
+                    "request": {
+                        "method": request.method,
+                        "path": request.url.raw_path.decode("ascii"),
+                        "body": _canonical_body(request.content),
+                    },
+                    "responses": [],
+                }
+                self._entries[key] = entry
+                self._written.add(key)
+            entry["responses"].append(response)
+
+            path = self._path_for(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Escrita atômica: outro processo nunca lê um arquivo pela metade
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                json.dump(entry, handle, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, path)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Transporte httpx que grava ou reproduz as respostas do provedor"""
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport], config: RecordingConfig):
+        """Envolve ``transport``; no modo replay ele nunca é chamado"""
+        if config.mode not in ("record", "replay"):
+            raise ValueError(f"modo de gravação inválido para o transporte: {config.mode}")
+        if config.mode == "record" and transport is None:
+            raise ValueError("o modo record precisa de um transporte de rede")
+        self._transport = transport
+        self.config = config
+        self.store = RecordingStore(config.directory)
+        self._replayed: Dict[str, int] = {}
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        self.model_seconds = 0.0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        key = request_key(request)
+        if self.config.mode == "replay":
+            return await self._replay(key, request)
+        return await self._record(key, request)
+
+    async def _record(self, key: str, request: httpx.Request) -> httpx.Response:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        response = await self._transport.handle_async_request(request)
+        try:
+            content = await response.aread()
+        finally:
+            await response.aclose()
+        latency = loop.time() - start
+
+        headers = [(name, value) for name, value in response.headers.multi_items()
+                   if name.lower() not in _DROPPED_HEADERS]
+        if response.status_code not in OVERLOAD_STATUS_CODES and response.status_code < 500:
+            # Serializar e gravar o arquivo bloquearia o event loop
+            await asyncio.to_thread(self.store.append, key, request, {
+                "status": response.status_code,
+                "headers": headers,
+                "body": _encode_body(content),
+                "latency": round(latency, 6),
+            })
+            self.recorded += 1
+            RECORDED_REQUESTS.inc(result="recorded")
+        return httpx.Response(response.status_code, headers=headers, content=content,
+                              extensions=response.extensions)
+
+    async def _replay(self, key: str, request: httpx.Request) -> httpx.Response:
+        # Ler e decodificar o arquivo bloquearia o event loop
+        entry = await asyncio.to_thread(self.store.load, key)
+        if entry is None or not entry["responses"]:
+            self.misses += 1
+            RECORDED_REQUESTS.inc(result="miss")
+            message = f"sem gravação para {request.method} {request.url.path} (chave {key})"
+            return httpx.Response(MISS_STATUS, json={"error": {"message": message, "code": "replay_miss"}},
+                                  headers={"x-replay-miss": key})
+
+        responses: List[Dict[str, Any]] = entry["responses"]
+        index = self._replayed.get(key, 0)
+        self._replayed[key] = index + 1
+        recorded = responses[min(index, len(responses) - 1)]
+
+        self.replayed += 1
+        self.model_seconds += recorded["latency"]
+        RECORDED_REQUESTS.inc(result="replayed")
+        if self.config.replay_latency:
+            await asyncio.sleep(recorded["latency"])
+        return httpx.Response(recorded["status"], headers=[tuple(item) for item in recorded["headers"]],
+                              content=_decode_body(recorded["body"]))
+
+    async def aclose(self) -> None:
+        if self._transport is not None:
+            await self._transport.aclose()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Contadores de gravação/reprodução e tempo de modelo reproduzido"""
+        return {
+            "mode": self.config.mode,
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "misses": self.misses,
+            "model_seconds": round(self.model_seconds, 6),
+        }
@@ -0,0 +1,229 @@
+"""
+Cache de resultados endereçado por conteúdo para os agentes de análise
+
+Duas camadas: um LRU em memória na frente de um armazenamento em disco.
+As entradas são identificadas pelo hash de (conteúdo, linguagem, arquivo,
+modelo, system prompt, versão do prompt), de modo que qualquer mudança em
+um desses itens gera uma nova chave.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+
+from ..models.config import CacheConfig
+from .metrics import CACHE_LOOKUPS
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def make_cache_key(content: str,
+                   language: Optional[str],
+                   filename: Optional[str],
+                   model_name: str,
+                   system_prompt: str,
+                   prompt_version: str = "") -> str:
+    """Calcula a chave do cache a partir das entradas que afetam o resultado
+
+    ``prompt_version`` identifica como o código vira prompt (versão da
+    compactação, tamanho dos blocos): o mesmo arquivo enviado de outra
+    forma pode ter outra resposta.
+    """
+    hasher = hashlib.sha256()
+    for part in (content, language or "", filename or "", model_name, system_prompt, prompt_version):
+        encoded = part.encode("utf-8")
+        # Prefixo de tamanho evita colisões entre concatenações diferentes
+        hasher.update(len(encoded).to_bytes(8, "little"))
+        hasher.update(encoded)
+    return hasher.hexdigest()
+
+
+class ResultCache:
+    """Cache persistente com camada LRU em memória e camada em disco"""
+
+    def __init__(self, config: Optional[CacheConfig] = None):
+        """Inicializa o cache"""
+        self.config = config or CacheConfig(enabled=True)
+        self.directory = Path(self.config.directory) if self.config.directory else None
+
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes: Optional[int] = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str, model_type: Type[ModelT]) -> Optional[ModelT]:
+        """Busca um resultado; retorna None se ausente ou expirado"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, payload = entry
+                if not self._is_expired(created_at):
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    CACHE_LOOKUPS.inc(result="memory")
+                    return model_type.model_validate_json(payload)
+                del self._memory[key]
+
+        disk_entry = self._read_disk(key)
+        if disk_entry is not None:
+            created_at, payload = disk_entry
+            with self._lock:
+                self.disk_hits += 1
+                self._remember(key, created_at, payload)
+            CACHE_LOOKUPS.inc(result="disk")
+            return model_type.model_validate_json(payload)
+
+        with self._lock:
+            self.misses += 1
+        CACHE_LOOKUPS.inc(result="miss")
+        return None
+
+    def set(self, key: str, value: BaseModel) -> None:
+        """Armazena um resultado nas duas camadas"""
+        payload = value.model_dump_json()
+        created_at = time.time()
+
+        with self._lock:
+            self._remember(key, created_at, payload)
+
+        if self.directory is not None:
+            self._write_disk(key, created_at, payload)
+
+    def clear(self) -> None:
+        """Remove todas as entradas do cache"""
+        with self._lock:
+            self._memory.clear()
+            self._disk_bytes = 0 if self.directory is not None else None
+
+        if self.directory is not None:
+            for path in self.directory.glob("*/*.json"):
+                path.unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna os contadores de acertos e falhas"""
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "hits": self.memory_hits + self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+            }
+
+    def _is_expired(self, created_at: float) -> bool:
+        max_age = self.config.max_age_seconds
+        return max_age is not None and time.time() - created_at > max_age
+
+    def _remember(self, key: str, created_at: float, payload: str) -> None:
+        """Insere na camada em memória respeitando o limite do LRU (requer lock)"""
+        self._memory[key] = (created_at, payload)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.config.memory_max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _path_for(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, str]]:
+        if self.directory is None:
+            return None
+
+        path = self._path_for(key)
+        try:
+            with open(path, "r", encoding="utf-8") as handle:
+                entry = json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+        created_at = entry.get("created_at", 0.0)
+        if self._is_expired(created_at):
+            self._remove_disk_file(path)
+            return None
+        return created_at, entry["data"]
+
+    def _write_disk(self, key: str, created_at: float, payload: str) -> None:
+        path = self._path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        body = json.dumps({"created_at": created_at, "data": payload})
+
+        # Escrita atômica: outro processo nunca lê um arquivo pela metade
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            handle.write(body)
+        try:
+            # Sobrescrita: o arquivo antigo deixa de contar
+            replaced = path.stat().st_size
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk_bytes()
+            else:
+                self._disk_bytes = max(0, self._disk_bytes + len(body) - replaced)
+            over_limit = self._disk_bytes > self.config.disk_max_bytes
+
+        if over_limit:
+            self._evict_disk()
+
+    def _scan_disk_bytes(self) -> int:
+        return sum(path.stat().st_size for path in self.directory.glob("*/*.json"))
+
+    def _remove_disk_file(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes = max(0, self._disk_bytes - size)
+
+    def _evict_disk(self) -> None:
+        """Remove entradas expiradas e as mais antigas até 90% do limite"""
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        target = int(self.config.disk_max_bytes * 0.9)
+        max_age = self.config.max_age_seconds
+        now = time.time()
+        evicted = 0
+
+        for mtime, size, path in entries:
+            expired = max_age is not None and now - mtime > max_age
+            if total <= target and not expired:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+
+        with self._lock:
+            self._disk_bytes = total
+            self.evictions += evicted
@@ -0,0 +1,135 @@
+"""
+Recorte de regiões de import e divisão por tokens
+
+Antes de enviar um arquivo ao LLM para extração de dependências, mantém
+apenas as linhas que podem conter imports (``import``, ``from``,
+``require()``, ``import()``, ``import_module``/``__import__``), estendidas
+até o fim do comando quando ele ocupa várias linhas. O que sobra é
+dividido em blocos com orçamento de tokens para que nenhum prompt passe
+da janela de contexto.
+"""
+
+import re
+from typing import List, Tuple
+
+from ..models.base_models import LanguageType, SourceCode
+from .tokens import CHARS_PER_TOKEN, estimate_tokens
+
+DEFAULT_CHUNK_TOKENS = 1500
+
+# Linhas de continuação analisadas após o início de um comando
+MAX_STATEMENT_LINES = 64
+
+_IMPORT_HINT = {
+    LanguageType.PYTHON: re.compile(r"^[ \t]*(?:import|from)[ \t]|\b(?:import_module|__import__)[ \t]*\("),
+    LanguageType.JAVASCRIPT: re.compile(r"\bimport\b|\brequire[ \t]*\(|^[ \t]*export\b.*\bfrom\b|^[ \t]*export[ \t]*(?:\*|\{)"),
+}
+
+# Apenas comandos de import propriamente ditos se estendem por várias linhas
+_STATEMENT_START = re.compile(r"[ \t]*(?:import|from|export)\b")
+
+_GAP_MARKER = {
+    LanguageType.PYTHON: "# ...",
+    LanguageType.JAVASCRIPT: "// ...",
+}
+
+_OPENERS = {"(": 1, "[": 1, "{": 1, ")": -1, "]": -1, "}": -1}
+
+
+def _family(language: LanguageType) -> LanguageType:
+    return LanguageType.PYTHON if language == LanguageType.PYTHON else LanguageType.JAVASCRIPT
+
+
+def _bracket_balance(line: str) -> int:
+    return sum(_OPENERS.get(char, 0) for char in line)
+
+
+def import_regions(content: str, language: LanguageType) -> List[Tuple[int, int]]:
+    """Intervalos de linhas [início, fim) que contêm imports, já unidos"""
+    hint = _IMPORT_HINT[_family(language)]
+    lines = content.splitlines()
+    regions: List[Tuple[int, int]] = []
+
+    index = 0
+    while index < len(lines):
+        if not hint.search(lines[index]):
+            index += 1
+            continue
+
+        # Estende o comando enquanto houver parênteses/chaves abertos ou "\"
+        start = index
+        statement = _STATEMENT_START.match(lines[index]) is not None
+        balance = _bracket_balance(lines[index]) if statement else 0
+        continued = statement and lines[index].rstrip().endswith("\\")
+        index += 1
+        while (balance > 0 or continued) and index < len(lines) and index - start < MAX_STATEMENT_LINES:
+            balance += _bracket_balance(lines[index])
+            continued = lines[index].rstrip().endswith("\\")
+            index += 1
+
+        if regions and regions[-1][1] >= start:
+            regions[-1] = (regions[-1][0], index)
+        else:
+            regions.append((start, index))
+    return regions
+
+
+def slice_imports(content: str, language: LanguageType) -> str:
+    """Mantém apenas as regiões de import, marcando os trechos omitidos"""
+    lines = content.splitlines()
+    marker = _GAP_MARKER[_family(language)]
+    parts: List[str] = []
+    previous_end = 0
+    for start, end in import_regions(content, language):
+        if start > previous_end:
+            parts.append(marker)
+        parts.extend(lines[start:end])
+        previous_end = end
+    return "\n".join(parts)
+
+
+def chunk_by_tokens(text: str, max_tokens: int = DEFAULT_CHUNK_TOKENS) -> List[str]:
+    """Divide ``text`` em blocos de até ``max_tokens``, preferindo quebras de linha"""
+    if max_tokens < 1:
+        raise ValueError("max_tokens must be at least 1")
+    max_chars = max_tokens * CHARS_PER_TOKEN
+
+    chunks: List[str] = []
+    current: List[str] = []
+    current_chars = 0
+    for line in text.splitlines():
+        # Linhas maiores que o orçamento são cortadas
+        pieces = [line[i:i + max_chars] for i in range(0, len(line), max_chars)] or [""]
+        for piece in pieces:
+            if current and current_chars + len(piece) + 1 > max_chars:
+                chunks.append("\n".join(current))
+                current, current_chars = [], 0
+            current.append(piece)
+            current_chars += len(piece) + 1
+    if current and any(current):
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def prepare_for_extraction(source_code: SourceCode,
+                           max_tokens_per_chunk: int = DEFAULT_CHUNK_TOKENS) -> List[SourceCode]:
+    """Recorta os imports de ``source_code`` e divide o resultado em blocos
+
+    Retorna uma lista vazia quando o arquivo não tem nenhum import.
+    Cada bloco guarda em ``metadata`` sua posição e a contagem de tokens
+    original e enviada.
+    """
+    content = source_code.content
+    sliced = slice_imports(content, source_code.language)
+    chunks = chunk_by_tokens(sliced, max_tokens_per_chunk) if sliced.strip() else []
+    original_tokens = estimate_tokens(content)
+    return [
+        source_code.with_content(chunk, metadata={
+            **source_code.metadata,
+            "chunk": index,
+            "chunks": len(chunks),
+            "original_tokens": original_tokens,
+            "chunk_tokens": estimate_tokens(chunk),
+        })
+        for index, chunk in enumerate(chunks)
+    ]
@@ -0,0 +1,16 @@
+"""
+Estimativa de tokens sem tokenizador
+
+Usada pelo limitador de taxa (reserva de tokens por requisição), pelo
+recorte de arquivos em blocos e pela contagem de tokens dos prompts.
+"""
+
+import math
+
+# Aproximação usada quando não há tokenizador: ~4 caracteres por token
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa de tokens de ``text`` (~4 caracteres por token)"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
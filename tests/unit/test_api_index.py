@@ -0,0 +1,155 @@
+"""
+Testes para o índice compilado de mapeamentos de APIs
+"""
+
+import json
+import struct
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from src.autonomous_code_converter.agents.dependency_extraction_agent import DependencyExtractionAgent
+from src.autonomous_code_converter.graphs.preanalysis import preanalyze_file
+from src.autonomous_code_converter.models import LanguageType, SourceCode
+from src.autonomous_code_converter.models.base_models import ApiMapping
+from src.autonomous_code_converter.tools.api_index import (
+    FORMAT_VERSION, ApiIndex, build_index, build_mappings, collect_requirements, main, set_default_api_index
+)
+from src.autonomous_code_converter.tools.dependency_parser import extract_dependencies_locally, merge_dependencies
+from src.autonomous_code_converter.tools.openrouter_client import OpenRouterClient
+
+REFERENCE = Path(__file__).resolve().parents[2] / "api_cpp.md"
+
+PYTHON_SOURCE = "import json\nimport requests.adapters\nfrom openai import OpenAI\nimport numpy\n"
+
+
+@pytest.fixture(scope="module")
+def index_path(tmp_path_factory):
+    return str(build_index(str(REFERENCE), str(tmp_path_factory.mktemp("index") / "api_index.bin")))
+
+
+@pytest.fixture
+def index(index_path):
+    with ApiIndex(index_path) as opened:
+        yield opened
+
+
+class TestApiIndex:
+    """Testes de compilação e consulta"""
+
+    def test_lookups(self, index):
+        """Teste de consulta exata, pelo módulo e por família de linguagem"""
+        get = index.get("requests.get", LanguageType.PYTHON)
+        module = index.lookup("requests.adapters.HTTPAdapter", LanguageType.PYTHON)
+
+        assert get.cpp_symbol == "cpr::Get"
+        assert get.includes == ["<cpr/cpr.h>"] and get.cmake_targets == ["cpr::cpr"]
+        assert (get.git_repository, get.git_tag) == ("https://github.com/libcpr/cpr.git", "1.10.0")
+        assert get.reference.startswith("api_cpp.md, Secção 1.1")
+        assert module.symbol == "requests"
+        assert index.get("axios", LanguageType.TYPESCRIPT).cpp_library == "cpr"
+        assert index.get("axios", LanguageType.PYTHON) is None
+        assert index.lookup("numpy.linalg", LanguageType.PYTHON) is None
+        assert len(index) == len(build_mappings(REFERENCE.read_text(encoding="utf-8")))
+
+    def test_versioned_artifact(self, index_path, index, tmp_path):
+        """Teste de versão estável e rejeição de arquivos incompatíveis"""
+        rebuilt = build_index(str(REFERENCE), str(tmp_path / "again.bin"))
+        assert ApiIndex(str(rebuilt)).version == index.version
+
+        other = tmp_path / "other.md"
+        other.write_text(REFERENCE.read_text(encoding="utf-8") + "\nnota\n", encoding="utf-8")
+        assert ApiIndex(str(build_index(str(other), str(tmp_path / "other.bin")))).version != index.version
+
+        data = bytearray(Path(index_path).read_bytes())
+        struct.pack_into("<H", data, 8, FORMAT_VERSION + 1)
+        (tmp_path / "future.bin").write_bytes(bytes(data))
+        (tmp_path / "garbage.bin").write_bytes(b"nada")
+        for name in ("future.bin", "garbage.bin"):
+            with pytest.raises(ValueError):
+                ApiIndex(str(tmp_path / name))
+
+    def test_missing_section_fails_build(self):
+        """Teste de referência a uma seção que o documento não tem"""
+        with pytest.raises(ValueError, match="seção"):
+            build_mappings("Secção 1.1: HTTP\n")
+
+    def test_collect_requirements(self, index):
+        """Teste de includes, alvos e FetchContent sem repetição"""
+        requirements = collect_requirements([
+            index.get("requests.post", LanguageType.PYTHON),
+            index.get("openai.OpenAI", LanguageType.PYTHON),
+            index.get("json.loads", LanguageType.PYTHON),
+        ])
+
+        assert requirements.includes == ["<cpr/cpr.h>", '"OpenAICompatibleClient.hpp"', "<nlohmann/json.hpp>"]
+        assert requirements.cmake_targets == ["cpr::cpr", "nlohmann_json::nlohmann_json"]
+        assert requirements.fetch_content == {"cpr": ("https://github.com/libcpr/cpr.git", "1.10.0")}
+
+    def test_collect_requirements_unknown_library(self):
+        """Teste de biblioteca fora da tabela usando o próprio nome no FetchContent"""
+        mapping = ApiMapping(symbol="toml", cpp_library="toml11", git_repository="https://x/toml11.git",
+                             git_tag="v4.0.0")
+
+        assert collect_requirements([mapping]).fetch_content == {"toml11": ("https://x/toml11.git", "v4.0.0")}
+
+    def test_cli(self, index_path, tmp_path, capsys):
+        """Teste da compilação e da consulta pela linha de comando"""
+        output = str(tmp_path / "cli.bin")
+        assert main(["build", "--source", str(REFERENCE), "-o", output]) == 0
+        capsys.readouterr()
+
+        assert main(["lookup", "json.dumps", "--index", output]) == 0
+        assert json.loads(capsys.readouterr().out)["json.dumps"]["cpp_symbol"] == "nlohmann::json::dump"
+        assert main(["lookup", "numpy", "--index", output]) == 1
+
+
+class TestDependencyStage:
+    """Testes do índice na extração de dependências"""
+
+    def test_local_extraction_fills_mappings(self, index):
+        """Teste de equivalentes C++ por símbolo importado"""
+        source = SourceCode(content=PYTHON_SOURCE, language=LanguageType.PYTHON)
+
+        dependencies = extract_dependencies_locally(source, index)
+
+        assert set(dependencies.cpp_mappings) == {"json", "requests", "openai", "openai.OpenAI"}
+        assert extract_dependencies_locally(source).cpp_mappings == {}
+        assert merge_dependencies(extract_dependencies_locally(source), dependencies).cpp_mappings == dependencies.cpp_mappings
+
+    @pytest.mark.asyncio
+    async def test_known_libraries_skip_the_llm(self, index):
+        """Teste de enriquecimento pulado quando o índice conhece todas as bibliotecas"""
+        client = Mock(spec=OpenRouterClient)
+        client.get_model_name.return_value = "test-model"
+        agent = DependencyExtractionAgent(client, llm_enrichment=True, api_index=index)
+        agent._get_agent = Mock(side_effect=AssertionError("o LLM não deveria ser chamado"))
+        known = SourceCode(content="import requests\nimport json\n", language=LanguageType.PYTHON)
+
+        dependencies = await agent.extract_dependencies(known)
+
+        assert dependencies.external_libraries == ["requests"]
+        assert dependencies.cpp_mappings["requests"].cpp_library == "cpr"
+        assert agent.get_stats()["index_answers"] == 1
+        with pytest.raises(AssertionError):
+            await agent.extract_dependencies(SourceCode(content=PYTHON_SOURCE, language=LanguageType.PYTHON))
+
+    def test_no_libraries_is_not_covered(self, index):
+        """Teste de arquivo sem bibliotecas externas fora da contagem do índice"""
+        agent = DependencyExtractionAgent(Mock(spec=OpenRouterClient), llm_enrichment=True, api_index=index)
+        stdlib_only = SourceCode(content="import os\n", language=LanguageType.PYTHON)
+
+        assert not index.covers([], LanguageType.PYTHON)
+        assert not agent._answered_by_index(stdlib_only, extract_dependencies_locally(stdlib_only))
+        assert agent.get_stats()["index_answers"] == 0
+
+    def test_preanalysis_worker_uses_index(self, index_path, tmp_path):
+        """Teste do índice aberto pelo trabalhador da pré-análise"""
+        (tmp_path / "app.py").write_text(PYTHON_SOURCE)
+        try:
+            result = preanalyze_file(str(tmp_path / "app.py"), "python", api_index_path=index_path)
+        finally:
+            set_default_api_index(None)
+
+        assert result.partials["dependencies"]["cpp_mappings"]["json"]["cpp_library"] == "nlohmann/json"
@@ -0,0 +1,67 @@
+"""
+Testes para o resumo estrutural local
+"""
+
+from src.autonomous_code_converter.models import LanguageType, SourceCode
+from src.autonomous_code_converter.tools.ast_summary import summarize_ast_locally
+
+
+class TestAstSummary:
+    """Testes do resumo estrutural sem LLM"""
+
+    def test_python_summary(self):
+        """Teste de funções, papéis e métricas em Python"""
+        source = SourceCode(
+            content=(
+                "LIMIT = 10\n"
+                "counter = 0\n\n"
+                "def total(items):\n"
+                "    \"\"\"Soma os itens\"\"\"\n"
+                "    result = 0\n"
+                "    for item in items:\n"
+                "        if item > LIMIT:\n"
+                "            result += item\n"
+                "    return result\n"
+            ),
+            language=LanguageType.PYTHON
+        )
+
+        summary = summarize_ast_locally(source)
+
+        assert summary.function_descriptions == {"total": "Soma os itens"}
+        assert summary.variable_roles == {"items": "parâmetro", "LIMIT": "constante", "counter": "global"}
+        assert summary.control_flow_logic == ["for na linha 7", "if na linha 8"]
+        assert summary.complexity_metrics["cyclomatic_complexity"] == 3
+        assert summary.ast_nodes["FunctionDef"] == 1
+
+    def test_python_syntax_error(self):
+        """Teste de código Python inválido"""
+        summary = summarize_ast_locally(SourceCode(content="def (:\n", language=LanguageType.PYTHON))
+
+        assert "parse_error" in summary.ast_nodes
+        assert summary.complexity_metrics["lines"] == 2
+
+    def test_javascript_summary(self):
+        """Teste de funções e fluxo de controle em JavaScript, ignorando comentários"""
+        source = SourceCode(
+            content=(
+                "const limit = 10;\n"
+                "// if (false) { for (;;) {} }\n"
+                "function check(x) {\n"
+                "  if (x > limit) { return 'for'; }\n"
+                "  return x;\n"
+                "}\n"
+                "const double = (y) => y * 2;\n"
+            ),
+            language=LanguageType.JAVASCRIPT
+        )
+
+        summary = summarize_ast_locally(source)
+
+        assert summary.function_descriptions == {
+            "check": "função declarada",
+            "double": "função atribuída a variável",
+        }
+        assert summary.variable_roles == {"limit": "constante"}
+        assert summary.control_flow_logic == ["if na linha 4"]
+        assert summary.complexity_metrics["cyclomatic_complexity"] == 2
@@ -2,12 +2,17 @@
 Testes para StateGraph base
 """
 
+import asyncio
+
 import pytest
 from unittest.mock import patch
 
 from src.autonomous_code_converter.graphs import create_base_graph, BaseGraphState
 from src.autonomous_code_converter.graphs.base_graph import create_initial_state
-from src.autonomous_code_converter.models import LanguageType
+from src.autonomous_code_converter.graphs.base_graph import (
+    agent_branches, merge_analysis_node, merge_analysis_partials
+)
+from src.autonomous_code_converter.models import LanguageType, LanguageDetection, Dependencies
 
 
 class TestBaseGraph:
@@ -84,5 +89,164 @@ class TestBaseGraph:
         assert "Validação básica executada" in messages_text
 
 
+class TestParallelAnalysis:
+    """Testes dos ramos de análise paralelos"""
+
+    def test_merge_analysis_partials(self):
+        """Teste do redutor dos resultados parciais"""
+        merged = merge_analysis_partials({"a": 1}, {"b": 2})
+
+        assert merged == {"a": 1, "b": 2}
+        assert merge_analysis_partials(merged, {"a": None, "c": 3}) == {"b": 2, "c": 3}
+        assert merge_analysis_partials(merged, None) == {}
+
+    @pytest.mark.asyncio
+    async def test_agent_branch_replaces_opposite_key(self):
+        """Teste de escrita de um ramo removendo resultado ou erro anteriores"""
+
+        class LanguageAgent:
+            async def detect_language(self, content):
+                return LanguageDetection(detected_language=LanguageType.PYTHON, confidence=0.9)
+
+        class BrokenDependencyAgent:
+            async def extract_dependencies(self, source_code):
+                raise RuntimeError("indisponível")
+
+        graph = create_base_graph(language_agent=LanguageAgent(), dependency_agent=BrokenDependencyAgent())
+        state = create_initial_state("x = 1\n", LanguageType.PYTHON)
+        state.analysis_partials = {
+            "language_detection_error": "language_detection: antigo",
+            "dependencies": {"imports": ["import os"]},
+        }
+
+        values = await graph.ainvoke(state, config={"configurable": {"thread_id": "replace"}})
+        result = BaseGraphState(**values)
+
+        # Sem o erro antigo do ramo de linguagem e sem as dependências pré-calculadas
+        assert result.system_state.error_messages == ["dependency_extraction: indisponível"]
+        assert result.system_state.analysis_result is None
+
+    def test_agent_branches(self):
+        """Teste dos ramos que o grafo entrega a agentes"""
+
+        class DependencyAgent:
+            async def extract_dependencies(self, source_code):
+                return Dependencies()
+
+        assert agent_branches(create_base_graph()) == frozenset()
+        assert agent_branches(create_base_graph(dependency_agent=DependencyAgent())) == {
+            "dependency_extraction"
+        }
+
+    def test_analysis_result_from_branches(self):
+        """Teste da junção dos ramos em CodeAnalysisResult"""
+        graph = create_base_graph()
+        state = create_initial_state("import os\n\ndef main():\n    return os.getcwd()\n",
+                                     LanguageType.PYTHON, filename="main.py")
+
+        result = BaseGraphState(**graph.invoke(state, config={"configurable": {"thread_id": "analysis"}}))
+
+        analysis = result.system_state.analysis_result
+        assert analysis is not None
+        assert analysis.source_code.filename == "main.py"
+        assert analysis.language_detection.detected_language == LanguageType.PYTHON
+        assert analysis.dependencies.standard_libraries == ["os"]
+        assert "main" in analysis.enriched_ast.function_descriptions
+        assert result.analysis_partials == {}
+        assert result.system_state.current_phase == "validated"
+        # Nenhuma mensagem duplicada pelos redutores
+        assert len(result.messages) == len(set(result.messages))
+
+    @pytest.mark.asyncio
+    async def test_branches_run_concurrently(self):
+        """Teste de que os ramos se sobrepõem: cada agente espera o outro começar"""
+        started = {"language": asyncio.Event(), "dependencies": asyncio.Event()}
+
+        async def overlap(mine, other):
+            started[mine].set()
+            # Em série, o primeiro ramo nunca veria o segundo começar
+            await asyncio.wait_for(started[other].wait(), timeout=5.0)
+
+        class LanguageAgent:
+            async def detect_language(self, content):
+                await overlap("language", "dependencies")
+                return LanguageDetection(detected_language=LanguageType.PYTHON, confidence=0.9)
+
+        class DependencyAgent:
+            async def extract_dependencies(self, source_code):
+                await overlap("dependencies", "language")
+                return Dependencies(imports=["import os"])
+
+        graph = create_base_graph(language_agent=LanguageAgent(), dependency_agent=DependencyAgent())
+        state = create_initial_state("x = 1\n", LanguageType.PYTHON)
+
+        result = BaseGraphState(**await graph.ainvoke(state, config={"configurable": {"thread_id": "parallel"}}))
+
+        assert result.system_state.error_messages == []
+        assert result.system_state.analysis_result.dependencies.imports == ["import os"]
+
+    def test_merge_does_not_mutate_input_state(self):
+        """Teste do nó de junção devolvendo listas novas em vez de alterar o estado"""
+        state = create_initial_state("x = 1\n", LanguageType.PYTHON)
+        state.analysis_partials = {"dependencies_error": "dependency_extraction: falhou"}
+        errors = state.system_state.error_messages
+
+        update = merge_analysis_node(state)
+
+        assert errors == [] and state.system_state.analysis_result is None
+        assert update["system_state"].error_messages == ["dependency_extraction: falhou"]
+        assert update["system_state"].error_messages is not errors
+        assert state.system_state.current_phase == "initialization"
+
+    @pytest.mark.asyncio
+    async def test_branch_failure_is_recorded(self):
+        """Teste de falha em um ramo sem interromper os demais"""
+
+        class BrokenDependencyAgent:
+            async def extract_dependencies(self, source_code):
+                raise RuntimeError("indisponível")
+
+        graph = create_base_graph(dependency_agent=BrokenDependencyAgent())
+        state = create_initial_state("x = 1\n", LanguageType.PYTHON)
+
+        result = BaseGraphState(**await graph.ainvoke(
+            state, config={"configurable": {"thread_id": "failure"}}
+        ))
+
+        assert result.system_state.analysis_result is None
+        assert result.system_state.error_messages == ["dependency_extraction: indisponível"]
+        assert result.system_state.current_phase == "validated"
+
+    @pytest.mark.asyncio
+    async def test_stream_partials_publishes_partial_results(self):
+        """Teste de resultados parciais publicados no modo custom do stream"""
+
+        class StreamingLanguageAgent:
+            async def detect_language_stream(self, content):
+                yield LanguageDetection(detected_language=LanguageType.PYTHON, confidence=0.9)
+                yield LanguageDetection(detected_language=LanguageType.PYTHON, confidence=0.9,
+                                        features_detected=["def"])
+
+        class StreamingDependencyAgent:
+            async def extract_dependencies_stream(self, source_code):
+                yield Dependencies(imports=["import os"])
+                yield Dependencies(imports=["import os"], external_libraries=["requests"])
+
+        graph = create_base_graph(language_agent=StreamingLanguageAgent(),
+                                  dependency_agent=StreamingDependencyAgent(),
+                                  stream_partials=True)
+        state = create_initial_state("x = 1\n", LanguageType.PYTHON)
+        config = {"configurable": {"thread_id": "streaming"}}
+
+        partials = [chunk async for chunk in graph.astream(state, config=config, stream_mode="custom")]
+
+        branches = [partial["branch"] for partial in partials]
+        assert branches.count("language_detection") == 2
+        assert branches.count("dependency_extraction") == 2
+        analysis = BaseGraphState(**graph.get_state(config).values).system_state.analysis_result
+        assert analysis.language_detection.features_detected == ["def"]
+        assert analysis.dependencies.external_libraries == ["requests"]
+
+
 if __name__ == "__main__":
     pytest.main([__file__]) 
\ No newline at end of file
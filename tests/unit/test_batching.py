@@ -0,0 +1,78 @@
+"""
+Unit tests for the agent batching helpers
+"""
+
+import asyncio
+
+import pytest
+
+from src.autonomous_code_converter.agents.batching import pack_files, run_bounded
+
+
+class TestPackFiles:
+    """Test suite for pack_files"""
+    
+    def test_packs_respect_file_limit(self):
+        """Test that no pack exceeds max_files"""
+        items = [(index, "x") for index in range(5)]
+        
+        packs = pack_files(items, max_files=2, max_chars=100)
+        
+        assert [len(pack) for pack in packs] == [2, 2, 1]
+        assert [index for pack in packs for index, _ in pack] == [0, 1, 2, 3, 4]
+    
+    def test_large_file_gets_its_own_pack(self):
+        """Test that files over max_chars are never packed with others"""
+        items = [(0, "a" * 5), (1, "b" * 50), (2, "c" * 5)]
+        
+        packs = pack_files(items, max_files=10, max_chars=20)
+        
+        assert [[index for index, _ in pack] for pack in packs] == [[0], [1], [2]]
+
+
+class TestRunBounded:
+    """Test suite for run_bounded"""
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded_and_results_stream(self):
+        """Test that at most max_concurrency jobs run and fast jobs finish first"""
+        in_flight = 0
+        peak = 0
+        
+        def job(delay, value):
+            async def run():
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(delay)
+                in_flight -= 1
+                return value
+            return run
+        
+        jobs = [job(0.05, "slow"), job(0.0, "fast-1"), job(0.0, "fast-2"), job(0.0, "fast-3")]
+        results = [result async for result in run_bounded(jobs, max_concurrency=2)]
+        
+        assert peak == 2
+        assert results[-1] == "slow"
+        assert sorted(results) == ["fast-1", "fast-2", "fast-3", "slow"]
+    
+    @pytest.mark.asyncio
+    async def test_closing_early_cancels_pending_jobs(self):
+        """Test that abandoning the generator cancels running jobs"""
+        cancelled = []
+        
+        def job(delay):
+            async def run():
+                try:
+                    await asyncio.sleep(delay)
+                except asyncio.CancelledError:
+                    cancelled.append(delay)
+                    raise
+                return delay
+            return run
+        
+        stream = run_bounded([job(0.0), job(10.0)], max_concurrency=2)
+        assert await stream.__anext__() == 0.0
+        await stream.aclose()
+        
+        assert cancelled == [10.0]
@@ -0,0 +1,143 @@
+"""
+Testes para a suíte de benchmarks e o servidor simulado
+"""
+
+import httpx
+import pytest
+
+from benchmarks.import_time import (
+    PACKAGE, check_heavy_imports, compare_import_times, measure_import
+)
+from benchmarks.mock_server import (
+    LatencyDistribution, MockChatServer, MockServerConfig, generate_from_schema
+)
+from benchmarks.run_benchmarks import compare_results, make_corpus, percentile, run_scenario
+from benchmarks.state_overhead import run_state_benchmark
+from src.autonomous_code_converter.agents.language_detection_agent import LanguageDetectionAgent
+from src.autonomous_code_converter.models import Dependencies, LanguageDetection, LanguageType
+from src.autonomous_code_converter.models.config import OpenRouterConfig, RateLimitConfig
+from src.autonomous_code_converter.tools.openrouter_client import OpenRouterClient
+
+
+class TestMockServer:
+    """Testes do servidor chat-completions simulado"""
+
+    def test_generate_from_schema(self):
+        """Teste de argumentos válidos gerados a partir do schema"""
+        detection = LanguageDetection.model_validate(
+            generate_from_schema(LanguageDetection.model_json_schema())
+        )
+        dependencies = Dependencies.model_validate(generate_from_schema(Dependencies.model_json_schema()))
+
+        assert detection.detected_language == LanguageType.PYTHON
+        assert 0.0 <= detection.confidence <= 1.0
+        assert dependencies == Dependencies()
+
+    def test_latency_distribution_parse(self):
+        """Teste de leitura das distribuições de latência"""
+        assert LatencyDistribution.parse("uniform:0.1,0.2").params == (0.1, 0.2)
+        with pytest.raises(ValueError):
+            LatencyDistribution.parse("gaussian:1")
+
+    @pytest.mark.asyncio
+    async def test_agent_against_mock_server(self):
+        """Teste de um agente real falando com o servidor local"""
+        with MockChatServer() as server:
+            client = OpenRouterClient(OpenRouterConfig(
+                api_key="benchmark", base_url=server.base_url, rate_limit=RateLimitConfig(enabled=False)
+            ))
+            agent = LanguageDetectionAgent(client, fast_path_threshold=None)
+
+            detection = await agent.detect_language("x = 1")
+            await client.aclose()
+
+            assert detection.detected_language == LanguageType.PYTHON
+            assert server.stats()["requests"] == 1
+
+    def test_error_injection(self):
+        """Teste de erros simulados com Retry-After"""
+        config = MockServerConfig(error_rate=1.0, error_status=429, retry_after=2.0)
+        with MockChatServer(config) as server:
+            response = httpx.post(f"{server.base_url}/chat/completions", json={"messages": []})
+
+            assert response.status_code == 429
+            assert response.headers["retry-after"] == "2.0"
+            assert server.stats()["errors"] == 1
+
+
+class TestBenchmarkRunner:
+    """Testes do executor de benchmarks"""
+
+    def test_percentile(self):
+        """Teste do percentil pelo posto mais próximo"""
+        values = [float(i) for i in range(1, 101)]
+
+        assert percentile(values, 0.50) == 50.0
+        assert percentile(values, 0.99) == 99.0
+        assert percentile([], 0.5) == 0.0
+
+    @pytest.mark.asyncio
+    async def test_run_scenario(self):
+        """Teste de uma rodada curta contra o servidor simulado"""
+        corpus = make_corpus(6)
+        with MockChatServer(MockServerConfig(latency=LatencyDistribution("constant", (0.005,)))) as server:
+            result = await run_scenario("dependency_extraction", corpus, 3, server)
+
+        assert result["files"] == 6
+        assert result["errors"] == 0
+        assert result["server_requests"] == 6
+        assert result["files_per_sec"] > 0
+        assert result["latency_ms"]["p50"] <= result["latency_ms"]["p99"]
+        assert result["peak_rss_mb"] > 0
+
+    def test_compare_results(self):
+        """Teste da detecção de regressões entre versões"""
+        def report(files_per_sec, p95):
+            return {"results": [{"scenario": "graph", "concurrency": 4,
+                                 "files_per_sec": files_per_sec, "latency_ms": {"p95": p95}}]}
+
+        assert compare_results(report(100, 50), report(100, 50)) == []
+        regressions = compare_results(report(80, 60), report(100, 50))
+        assert len(regressions) == 2
+
+
+class TestImportTime:
+    """Testes do benchmark de tempo de importação"""
+
+    @pytest.mark.parametrize("subpackage", ["models", "tools", "graphs", "agents"])
+    def test_subpackages_do_not_load_heavy_dependencies(self, subpackage):
+        """Teste de importação leve dos subpacotes em um processo novo"""
+        result = measure_import(f"{PACKAGE}.{subpackage}", repeats=1)
+
+        assert result["heavy_modules"] == []
+        assert check_heavy_imports({"results": [result]}) == []
+
+    def test_lazy_attribute_loads_on_access(self):
+        """Teste de carga do submódulo no primeiro acesso ao atributo"""
+        from src.autonomous_code_converter import tools
+
+        assert tools.MetricsRegistry.__module__ == f"{PACKAGE}.tools.metrics"
+        assert "OpenRouterClient" in dir(tools)
+        with pytest.raises(AttributeError):
+            tools.inexistente
+
+    def test_heavy_violation_and_time_regression(self):
+        """Teste das duas formas de regressão detectadas"""
+        def report(median_ms, heavy):
+            return {"results": [{"module": f"{PACKAGE}.models", "median_ms": median_ms, "heavy_modules": heavy}]}
+
+        assert check_heavy_imports(report(100.0, ["langgraph"])) == [f"{PACKAGE}.models: carrega langgraph"]
+        assert compare_import_times(report(110.0, []), report(100.0, [])) == []
+        assert len(compare_import_times(report(200.0, []), report(100.0, []))) == 1
+
+
+class TestStateOverhead:
+    """Testes do microbenchmark do estado do grafo"""
+
+    def test_small_state(self):
+        """Teste de execução com um estado pequeno"""
+        result = run_state_benchmark([5], repeats=1)["results"][0]
+
+        assert result["scale"] == 5
+        assert result["state_bytes"] < result["jsonplus_bytes"]
+        assert {"validate_ms", "construct_ms", "state_graph_step_ms"} <= set(result)
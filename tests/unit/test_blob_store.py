@@ -0,0 +1,162 @@
+"""
+Testes para o armazenamento de textos endereçado por conteúdo
+"""
+
+import pytest
+
+from src.autonomous_code_converter.graphs import BaseGraphState, SqliteCheckpointer, create_base_graph
+from src.autonomous_code_converter.graphs.base_graph import create_initial_state
+from src.autonomous_code_converter.models import CppCodeFiles, LanguageType, SourceCode
+from src.autonomous_code_converter.models.blob_store import (
+    BlobNotFoundError, BlobRef, BlobStore, set_default_blob_store
+)
+
+LARGE_SOURCE = "import os\n\ndef main():\n    return os.getcwd()\n" * 5_000
+
+
+@pytest.fixture
+def store(tmp_path):
+    """BlobStore ativo como padrão durante o teste"""
+    blob_store = BlobStore(str(tmp_path / "blobs"), inline_threshold=1024)
+    previous = set_default_blob_store(blob_store)
+    yield blob_store
+    set_default_blob_store(previous)
+    blob_store.close()
+
+
+class TestBlobStore:
+    """Testes do store em arquivos mapeados"""
+
+    def test_put_is_content_addressed(self, tmp_path):
+        """Teste de deduplicação: o mesmo conteúdo é gravado uma vez"""
+        with BlobStore(str(tmp_path)) as blob_store:
+            first = blob_store.put("ação = 1")
+            second = blob_store.put("ação = 1".encode("utf-8"))
+
+            assert first == second
+            assert first.size == len("ação = 1".encode("utf-8"))
+            assert blob_store.writes == 1
+            assert blob_store.deduplicated == 1
+            assert blob_store.read_text(first) == "ação = 1"
+
+    def test_reopened_store_reads_existing_blobs(self, tmp_path):
+        """Teste de leitura após reabrir o diretório"""
+        with BlobStore(str(tmp_path)) as blob_store:
+            ref = blob_store.put("x = 1\n")
+        with BlobStore(str(tmp_path)) as reopened:
+            assert reopened.read_bytes(ref) == b"x = 1\n"
+            assert reopened.put("x = 1\n") == ref
+            assert reopened.writes == 0
+
+    def test_empty_and_missing_blobs(self, tmp_path):
+        """Teste de blob vazio e de referência inexistente"""
+        with BlobStore(str(tmp_path)) as blob_store:
+            assert blob_store.read_text(blob_store.put("")) == ""
+            with pytest.raises(BlobNotFoundError):
+                blob_store.read_text(BlobRef(digest="0" * 64, size=3))
+
+    def test_decoded_text_is_reused(self, tmp_path):
+        """Teste de leituras repetidas sem decodificar o blob de novo"""
+        with BlobStore(str(tmp_path)) as blob_store:
+            ref = blob_store.put(LARGE_SOURCE)
+            assert blob_store.read_text(ref) is blob_store.read_text(ref)
+
+    def test_eviction_with_open_memoryview(self, tmp_path):
+        """Teste de mapeamento em uso fechado só depois de liberado"""
+        with BlobStore(str(tmp_path), max_open_maps=1) as blob_store:
+            first, second = blob_store.put("a" * 10), blob_store.put("b" * 10)
+            view = memoryview(blob_store._map(first.digest))
+
+            assert blob_store.read_bytes(second) == b"b" * 10
+            assert bytes(view[:1]) == b"a"
+            view.release()
+            assert blob_store.read_bytes(first) == b"a" * 10
+            assert blob_store._unclosed == []
+
+    def test_temporary_store_is_removed(self):
+        """Teste de remoção do diretório temporário no close"""
+        blob_store = BlobStore()
+        blob_store.put("abc")
+        directory = blob_store.directory
+        blob_store.close()
+
+        assert not directory.exists()
+
+
+class TestModelReferences:
+    """Testes das referências nos modelos"""
+
+    def test_source_code_inline_without_store(self):
+        """Teste de comportamento inalterado sem store ativo"""
+        source = SourceCode(content=LARGE_SOURCE, language=LanguageType.PYTHON)
+
+        assert source.content_ref is None
+        assert source.content == LARGE_SOURCE
+
+    def test_large_source_code_is_externalized(self, store):
+        """Teste de texto grande guardado por referência e resolvido no acesso"""
+        source = SourceCode(content=LARGE_SOURCE, language=LanguageType.PYTHON)
+        small = SourceCode(content="x = 1", language=LanguageType.PYTHON)
+
+        assert source.inline_content is None
+        assert source.content_ref.size == len(LARGE_SOURCE)
+        assert source.content == LARGE_SOURCE
+        assert small.content_ref is None
+        assert len(source.model_dump_json()) < 1024
+
+        restored = SourceCode(**source.model_dump())
+        assert restored.content == LARGE_SOURCE
+
+    def test_content_is_serialized_and_assignable(self):
+        """Teste de ``content`` como nome serializado e atribuível"""
+        source = SourceCode(content="x = 1", language=LanguageType.PYTHON)
+        source.content = "y = 2"
+
+        assert source.model_dump()["content"] == "y = 2"
+        assert SourceCode.model_validate_json(source.model_dump_json()) == source
+
+    def test_cpp_files_deduplicated_across_iterations(self, store):
+        """Teste de arquivos C++ iguais entre iterações guardados uma vez"""
+        body = "int main() { return 0; }\n" * 100
+        first = CppCodeFiles(source_files={"main.cpp": body}, header_files={"a.hpp": "#pragma once\n"})
+        second = CppCodeFiles(source_files={"main.cpp": body})
+
+        assert isinstance(first.source_blobs["main.cpp"], BlobRef)
+        assert first.source_blobs["main.cpp"] == second.source_blobs["main.cpp"]
+        assert first.source_files == {"main.cpp": body}
+        assert set(first.model_dump()) >= {"header_files", "source_files"}
+        assert store.writes == 1
+        assert first.read("main.cpp") == body
+        assert dict(first.files()) == {"a.hpp": "#pragma once\n", "main.cpp": body}
+
+    def test_unresolvable_reference(self):
+        """Teste de erro claro ao ler uma referência sem store ativo"""
+        source = SourceCode(content_ref=BlobRef(digest="0" * 64, size=1), language=LanguageType.PYTHON)
+
+        with pytest.raises(BlobNotFoundError):
+            source.content
+
+
+class TestCheckpointSize:
+    """Testes do efeito nos checkpoints"""
+
+    @staticmethod
+    def _checkpoint_bytes(thread_id: str) -> int:
+        checkpointer = SqliteCheckpointer(compress_threshold=None)
+        graph = create_base_graph(checkpointer=checkpointer)
+        state = create_initial_state(LARGE_SOURCE, LanguageType.PYTHON)
+        result = BaseGraphState(**graph.invoke(state, config={"configurable": {"thread_id": thread_id}}))
+        assert result.system_state.analysis_result.source_code.content == LARGE_SOURCE
+        return sum(
+            checkpointer.conn.execute(f"SELECT COALESCE(SUM(LENGTH(data)), 0) FROM {table}").fetchone()[0]
+            for table in ("blobs", "writes", "sources")
+        )
+
+    def test_checkpoints_hold_references(self, store):
+        """Teste de checkpoints só com referências: o texto fica no store ou uma vez na sessão"""
+        with_store = self._checkpoint_bytes("com-store")
+        set_default_blob_store(None)
+        inline = self._checkpoint_bytes("inline")
+
+        assert with_store < len(LARGE_SOURCE) // 5
+        assert len(LARGE_SOURCE) <= inline - with_store < 2 * len(LARGE_SOURCE)
@@ -4,15 +4,23 @@ Testes unitários para o Dependency Extraction Agent
 
 import pytest
 from unittest.mock import Mock, patch, AsyncMock
+from pydantic_ai import Agent
+from pydantic_ai.models.function import DeltaToolCall, FunctionModel
 from src.autonomous_code_converter.agents.dependency_extraction_agent import (
     DependencyExtractionAgent,
     create_dependency_extraction_agent
 )
 from src.autonomous_code_converter.models.base_models import (
-    SourceCode, Dependencies, LanguageType
+    SourceCode, Dependencies, DependenciesBatch, LanguageType
 )
 from src.autonomous_code_converter.tools.openrouter_client import OpenRouterClient
-from src.autonomous_code_converter.models.config import OpenRouterConfig
+from src.autonomous_code_converter.models.config import OpenRouterConfig, CacheConfig
+from src.autonomous_code_converter.tools.result_cache import ResultCache
+from src.autonomous_code_converter.tools.dependency_parser import (
+    extract_dependencies_locally,
+    js_tokens,
+    merge_dependencies
+)
 
 
 class TestDependencyExtractionAgent:
@@ -28,8 +36,8 @@ class TestDependencyExtractionAgent:
         self.mock_client = Mock(spec=OpenRouterClient)
         self.mock_client.get_model_name.return_value = "openai:mistralai/devstral-small:free"
         
-        # Create agent instance
-        self.agent = DependencyExtractionAgent(self.mock_client)
+        # Create agent instance (enrichment on so these tests exercise the LLM)
+        self.agent = DependencyExtractionAgent(self.mock_client, llm_enrichment=True)
     
     def test_agent_initialization(self):
         """Test agent initialization"""
@@ -73,7 +81,7 @@ class TestDependencyExtractionAgent:
         """Test synchronous dependency extraction with mocked response"""
         # Mock the PydanticAI agent
         mock_result = Mock()
-        mock_result.data = Dependencies(
+        mock_result.output = Dependencies(
             imports=["import os", "import sys", "import requests"],
             external_libraries=["requests"],
             standard_libraries=["os", "sys"],
@@ -116,7 +124,7 @@ class TestDependencyExtractionAgent:
         """Test asynchronous dependency extraction with mocked response"""
         # Mock the PydanticAI agent
         mock_result = Mock()
-        mock_result.data = Dependencies(
+        mock_result.output = Dependencies(
             imports=["import React from 'react'", "const fs = require('fs')"],
             external_libraries=["react"],
             standard_libraries=["fs"],
@@ -165,7 +173,7 @@ class TestDependencyExtractionAgent:
         with patch.object(self.agent, '_get_agent') as mock_get_agent:
             mock_agent = Mock()
             mock_result = Mock()
-            mock_result.data = Dependencies()
+            mock_result.output = Dependencies()
             mock_agent.run_sync.return_value = mock_result
             mock_get_agent.return_value = mock_agent
             
@@ -212,6 +220,337 @@ class TestDependencyExtractionAgentFactory:
         assert agent.openrouter_client == mock_client
 
 
+class TestLocalDependencyExtraction:
+    """Test suite for the parser-based default path"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.mock_client = Mock(spec=OpenRouterClient)
+        self.mock_client.get_model_name.return_value = "openai:test-model"
+        self.agent = DependencyExtractionAgent(self.mock_client)
+    
+    @patch('src.autonomous_code_converter.agents.dependency_extraction_agent.Agent')
+    def test_python_extraction_without_llm(self, mock_agent_class):
+        """Test that Python imports are parsed from the AST without the LLM"""
+        source = SourceCode(
+            content=(
+                "import os, sys\n"
+                "import pandas as pd\n"
+                "from datetime import datetime\n"
+                "from . import sibling\n"
+                "import importlib\n"
+                "yaml = importlib.import_module('yaml')\n"
+            ),
+            language=LanguageType.PYTHON
+        )
+        
+        result = self.agent.extract_dependencies_sync(source)
+        
+        mock_agent_class.assert_not_called()
+        assert "import pandas as pd" in result.imports
+        assert "from . import sibling" in result.imports
+        assert result.standard_libraries == ["os", "sys", "datetime", "importlib"]
+        assert result.external_libraries == ["pandas", "yaml"]
+        assert result.documentation_urls["os"] == "https://docs.python.org/3/library/os.html"
+        assert result.documentation_urls["pandas"] == "https://pypi.org/project/pandas/"
+    
+    @pytest.mark.asyncio
+    async def test_typescript_extraction_without_llm(self):
+        """Test import, import type, require, dynamic import and re-exports"""
+        source = SourceCode(
+            content=(
+                "// import ignored from 'commented-out'\n"
+                "import React, { useState } from 'react';\n"
+                "import type { Props } from '@types/react';\n"
+                "import type { Local } from './local';\n"
+                "export * from 'lodash/fp';\n"
+                "const fs = require('fs');\n"
+                "const text = \"import fake from 'string'\";\n"
+                "const chalk = await import('chalk');\n"
+                "import { join } from 'node:path';\n"
+            ),
+            language=LanguageType.TYPESCRIPT
+        )
+        
+        result = await self.agent.extract_dependencies(source)
+        
+        assert "import type { Props } from '@types/react'" in result.imports
+        assert "require('fs')" in result.imports
+        assert "import('chalk')" in result.imports
+        assert result.external_libraries == ["react", "@types/react", "lodash", "chalk"]
+        assert result.standard_libraries == ["fs", "path"]
+        assert result.documentation_urls["fs"] == "https://nodejs.org/api/fs.html"
+        assert result.documentation_urls["@types/react"] == "https://www.npmjs.com/package/@types/react"
+    
+    def test_python_syntax_error_falls_back_to_line_scan(self):
+        """Test that unparsable files still yield their imports"""
+        source = SourceCode(
+            content="def broken(:\nimport requests\nfrom numpy import array\n",
+            language=LanguageType.PYTHON
+        )
+        
+        result = extract_dependencies_locally(source)
+        
+        assert result.external_libraries == ["requests", "numpy"]
+    
+    def test_merge_prefers_first_result(self):
+        """Test that merging de-duplicates and keeps parser URLs"""
+        local = Dependencies(external_libraries=["requests"],
+                             documentation_urls={"requests": "https://pypi.org/project/requests/"})
+        llm = Dependencies(external_libraries=["requests", "urllib3"],
+                           documentation_urls={"requests": "https://example.com",
+                                               "urllib3": "https://urllib3.readthedocs.io/"})
+        
+        merged = merge_dependencies(local, llm)
+        
+        assert merged.external_libraries == ["requests", "urllib3"]
+        assert merged.documentation_urls["requests"] == "https://pypi.org/project/requests/"
+        assert "urllib3" in merged.documentation_urls
+    
+    def test_js_tokens_skip_comments(self):
+        """Test the shared JS/TS tokenizer used by the parser and the AST summary"""
+        tokens = js_tokens("// lead\nconst a = require('x'); /* tail */")
+        
+        assert [(kind, text) for kind, text, _, _ in tokens] == [
+            ("name", "const"), ("name", "a"), ("punct", "="), ("name", "require"),
+            ("punct", "("), ("string", "'x'"), ("punct", ")"), ("punct", ";"),
+        ]
+        assert tokens[0][2:] == (8, 13)
+
+
+class TestDependencyExtractionBatch:
+    """Test suite for batched extraction"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.mock_client = Mock(spec=OpenRouterClient)
+        self.mock_client.get_model_name.return_value = "openai:test-model"
+        self.sources = [
+            SourceCode(content="import os", language=LanguageType.PYTHON, filename="a.py"),
+            SourceCode(content="import requests", language=LanguageType.PYTHON, filename="b.py"),
+        ]
+    
+    @pytest.mark.asyncio
+    @patch('src.autonomous_code_converter.agents.dependency_extraction_agent.Agent')
+    async def test_batch_without_enrichment_uses_parser_only(self, mock_agent_class):
+        """Test that the default batch path never calls the LLM"""
+        agent = DependencyExtractionAgent(self.mock_client)
+        
+        results = dict([item async for item in agent.extract_dependencies_batch(self.sources)])
+        
+        mock_agent_class.assert_not_called()
+        assert results[0].standard_libraries == ["os"]
+        assert results[1].external_libraries == ["requests"]
+    
+    @pytest.mark.asyncio
+    @patch('src.autonomous_code_converter.agents.dependency_extraction_agent.Agent')
+    async def test_batch_enrichment_splits_packed_reply(self, mock_agent_class):
+        """Test that one packed prompt is split back into per-file results"""
+        batch_result = Mock()
+        batch_result.output = DependenciesBatch(results={
+            "0": Dependencies(standard_libraries=["os"]),
+            "1": Dependencies(external_libraries=["requests", "urllib3"]),
+        })
+        mock_agent_instance = Mock()
+        mock_agent_instance.run = AsyncMock(return_value=batch_result)
+        mock_agent_class.return_value = mock_agent_instance
+        agent = DependencyExtractionAgent(self.mock_client, llm_enrichment=True)
+        
+        results = dict([item async for item in agent.extract_dependencies_batch(self.sources)])
+        
+        mock_agent_instance.run.assert_called_once()
+        prompt = mock_agent_instance.run.call_args[0][0]
+        assert "Filename: a.py" in prompt and "Filename: b.py" in prompt
+        assert results[1].external_libraries == ["requests", "urllib3"]
+        assert results[1].documentation_urls["requests"] == "https://pypi.org/project/requests/"
+
+
+class TestDependencyExtractionSlicing:
+    """Test suite for import-region slicing in the enrichment path"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.mock_client = Mock(spec=OpenRouterClient)
+        self.mock_client.get_model_name.return_value = "openai:test-model"
+        body = "\n".join(f"def helper_{i}(x):\n    return x * {i}\n" for i in range(500))
+        self.source = SourceCode(
+            content=f"import os\nimport json\n\n{body}\nimport requests\n",
+            language=LanguageType.PYTHON,
+            filename="big.py"
+        )
+    
+    @pytest.mark.asyncio
+    @patch('src.autonomous_code_converter.agents.dependency_extraction_agent.Agent')
+    async def test_prompt_only_carries_import_regions(self, mock_agent_class):
+        """Test that the prompt is a small fraction of the file"""
+        mock_result = Mock()
+        mock_result.output = Dependencies(external_libraries=["requests"])
+        mock_agent_instance = Mock()
+        mock_agent_instance.run = AsyncMock(return_value=mock_result)
+        mock_agent_class.return_value = mock_agent_instance
+        agent = DependencyExtractionAgent(self.mock_client, llm_enrichment=True)
+        
+        result = await agent.extract_dependencies(self.source)
+        
+        mock_agent_instance.run.assert_called_once()
+        prompt = mock_agent_instance.run.call_args[0][0]
+        assert "import os" in prompt and "import requests" in prompt
+        assert "helper_250" not in prompt
+        assert len(prompt) * 10 < len(self.source.content)
+        assert result.standard_libraries == ["os", "json"]
+    
+    @pytest.mark.asyncio
+    @patch('src.autonomous_code_converter.agents.dependency_extraction_agent.Agent')
+    async def test_chunks_are_extracted_and_merged(self, mock_agent_class):
+        """Test that oversized import regions are split and merged"""
+        replies = iter([
+            Dependencies(external_libraries=["requests"]),
+            Dependencies(external_libraries=["requests", "numpy"]),
+        ])
+        mock_agent_instance = Mock()
+        mock_agent_instance.run = AsyncMock(side_effect=lambda prompt: Mock(output=next(replies)))
+        mock_agent_class.return_value = mock_agent_instance
+        agent = DependencyExtractionAgent(self.mock_client, llm_enrichment=True, max_tokens_per_chunk=5)
+        source = SourceCode(content="import requests\nimport numpy\n", language=LanguageType.PYTHON)
+        
+        result = await agent.extract_dependencies(source)
+        
+        assert mock_agent_instance.run.call_count == 2
+        assert result.external_libraries == ["requests", "numpy"]
+    
+    @pytest.mark.asyncio
+    @patch('src.autonomous_code_converter.agents.dependency_extraction_agent.Agent')
+    async def test_file_without_imports_skips_llm(self, mock_agent_class):
+        """Test that a file with no import regions never reaches the LLM"""
+        mock_agent_instance = Mock()
+        mock_agent_instance.run = AsyncMock()
+        mock_agent_class.return_value = mock_agent_instance
+        agent = DependencyExtractionAgent(self.mock_client, llm_enrichment=True)
+        
+        result = await agent.extract_dependencies(
+            SourceCode(content="x = 1\n", language=LanguageType.PYTHON)
+        )
+        
+        mock_agent_instance.run.assert_not_called()
+        assert result == Dependencies()
+
+
+def streaming_model(payloads: list, sent: list, size: int = 8) -> FunctionModel:
+    """Model that streams one payload per request in small pieces."""
+    replies = iter(payloads)
+    
+    async def stream(messages, info):
+        payload = next(replies)
+        for start in range(0, len(payload), size):
+            sent.append(payload[start:start + size])
+            name = info.output_tools[0].name if start == 0 else None
+            yield {0: DeltaToolCall(name=name, json_args=payload[start:start + size])}
+    return FunctionModel(stream_function=stream)
+
+
+class TestDependencyExtractionStreaming:
+    """Test suite for streamed extraction"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.mock_client = Mock(spec=OpenRouterClient)
+        self.mock_client.get_model_name.return_value = "openai:test-model"
+        self.cache = ResultCache(CacheConfig(enabled=True, directory=None))
+        self.source = SourceCode(
+            content="import os\nimport requests\nimport numpy as np\n",
+            language=LanguageType.PYTHON
+        )
+        self.sent = []
+    
+    def make_agent(self, payloads: list, **kwargs) -> DependencyExtractionAgent:
+        agent = DependencyExtractionAgent(self.mock_client, cache=self.cache, llm_enrichment=True, **kwargs)
+        agent.agent = Agent(streaming_model(payloads, self.sent), result_type=Dependencies)
+        return agent
+    
+    @pytest.mark.asyncio
+    async def test_parser_result_comes_first(self):
+        """Test that the local result is yielded before any LLM output"""
+        agent = self.make_agent(['{"documentation_urls": {"certifi": "https://certifiio.readthedocs.io"}}'])
+        stream = agent.extract_dependencies_stream(self.source)
+        
+        first = await stream.__anext__()
+        assert self.sent == []
+        assert first == extract_dependencies_locally(self.source)
+        
+        results = [first] + [d async for d in stream]
+        assert results[-1].documentation_urls["certifi"] == "https://certifiio.readthedocs.io"
+        assert all(r.imports == first.imports for r in results)
+    
+    @pytest.mark.asyncio
+    async def test_partial_lists_never_hold_truncated_names(self):
+        """Test that only fully received names are yielded"""
+        agent = self.make_agent(['{"external_libraries": ["requests", "numpy", "pandas", "scipy"]}'])
+        
+        results = [d async for d in agent.extract_dependencies_stream(self.source)]
+        
+        names = {"requests", "numpy", "pandas", "scipy"}
+        for result in results:
+            assert set(result.external_libraries) <= names
+        assert results[-1].external_libraries == ["requests", "numpy", "pandas", "scipy"]
+        assert self.cache.get(agent._cache_key(self.source), Dependencies) is not None
+    
+    @pytest.mark.asyncio
+    async def test_stop_skips_remaining_chunks(self):
+        """Test that stopping ends the stream and sends no further chunks"""
+        agent = self.make_agent([
+            '{"external_libraries": ["requests", "numpy"], "documentation_urls": {"numpy": "https://numpy.org/doc"}}',
+            '{"external_libraries": ["numpy"]}',
+        ], max_tokens_per_chunk=5)
+        assert len(agent._prepare(self.source)) > 1
+        
+        results = [d async for d in agent.extract_dependencies_stream(
+            self.source, stop_when=lambda deps: "numpy" in deps.external_libraries
+        )]
+        
+        assert "numpy" in results[-1].external_libraries
+        assert "numpy.org" not in "".join(self.sent)
+        assert self.cache.get(agent._cache_key(self.source), Dependencies) is None
+    
+    @pytest.mark.asyncio
+    async def test_without_enrichment_only_parser_runs(self):
+        """Test that the stream is a single parser result without enrichment"""
+        agent = DependencyExtractionAgent(self.mock_client)
+        
+        results = [d async for d in agent.extract_dependencies_stream(self.source)]
+        
+        assert results == [extract_dependencies_locally(self.source)]
+
+
+class TestDependencyExtractionAgentCache:
+    """Test suite for result caching"""
+    
+    @patch('src.autonomous_code_converter.agents.dependency_extraction_agent.Agent')
+    def test_cache_key_includes_filename_and_language(self, mock_agent_class, tmp_path):
+        """Test that cached results are keyed by file metadata and persisted"""
+        mock_client = Mock(spec=OpenRouterClient)
+        mock_client.get_model_name.return_value = "openai:test-model"
+        mock_result = Mock()
+        mock_result.output = Dependencies(imports=["import os"], standard_libraries=["os"])
+        mock_agent_instance = Mock()
+        mock_agent_instance.run_sync.return_value = mock_result
+        mock_agent_class.return_value = mock_agent_instance
+        
+        config = CacheConfig(enabled=True, directory=str(tmp_path))
+        agent = DependencyExtractionAgent(mock_client, cache=ResultCache(config), llm_enrichment=True)
+        source = SourceCode(content="import os", language=LanguageType.PYTHON, filename="a.py")
+        
+        agent.extract_dependencies_sync(source)
+        agent.extract_dependencies_sync(source)
+        agent.extract_dependencies_sync(source.model_copy(update={"filename": "b.py"}))
+        assert mock_agent_instance.run_sync.call_count == 2
+        
+        # A fresh agent with the same cache directory reuses the disk tier
+        fresh_agent = DependencyExtractionAgent(mock_client, cache=ResultCache(config), llm_enrichment=True)
+        result = fresh_agent.extract_dependencies_sync(source)
+        assert result.standard_libraries == ["os"]
+        assert mock_agent_instance.run_sync.call_count == 2
+
+
 class TestDependencyExtractionIntegration:
     """Integration tests for dependency extraction scenarios"""
     
@@ -219,7 +558,7 @@ class TestDependencyExtractionIntegration:
         """Setup integration test fixtures"""
         self.mock_client = Mock(spec=OpenRouterClient)
         self.mock_client.get_model_name.return_value = "openai:test-model"
-        self.agent = DependencyExtractionAgent(self.mock_client)
+        self.agent = DependencyExtractionAgent(self.mock_client, llm_enrichment=True)
     
     @patch('src.autonomous_code_converter.agents.dependency_extraction_agent.Agent')
     def test_python_dependency_extraction(self, mock_agent_class):
@@ -242,7 +581,7 @@ class TestDependencyExtractionIntegration:
         )
         
         mock_result = Mock()
-        mock_result.data = expected_deps
+        mock_result.output = expected_deps
         mock_agent_instance = Mock()
         mock_agent_instance.run_sync.return_value = mock_result
         mock_agent_class.return_value = mock_agent_instance
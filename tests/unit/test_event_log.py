@@ -0,0 +1,118 @@
+"""
+Testes para o log de eventos estruturado
+"""
+
+import json
+import time
+from datetime import datetime
+
+from src.autonomous_code_converter.graphs import BaseGraphState, create_base_graph
+from src.autonomous_code_converter.graphs.base_graph import create_initial_state
+from src.autonomous_code_converter.models import LanguageType
+from src.autonomous_code_converter.models.event_log import (
+    EventCode, EventLog, make_event, merge_event_logs
+)
+
+
+class TestEventLog:
+    """Testes do buffer circular de eventos"""
+
+    def test_ring_buffer_keeps_latest(self):
+        """Teste de capacidade fixa com expulsão dos mais antigos"""
+        log = EventLog(capacity=3)
+        for index in range(5):
+            log.append(EventCode.MESSAGE, text=f"m{index}")
+
+        assert len(log) == 3
+        assert log.dropped == 2
+        assert [event.payload["text"] for event in log.events()] == ["m2", "m3", "m4"]
+
+    def test_formatting_is_lazy_and_readable(self):
+        """Teste do texto montado apenas na leitura"""
+        log = EventLog()
+        log.append(EventCode.PHASE_CHANGED, "analyzed")
+        log.append(EventCode.BRANCH_FAILED, "analyzed", branch="ast_analysis", error="boom")
+
+        assert isinstance(log.entries[0], tuple)
+        messages = log.messages()
+        assert messages[0].startswith("[") and messages[0].endswith("] Fase atualizada para: analyzed")
+        assert messages[1].endswith("Falha em ast_analysis: boom")
+
+    def test_spill_to_disk(self, tmp_path):
+        """Teste de eventos expulsos gravados em JSONL"""
+        spill = tmp_path / "events.jsonl"
+        log = EventLog(capacity=2, spill_path=str(spill))
+        for phase in ("a", "b", "c", "d"):
+            log.append(EventCode.PHASE_CHANGED, phase)
+
+        spilled = [json.loads(line) for line in spill.read_text().splitlines()]
+        assert [entry["phase"] for entry in spilled] == ["a", "b"]
+        assert spilled[0]["code"] == "PHASE_CHANGED"
+
+    def test_reducer_does_not_mutate_previous_value(self):
+        """Teste do redutor com cópia: o valor anterior fica intacto"""
+        left = EventLog(capacity=2)
+        left.append(EventCode.STATE_CREATED)
+
+        merged = merge_event_logs(left, [make_event(EventCode.VALIDATED), make_event(EventCode.VALIDATED)])
+
+        assert len(left) == 1
+        assert len(merged) == 2
+        assert merged.dropped == 1
+
+    def test_round_trip_through_model_dump(self):
+        """Teste de reconstrução preservando capacidade e mensagens"""
+        log = EventLog(capacity=4)
+        log.append(EventCode.SESSION_STARTED, "initialized")
+
+        restored = EventLog(**log.model_dump())
+
+        assert restored.entries.maxlen == 4
+        assert restored.messages() == log.messages()
+
+    def test_resume_with_another_monotonic_base(self, monkeypatch):
+        """Teste de log retomado em outro processo (origem monotônica diferente)"""
+        log = EventLog()
+        log.append(EventCode.SESSION_STARTED, "initialized")
+        payload = log.model_dump()
+
+        # Após um reinício o relógio monotônico recomeça perto de zero
+        monkeypatch.setattr(time, "monotonic_ns", lambda: 5)
+        resumed = EventLog(**payload)
+        resumed.append(EventCode.VALIDATED, "validated")
+
+        stamps = [datetime.fromisoformat(message[1:message.index("]")]) for message in resumed.messages()]
+        assert stamps[0] <= stamps[1]
+        assert abs((stamps[1] - datetime.now()).total_seconds()) < 60
+
+
+class TestGraphEvents:
+    """Testes do log de eventos no grafo"""
+
+    def test_graph_log_stays_bounded(self, tmp_path):
+        """Teste de log limitado durante a execução do grafo"""
+        spill = tmp_path / "events.jsonl"
+        state = create_initial_state("import os\n", LanguageType.PYTHON,
+                                     event_log=EventLog(capacity=4, spill_path=str(spill)))
+
+        result = BaseGraphState(**create_base_graph().invoke(
+            state, config={"configurable": {"thread_id": "eventos"}}
+        ))
+
+        assert len(result.events) == 4
+        assert result.messages[-1].endswith("Fase atualizada para: validated")
+        spilled = [json.loads(line) for line in spill.read_text().splitlines()]
+        assert spilled[0]["code"] == "STATE_CREATED"
+        assert len(spilled) == result.events.dropped
+
+    def test_branch_events_from_parallel_nodes(self):
+        """Teste de eventos dos três ramos paralelos"""
+        state = create_initial_state("import os\n", LanguageType.PYTHON)
+
+        result = BaseGraphState(**create_base_graph().invoke(
+            state, config={"configurable": {"thread_id": "ramos"}}
+        ))
+
+        branches = {event.payload["branch"] for event in result.events.events()
+                    if event.code == EventCode.BRANCH_COMPLETED}
+        assert branches == {"language_detection", "dependency_extraction", "ast_analysis"}
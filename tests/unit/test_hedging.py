@@ -0,0 +1,203 @@
+"""
+Testes para as requisições duplicadas (hedging)
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from src.autonomous_code_converter.models.config import HedgingConfig, OpenRouterConfig
+from src.autonomous_code_converter.tools.hedging import HedgeBudget, HedgedTransport, LatencyTracker
+from src.autonomous_code_converter.tools.metrics import HEDGE_OUTCOMES
+from src.autonomous_code_converter.tools.openrouter_client import OpenRouterClient
+
+URL = "https://openrouter.ai/api/v1/chat/completions"
+
+
+class SlowProvider:
+    """Provedor falso: as primeiras ``stalls`` requisições travam por ``stall`` segundos"""
+
+    def __init__(self, stalls: int = 1, stall: float = 5.0):
+        self.stalls = stalls
+        self.stall = stall
+        self.models = []
+        self.cancelled = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        model = json.loads(request.content)["model"]
+        self.models.append(model)
+        if len(self.models) <= self.stalls:
+            try:
+                await asyncio.sleep(self.stall)
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+        return httpx.Response(200, json={"model": model})
+
+
+def post(model: str = "modelo-a", **extra) -> httpx.Request:
+    return httpx.Request("POST", URL, json={"model": model, "messages": [], **extra})
+
+
+class TestLatencyTracker:
+    """Testes da janela de latências"""
+
+    def test_percentile_per_model(self):
+        """Teste de percentil calculado na janela de cada modelo"""
+        tracker = LatencyTracker(window=100)
+        for value in range(1, 101):
+            tracker.observe("a", value / 100)
+        tracker.observe("b", 3.0)
+
+        assert tracker.percentile("a", 0.95) == pytest.approx(0.96)
+        assert tracker.percentile("b", 0.95) == 3.0
+        assert tracker.percentile("c", 0.95) is None
+
+    def test_window_keeps_recent_samples(self):
+        """Teste de descarte das amostras antigas"""
+        tracker = LatencyTracker(window=3)
+        for value in (10.0, 1.0, 1.0, 1.0):
+            tracker.observe("a", value)
+
+        assert tracker.percentile("a", 0.99) == 1.0
+
+
+class TestHedgeBudget:
+    """Testes do orçamento de duplicatas"""
+
+    def test_budget_caps_hedge_ratio(self):
+        """Teste de no máximo ``ratio`` duplicatas por requisição"""
+        budget = HedgeBudget(0.1, burst=1.0)
+        allowed = 0
+        for _ in range(100):
+            budget.deposit()
+            allowed += budget.try_spend()
+
+        assert allowed == 10
+
+
+class TestHedgedTransport:
+    """Testes do transporte com duplicatas"""
+
+    @pytest.mark.asyncio
+    async def test_stalled_request_is_hedged_and_loser_cancelled(self):
+        """Teste de duplicata vencedora e cancelamento da original"""
+        provider = SlowProvider()
+        transport = HedgedTransport(httpx.MockTransport(provider), HedgingConfig(
+            enabled=True, initial_delay=0.05, min_delay=0.0, budget=1.0
+        ))
+        hedge_wins = HEDGE_OUTCOMES.value(result="hedge_won")
+
+        response = await asyncio.wait_for(transport.handle_async_request(post()), timeout=1.0)
+
+        assert response.status_code == 200
+        assert json.loads(response.content) == {"model": "modelo-a"}
+        assert provider.models == ["modelo-a", "modelo-a"]
+        assert provider.cancelled == 1
+        assert transport.metrics()["hedge_wins"] == 1
+        assert HEDGE_OUTCOMES.value(result="hedge_won") == hedge_wins + 1
+
+    @pytest.mark.asyncio
+    async def test_alternate_model(self):
+        """Teste de duplicata enviada ao modelo alternativo"""
+        provider = SlowProvider()
+        transport = HedgedTransport(httpx.MockTransport(provider), HedgingConfig(
+            enabled=True, initial_delay=0.05, min_delay=0.0, budget=1.0, alternate_model="modelo-b"
+        ))
+
+        response = await transport.handle_async_request(post())
+
+        assert json.loads(response.content) == {"model": "modelo-b"}
+        assert provider.models == ["modelo-a", "modelo-b"]
+        # A original cancelada entra como limite inferior da latência do seu modelo
+        assert transport.latencies.count("modelo-a") == 1
+        assert transport.latencies.percentile("modelo-a", 0.5) >= 0.05
+        assert transport.latencies.count("modelo-b") == 1
+
+    @pytest.mark.asyncio
+    async def test_fast_request_is_not_hedged(self):
+        """Teste de resposta dentro do percentil sem duplicata"""
+        provider = SlowProvider(stalls=0)
+        transport = HedgedTransport(httpx.MockTransport(provider), HedgingConfig(
+            enabled=True, initial_delay=0.5, budget=1.0
+        ))
+
+        await transport.handle_async_request(post())
+
+        assert provider.models == ["modelo-a"]
+        assert transport.metrics()["hedges"] == 0
+
+    @pytest.mark.asyncio
+    async def test_delay_follows_measured_percentile(self):
+        """Teste de espera derivada da latência medida do modelo"""
+        transport = HedgedTransport(httpx.MockTransport(SlowProvider(stalls=0)), HedgingConfig(
+            enabled=True, min_samples=5, min_delay=0.1
+        ))
+        assert transport.hedge_delay("modelo-a") is None
+
+        for _ in range(5):
+            await transport.handle_async_request(post())
+        assert transport.hedge_delay("modelo-a") == 0.1
+
+        for latency in (2.0, 2.0, 2.0, 2.0, 2.0):
+            transport.latencies.observe("modelo-a", latency)
+        assert transport.hedge_delay("modelo-a") == 2.0
+
+    @pytest.mark.asyncio
+    async def test_budget_exhausted_waits_for_primary(self):
+        """Teste de requisição lenta sem saldo esperando a original"""
+        provider = SlowProvider(stall=0.1)
+        transport = HedgedTransport(httpx.MockTransport(provider), HedgingConfig(
+            enabled=True, initial_delay=0.01, min_delay=0.0, budget=0.01
+        ))
+
+        response = await transport.handle_async_request(post())
+
+        assert response.status_code == 200
+        assert provider.models == ["modelo-a"]
+        assert transport.metrics()["hedges"] == 0
+
+    @pytest.mark.asyncio
+    async def test_streaming_requests_pass_through(self):
+        """Teste de requisições com streaming nunca duplicadas"""
+        provider = SlowProvider(stall=0.1)
+        transport = HedgedTransport(httpx.MockTransport(provider), HedgingConfig(
+            enabled=True, initial_delay=0.01, min_delay=0.0, budget=1.0
+        ))
+
+        await transport.handle_async_request(post(stream=True))
+
+        assert provider.models == ["modelo-a"]
+
+    @pytest.mark.asyncio
+    async def test_failed_primary_falls_back_to_hedge(self):
+        """Teste de erro na original com a duplicata ainda em andamento"""
+        calls = []
+
+        async def handler(request):
+            calls.append(request)
+            if len(calls) == 1:
+                await asyncio.sleep(0.05)
+                return httpx.Response(503)
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json={})
+
+        transport = HedgedTransport(httpx.MockTransport(handler), HedgingConfig(
+            enabled=True, initial_delay=0.01, min_delay=0.0, budget=1.0
+        ))
+
+        response = await transport.handle_async_request(post())
+
+        assert response.status_code == 200
+        assert len(calls) == 2
+
+    def test_client_wraps_transport_when_enabled(self):
+        """Teste de camada de hedging acima do limitador no cliente"""
+        client = OpenRouterClient(OpenRouterConfig(api_key="test-key", hedging=HedgingConfig(enabled=True)))
+        assert client.get_hedging_metrics() == {}
+
+        assert isinstance(client.get_http_client()._transport, HedgedTransport)
+        assert client.get_hedging_metrics()["hedges"] == 0
+        assert OpenRouterClient(OpenRouterConfig(api_key="test-key")).get_hedging_metrics() == {}
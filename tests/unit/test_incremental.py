@@ -0,0 +1,195 @@
+"""
+Testes para a reanálise incremental
+"""
+
+import asyncio
+import io
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from src.autonomous_code_converter.graphs import incremental
+from src.autonomous_code_converter.graphs.base_graph import create_base_graph
+from src.autonomous_code_converter.graphs.incremental import (
+    FingerprintStore, detect_changes, import_keys, main, module_keys, run_incremental
+)
+from src.autonomous_code_converter.models import LanguageType, SourceCode
+from src.autonomous_code_converter.tools.dependency_parser import import_specifiers
+
+
+@pytest.fixture
+def repository(tmp_path):
+    """Repositório com imports Python relativos/absolutos e TypeScript"""
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "__init__.py").write_text("")
+    (tmp_path / "pkg" / "util.py").write_text("def helper():\n    return 1\n")
+    (tmp_path / "pkg" / "app.py").write_text("from .util import helper\n\nprint(helper())\n")
+    (tmp_path / "main.py").write_text("import pkg.app\n")
+    (tmp_path / "web").mkdir()
+    (tmp_path / "web" / "lib.ts").write_text("export const x: number = 1;\n")
+    (tmp_path / "web" / "index.ts").write_text("import { x } from './lib';\nconsole.log(x);\n")
+    return tmp_path
+
+
+def run(root, store, **options):
+    """Executa uma rodada incremental e devolve (contadores, arquivos processados)"""
+    output = io.StringIO()
+    stats = asyncio.run(run_incremental(str(root), store, output, graph=create_base_graph(), **options))
+    processed = sorted(json.loads(line)["filename"] for line in output.getvalue().splitlines())
+    return stats, processed
+
+
+def edit(path, content):
+    """Grava e garante um mtime diferente mesmo em sistemas de arquivos grossos"""
+    mtime = os.stat(path).st_mtime_ns if path.exists() else 0
+    path.write_text(content)
+    os.utime(path, ns=(mtime + 10**9, mtime + 10**9))
+
+
+class TestModuleKeys:
+    """Testes da resolução de imports para chaves de módulo"""
+
+    def test_python_keys(self):
+        """Teste de sufixos pontuados e pacotes"""
+        assert module_keys("src/pkg/mod.py") == ["src.pkg.mod", "pkg.mod", "mod"]
+        assert module_keys("pkg/__init__.py") == ["pkg"]
+
+    def test_javascript_keys(self):
+        """Teste de caminhos sem extensão e diretórios com index"""
+        assert module_keys("web/lib.ts") == ["web/lib"]
+        assert module_keys("web/index.ts") == ["web/index", "web"]
+
+    def test_import_keys_resolve_relative_imports(self):
+        """Teste de imports relativos resolvidos a partir do arquivo"""
+        python = SourceCode(content="from . import util\nfrom ..core.base import Base\nimport os\n",
+                            language=LanguageType.PYTHON, filename="a/b/c.py")
+        typescript = SourceCode(content="import x from './lib.js';\nimport y from '../up';\nimport 'react';\n",
+                                language=LanguageType.TYPESCRIPT, filename="web/app.ts")
+
+        assert set(import_keys(python)) == {"a.b", "a.b.util", "a.core.base", "a.core.base.Base", "os"}
+        assert import_keys(typescript) == ["web/lib", "up"]
+
+    def test_import_specifiers_include_submodule_candidates(self):
+        """Teste de ``from m import n`` gerando também ``m.n``"""
+        source = SourceCode(content="from pkg import util\nfrom pkg.sub import *\n", language=LanguageType.PYTHON)
+
+        assert import_specifiers(source) == ["pkg", "pkg.util", "pkg.sub"]
+
+
+class TestIncrementalRun:
+    """Testes das rodadas incrementais"""
+
+    def test_unchanged_repository_runs_nothing(self, repository):
+        """Teste de segunda rodada sem trabalho e de touch sem reanálise"""
+        store = FingerprintStore()
+        stats, processed = run(repository, store)
+        assert len(processed) == 6
+        assert store.result("pkg/app.py")["analysis"]["dependencies"]["imports"] == ["from .util import helper"]
+
+        os.utime(repository / "main.py", ns=(1, 1))
+        stats, processed = run(repository, store)
+
+        assert processed == []
+        assert stats["unchanged"] == 6
+        assert store.get("main.py").mtime_ns == 1
+
+    def test_changed_file_and_its_importers(self, repository):
+        """Teste de reanálise do arquivo alterado e de quem o importa"""
+        store = FingerprintStore()
+        run(repository, store)
+
+        edit(repository / "pkg" / "util.py", "def helper():\n    return 2\n")
+        edit(repository / "web" / "lib.ts", "export const x: number = 2;\n")
+        stats, processed = run(repository, store)
+
+        assert processed == ["pkg/app.py", "pkg/util.py", "web/index.ts", "web/lib.ts"]
+        assert stats["dependents"] == 2
+
+    def test_transitive_dependents(self, repository):
+        """Teste de propagação para quem importa os dependentes"""
+        store = FingerprintStore()
+        run(repository, store)
+
+        edit(repository / "pkg" / "util.py", "def helper():\n    return 2\n")
+        _, processed = run(repository, store, transitive=True)
+
+        assert processed == ["main.py", "pkg/app.py", "pkg/util.py"]
+
+    def test_deleted_file_reanalyzes_importers(self, repository):
+        """Teste de arquivo apagado esquecido e importadores reanalisados"""
+        store = FingerprintStore()
+        run(repository, store)
+
+        (repository / "web" / "lib.ts").unlink()
+        stats, processed = run(repository, store, mode="hash")
+
+        assert processed == ["web/index.ts"]
+        assert stats["deleted"] == 1
+        assert store.get("web/lib.ts") is None
+
+    def test_failed_files_are_retried(self, repository):
+        """Teste de arquivo com falha não gravado no store"""
+
+        class FailingGraph:
+            checkpointer = None
+
+            async def ainvoke(self, state, config=None):
+                raise RuntimeError("falhou")
+
+        store = FingerprintStore()
+        stats = asyncio.run(run_incremental(str(repository), store, io.StringIO(), graph=FailingGraph()))
+        assert stats["failed"] == 6
+
+        _, processed = run(repository, store)
+        assert len(processed) == 6
+
+    def test_expired_files_are_retried(self, repository, monkeypatch):
+        """Teste de arquivo expirado tratado como falha (FAILED_PHASES)"""
+
+        async def expire_all(sources, output, graph, max_in_flight, on_summary):
+            for source_code in sources:
+                on_summary({"filename": source_code.filename, "phase": "expired"})
+            return {"processed": 0, "failed": 0}
+
+        store = FingerprintStore()
+        monkeypatch.setattr(incremental, "run_pipeline", expire_all)
+        asyncio.run(run_incremental(str(repository), store, io.StringIO()))
+        monkeypatch.undo()
+
+        _, processed = run(repository, store)
+        assert len(processed) == 6
+
+    @pytest.mark.skipif(shutil.which("git") is None, reason="git não disponível")
+    def test_git_mode_reads_only_the_diff(self, repository):
+        """Teste do modo git: diff contra a referência mais não rastreados"""
+        def git(*args):
+            subprocess.run(["git", "-C", str(repository), *args], check=True, capture_output=True)
+
+        git("init", "-q")
+        git("add", ".")
+        git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "base")
+        store = FingerprintStore()
+        run(repository, store)
+
+        edit(repository / "pkg" / "util.py", "def helper():\n    return 3\n")
+        (repository / "web" / "extra.ts").write_text("export const y = 1;\n")
+        changes = detect_changes(str(repository), store, mode="git", since="HEAD")
+        assert sorted(changes.changed) == ["pkg/util.py", "web/extra.ts"]
+        assert changes.scanned == 2
+
+        _, processed = run(repository, store, mode="git", since="HEAD")
+        assert processed == ["pkg/app.py", "pkg/util.py", "web/extra.ts"]
+
+    def test_cli(self, repository, tmp_path, capsys):
+        """Teste da linha de comando com o store em disco"""
+        database = tmp_path / "state" / "fingerprints.sqlite"
+        output = tmp_path / "out.jsonl"
+
+        assert main([str(repository), "--store", str(database), "-o", str(output)]) == 0
+        assert len(output.read_text().splitlines()) == 6
+        assert main([str(repository), "--store", str(database), "-o", str(output)]) == 0
+        assert output.read_text() == ""
+        assert json.loads(capsys.readouterr().err.splitlines()[-1])["unchanged"] == 6
@@ -4,13 +4,20 @@ Testes unitários para o Language Detection Agent
 
 import pytest
 from unittest.mock import Mock, patch, AsyncMock
+from pydantic_ai import Agent
+from pydantic_ai.models.function import DeltaToolCall, FunctionModel
 from src.autonomous_code_converter.agents.language_detection_agent import (
     LanguageDetectionAgent,
-    create_language_detection_agent
+    create_language_detection_agent,
+    language_settled
+)
+from src.autonomous_code_converter.models.base_models import (
+    LanguageDetection, LanguageDetectionBatch, LanguageType
 )
-from src.autonomous_code_converter.models.base_models import LanguageDetection, LanguageType
 from src.autonomous_code_converter.tools.openrouter_client import OpenRouterClient
-from src.autonomous_code_converter.models.config import OpenRouterConfig
+from src.autonomous_code_converter.models.config import OpenRouterConfig, CacheConfig
+from src.autonomous_code_converter.tools.result_cache import ResultCache
+from src.autonomous_code_converter.tools.language_heuristics import detect_language_locally
 
 
 class TestLanguageDetectionAgent:
@@ -26,8 +33,8 @@ class TestLanguageDetectionAgent:
         self.mock_client = Mock(spec=OpenRouterClient)
         self.mock_client.get_model_name.return_value = "openai:mistralai/devstral-small:free"
         
-        # Create agent instance
-        self.agent = LanguageDetectionAgent(self.mock_client)
+        # Create agent instance (fast path off so these tests exercise the LLM)
+        self.agent = LanguageDetectionAgent(self.mock_client, fast_path_threshold=None)
     
     def test_agent_initialization(self):
         """Test agent initialization"""
@@ -68,7 +75,7 @@ class TestLanguageDetectionAgent:
         """Test synchronous language detection with mocked response"""
         # Mock the PydanticAI agent
         mock_result = Mock()
-        mock_result.data = LanguageDetection(
+        mock_result.output = LanguageDetection(
             detected_language=LanguageType.PYTHON,
             confidence=0.95
         )
@@ -98,7 +105,7 @@ class TestLanguageDetectionAgent:
         """Test asynchronous language detection with mocked response"""
         # Mock the PydanticAI agent
         mock_result = Mock()
-        mock_result.data = LanguageDetection(
+        mock_result.output = LanguageDetection(
             detected_language=LanguageType.JAVASCRIPT,
             confidence=0.88
         )
@@ -151,4 +158,265 @@ class TestLanguageDetectionAgentFactory:
         
         # Verify agent was created with provided client
         assert isinstance(agent, LanguageDetectionAgent)
-        assert agent.openrouter_client == mock_client 
\ No newline at end of file
+        assert agent.openrouter_client == mock_client 
+
+class TestLanguageDetectionAgentCache:
+    """Test suite for result caching"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.mock_client = Mock(spec=OpenRouterClient)
+        self.mock_client.get_model_name.return_value = "openai:test-model"
+        self.cache = ResultCache(CacheConfig(enabled=True, directory=None))
+        self.agent = LanguageDetectionAgent(self.mock_client, cache=self.cache, fast_path_threshold=None)
+    
+    @patch('src.autonomous_code_converter.agents.language_detection_agent.Agent')
+    def test_repeated_source_hits_cache(self, mock_agent_class):
+        """Test that the same source only reaches the LLM once"""
+        mock_result = Mock()
+        mock_result.output = LanguageDetection(
+            detected_language=LanguageType.PYTHON,
+            confidence=0.9
+        )
+        mock_agent_instance = Mock()
+        mock_agent_instance.run_sync.return_value = mock_result
+        mock_agent_class.return_value = mock_agent_instance
+        
+        first = self.agent.detect_language_sync("x = 1")
+        second = self.agent.detect_language_sync("x = 1")
+        
+        assert first == second
+        mock_agent_instance.run_sync.assert_called_once()
+        assert self.cache.stats()["hits"] == 1
+    
+    @pytest.mark.asyncio
+    @patch('src.autonomous_code_converter.agents.language_detection_agent.Agent')
+    async def test_cache_key_includes_model(self, mock_agent_class):
+        """Test that switching models invalidates cached results"""
+        mock_result = Mock()
+        mock_result.output = LanguageDetection(
+            detected_language=LanguageType.JAVASCRIPT,
+            confidence=0.8
+        )
+        mock_agent_instance = Mock()
+        mock_agent_instance.run = AsyncMock(return_value=mock_result)
+        mock_agent_class.return_value = mock_agent_instance
+        
+        await self.agent.detect_language("let x = 1;")
+        self.mock_client.get_model_name.return_value = "openai:other-model"
+        await self.agent.detect_language("let x = 1;")
+        
+        assert mock_agent_instance.run.call_count == 2
+
+
+
+class TestLanguageDetectionFastPath:
+    """Test suite for the local heuristic fast path"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.mock_client = Mock(spec=OpenRouterClient)
+        self.mock_client.get_model_name.return_value = "openai:test-model"
+        self.agent = LanguageDetectionAgent(self.mock_client)
+    
+    @pytest.mark.parametrize("source, expected", [
+        ("import os\n\ndef main():\n    if os.sep:\n        print(os.sep)\n", LanguageType.PYTHON),
+        ("const fs = require('fs');\nmodule.exports = () => fs.readFileSync('a');\n", LanguageType.JAVASCRIPT),
+        ("interface User {\n  name: string;\n}\nexport type Id = string;\n", LanguageType.TYPESCRIPT),
+        ("import os\nprint(os.getcwd())\n", LanguageType.PYTHON),
+    ])
+    def test_local_detection(self, source, expected):
+        """Test the heuristic scorer on clear-cut sources"""
+        detection = detect_language_locally(source)
+        
+        assert detection.detected_language == expected
+        assert detection.confidence >= 0.85
+        assert detection.features_detected
+    
+    def test_ambiguous_source_has_low_confidence(self):
+        """Test that code valid in every language is not trusted"""
+        assert detect_language_locally("x = 1").confidence < 0.5
+
+    def test_literal_config_module_is_parsed(self):
+        """Test that a Python module of dict literals is not taken for JavaScript"""
+        source = 'CONFIG = {\n    "db": {"host": "localhost"},\n    "debug": True,\n}\n'
+        detection = detect_language_locally(source)
+
+        assert detection.detected_language == LanguageType.PYTHON
+        assert "python:ast_parse_ok" in detection.features_detected
+        assert detection.confidence < 0.5
+    
+    @patch('src.autonomous_code_converter.agents.language_detection_agent.Agent')
+    def test_confident_detection_skips_llm(self, mock_agent_class):
+        """Test that obvious sources never reach the LLM"""
+        result = self.agent.detect_language_sync(
+            "def hello_world():\n    print('Hello, World!')"
+        )
+        
+        assert result.detected_language == LanguageType.PYTHON
+        assert "python:ast_parse_ok" in result.features_detected
+        mock_agent_class.assert_not_called()
+        assert self.agent.get_stats()["fast_path_ratio"] == 1.0
+    
+    @pytest.mark.asyncio
+    @patch('src.autonomous_code_converter.agents.language_detection_agent.Agent')
+    async def test_low_confidence_falls_back_to_llm(self, mock_agent_class):
+        """Test that ambiguous sources are sent to the LLM"""
+        mock_result = Mock()
+        mock_result.output = LanguageDetection(
+            detected_language=LanguageType.PYTHON,
+            confidence=0.6
+        )
+        mock_agent_instance = Mock()
+        mock_agent_instance.run = AsyncMock(return_value=mock_result)
+        mock_agent_class.return_value = mock_agent_instance
+        
+        result = await self.agent.detect_language("x = 1")
+        
+        assert result.confidence == 0.6
+        mock_agent_instance.run.assert_called_once()
+        stats = self.agent.get_stats()
+        assert stats["llm_calls"] == 1
+        assert stats["fast_path_hits"] == 0
+
+
+
+def streaming_model(payload: str, sent: list, size: int = 8) -> FunctionModel:
+    """Model that streams the output tool arguments in small pieces."""
+    async def stream(messages, info):
+        for start in range(0, len(payload), size):
+            sent.append(payload[start:start + size])
+            name = info.output_tools[0].name if start == 0 else None
+            yield {0: DeltaToolCall(name=name, json_args=payload[start:start + size])}
+    return FunctionModel(stream_function=stream)
+
+
+class TestLanguageDetectionStreaming:
+    """Test suite for streamed detection"""
+    
+    PAYLOAD = ('{"detected_language": "python", "confidence": 0.9, '
+               '"features_detected": ["def keyword", "indentation blocks", "import statements"]}')
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.mock_client = Mock(spec=OpenRouterClient)
+        self.mock_client.get_model_name.return_value = "openai:test-model"
+        self.cache = ResultCache(CacheConfig(enabled=True, directory=None))
+        self.agent = LanguageDetectionAgent(self.mock_client, cache=self.cache, fast_path_threshold=None)
+        self.sent = []
+        self.agent.agent = Agent(streaming_model(self.PAYLOAD, self.sent), result_type=LanguageDetection)
+    
+    @pytest.mark.asyncio
+    async def test_partial_detections_grow_until_complete(self):
+        """Test that partials are yielded as the response arrives"""
+        detections = [d async for d in self.agent.detect_language_stream("x = 1")]
+        
+        assert len(detections) > 2
+        assert detections[0].detected_language == LanguageType.PYTHON
+        assert detections[0].features_detected == []
+        # No half-received feature name is ever yielded
+        for detection in detections:
+            assert set(detection.features_detected) <= {"def keyword", "indentation blocks", "import statements"}
+        assert detections[-1] == LanguageDetection.model_validate_json(self.PAYLOAD)
+        assert self.agent.get_stats()["llm_calls"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_stop_when_language_is_settled(self):
+        """Test that the generation stops early and is not cached"""
+        detections = [d async for d in self.agent.detect_language_stream(
+            "x = 1", stop_when=language_settled(min_confidence=0.8)
+        )]
+        
+        assert len(detections) == 1
+        assert detections[0].detected_language == LanguageType.PYTHON
+        assert len("".join(self.sent)) < len(self.PAYLOAD) // 2
+        assert self.cache.get(self.agent._cache_key("x = 1"), LanguageDetection) is None
+    
+    def test_language_settled_defaults(self):
+        """Test that the default condition needs a sent language and a confident answer"""
+        settled = language_settled()
+        
+        assert not settled(LanguageDetection(detected_language=LanguageType.PYTHON, confidence=0.5))
+        assert settled(LanguageDetection(detected_language=LanguageType.PYTHON, confidence=0.9))
+        assert not settled(LanguageDetection.model_construct(confidence=0.9))
+    
+    @pytest.mark.asyncio
+    async def test_complete_stream_is_cached(self):
+        """Test that a finished stream serves later calls from the cache"""
+        [d async for d in self.agent.detect_language_stream("x = 1")]
+        calls = len(self.sent)
+        
+        detections = [d async for d in self.agent.detect_language_stream("x = 1")]
+        
+        assert len(detections) == 1
+        assert len(self.sent) == calls
+        assert detections[0].features_detected == ["def keyword", "indentation blocks", "import statements"]
+    
+    @pytest.mark.asyncio
+    async def test_fast_path_yields_once(self):
+        """Test that a confident local detection never opens a stream"""
+        agent = LanguageDetectionAgent(self.mock_client)
+        agent.agent = self.agent.agent
+        
+        detections = [d async for d in agent.detect_language_stream("import os\n\ndef main():\n    print(os.getcwd())\n")]
+        
+        assert len(detections) == 1
+        assert detections[0].detected_language == LanguageType.PYTHON
+        assert self.sent == []
+
+
+class TestLanguageDetectionBatch:
+    """Test suite for batched detection"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.mock_client = Mock(spec=OpenRouterClient)
+        self.mock_client.get_model_name.return_value = "openai:test-model"
+        self.agent = LanguageDetectionAgent(self.mock_client)
+    
+    @pytest.mark.asyncio
+    @patch('src.autonomous_code_converter.agents.language_detection_agent.Agent')
+    async def test_batch_packs_ambiguous_files_into_one_prompt(self, mock_agent_class):
+        """Test that fast-path files stream first and the rest share one prompt"""
+        batch_result = Mock()
+        batch_result.output = LanguageDetectionBatch(results={
+            "1": LanguageDetection(detected_language=LanguageType.PYTHON, confidence=0.6),
+            "2": LanguageDetection(detected_language=LanguageType.JAVASCRIPT, confidence=0.7),
+        })
+        mock_agent_instance = Mock()
+        mock_agent_instance.run = AsyncMock(return_value=batch_result)
+        mock_agent_class.return_value = mock_agent_instance
+        
+        sources = [
+            "def hello_world():\n    print('Hello, World!')",
+            "x = 1",
+            "y = 2",
+        ]
+        results = [item async for item in self.agent.detect_language_batch(sources)]
+        
+        assert results[0][0] == 0
+        assert dict(results)[1].detected_language == LanguageType.PYTHON
+        assert dict(results)[2].detected_language == LanguageType.JAVASCRIPT
+        mock_agent_instance.run.assert_called_once()
+        prompt = mock_agent_instance.run.call_args[0][0]
+        assert "### File 1" in prompt and "### File 2" in prompt
+    
+    @pytest.mark.asyncio
+    @patch('src.autonomous_code_converter.agents.language_detection_agent.Agent')
+    async def test_missing_file_in_reply_is_retried_alone(self, mock_agent_class):
+        """Test that files the model skipped are re-asked individually"""
+        batch_result = Mock()
+        batch_result.output = LanguageDetectionBatch(results={
+            "0": LanguageDetection(detected_language=LanguageType.PYTHON, confidence=0.6),
+        })
+        single_result = Mock()
+        single_result.output = LanguageDetection(detected_language=LanguageType.TYPESCRIPT, confidence=0.5)
+        mock_agent_instance = Mock()
+        mock_agent_instance.run = AsyncMock(side_effect=[batch_result, single_result])
+        mock_agent_class.return_value = mock_agent_instance
+        
+        results = dict([item async for item in self.agent.detect_language_batch(["x = 1", "y = 2"])])
+        
+        assert results[1].detected_language == LanguageType.TYPESCRIPT
+        assert mock_agent_instance.run.call_count == 2
+        assert self.agent.get_stats()["llm_calls"] == 2
@@ -0,0 +1,219 @@
+"""
+Testes para as métricas de desempenho
+"""
+
+import json
+import urllib.request
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from src.autonomous_code_converter.agents.language_detection_agent import LanguageDetectionAgent
+from src.autonomous_code_converter.graphs import create_base_graph
+from src.autonomous_code_converter.graphs.base_graph import create_initial_state
+from src.autonomous_code_converter.models import LanguageDetection, LanguageType
+from src.autonomous_code_converter.models.config import OpenRouterConfig, RateLimitConfig
+from src.autonomous_code_converter.tools.metrics import (
+    CACHE_LOOKUPS,
+    FAST_PATH,
+    GRAPH_NODE_DURATION,
+    HTTP_IN_FLIGHT,
+    HTTP_REQUESTS,
+    HTTP_RETRYABLE,
+    LLM_CONCURRENCY_LIMIT,
+    LLM_RATE_AVAILABLE,
+    LLM_RATE_LIMIT,
+    LLM_TOKENS,
+    REGISTRY,
+    MetricsRegistry,
+    MetricsServer,
+    SnapshotWriter,
+    instrument_node,
+)
+from src.autonomous_code_converter.tools.openrouter_client import OpenRouterClient
+from src.autonomous_code_converter.tools.rate_limiter import AdaptiveConcurrencyController, RateLimiter
+from src.autonomous_code_converter.tools.result_cache import ResultCache
+
+from .test_openrouter import _chat_completion
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    """Cada teste parte de métricas zeradas"""
+    REGISTRY.reset()
+    yield
+    REGISTRY.reset()
+
+
+class TestRegistry:
+    """Testes do registro e dos formatos de exportação"""
+
+    def test_prometheus_text_format(self):
+        """Teste do formato texto com HELP, TYPE e rótulos escapados"""
+        registry = MetricsRegistry()
+        registry.counter("jobs_total", "Tarefas", ["queue"]).inc(3, queue='a"b')
+        registry.gauge("depth", "Profundidade").set(2)
+
+        text = registry.render_prometheus()
+
+        assert "# HELP jobs_total Tarefas\n# TYPE jobs_total counter\n" in text
+        assert 'jobs_total{queue="a\\"b"} 3\n' in text
+        assert "# TYPE depth gauge\ndepth 2\n" in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Teste dos buckets cumulativos, soma e contagem"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latência", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 5.0):
+            histogram.observe(value)
+
+        text = registry.render_prometheus()
+
+        assert 'latency_seconds_bucket{le="0.1"} 1\n' in text
+        assert 'latency_seconds_bucket{le="1"} 3\n' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 4\n' in text
+        assert "latency_seconds_sum 6.25\n" in text
+        assert "latency_seconds_count 4\n" in text
+
+    def test_same_name_returns_existing_metric(self):
+        """Teste de registro idempotente e conflito de tipo"""
+        registry = MetricsRegistry()
+        counter = registry.counter("calls_total", "Chamadas")
+
+        assert registry.counter("calls_total", "Chamadas") is counter
+        with pytest.raises(ValueError):
+            registry.gauge("calls_total", "Chamadas")
+
+    def test_wrong_labels_raise(self):
+        """Teste de rótulos incompatíveis"""
+        counter = MetricsRegistry().counter("calls_total", "Chamadas", ["agent"])
+
+        with pytest.raises(ValueError):
+            counter.inc(node="x")
+
+    def test_gauge_track(self):
+        """Teste do gauge incrementado apenas durante o bloco"""
+        gauge = MetricsRegistry().gauge("running", "Em andamento")
+
+        with gauge.track():
+            assert gauge.value() == 1
+        assert gauge.value() == 0
+
+
+class TestExport:
+    """Testes do endpoint HTTP e dos snapshots"""
+
+    def test_http_endpoint(self):
+        """Teste de /metrics e /metrics.json servidos localmente"""
+        registry = MetricsRegistry()
+        registry.counter("hits_total", "Acertos").inc()
+
+        with MetricsServer(registry, port=0) as server:
+            with urllib.request.urlopen(f"{server.url}/metrics") as response:
+                text = response.read().decode()
+                content_type = response.headers["Content-Type"]
+            with urllib.request.urlopen(f"{server.url}/metrics.json") as response:
+                snapshot = json.loads(response.read())
+
+        assert content_type.startswith("text/plain; version=0.0.4")
+        assert "hits_total 1\n" in text
+        assert snapshot["metrics"]["hits_total"]["samples"] == [{"labels": {}, "value": 1.0}]
+
+    def test_snapshot_writer(self, tmp_path):
+        """Teste de snapshots JSON gravados um por linha"""
+        registry = MetricsRegistry()
+        counter = registry.counter("hits_total", "Acertos")
+        path = tmp_path / "metrics" / "snapshots.jsonl"
+
+        writer = SnapshotWriter(str(path), interval=3600, registry=registry).start()
+        counter.inc()
+        writer.write_snapshot()
+        counter.inc()
+        writer.stop()
+
+        snapshots = [json.loads(line) for line in path.read_text().splitlines()]
+        values = [snapshot["metrics"]["hits_total"]["samples"][0]["value"] for snapshot in snapshots]
+        assert values == [1.0, 2.0]
+
+
+class TestInstrumentation:
+    """Testes da coleta nos pontos instrumentados"""
+
+    def test_graph_nodes_are_timed(self):
+        """Teste de histogramas por nó após uma execução do grafo"""
+        graph = create_base_graph()
+        state = create_initial_state("import os\nprint(os.getcwd())", LanguageType.PYTHON)
+
+        graph.invoke(state, config={"configurable": {"thread_id": "metrics"}})
+
+        for node in ("initialization", "language_detection", "merge_analysis", "validation"):
+            assert GRAPH_NODE_DURATION.count(node=node) == 1
+
+    @pytest.mark.asyncio
+    async def test_node_errors_counted(self):
+        """Teste de erros contados e relançados pelo nó instrumentado"""
+        async def failing(state):
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await instrument_node("failing", failing)({})
+
+        assert REGISTRY.get("graph_node_errors_total").value(node="failing") == 1
+        assert GRAPH_NODE_DURATION.count(node="failing") == 1
+
+    @pytest.mark.asyncio
+    async def test_agent_tokens_and_http_status(self):
+        """Teste de tokens da resposta e status HTTP registrados"""
+        responses = iter([429, 200])
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            status = next(responses)
+            if status != 200:
+                return httpx.Response(status, json={"error": {"message": "slow down"}})
+            return httpx.Response(200, json=_chat_completion({"detected_language": "python", "confidence": 0.9}))
+
+        config = OpenRouterConfig(api_key="test-key", rate_limit=RateLimitConfig(enabled=False))
+        client = OpenRouterClient(config)
+        with patch.object(client, "_build_transport", return_value=httpx.MockTransport(handler)), \
+                patch("openai._base_client.BaseClient._calculate_retry_timeout", return_value=0):
+            agent = LanguageDetectionAgent(client, fast_path_threshold=None)
+            await agent.detect_language("x = 1")
+        await client.aclose()
+
+        assert LLM_TOKENS.value(agent="language_detection", kind="prompt") == 10
+        assert LLM_TOKENS.value(agent="language_detection", kind="completion") == 5
+        assert HTTP_REQUESTS.value(status="429") == 1
+        assert HTTP_REQUESTS.value(status="200") == 1
+        assert HTTP_RETRYABLE.value(reason="429") == 1
+        assert HTTP_IN_FLIGHT.value() == 0
+
+    def test_cache_and_fast_path(self):
+        """Teste de contadores do cache e do caminho rápido"""
+        cache = ResultCache()
+        cache.get("missing", LanguageDetection)
+
+        agent = LanguageDetectionAgent(OpenRouterClient(OpenRouterConfig(api_key="test-key")))
+        agent.detect_language_sync("def main():\n    import os\n    print('hi')\n")
+
+        assert CACHE_LOOKUPS.value(result="miss") == 1
+        assert FAST_PATH.value(result="hit") == 1
+
+    def test_rate_limiter_and_aimd_gauges(self):
+        """Teste dos gauges de vazão e do limite AIMD na exportação"""
+        now = [0.0]
+        limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=600, clock=lambda: now[0])
+        controller = AdaptiveConcurrencyController(initial=4, clock=lambda: now[0])
+
+        limiter.reserve(100)
+        controller.on_overload()
+
+        assert LLM_RATE_LIMIT.value(bucket="requests") == 60
+        assert LLM_RATE_LIMIT.value(bucket="tokens") == 600
+        assert LLM_RATE_AVAILABLE.value(bucket="requests") == 59
+        assert LLM_RATE_AVAILABLE.value(bucket="tokens") == 500
+        assert LLM_CONCURRENCY_LIMIT.value() == 2
+        text = REGISTRY.render_prometheus()
+        assert 'llm_rate_limit_per_minute{bucket="tokens"} 600\n' in text
+        assert "llm_concurrency_limit 2\n" in text
+        assert "llm_rate_available" in REGISTRY.snapshot()["metrics"]
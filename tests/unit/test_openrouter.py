@@ -4,10 +4,39 @@ Testes para integração OpenRouter
 
 import pytest
 import os
+import json
 from unittest.mock import patch, MagicMock
 
+import httpx
+
 from src.autonomous_code_converter.tools import OpenRouterClient
-from src.autonomous_code_converter.models.config import OpenRouterConfig
+from src.autonomous_code_converter.models.config import OpenRouterConfig, RateLimitConfig
+from src.autonomous_code_converter.models import LanguageDetection, LanguageType
+from src.autonomous_code_converter.agents.language_detection_agent import LanguageDetectionAgent
+
+
+def _chat_completion(arguments: dict) -> dict:
+    """Resposta chat-completions com a chamada da ferramenta final_result"""
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "mistralai/devstral-small:free",
+        "choices": [{
+            "index": 0,
+            "finish_reason": "tool_calls",
+            "message": {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{
+                    "id": "call_1",
+                    "type": "function",
+                    "function": {"name": "final_result", "arguments": json.dumps(arguments)}
+                }]
+            }
+        }],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+    }
 
 
 class TestOpenRouterClient:
@@ -61,5 +90,74 @@ class TestOpenRouterClient:
         assert client.model_name == "mistralai/devstral-small:free"
 
 
+
+class TestSharedTransport:
+    """Testes para o transporte HTTP compartilhado"""
+    
+    def test_pool_limits_from_config(self):
+        """Teste de limites do pool vindos da configuração"""
+        config = OpenRouterConfig(
+            api_key="test-key",
+            max_connections=7,
+            max_keepalive_connections=3,
+            rate_limit=RateLimitConfig(enabled=False)
+        )
+        client = OpenRouterClient(config)
+        
+        # O transporte base fica sob a camada de métricas
+        pool = client.get_http_client()._transport._transport._pool
+        assert pool._max_connections == 7
+        assert pool._max_keepalive_connections == 3
+    
+    def test_rate_limit_metrics_exposed(self):
+        """Teste de exposição dos limites de vazão atuais"""
+        assert OpenRouterClient(OpenRouterConfig(api_key="test-key")).get_rate_limit_metrics() == {}
+        client = OpenRouterClient(OpenRouterConfig(api_key="test-key", rate_limit=RateLimitConfig(enabled=True)))
+        assert client.get_rate_limit_metrics() == {}
+        
+        client.get_http_client()
+        metrics = client.get_rate_limit_metrics()
+        
+        assert metrics["requests_per_minute"] == 20
+        assert metrics["concurrency_limit"] == 4
+        assert metrics["in_flight"] == 0
+    
+    def test_agents_share_one_model_and_transport(self):
+        """Teste de que todos os agentes usam o mesmo modelo e pool"""
+        client = OpenRouterClient(OpenRouterConfig(api_key="test-key"))
+        
+        first = client.create_agent("prompt a")
+        second = client.create_agent("prompt b")
+        
+        assert first.model is second.model
+        assert first.model.client is client.get_async_client()
+        assert client.get_async_client()._client is client.get_http_client()
+        assert str(client.get_async_client().base_url).startswith("https://openrouter.ai/api/v1")
+    
+    @pytest.mark.asyncio
+    async def test_agent_requests_go_through_shared_transport(self):
+        """Teste de que as chamadas do agente passam pelo transporte do cliente"""
+        seen = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request)
+            return httpx.Response(200, json=_chat_completion(
+                {"detected_language": "python", "confidence": 0.9}
+            ))
+        
+        client = OpenRouterClient(OpenRouterConfig(api_key="test-key"))
+        with patch.object(client, "_build_transport", return_value=httpx.MockTransport(handler)):
+            agent = LanguageDetectionAgent(client, fast_path_threshold=None)
+            first = await agent.detect_language("x = 1")
+            second = await agent.detect_language("y = 2")
+        
+        assert first.detected_language == LanguageType.PYTHON
+        assert second.confidence == 0.9
+        assert len(seen) == 2
+        assert str(seen[0].url) == "https://openrouter.ai/api/v1/chat/completions"
+        assert seen[0].headers["authorization"] == "Bearer test-key"
+        await client.aclose()
+
+
 if __name__ == "__main__":
     pytest.main([__file__]) 
\ No newline at end of file
@@ -0,0 +1,195 @@
+"""
+Testes para o pipeline de ingestão em streaming
+"""
+
+import asyncio
+import io
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from src.autonomous_code_converter.graphs.base_graph import create_base_graph
+from src.autonomous_code_converter.graphs import pipeline
+from src.autonomous_code_converter.graphs.pipeline import (
+    iter_source_files, iter_source_paths, run_path_pipeline, run_pipeline, main
+)
+from src.autonomous_code_converter.models import LanguageType
+
+
+@pytest.fixture
+def repository(tmp_path):
+    """Repositório pequeno com arquivos suportados e ignorados"""
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("def main():\n    return 1\n")
+    (tmp_path / "src" / "util.ts").write_text("export const x: number = 1;\n")
+    (tmp_path / "index.js").write_text("console.log('oi');\n")
+    (tmp_path / "README.md").write_text("# docs\n")
+    (tmp_path / "node_modules" / "lib").mkdir(parents=True)
+    (tmp_path / "node_modules" / "lib" / "index.js").write_text("module.exports = 1;\n")
+    (tmp_path / "generated").mkdir()
+    (tmp_path / "generated" / "out.py").write_text("x = 1\n")
+    (tmp_path / ".gitignore").write_text("# comentário\ngenerated/\n")
+    return tmp_path
+
+
+def summaries(output):
+    """Resumos JSONL por arquivo, sem id da sessão e horário da análise"""
+    results = {}
+    for line in output.getvalue().splitlines():
+        summary = json.loads(line)
+        summary.pop("session_id")
+        summary["analysis"].pop("analysis_timestamp")
+        results[summary.pop("filename")] = summary
+    return results
+
+
+class FakeGraph:
+    """Grafo falso que mede quantas sessões rodam ao mesmo tempo"""
+
+    def __init__(self):
+        self.checkpointer = None
+        self.in_flight = 0
+        self.peak = 0
+
+    async def ainvoke(self, state, config=None):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        state.update_phase("validated")
+        return state.model_dump()
+
+
+class TestIterSourceFiles:
+    """Testes da descoberta de arquivos"""
+
+    def test_respects_ignore_patterns_and_gitignore(self, repository):
+        """Teste de poda de diretórios ignorados e extensões não suportadas"""
+        sources = list(iter_source_files(str(repository)))
+
+        assert [source.filename for source in sources] == ["index.js", "src/app.py", "src/util.ts"]
+        assert [source.language for source in sources] == [
+            LanguageType.JAVASCRIPT, LanguageType.PYTHON, LanguageType.TYPESCRIPT
+        ]
+        assert sources[1].metadata["size"] == len("def main():\n    return 1\n")
+
+    def test_without_gitignore(self, repository):
+        """Teste desativando o .gitignore"""
+        filenames = [source.filename for source in iter_source_files(str(repository), use_gitignore=False)]
+
+        assert "generated/out.py" in filenames
+        assert "node_modules/lib/index.js" not in filenames
+
+    def test_is_lazy(self, repository):
+        """Teste de que os arquivos são lidos sob demanda"""
+        files = iter_source_files(str(repository))
+
+        first = next(files)
+        (repository / "src" / "app.py").write_text("print('alterado')\n")
+        second = next(files)
+
+        assert first.filename == "index.js"
+        assert second.content == "print('alterado')\n"
+
+    def test_skips_large_and_binary_files(self, repository):
+        """Teste de arquivos grandes ou não UTF-8"""
+        (repository / "big.py").write_text("x = 1\n" * 100)
+        (repository / "bin.js").write_bytes(b"\xff\xfe\x00")
+
+        filenames = [source.filename for source in iter_source_files(str(repository), max_file_bytes=100)]
+
+        assert "big.py" not in filenames
+        assert "bin.js" not in filenames
+
+
+class TestRunPipeline:
+    """Testes da execução do pipeline"""
+
+    @pytest.mark.asyncio
+    async def test_writes_jsonl_with_real_graph(self, repository):
+        """Teste de saída JSONL e limpeza dos checkpoints"""
+        graph = create_base_graph()
+        output = io.StringIO()
+
+        stats = await run_pipeline(iter_source_files(str(repository)), output, graph=graph)
+
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert stats == {"processed": 3, "failed": 0}
+        assert sorted(line["filename"] for line in lines) == ["index.js", "src/app.py", "src/util.ts"]
+        assert all(line["phase"] == "validated" for line in lines)
+        assert all("content" not in json.dumps(line) for line in lines)
+        assert graph.checkpointer.storage == {}
+
+    @pytest.mark.asyncio
+    async def test_paths_are_read_off_the_event_loop(self, repository):
+        """Teste de run_path_pipeline: mesmos resumos, arquivos lidos numa thread"""
+        expected, output = io.StringIO(), io.StringIO()
+        await run_pipeline(iter_source_files(str(repository)), expected, graph=create_base_graph())
+        threads = []
+        original = pipeline.load_source
+
+        def load_source(*args):
+            threads.append(threading.get_ident())
+            return original(*args)
+
+        with patch.object(pipeline, "load_source", load_source):
+            stats = await run_path_pipeline(iter_source_paths(str(repository)), output,
+                                            graph=create_base_graph())
+
+        assert stats == {"processed": 3, "failed": 0}
+        assert summaries(output) == summaries(expected)
+        assert threads and threading.get_ident() not in threads
+
+    @pytest.mark.asyncio
+    async def test_bounded_in_flight(self, tmp_path):
+        """Teste do limite de sessões simultâneas"""
+        for index in range(20):
+            (tmp_path / f"m{index}.py").write_text("x = 1\n")
+        graph = FakeGraph()
+
+        stats = await run_pipeline(iter_source_files(str(tmp_path)), io.StringIO(),
+                                   graph=graph, max_in_flight=3)
+
+        assert stats["processed"] == 20
+        assert graph.peak == 3
+
+    @pytest.mark.asyncio
+    async def test_failure_is_reported_per_file(self, repository):
+        """Teste de falha de um arquivo sem interromper o pipeline"""
+
+        class BrokenGraph(FakeGraph):
+            async def ainvoke(self, state, config=None):
+                if state.system_state.original_source.filename == "index.js":
+                    raise RuntimeError("falhou")
+                return await super().ainvoke(state, config)
+
+        output = io.StringIO()
+        stats = await run_pipeline(iter_source_files(str(repository)), output, graph=BrokenGraph())
+
+        failed = [json.loads(line) for line in output.getvalue().splitlines() if "falhou" in line]
+        assert stats == {"processed": 3, "failed": 1}
+        assert failed[0]["errors"] == ["RuntimeError: falhou"]
+
+    def test_cli(self, repository, tmp_path_factory):
+        """Teste da linha de comando"""
+        output = tmp_path_factory.mktemp("out") / "results.jsonl"
+
+        exit_code = main([str(repository), "-o", str(output), "--max-in-flight", "2"])
+
+        assert exit_code == 0
+        assert len(output.read_text().splitlines()) == 3
+
+    def test_cli_metrics_snapshot(self, repository, tmp_path_factory):
+        """Teste do snapshot de métricas gravado ao fim da execução"""
+        directory = tmp_path_factory.mktemp("metrics")
+        snapshot = directory / "metrics.jsonl"
+
+        main([str(repository), "-o", str(directory / "results.jsonl"),
+              "--metrics-snapshot", str(snapshot)])
+
+        metrics = json.loads(snapshot.read_text().splitlines()[-1])["metrics"]
+        nodes = {sample["labels"]["node"] for sample in metrics["graph_node_duration_seconds"]["samples"]}
+        assert "validation" in nodes
+        assert metrics["pipeline_in_flight"]["samples"][0]["value"] == 0
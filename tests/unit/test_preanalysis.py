@@ -0,0 +1,165 @@
+"""
+Testes para a pré-análise local em processos
+"""
+
+import hashlib
+import io
+import json
+import threading
+from concurrent.futures import Future
+from unittest.mock import patch
+
+import pytest
+
+from src.autonomous_code_converter.graphs import preanalysis
+from src.autonomous_code_converter.graphs.base_graph import create_base_graph
+from src.autonomous_code_converter.graphs.pipeline import (
+    iter_source_files, iter_source_paths, main, process_source, run_pipeline
+)
+from src.autonomous_code_converter.graphs.preanalysis import (
+    PendingSource, PreAnalyzer, preanalyze_file, run_preanalyzed_pipeline
+)
+from src.autonomous_code_converter.models import LanguageType, SourceCode
+
+
+@pytest.fixture
+def repository(tmp_path):
+    """Repositório com Python, TypeScript e arquivos que devem ser pulados"""
+    (tmp_path / "app.py").write_text("import os\n\ndef main():\n    if os.sep:\n        return 1\n")
+    (tmp_path / "util.ts").write_text("import { x } from './lib';\nexport const y: number = x;\n")
+    (tmp_path / "crlf.js").write_bytes(b"const fs = require('fs');\r\nconsole.log(fs);\r\n")
+    (tmp_path / "bin.js").write_bytes(b"\xff\xfe\x00")
+    return tmp_path
+
+
+def results_by_file(output):
+    """Resumos JSONL indexados por arquivo, sem id da sessão e horário da análise"""
+    results = {}
+    for line in output.getvalue().splitlines():
+        summary = json.loads(line)
+        summary.pop("session_id")
+        summary["analysis"].pop("analysis_timestamp")
+        results[summary.pop("filename")] = summary
+    return results
+
+
+class TestPreanalyzeFile:
+    """Testes do trabalho feito em cada processo"""
+
+    def test_compact_result(self, repository):
+        """Teste de resultados locais como dicts JSON e hash dos bytes lidos"""
+        result = preanalyze_file(str(repository / "crlf.js"), "javascript")
+        data = (repository / "crlf.js").read_bytes()
+
+        assert "content" not in result._fields
+        assert result.size == len(data)
+        assert result.sha256 == hashlib.sha256(data).hexdigest()
+        assert set(result.partials) == {"language_detection", "dependencies", "enriched_ast"}
+        assert result.partials["dependencies"]["imports"] == ["require('fs')"]
+        assert json.loads(json.dumps(result.partials)) == result.partials
+
+    def test_skipped_branches_are_not_computed(self, repository):
+        """Teste de ramos entregues a agentes fora do trabalhador"""
+        result = preanalyze_file(str(repository / "app.py"), "python",
+                                 skip=("language_detection", "dependency_extraction"))
+
+        assert set(result.partials) == {"enriched_ast"}
+
+    def test_skips_like_load_source(self, repository):
+        """Teste de arquivos grandes ou não UTF-8"""
+        assert preanalyze_file(str(repository / "bin.js"), "javascript") is None
+        assert preanalyze_file(str(repository / "app.py"), "python", max_file_bytes=10) is None
+        assert preanalyze_file(str(repository / "missing.py"), "python") is None
+
+
+class TestPreanalyzedPipeline:
+    """Testes do pipeline com o pool de processos"""
+
+    @pytest.mark.asyncio
+    async def test_same_results_as_in_process_analysis(self, repository):
+        """Teste de resultados idênticos aos da análise no laço de eventos"""
+        expected, output = io.StringIO(), io.StringIO()
+        await run_pipeline(iter_source_files(str(repository)), expected, graph=create_base_graph())
+
+        with PreAnalyzer(max_workers=2, window=1) as analyzer:
+            stats = await run_preanalyzed_pipeline(iter_source_paths(str(repository)), output,
+                                                   graph=create_base_graph(), analyzer=analyzer)
+
+        assert stats == {"processed": 3, "failed": 0}
+        assert results_by_file(output) == results_by_file(expected)
+        assert analyzer.fallbacks == 0
+
+    @pytest.mark.asyncio
+    async def test_precomputed_partials_are_not_recomputed(self):
+        """Teste de resultado pré-calculado usado pelo grafo sem recálculo"""
+        source = SourceCode(content="x = 1\n", language=LanguageType.PYTHON, filename="a.py")
+        partials = {"language_detection": {"detected_language": "python", "confidence": 0.123}}
+
+        summary = await process_source(create_base_graph(), source, partials=partials)
+
+        assert summary["analysis"]["language_detection"]["confidence"] == 0.123
+        assert summary["analysis"]["enriched_ast"]["complexity_metrics"]["lines"] == 2
+
+    @pytest.mark.asyncio
+    async def test_pool_failure_falls_back_to_local_read(self, repository):
+        """Teste de arquivo lido no processo principal quando o pool falha"""
+        future = Future()
+        future.set_exception(RuntimeError("processo morreu"))
+        analyzer = PreAnalyzer(max_workers=1)
+        threads = []
+        original = preanalysis.load_source
+
+        def load_source(*args):
+            threads.append(threading.get_ident())
+            return original(*args)
+
+        with patch.object(preanalysis, "load_source", load_source):
+            source_code, partials = await analyzer.resolve(
+                PendingSource(str(repository / "app.py"), "app.py", LanguageType.PYTHON, future))
+
+        assert source_code.content.startswith("import os")
+        assert partials == {}
+        assert analyzer.fallbacks == 1
+        # Leitura síncrona fora da thread do laço de eventos
+        assert threads and threads[0] != threading.get_ident()
+
+    @pytest.mark.asyncio
+    async def test_owned_pool_is_closed_off_the_event_loop(self, repository):
+        """Teste do encerramento do pool próprio numa thread"""
+        threads = []
+        close = PreAnalyzer.close
+
+        def record(analyzer):
+            threads.append(threading.get_ident())
+            close(analyzer)
+
+        with patch.object(PreAnalyzer, "close", record):
+            stats = await run_preanalyzed_pipeline(iter_source_paths(str(repository)), io.StringIO(),
+                                                   graph=create_base_graph())
+
+        assert stats == {"processed": 3, "failed": 0}
+        assert threads and threads[0] != threading.get_ident()
+
+    @pytest.mark.asyncio
+    async def test_changed_file_is_analyzed_again(self, repository):
+        """Teste de arquivo alterado após a pré-análise: resultados descartados"""
+        future = Future()
+        future.set_result(preanalyze_file(str(repository / "app.py"), "python"))
+        (repository / "app.py").write_text("x = 2\n")
+
+        source_code, partials = await PreAnalyzer(max_workers=1).resolve(
+            PendingSource(str(repository / "app.py"), "app.py", LanguageType.PYTHON, future))
+
+        assert source_code.content == "x = 2\n"
+        assert partials == {}
+
+    def test_cli_with_workers(self, repository, tmp_path_factory):
+        """Teste da linha de comando com e sem o pool"""
+        directory = tmp_path_factory.mktemp("out")
+
+        assert main([str(repository), "-o", str(directory / "pool.jsonl"), "--workers", "2"]) == 0
+        assert main([str(repository), "-o", str(directory / "local.jsonl"), "--workers", "0"]) == 0
+
+        pooled = io.StringIO((directory / "pool.jsonl").read_text())
+        local = io.StringIO((directory / "local.jsonl").read_text())
+        assert results_by_file(pooled) == results_by_file(local)
@@ -0,0 +1,182 @@
+"""
+Testes para a montagem compacta dos prompts
+"""
+
+import asyncio
+from unittest.mock import Mock
+
+from pydantic_ai.models.test import TestModel
+
+from src.autonomous_code_converter.agents.dependency_extraction_agent import DependencyExtractionAgent
+from src.autonomous_code_converter.agents.language_detection_agent import LanguageDetectionAgent
+from src.autonomous_code_converter.models import LanguageType, SourceCode
+from src.autonomous_code_converter.tools.metrics import PROMPT_TOKENS
+from src.autonomous_code_converter.tools.openrouter_client import OpenRouterClient
+from src.autonomous_code_converter.tools.prompt_builder import (
+    build_detection_batch_prompt, build_detection_prompt, build_extraction_batch_prompt,
+    build_extraction_prompt, compact_generic, compact_source, shorten_literal
+)
+
+LICENSE = "".join(f"# Licensed line {n}: permission is hereby granted\n" for n in range(20))
+
+PYTHON_SOURCE = LICENSE + '''"""Module docstring
+spanning lines."""
+import os  # standard library
+from typing import List
+
+URL = "https://example.com/a/very/long/path/that/keeps/going/and/going/forever"
+
+
+def join(items):
+    """Join the items."""
+    return "".join(items) + f"{items}"  # trailing comment
+'''
+
+TYPESCRIPT_SOURCE = '''/**
+ * License header
+ */
+/// <reference types="node" />
+import { Component } from '@angular/core'; // framework
+const banner = `a very long template literal that goes on and on and on and on`;
+const fs = require('fs'); /* inline */
+'''
+
+
+class TestCompaction:
+    """Testes da compactação por linguagem"""
+
+    def test_python_drops_comments_and_docstrings(self):
+        """Teste de remoção de comentários e docstrings e encurtamento de literais"""
+        compacted = compact_source(PYTHON_SOURCE, LanguageType.PYTHON)
+
+        assert compacted.splitlines() == [
+            "import os",
+            "from typing import List",
+            'URL = "https://example.com/a/ve..."',
+            "def join(items):",
+            '    return "".join(items) + f"{items}"',
+        ]
+
+    def test_python_form_feed_keeps_offsets(self):
+        """Teste de form feed (\\x0c), que splitlines trata como quebra de linha"""
+        source = 'import os\n\x0c\ndef f():  # comentário\n    return "x\x0cy"\n'
+
+        assert compact_source(source, LanguageType.PYTHON).split("\n") == [
+            "import os",
+            "def f():",
+            '    return "x\x0cy"',
+        ]
+
+    def test_python_keeps_dynamic_import_names(self):
+        """Teste de nomes de módulos em import_module/__import__ mantidos inteiros"""
+        name = "package.subpackage.with_a_rather_long_module_name.plugins"
+        source = f'import importlib\nmod = importlib.import_module("{name}")\nold = __import__("{name}", fromlist=["x"])\nlabel = ("{name}")\n'
+
+        compacted = compact_source(source, LanguageType.PYTHON)
+
+        assert compacted.count(name) == 2
+        assert f'label = ("{name[:24]}...")' in compacted
+
+    def test_python_many_edits(self):
+        """Teste de arquivo grande com uma edição por linha (uma única junção dos trechos)"""
+        source = "".join(f'x{n} = 1  # comentário {n}\n"""solta {n}"""\n' for n in range(20000))
+
+        compacted = compact_source(source, LanguageType.PYTHON)
+
+        assert compacted.splitlines() == [f"x{n} = 1" for n in range(20000)]
+
+    def test_invalid_python_falls_back_to_generic(self):
+        """Teste de código que o tokenize rejeita"""
+        source = 'import os\nx = """unterminated\n'
+
+        assert compact_source(source, LanguageType.PYTHON) == compact_generic(source)
+
+    def test_javascript_keeps_reference_directives(self):
+        """Teste de comentários removidos exceto ``///`` e strings longas encurtadas"""
+        compacted = compact_source(TYPESCRIPT_SOURCE, LanguageType.TYPESCRIPT)
+
+        assert "License" not in compacted and "framework" not in compacted
+        assert '/// <reference types="node" />' in compacted
+        assert "import { Component } from '@angular/core';" in compacted
+        assert "require('fs')" in compacted
+        assert "`a very long template lit...`" in compacted
+
+    def test_shorten_literal_keeps_delimiters(self):
+        """Teste de prefixos e aspas triplas preservados"""
+        assert shorten_literal("'short'") == "'short'"
+        assert shorten_literal('rb"' + "x" * 60 + '"') == 'rb"' + "x" * 24 + '..."'
+        assert shorten_literal('"""' + "y" * 60 + '"""') == '"""' + "y" * 24 + '..."""'
+
+    def test_generic_shortens_license_header(self):
+        """Teste de cabeçalho de licença reduzido mantendo a sintaxe"""
+        compacted = compact_generic(LICENSE + "\n\n\nimport os  # comment\n")
+
+        assert compacted.splitlines() == [
+            "# Licensed line 0: permission is hereby granted",
+            "# Licensed line 1: permission is hereby granted",
+            "import os  # comment",
+        ]
+
+
+class TestPromptBuilders:
+    """Testes dos prompts montados e da contagem de tokens"""
+
+    def test_detection_prompt_samples_large_files(self):
+        """Teste de arquivo grande reduzido ao orçamento com começo e fim"""
+        source = "def first():\n    pass\n" + "x = 1\n" * 5_000 + "def last():\n    pass\n"
+        prompt = build_detection_prompt(source, max_tokens=64)
+
+        assert prompt.text.startswith("Analyze this source code and detect the programming language:")
+        assert "def first():" in prompt.text and "def last():" in prompt.text
+        assert "\n...\n" in prompt.text
+        assert prompt.prompt_tokens < 100
+        assert prompt.saved_tokens == prompt.original_tokens - prompt.prompt_tokens > 7_000
+
+    def test_small_prompt_has_no_savings_to_invent(self):
+        """Teste de código já compacto enviado sem alteração"""
+        prompt = build_detection_prompt("print('hi')")
+
+        assert "```\nprint('hi')\n```" in prompt.text
+        assert prompt.saved_tokens == 0
+
+    def test_extraction_prompts(self):
+        """Teste do formato do prompt de extração e do lote"""
+        source = SourceCode(content=PYTHON_SOURCE, language=LanguageType.PYTHON, filename="a.py")
+        other = SourceCode(content=TYPESCRIPT_SOURCE, language=LanguageType.TYPESCRIPT, filename="b.ts")
+
+        single = build_extraction_prompt(source)
+        assert "Language: python\nFilename: a.py" in single.text
+        assert "```python\nimport os\n" in single.text
+        assert "Licensed" not in single.text
+        assert single.saved_tokens > 0
+
+        batch = build_extraction_batch_prompt([(0, source), (1, other)], lambda s: s.content)
+        assert batch.text.startswith("Analyze each of these 2 files and extract all dependencies:")
+        assert "### File 1\nLanguage: typescript\nFilename: b.ts" in batch.text
+        assert batch.prompt_tokens < batch.original_tokens
+
+        detection = build_detection_batch_prompt([(3, PYTHON_SOURCE)])
+        assert "### File 3\n```\n# Licensed line 0" in detection.text
+
+
+class TestAgentSavings:
+    """Testes da economia reportada pelos agentes"""
+
+    def test_agents_report_prompt_savings(self):
+        """Teste de ``get_stats`` e da métrica ``llm_prompt_tokens_total``"""
+        client = Mock(spec=OpenRouterClient)
+        client.get_model.return_value = TestModel()
+        client.get_model_name.return_value = "test"
+        before = PROMPT_TOKENS.value(agent="language_detection", stage="original")
+
+        detector = LanguageDetectionAgent(client, fast_path_threshold=None)
+        asyncio.run(detector.detect_language(PYTHON_SOURCE))
+        stats = detector.get_stats()
+        assert stats["prompt_tokens_saved"] > 0
+        assert PROMPT_TOKENS.value(agent="language_detection", stage="original") - before == (
+            stats["prompt_tokens"] + stats["prompt_tokens_saved"])
+
+        extractor = DependencyExtractionAgent(client, llm_enrichment=True)
+        asyncio.run(extractor.extract_dependencies(
+            SourceCode(content=PYTHON_SOURCE, language=LanguageType.PYTHON, filename="a.py")))
+        assert extractor.get_stats()["prompt_tokens"] > 0
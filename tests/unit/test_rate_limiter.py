@@ -0,0 +1,210 @@
+"""
+Testes para o controle de vazão do cliente
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from src.autonomous_code_converter.tools.rate_limiter import (
+    AdaptiveConcurrencyController,
+    PacedTransport,
+    RateLimiter,
+    TokenBucket,
+    estimate_request_tokens,
+    parse_retry_after
+)
+
+
+class FakeClock:
+    """Relógio controlado pelo teste"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTokenBucket:
+    """Testes para TokenBucket"""
+
+    def test_reserve_within_capacity_is_immediate(self):
+        """Teste de reserva sem espera"""
+        bucket = TokenBucket(capacity=2, refill_per_second=1, clock=FakeClock())
+
+        assert bucket.reserve(1) == 0.0
+        assert bucket.reserve(1) == 0.0
+
+    def test_debt_is_paid_in_arrival_order(self):
+        """Teste de que reservas acima da capacidade esperam em fila"""
+        clock = FakeClock()
+        bucket = TokenBucket(capacity=1, refill_per_second=2, clock=clock)
+
+        assert bucket.reserve(1) == 0.0
+        assert bucket.reserve(1) == pytest.approx(0.5)
+        assert bucket.reserve(1) == pytest.approx(1.0)
+
+        clock.now = 10.0
+        assert bucket.reserve(1) == 0.0
+
+
+class TestRateLimiter:
+    """Testes para RateLimiter"""
+
+    def test_requests_and_tokens_limits(self):
+        """Teste de que o limite mais restritivo define a espera"""
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=600, clock=clock)
+
+        assert limiter.reserve(600) == 0.0
+        # Sobra 1 requisição/s, mas os tokens levam 10 s para repor
+        assert limiter.reserve(100) == pytest.approx(10.0)
+        assert limiter.metrics()["throttled"] == 1
+
+    def test_pause_delays_next_requests(self):
+        """Teste de pausa por Retry-After"""
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_minute=None, clock=clock)
+
+        limiter.pause(3.0)
+
+        assert limiter.reserve(0) == pytest.approx(3.0)
+        assert limiter.metrics()["paused_for"] == pytest.approx(3.0)
+
+
+class TestAdaptiveConcurrencyController:
+    """Testes para o controle AIMD"""
+
+    def test_additive_increase_multiplicative_decrease(self):
+        """Teste do ciclo aumento/redução"""
+        clock = FakeClock()
+        controller = AdaptiveConcurrencyController(initial=4, minimum=1, maximum=8, clock=clock)
+
+        for _ in range(4):
+            controller.on_success()
+        assert controller.limit == 4
+        for _ in range(2):
+            controller.on_success()
+        assert controller.limit == 5
+
+        controller.on_overload()
+        assert controller.limit == 2
+        # Rajada de 429 dentro do cooldown conta como um único evento
+        controller.on_overload()
+        assert controller.limit == 2
+
+        clock.now = 5.0
+        controller.on_overload()
+        controller.on_overload()
+        assert controller.limit == 1
+
+    @pytest.mark.asyncio
+    async def test_acquire_waits_for_release(self):
+        """Teste de que o limite bloqueia e a liberação acorda o próximo"""
+        controller = AdaptiveConcurrencyController(initial=1, maximum=1)
+        await controller.acquire()
+
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        assert controller.metrics()["waiting"] == 1
+
+        controller.release()
+        await asyncio.wait_for(waiter, 1.0)
+        assert controller.in_flight == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_woken_waiter_passes_slot_on(self):
+        """Teste de vaga repassada quando o acordado é cancelado antes de entrar"""
+        controller = AdaptiveConcurrencyController(initial=1, maximum=1)
+        await controller.acquire()
+        first = asyncio.ensure_future(controller.acquire())
+        second = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+
+        controller.release()
+        first.cancel()
+        await asyncio.wait_for(second, 1.0)
+
+        assert first.cancelled()
+        assert controller.in_flight == 1
+
+
+class TestRetryAfter:
+    """Testes para leitura do Retry-After"""
+
+    def test_seconds_and_invalid_values(self):
+        """Teste de formatos aceitos"""
+        assert parse_retry_after("2.5") == 2.5
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+
+    def test_http_date(self):
+        """Teste de data HTTP no passado"""
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+class TestPacedTransport:
+    """Testes para o transporte controlado"""
+
+    def test_token_estimate_includes_max_tokens(self):
+        """Teste de estimativa de tokens da requisição"""
+        request = httpx.Request("POST", "https://x/chat", json={"messages": [], "max_tokens": 100})
+
+        assert estimate_request_tokens(request) >= 100
+
+    @pytest.mark.asyncio
+    async def test_429_backs_off_and_honors_retry_after(self):
+        """Teste de reação a 429 com Retry-After"""
+        responses = [
+            httpx.Response(429, headers={"retry-after": "7"}),
+            httpx.Response(200, json={}),
+        ]
+        inner = httpx.MockTransport(lambda request: responses.pop(0))
+        limiter = RateLimiter(requests_per_minute=None)
+        controller = AdaptiveConcurrencyController(initial=8, maximum=8)
+        transport = PacedTransport(inner, limiter, controller)
+
+        async with httpx.AsyncClient(transport=transport) as client:
+            first = await client.post("https://x/chat", json={})
+
+        assert first.status_code == 429
+        metrics = transport.metrics()
+        assert metrics["concurrency_limit"] == 4
+        assert metrics["overloads"] == 1
+        assert metrics["paused_for"] > 6
+        assert metrics["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_slot_held_until_stream_is_closed(self):
+        """Teste de vaga ocupada enquanto o corpo em streaming é lido"""
+        controller = AdaptiveConcurrencyController(initial=4)
+        async def body():
+            yield b"data: {}\n\n"
+
+        inner = httpx.MockTransport(lambda request: httpx.Response(200, content=body()))
+        transport = PacedTransport(inner, RateLimiter(None), controller)
+
+        async with httpx.AsyncClient(transport=transport) as client:
+            async with client.stream("POST", "https://x/chat", json={}) as response:
+                assert controller.in_flight == 1
+                await response.aread()
+            assert controller.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_timeout_counts_as_overload(self):
+        """Teste de que timeouts reduzem a concorrência"""
+        def handler(request):
+            raise httpx.ReadTimeout("timeout", request=request)
+
+        controller = AdaptiveConcurrencyController(initial=4)
+        transport = PacedTransport(httpx.MockTransport(handler), RateLimiter(None), controller)
+
+        async with httpx.AsyncClient(transport=transport) as client:
+            with pytest.raises(httpx.ReadTimeout):
+                await client.get("https://x/")
+
+        assert controller.limit == 2
+        assert controller.in_flight == 0
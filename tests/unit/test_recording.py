@@ -0,0 +1,189 @@
+"""
+Testes para a gravação e reprodução do tráfego com o LLM
+"""
+
+import asyncio
+import json
+import threading
+
+import httpx
+import pytest
+
+from benchmarks.mock_server import LatencyDistribution, MockChatServer, MockServerConfig
+from benchmarks.run_benchmarks import make_corpus, run_scenario
+from src.autonomous_code_converter.agents.language_detection_agent import LanguageDetectionAgent
+from src.autonomous_code_converter.models import LanguageType
+from src.autonomous_code_converter.models.config import OpenRouterConfig, RateLimitConfig, RecordingConfig
+from src.autonomous_code_converter.tools.openrouter_client import OpenRouterClient
+from src.autonomous_code_converter.tools.recording import MISS_STATUS, RecordingTransport, request_key
+
+
+def post(body: bytes, host: str = "openrouter.ai") -> httpx.Request:
+    return httpx.Request("POST", f"https://{host}/api/v1/chat/completions", content=body)
+
+
+class Provider:
+    """Provedor falso que numera as respostas"""
+
+    def __init__(self, status: int = 200, delay: float = 0.0):
+        self.status = status
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return httpx.Response(self.status, json={"call": self.calls})
+
+
+def client_for(base_url: str, mode: str, directory: str, replay_latency: bool = False) -> OpenRouterClient:
+    return OpenRouterClient(OpenRouterConfig(
+        api_key="test-key",
+        base_url=base_url,
+        rate_limit=RateLimitConfig(enabled=False),
+        recording=RecordingConfig(mode=mode, directory=directory, replay_latency=replay_latency)
+    ))
+
+
+class TestRecordingTransport:
+    """Testes da chave, da gravação e da reprodução"""
+
+    def test_key_ignores_host_and_key_order(self):
+        """Teste de chave igual para JSON equivalente em outro host"""
+        first = post(b'{"model": "m", "messages": []}')
+        second = post(b'{"messages":[],"model":"m"}', host="127.0.0.1:8080")
+
+        assert request_key(first) == request_key(second)
+        assert request_key(first) != request_key(post(b'{"model": "outro", "messages": []}'))
+
+    @pytest.mark.asyncio
+    async def test_record_then_replay_in_order(self, tmp_path):
+        """Teste de respostas repetidas servidas na ordem gravada, sem rede"""
+        provider = Provider()
+        recorder = RecordingTransport(httpx.MockTransport(provider), RecordingConfig(
+            mode="record", directory=str(tmp_path)))
+        for _ in range(2):
+            await recorder.handle_async_request(post(b'{"model": "m"}'))
+        await recorder.handle_async_request(post(b'{"model": "n"}'))
+
+        player = RecordingTransport(None, RecordingConfig(mode="replay", directory=str(tmp_path)))
+        calls = [json.loads((await player.handle_async_request(post(b'{"model": "m"}'))).content)["call"]
+                 for _ in range(3)]
+
+        assert calls == [1, 2, 2]
+        assert provider.calls == 3
+        assert recorder.metrics()["recorded"] == 3
+        assert player.metrics()["replayed"] == 3
+
+    @pytest.mark.asyncio
+    async def test_writes_leave_the_event_loop(self, tmp_path):
+        """Teste de gravação em disco fora da thread do event loop"""
+        recorder = RecordingTransport(httpx.MockTransport(Provider()), RecordingConfig(
+            mode="record", directory=str(tmp_path)))
+        threads = []
+        append = recorder.store.append
+
+        def tracked(*args):
+            threads.append(threading.get_ident())
+            append(*args)
+
+        recorder.store.append = tracked
+        await recorder.handle_async_request(post(b"{}"))
+
+        assert threads and threads[0] != threading.get_ident()
+        assert list(tmp_path.glob("*/*.json"))
+
+    @pytest.mark.asyncio
+    async def test_reads_leave_the_event_loop(self, tmp_path):
+        """Teste de leitura da gravação fora da thread do event loop"""
+        recorder = RecordingTransport(httpx.MockTransport(Provider()), RecordingConfig(
+            mode="record", directory=str(tmp_path)))
+        await recorder.handle_async_request(post(b"{}"))
+        player = RecordingTransport(None, RecordingConfig(mode="replay", directory=str(tmp_path)))
+        threads = []
+        load = player.store.load
+
+        def tracked(key):
+            threads.append(threading.get_ident())
+            return load(key)
+
+        player.store.load = tracked
+        response = await player.handle_async_request(post(b"{}"))
+
+        assert json.loads(response.content) == {"call": 1}
+        assert threads and threads[0] != threading.get_ident()
+
+    @pytest.mark.asyncio
+    async def test_miss_and_overload_are_not_recorded(self, tmp_path):
+        """Teste de 429 sem gravação e de resposta sintética para a falta"""
+        recorder = RecordingTransport(httpx.MockTransport(Provider(status=429)), RecordingConfig(
+            mode="record", directory=str(tmp_path)))
+        assert (await recorder.handle_async_request(post(b"{}"))).status_code == 429
+
+        player = RecordingTransport(None, RecordingConfig(mode="replay", directory=str(tmp_path)))
+        response = await player.handle_async_request(post(b"{}"))
+
+        assert response.status_code == MISS_STATUS
+        assert response.json()["error"]["code"] == "replay_miss"
+        assert player.metrics()["misses"] == 1 and recorder.metrics()["recorded"] == 0
+
+    @pytest.mark.asyncio
+    async def test_replay_latency(self, tmp_path):
+        """Teste de latência zero por padrão e da latência gravada quando pedida"""
+        recorder = RecordingTransport(httpx.MockTransport(Provider(delay=0.05)), RecordingConfig(
+            mode="record", directory=str(tmp_path)))
+        await recorder.handle_async_request(post(b"{}"))
+
+        loop = asyncio.get_running_loop()
+        for replay_latency, low, high in ((False, 0.0, 0.03), (True, 0.05, 1.0)):
+            player = RecordingTransport(None, RecordingConfig(
+                mode="replay", directory=str(tmp_path), replay_latency=replay_latency))
+            start = loop.time()
+            await player.handle_async_request(post(b"{}"))
+            assert low <= loop.time() - start < high
+            assert player.metrics()["model_seconds"] >= 0.05
+
+
+class TestRecordedPipelines:
+    """Testes de agentes e benchmarks reproduzidos sem o provedor"""
+
+    @pytest.mark.asyncio
+    async def test_agent_round_trip_offline(self, tmp_path):
+        """Teste de agente gravado contra o servidor e reproduzido sem ele"""
+        with MockChatServer() as server:
+            client = client_for(server.base_url, "record", str(tmp_path))
+            recorded = await LanguageDetectionAgent(client, fast_path_threshold=None).detect_language("x = 1")
+            await client.aclose()
+
+        client = client_for("http://127.0.0.1:9/v1", "replay", str(tmp_path))
+        replayed = await LanguageDetectionAgent(client, fast_path_threshold=None).detect_language("x = 1")
+
+        assert replayed == recorded
+        assert replayed.detected_language == LanguageType.PYTHON
+        metrics = client.get_recording_metrics()
+        assert (metrics["mode"], metrics["replayed"], metrics["misses"]) == ("replay", 1, 0)
+
+    @pytest.mark.asyncio
+    async def test_benchmark_replay_skips_server(self, tmp_path):
+        """Teste de cenário de benchmark reproduzido sem requisições ao servidor"""
+        corpus = make_corpus(4)
+        record = RecordingConfig(mode="record", directory=str(tmp_path))
+        replay = RecordingConfig(mode="replay", directory=str(tmp_path))
+        with MockChatServer(MockServerConfig(latency=LatencyDistribution("constant", (0.005,)))) as server:
+            recorded = await run_scenario("dependency_extraction", corpus, 2, server, recording=record)
+            replayed = await run_scenario("dependency_extraction", corpus, 2, server, recording=replay)
+
+        assert recorded["server_requests"] == 4 and recorded["recording"]["recorded"] == 4
+        assert replayed["server_requests"] == 0 and replayed["errors"] == 0
+        assert replayed["recording"]["replayed"] == 4
+
+    def test_client_layers(self, tmp_path):
+        """Teste de gravação abaixo das camadas e replay sem elas"""
+        assert client_for("http://x", "off", str(tmp_path)).get_recording_metrics() == {}
+
+        replay = client_for("http://x", "replay", str(tmp_path))
+        assert isinstance(replay.get_http_client()._transport, RecordingTransport)
+
+        record = client_for("http://x", "record", str(tmp_path))
+        assert not isinstance(record.get_http_client()._transport, RecordingTransport)
+        assert record.get_recording_metrics()["mode"] == "record"
@@ -0,0 +1,137 @@
+"""
+Testes para o cache de resultados
+"""
+
+import os
+import time
+
+import pytest
+from unittest.mock import patch
+
+from src.autonomous_code_converter.tools.result_cache import ResultCache, make_cache_key
+from src.autonomous_code_converter.models.config import CacheConfig
+from src.autonomous_code_converter.models import LanguageDetection, LanguageType
+
+
+def _detection(confidence: float = 0.9) -> LanguageDetection:
+    return LanguageDetection(detected_language=LanguageType.PYTHON, confidence=confidence)
+
+
+class TestCacheKey:
+    """Testes para a chave do cache"""
+
+    def test_key_is_deterministic(self):
+        """Mesmas entradas geram a mesma chave"""
+        key_a = make_cache_key("x = 1", "python", "a.py", "openai:m", "prompt")
+        key_b = make_cache_key("x = 1", "python", "a.py", "openai:m", "prompt")
+
+        assert key_a == key_b
+
+    def test_key_changes_with_each_input(self):
+        """Qualquer entrada diferente gera outra chave"""
+        base = ("x = 1", "python", "a.py", "openai:m", "prompt", "1/2048")
+        keys = {make_cache_key(*base)}
+        for index in range(len(base)):
+            changed = list(base)
+            changed[index] = changed[index] + "!"
+            keys.add(make_cache_key(*changed))
+
+        assert len(keys) == len(base) + 1
+
+    def test_key_has_no_concatenation_collisions(self):
+        """Fronteiras entre campos fazem parte da chave"""
+        assert make_cache_key("ab", "c", None, "m", "p") != make_cache_key("a", "bc", None, "m", "p")
+
+
+class TestResultCache:
+    """Testes para ResultCache"""
+
+    def test_memory_only_roundtrip(self):
+        """Teste de ida e volta sem disco"""
+        cache = ResultCache(CacheConfig(enabled=True, directory=None))
+
+        assert cache.get("k", LanguageDetection) is None
+        cache.set("k", _detection())
+
+        result = cache.get("k", LanguageDetection)
+        assert result == _detection()
+        assert cache.stats()["memory_hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_disk_tier_survives_new_instance(self, tmp_path):
+        """Entradas em disco são vistas por uma nova instância"""
+        config = CacheConfig(enabled=True, directory=str(tmp_path))
+        ResultCache(config).set("k", _detection(0.7))
+
+        cache = ResultCache(config)
+        result = cache.get("k", LanguageDetection)
+
+        assert result.confidence == 0.7
+        assert cache.stats()["disk_hits"] == 1
+        # Segunda leitura vem da memória
+        cache.get("k", LanguageDetection)
+        assert cache.stats()["memory_hits"] == 1
+
+    def test_lru_eviction(self):
+        """Entrada menos usada é removida da memória"""
+        cache = ResultCache(CacheConfig(enabled=True, directory=None, memory_max_entries=2))
+        cache.set("a", _detection())
+        cache.set("b", _detection())
+        cache.get("a", LanguageDetection)
+        cache.set("c", _detection())
+
+        assert cache.get("b", LanguageDetection) is None
+        assert cache.get("a", LanguageDetection) is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_expired_entries_are_misses(self, tmp_path):
+        """Entradas mais velhas que max_age não são retornadas"""
+        config = CacheConfig(enabled=True, directory=str(tmp_path), max_age_seconds=60)
+        cache = ResultCache(config)
+        cache.set("k", _detection())
+
+        future = time.time() + 120
+        with patch("src.autonomous_code_converter.tools.result_cache.time.time", return_value=future):
+            assert cache.get("k", LanguageDetection) is None
+
+        # A entrada expirada também é removida do disco
+        assert not cache._path_for("k").exists()
+
+    def test_disk_size_limit_evicts_oldest(self, tmp_path):
+        """Limite de bytes em disco remove as entradas mais antigas"""
+        config = CacheConfig(enabled=True, directory=str(tmp_path), disk_max_bytes=400)
+        cache = ResultCache(config)
+        base = time.time() - 100
+        for index in range(10):
+            cache.set(f"{index:02d}key", _detection())
+            path = cache._path_for(f"{index:02d}key")
+            os.utime(path, (base + index, base + index))
+
+        total = sum(p.stat().st_size for p in tmp_path.glob("*/*.json"))
+        assert total <= 400
+        assert cache._path_for("09key").exists()
+        assert not cache._path_for("00key").exists()
+
+    def test_overwrite_does_not_grow_disk_bytes(self, tmp_path):
+        """Regravar a mesma chave não soma o arquivo substituído"""
+        cache = ResultCache(CacheConfig(enabled=True, directory=str(tmp_path)))
+        for _ in range(2):
+            cache.set("00key", _detection())
+        cache.set("01key", _detection())
+        for _ in range(5):
+            cache.set("01key", _detection(0.5))
+
+        assert cache._disk_bytes == cache._scan_disk_bytes()
+
+    def test_clear(self, tmp_path):
+        """Teste de limpeza do cache"""
+        cache = ResultCache(CacheConfig(enabled=True, directory=str(tmp_path)))
+        cache.set("k", _detection())
+        cache.clear()
+
+        assert cache.get("k", LanguageDetection) is None
+        assert list(tmp_path.glob("*/*.json")) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
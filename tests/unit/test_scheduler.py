@@ -0,0 +1,210 @@
+"""
+Testes para o escalonador de sessões
+"""
+
+import asyncio
+import io
+import json
+
+import pytest
+
+from src.autonomous_code_converter.graphs import Priority, SessionScheduler
+from src.autonomous_code_converter.graphs.base_graph import create_base_graph
+from src.autonomous_code_converter.graphs.scheduler import llm_capacity, run_scheduled_pipeline
+from src.autonomous_code_converter.models import LanguageType, SourceCode
+
+
+def source(name: str) -> SourceCode:
+    return SourceCode(content="x = 1\n", language=LanguageType.PYTHON, filename=name)
+
+
+class GatedGraph:
+    """Grafo falso cujas sessões só terminam quando o teste libera"""
+
+    def __init__(self):
+        self.checkpointer = None
+        self.started = []
+        self.gate = asyncio.Event()
+
+    async def ainvoke(self, state, config=None):
+        self.started.append(state.system_state.original_source.filename)
+        await self.gate.wait()
+        state.update_phase("validated")
+        return state.model_dump()
+
+
+class TestSessionScheduler:
+    """Testes de ordem, admissão, prazos e contrapressão"""
+
+    @pytest.mark.asyncio
+    async def test_interactive_is_not_stuck_behind_batch(self):
+        """Teste de sessão interativa iniciada na vaga reservada antes do lote"""
+        graph = GatedGraph()
+        scheduler = SessionScheduler(graph, max_sessions=3, reserved=1)
+        batch = [scheduler.submit_nowait(source(f"lote{index}.py"), Priority.BATCH) for index in range(50)]
+        await asyncio.sleep(0)
+
+        interactive = scheduler.submit_nowait(source("agora.py"), Priority.INTERACTIVE)
+        await asyncio.sleep(0)
+
+        assert graph.started == ["lote0.py", "lote1.py", "agora.py"]
+        assert scheduler.stats()["queued"]["batch"] == 48
+        graph.gate.set()
+        assert (await interactive)["phase"] == "validated"
+        await scheduler.join()
+        assert all(handle.status == "completed" for handle in batch)
+        assert scheduler.stats()["completed"] == 51
+
+    @pytest.mark.asyncio
+    async def test_priority_then_deadline_order(self):
+        """Teste da ordem de saída: classe, menor prazo, chegada"""
+        graph = GatedGraph()
+        scheduler = SessionScheduler(graph, max_sessions=1, reserved=0)
+        scheduler.submit_nowait(source("ocupa.py"))
+        scheduler.submit_nowait(source("lote.py"), Priority.BATCH)
+        scheduler.submit_nowait(source("normal.py"))
+        scheduler.submit_nowait(source("prazo.py"), timeout=60)
+        scheduler.submit_nowait(source("interativo.py"), Priority.INTERACTIVE)
+
+        graph.gate.set()
+        await scheduler.join()
+
+        assert graph.started == ["ocupa.py", "interativo.py", "prazo.py", "normal.py", "lote.py"]
+
+    @pytest.mark.asyncio
+    async def test_admission_follows_llm_capacity(self):
+        """Teste de vagas limitadas pela capacidade atual do LLM"""
+        graph = GatedGraph()
+        capacity = {"value": 2}
+        scheduler = SessionScheduler(graph, max_sessions=8, reserved=0, capacity=lambda: capacity["value"])
+        for index in range(6):
+            scheduler.submit_nowait(source(f"{index}.py"))
+        await asyncio.sleep(0)
+        assert len(graph.started) == 2
+
+        capacity["value"] = 4
+        scheduler.submit_nowait(source("6.py"))
+        await asyncio.sleep(0)
+        assert len(graph.started) == 4
+
+        graph.gate.set()
+        await scheduler.join()
+
+    @pytest.mark.asyncio
+    async def test_capacity_at_reserved_leaves_batch_without_slots(self):
+        """Teste de capacidade igual a ``reserved``: o lote só roda sem demanda interativa"""
+        graph = GatedGraph()
+        scheduler = SessionScheduler(graph, max_sessions=8, reserved=1, capacity=lambda: 1)
+        interactive = scheduler.submit_nowait(source("agora.py"), Priority.INTERACTIVE)
+        batch = [scheduler.submit_nowait(source(f"lote{index}.py"), Priority.BATCH) for index in range(3)]
+        await asyncio.sleep(0)
+
+        assert graph.started == ["agora.py"]
+
+        graph.gate.set()
+        await interactive
+        await asyncio.sleep(0)
+        # Sem demanda interativa o lote volta a ter uma vaga
+        assert graph.started[:2] == ["agora.py", "lote0.py"]
+        await scheduler.join()
+        assert all(handle.status == "completed" for handle in batch)
+
+    def test_llm_capacity_from_client(self):
+        """Teste da capacidade lida do limite AIMD do cliente"""
+        class Client:
+            def __init__(self, metrics):
+                self.metrics = metrics
+
+            def get_rate_limit_metrics(self):
+                return self.metrics
+
+        assert llm_capacity(Client({"concurrency_limit": 9}))() == 4
+        assert llm_capacity(Client({}))() is None
+
+    @pytest.mark.asyncio
+    async def test_deadlines_in_queue_and_running(self):
+        """Teste de prazo vencido na fila (sem rodar) e em execução"""
+        graph = GatedGraph()
+        scheduler = SessionScheduler(graph, max_sessions=1, reserved=0)
+        running = scheduler.submit_nowait(source("lento.py"), timeout=0.05)
+        queued = scheduler.submit_nowait(source("fila.py"), timeout=0.01)
+
+        queued_summary, running_summary = await queued, await running
+
+        assert queued_summary["phase"] == running_summary["phase"] == "expired"
+        assert "DeadlineExceeded" in queued_summary["errors"][0]
+        assert graph.started == ["lento.py"]
+        assert scheduler.stats()["expired"] == 2
+
+    @pytest.mark.asyncio
+    async def test_other_timeout_is_not_expired(self):
+        """Teste de TimeoutError que não vem do prazo da sessão: falha, não ``expired``"""
+
+        class Checkpointer:
+            async def adelete_thread(self, thread_id):
+                raise TimeoutError("banco ocupado")
+
+        graph = GatedGraph()
+        graph.checkpointer = Checkpointer()
+        graph.gate.set()
+        scheduler = SessionScheduler(graph, max_sessions=1, reserved=0)
+
+        with pytest.raises(TimeoutError, match="banco ocupado"):
+            await scheduler.run(source("a.py"), timeout=60)
+
+        assert scheduler.stats()["failed"] == 1
+        assert scheduler.stats()["expired"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancellation(self):
+        """Teste de cancelamento na fila e em execução"""
+        graph = GatedGraph()
+        scheduler = SessionScheduler(graph, max_sessions=1, reserved=0)
+        running = scheduler.submit_nowait(source("a.py"))
+        queued = scheduler.submit_nowait(source("b.py"))
+        await asyncio.sleep(0)
+
+        assert queued.cancel() and running.cancel()
+        for handle in (queued, running):
+            with pytest.raises(asyncio.CancelledError):
+                await handle
+        await scheduler.join()
+
+        assert graph.started == ["a.py"]
+        assert scheduler.stats()["cancelled"] == 2
+        assert not running.cancel()
+
+    @pytest.mark.asyncio
+    async def test_backpressure_per_priority(self):
+        """Teste de produtor bloqueado com a fila da classe cheia"""
+        graph = GatedGraph()
+        scheduler = SessionScheduler(graph, max_sessions=1, reserved=0, max_queued=2)
+        scheduler.submit_nowait(source("0.py"), Priority.BATCH)
+        await asyncio.sleep(0)
+        scheduler.submit_nowait(source("1.py"), Priority.BATCH)
+        scheduler.submit_nowait(source("2.py"), Priority.BATCH)
+
+        with pytest.raises(asyncio.QueueFull):
+            scheduler.submit_nowait(source("3.py"), Priority.BATCH)
+        producer = asyncio.create_task(scheduler.submit(source("3.py"), Priority.BATCH))
+        await asyncio.sleep(0.01)
+        assert not producer.done()
+        scheduler.submit_nowait(source("outra.py"), Priority.INTERACTIVE)
+
+        graph.gate.set()
+        await producer
+        await scheduler.join()
+        assert scheduler.stats()["completed"] == 5
+
+    @pytest.mark.asyncio
+    async def test_scheduled_pipeline_with_real_graph(self):
+        """Teste do pipeline em lote compartilhando o escalonador com o grafo real"""
+        output = io.StringIO()
+        async with SessionScheduler(create_base_graph(), max_sessions=2) as scheduler:
+            interactive = asyncio.create_task(scheduler.run(source("agora.py"), Priority.INTERACTIVE))
+            stats = await run_scheduled_pipeline((source(f"{index}.py") for index in range(5)), output, scheduler)
+
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert stats == {"processed": 5, "failed": 0}
+        assert {line["phase"] for line in lines} == {"validated"}
+        assert (await interactive)["phase"] == "validated"
@@ -0,0 +1,157 @@
+"""
+Testes unitários para a coalescência de chamadas idênticas em andamento
+"""
+
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+
+from src.autonomous_code_converter.agents.dependency_extraction_agent import DependencyExtractionAgent
+from src.autonomous_code_converter.agents.language_detection_agent import LanguageDetectionAgent
+from src.autonomous_code_converter.agents.single_flight import SingleFlight
+from src.autonomous_code_converter.models.base_models import (
+    Dependencies, LanguageDetection, LanguageType, SourceCode
+)
+from src.autonomous_code_converter.tools.metrics import COALESCED_CALLS
+from src.autonomous_code_converter.tools.openrouter_client import OpenRouterClient
+
+
+class GatedCall:
+    """Fake LLM call that finishes only when the test opens the gate"""
+
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+        self.gate = asyncio.Event()
+
+    async def __call__(self, *args, **kwargs):
+        self.calls += 1
+        try:
+            await self.gate.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def mock_client():
+    client = Mock(spec=OpenRouterClient)
+    client.get_model_name.return_value = "test-model"
+    return client
+
+
+class TestSingleFlight:
+    """Test suite for SingleFlight"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_call(self):
+        """Test that identical keys run once and distinct keys do not coalesce"""
+        group = SingleFlight("test")
+        call = GatedCall(result="ok")
+        before = COALESCED_CALLS.value(agent="test")
+
+        waiters = [asyncio.create_task(group.do("a", call)) for _ in range(5)]
+        other = asyncio.create_task(group.do("b", call))
+        await asyncio.sleep(0)
+        call.gate.set()
+
+        assert await asyncio.gather(*waiters, other) == ["ok"] * 6
+        assert call.calls == 2
+        assert (group.calls, group.saved) == (2, 4)
+        assert COALESCED_CALLS.value(agent="test") - before == 4
+        assert group.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_failure_reaches_every_waiter(self):
+        """Test that the shared call's exception is raised to all waiters"""
+        group = SingleFlight("test")
+        call = GatedCall(error=RuntimeError("boom"))
+        waiters = [asyncio.create_task(group.do("a", call)) for _ in range(3)]
+        await asyncio.sleep(0)
+        call.gate.set()
+
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert call.calls == 1
+        # The key is forgotten, so the next caller retries
+        call.error, call.result = None, "ok"
+        assert await group.do("a", call) == "ok"
+
+    @pytest.mark.asyncio
+    async def test_cancelling_one_waiter_keeps_the_call(self):
+        """Test that a cancelled waiter does not cancel the call for the others"""
+        group = SingleFlight("test")
+        call = GatedCall(result="ok")
+        first = asyncio.create_task(group.do("a", call))
+        second = asyncio.create_task(group.do("a", call))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        call.gate.set()
+
+        assert await second == "ok"
+        assert first.cancelled()
+        assert call.cancelled == 0
+
+    @pytest.mark.asyncio
+    async def test_call_is_cancelled_when_nobody_waits(self):
+        """Test that the call stops once every waiter is gone"""
+        group = SingleFlight("test")
+        call = GatedCall(result="ok")
+        waiters = [asyncio.create_task(group.do("a", call)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert call.cancelled == 1
+        assert group.in_flight() == 0
+        call.gate.set()
+        assert await group.do("a", call) == "ok"
+
+
+class TestAgentCoalescing:
+    """Test suite for coalescing inside the analysis agents"""
+
+    @pytest.mark.asyncio
+    async def test_identical_sources_share_one_detection(self):
+        """Test that concurrent detections of the same source send one request"""
+        agent = LanguageDetectionAgent(mock_client(), fast_path_threshold=None)
+        detection = LanguageDetection(detected_language=LanguageType.PYTHON, confidence=0.9)
+        run = GatedCall(result=Mock(output=detection))
+        agent._get_agent = Mock(return_value=Mock(run=run))
+
+        tasks = [asyncio.create_task(agent.detect_language("x = 1")) for _ in range(4)]
+        await asyncio.sleep(0)
+        run.gate.set()
+
+        assert await asyncio.gather(*tasks) == [detection] * 4
+        assert run.calls == 1
+        assert agent.get_stats()["llm_calls"] == 1
+        assert agent.get_stats()["coalesced_calls"] == 3
+
+    @pytest.mark.asyncio
+    async def test_identical_files_share_one_extraction(self):
+        """Test that concurrent enrichments of the same file send one request"""
+        agent = DependencyExtractionAgent(mock_client(), llm_enrichment=True)
+        run = GatedCall(result=Mock(output=Dependencies(external_libraries=["numpy"])))
+        agent._get_agent = Mock(return_value=Mock(run=run))
+        source = SourceCode(content="import numpy\n", language=LanguageType.PYTHON, filename="vendored.py")
+
+        tasks = [asyncio.create_task(agent.extract_dependencies(source)) for _ in range(3)]
+        await asyncio.sleep(0)
+        run.gate.set()
+        results = await asyncio.gather(*tasks)
+
+        assert all(result.external_libraries == ["numpy"] for result in results)
+        assert run.calls == 1
+        assert agent.get_stats()["coalesced_calls"] == 2
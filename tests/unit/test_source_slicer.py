@@ -0,0 +1,80 @@
+"""
+Testes para o recorte de regiões de import
+"""
+
+import pytest
+
+from src.autonomous_code_converter.models import LanguageType, SourceCode
+from src.autonomous_code_converter.tools.source_slicer import (
+    chunk_by_tokens, import_regions, prepare_for_extraction, slice_imports
+)
+from src.autonomous_code_converter.tools.tokens import estimate_tokens
+
+
+class TestSourceSlicer:
+    """Testes do recorte e da divisão em blocos"""
+
+    def test_python_multiline_import(self):
+        """Teste de import entre parênteses e import dinâmico"""
+        content = (
+            "import os\n"
+            "from typing import (\n"
+            "    Any,\n"
+            "    Dict,\n"
+            ")\n"
+            "\n"
+            "def load(name):\n"
+            "    return importlib.import_module('plugins.' + name)\n"
+        )
+
+        assert import_regions(content, LanguageType.PYTHON) == [(0, 5), (7, 8)]
+        assert slice_imports(content, LanguageType.PYTHON).splitlines() == [
+            "import os", "from typing import (", "    Any,", "    Dict,", ")",
+            "# ...", "    return importlib.import_module('plugins.' + name)",
+        ]
+
+    def test_javascript_regions(self):
+        """Teste de import com chaves, require e export-from"""
+        content = (
+            "import {\n"
+            "  a,\n"
+            "  b,\n"
+            "} from './mod';\n"
+            "const x = 1;\n"
+            "const fs = require('fs');\n"
+            "export * from './other';\n"
+            "function f() { return import('./lazy'); }\n"
+        )
+
+        sliced = slice_imports(content, LanguageType.TYPESCRIPT)
+
+        assert "} from './mod';" in sliced
+        assert "const x = 1;" not in sliced
+        assert "// ..." in sliced
+        assert "require('fs')" in sliced and "import('./lazy')" in sliced
+
+    def test_chunk_by_tokens(self):
+        """Teste de blocos dentro do orçamento, inclusive linhas longas"""
+        text = "\n".join(["import a"] * 10 + ["x" * 100])
+
+        chunks = chunk_by_tokens(text, max_tokens=5)
+
+        assert all(estimate_tokens(chunk) <= 5 for chunk in chunks)
+        assert "".join(chunk.replace("\n", "") for chunk in chunks) == text.replace("\n", "")
+        with pytest.raises(ValueError):
+            chunk_by_tokens(text, max_tokens=0)
+
+    def test_prepare_for_extraction(self):
+        """Teste de metadados e redução de tokens"""
+        body = "\n".join(f"value_{i} = {i}" for i in range(2000))
+        source = SourceCode(content=f"import os\n{body}\n", language=LanguageType.PYTHON,
+                            filename="big.py", metadata={"path": "/tmp/big.py"})
+
+        chunks = prepare_for_extraction(source)
+
+        assert len(chunks) == 1
+        assert chunks[0].content == "import os"
+        assert chunks[0].filename == "big.py"
+        assert chunks[0].metadata["path"] == "/tmp/big.py"
+        assert chunks[0].metadata["original_tokens"] >= 10 * chunks[0].metadata["chunk_tokens"]
+        assert prepare_for_extraction(SourceCode(content="x = 1\n", language=LanguageType.PYTHON)) == []
@@ -0,0 +1,134 @@
+"""
+Testes para o checkpointer SQLite
+"""
+
+import asyncio
+
+import pytest
+
+from src.autonomous_code_converter.graphs import (
+    BaseGraphState, SqliteCheckpointer, create_base_graph, create_checkpointer
+)
+from src.autonomous_code_converter.graphs.base_graph import create_initial_state
+from src.autonomous_code_converter.models import LanguageType
+from src.autonomous_code_converter.models.config import CheckpointerConfig
+
+SOURCE = "import os\n\ndef main():\n    return os.getcwd()\n" * 50
+
+
+def _config(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+class TestSqliteCheckpointer:
+    """Testes do checkpointer persistido em SQLite"""
+
+    def test_graph_execution_and_restart(self, tmp_path):
+        """Teste de execução e leitura do estado após reabrir o banco"""
+        path = str(tmp_path / "checkpoints.sqlite")
+        with SqliteCheckpointer(path) as checkpointer:
+            graph = create_base_graph(checkpointer=checkpointer)
+            state = create_initial_state(SOURCE, LanguageType.PYTHON)
+            result = BaseGraphState(**graph.invoke(state, config=_config("sessao")))
+
+        with SqliteCheckpointer(path) as reopened:
+            graph = create_base_graph(checkpointer=reopened)
+            restored = BaseGraphState(**graph.get_state(_config("sessao")).values)
+
+        assert restored.system_state.current_phase == "validated"
+        assert restored.system_state.original_source.content == SOURCE
+        assert restored.messages == result.messages
+        assert restored.system_state.analysis_result is not None
+
+    def test_only_changed_channels_are_written(self):
+        """Teste de gravação incremental: cada canal é gravado quando muda"""
+        checkpointer = SqliteCheckpointer()
+        graph = create_base_graph(checkpointer=checkpointer)
+        graph.invoke(create_initial_state(SOURCE, LanguageType.PYTHON), config=_config("delta"))
+
+        checkpoints = checkpointer.conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+        writes_per_channel = dict(checkpointer.conn.execute(
+            "SELECT channel, COUNT(*) FROM blobs GROUP BY channel"
+        ).fetchall())
+
+        # system_state muda em init, merge e validação; não em cada passo
+        assert checkpoints > writes_per_channel["system_state"]
+        assert writes_per_channel["events"] <= checkpoints
+
+    def test_source_is_written_once_per_session(self):
+        """Teste do código fonte gravado uma vez, fora dos blobs e das escritas de cada passo"""
+        source = SOURCE * 20
+        checkpointer = SqliteCheckpointer(compress_threshold=None)
+        graph = create_base_graph(checkpointer=checkpointer)
+        graph.invoke(create_initial_state(source, LanguageType.PYTHON), config=_config("fonte"))
+
+        sizes = checkpointer.conn.execute(
+            "SELECT length(data) FROM blobs UNION ALL SELECT length(data) FROM writes"
+        ).fetchall()
+        stored = checkpointer.conn.execute("SELECT length(data) FROM sources").fetchall()
+
+        assert max(size or 0 for size, in sizes) < len(source) // 10
+        assert stored == [(len(source),)]
+        values = graph.get_state(_config("fonte")).values
+        assert values["system_state"].original_source.content == source
+        assert values["system_state"].analysis_result.source_code.content == source
+        assert values["system_state"].original_source.content_ref is None
+
+        checkpointer.delete_thread("fonte")
+        assert checkpointer.conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0] == 0
+
+    def test_large_blobs_are_compressed(self):
+        """Teste de compressão dos blobs grandes"""
+        checkpointer = SqliteCheckpointer(compress_threshold=256)
+        graph = create_base_graph(checkpointer=checkpointer)
+        graph.invoke(create_initial_state(SOURCE, LanguageType.PYTHON), config=_config("zlib"))
+
+        compressed = checkpointer.conn.execute(
+            "SELECT COUNT(*) FROM blobs WHERE compressed = 1"
+        ).fetchone()[0]
+        assert compressed > 0
+
+    def test_list_and_delete_thread(self):
+        """Teste de listagem e remoção de uma thread"""
+        checkpointer = SqliteCheckpointer()
+        graph = create_base_graph(checkpointer=checkpointer)
+        graph.invoke(create_initial_state(), config=_config("a"))
+        graph.invoke(create_initial_state(), config=_config("b"))
+
+        history = list(checkpointer.list(_config("a")))
+        assert len(history) > 1
+        assert history[0].checkpoint["id"] > history[-1].checkpoint["id"]
+        assert len(list(checkpointer.list(_config("a"), limit=2))) == 2
+
+        checkpointer.delete_thread("a")
+
+        assert checkpointer.get_tuple(_config("a")) is None
+        assert checkpointer.get_tuple(_config("b")) is not None
+
+    @pytest.mark.asyncio
+    async def test_concurrent_async_sessions(self, tmp_path):
+        """Teste de várias sessões assíncronas no mesmo banco"""
+        checkpointer = SqliteCheckpointer(str(tmp_path / "wal.sqlite"))
+        graph = create_base_graph(checkpointer=checkpointer)
+
+        results = await asyncio.gather(*(
+            graph.ainvoke(create_initial_state(SOURCE, LanguageType.PYTHON), config=_config(f"s{i}"))
+            for i in range(5)
+        ))
+
+        assert all(BaseGraphState(**result).system_state.current_phase == "validated" for result in results)
+        journal_mode = checkpointer.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert journal_mode == "wal"
+
+        await checkpointer.adelete_thread("s0")
+        assert await checkpointer.aget_tuple(_config("s0")) is None
+        checkpointer.close()
+
+    def test_create_checkpointer_from_config(self, tmp_path):
+        """Teste da seleção do backend pela configuração"""
+        sqlite = create_checkpointer(CheckpointerConfig(backend="sqlite", path=str(tmp_path / "c.sqlite")))
+        memory = create_checkpointer(CheckpointerConfig())
+
+        assert isinstance(sqlite, SqliteCheckpointer)
+        assert not isinstance(memory, SqliteCheckpointer)
+        sqlite.close()
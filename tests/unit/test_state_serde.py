@@ -0,0 +1,90 @@
+"""
+Testes para a serialização do estado nos checkpoints
+"""
+
+from pathlib import Path
+
+import pytest
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from benchmarks.state_overhead import build_state
+from src.autonomous_code_converter.graphs import SqliteCheckpointer, create_base_graph
+from src.autonomous_code_converter.graphs.base_graph import create_initial_state
+from src.autonomous_code_converter.graphs.state_serde import MODEL_TYPE_PREFIX, StateSerializer
+from src.autonomous_code_converter.models import CodeAnalysisResult, LanguageType, SystemState
+from src.autonomous_code_converter.models.base_models import SourceCode, type_adapter
+from src.autonomous_code_converter.models.event_log import EventLog
+
+
+class TestStateSerializer:
+    """Testes do caminho rápido para os modelos do pacote"""
+
+    def test_round_trip_returns_typed_tree(self):
+        """Teste de ida e volta com submodelos tipados (não dicts)"""
+        serde = StateSerializer()
+        system_state = build_state(50).system_state
+
+        type_, payload = serde.dumps_typed(system_state)
+        restored = serde.loads_typed((type_, payload))
+
+        assert type_.startswith(MODEL_TYPE_PREFIX)
+        assert restored == system_state
+        assert isinstance(restored.analysis_result, CodeAnalysisResult)
+        assert len(payload) < len(JsonPlusSerializer().dumps_typed(system_state)[1])
+
+    def test_event_log_round_trip(self):
+        """Teste do EventLog, que guarda as entradas num deque"""
+        serde = StateSerializer()
+        events = build_state(20).events
+
+        restored = serde.loads_typed(serde.dumps_typed(events))
+
+        assert isinstance(restored, EventLog)
+        assert restored.messages() == events.messages()
+
+    def test_load_skips_validation(self, monkeypatch):
+        """Teste de carga confiável: nenhum validador roda e os tipos são restaurados"""
+        serde = StateSerializer()
+        system_state = build_state(10).system_state
+        payload = serde.dumps_typed(system_state)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("payload do checkpoint revalidado")
+
+        monkeypatch.setattr(SystemState, "model_validate", classmethod(fail))
+        restored = serde.loads_typed(payload)
+
+        assert restored == system_state
+        assert isinstance(restored.analysis_result.source_code, SourceCode)
+        assert isinstance(restored.analysis_result.source_code.language, LanguageType)
+
+    def test_other_values_use_default_serializer(self):
+        """Teste de fallback para valores de fora do pacote ou não empacotáveis"""
+        serde = StateSerializer()
+        state = create_initial_state("x = 1", LanguageType.PYTHON, metadata={"path": Path("a.py")})
+
+        assert serde.dumps_typed({"a": 1})[0] == "msgpack"
+        type_, payload = serde.dumps_typed(state.system_state)
+        assert not type_.startswith(MODEL_TYPE_PREFIX)
+        assert serde.loads_typed((type_, payload)).session_id == state.system_state.session_id
+
+    def test_rejects_classes_outside_package(self):
+        """Teste de tipo gravado que aponta para fora do pacote"""
+        with pytest.raises(ValueError):
+            StateSerializer().loads_typed(("model:os:path", b"\x80"))
+
+    def test_checkpointed_graph_state_is_typed(self):
+        """Teste de estado lido do SQLite já com modelos tipados"""
+        config = {"configurable": {"thread_id": "tipado"}}
+        with SqliteCheckpointer() as checkpointer:
+            graph = create_base_graph(checkpointer=checkpointer)
+            graph.invoke(create_initial_state("import os\n", LanguageType.PYTHON), config=config)
+            values = graph.get_state(config).values
+
+        assert isinstance(values["system_state"], SystemState)
+        assert isinstance(values["system_state"].analysis_result, CodeAnalysisResult)
+
+    def test_type_adapter_is_cached(self):
+        """Teste do TypeAdapter reaproveitado por tipo"""
+        assert type_adapter(CodeAnalysisResult) is type_adapter(CodeAnalysisResult)
+